@@ -111,6 +111,39 @@ except Exception as e:
     except Exception:
         print(f"[ComfyUI-PromptManager] Warning: Failed to start image monitoring: {e}")
 
+
+def _log_init_error(message):
+    """Log a startup failure to the internal logging system, if available."""
+    try:
+        from .utils.logging_config import get_logger
+
+        get_logger("prompt_manager.init").error(message)
+    except Exception:
+        pass
+
+
+def _start_background(name, factory):
+    """Start the background worker returned by ``factory``; failures are logged."""
+    try:
+        factory().start()
+    except Exception as e:
+        _log_init_error(f"Failed to start {name}: {e}")
+
+
+# Scheduled database backups (AUTO_BACKUP_INTERVAL, 0 disables), query planner
+# statistics (OPTIMIZE_INTERVAL, 0 disables) and similarity vectors of saved
+# prompts (ENABLE_SIMILARITY_SEARCH)
+try:
+    from .utils.backup_scheduler import get_backup_scheduler
+    from .utils.embedding_worker import get_embedding_worker
+    from .utils.optimize_scheduler import get_optimize_scheduler
+except Exception as e:
+    _log_init_error(f"Failed to load background workers: {e}")
+else:
+    _start_background("backup scheduler", lambda: get_backup_scheduler(_global_db))
+    _start_background("optimize scheduler", lambda: get_optimize_scheduler(_global_db))
+    _start_background("embedding worker", lambda: get_embedding_worker(_global_db))
+
 __all__ = ["NODE_CLASS_MAPPINGS", "NODE_DISPLAY_NAME_MAPPINGS", "WEB_DIRECTORY"]
 
 # Print startup message with loaded tools
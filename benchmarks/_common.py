@@ -0,0 +1,116 @@
+"""
+Shared helpers for the standalone benchmark scripts in this directory.
+
+The benchmarks build a throwaway database filled with synthetic prompts so
+that query changes can be measured at realistic sizes. They are not part of
+the unit test suite; run them directly, e.g. ``python benchmarks/bench_tag_list.py``.
+"""
+
+import contextlib
+import os
+import random
+import sys
+import tempfile
+import time
+from typing import Iterator, List
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from database.operations import PromptDatabase  # noqa: E402
+from utils.hashing import generate_prompt_hash  # noqa: E402
+
+WORDS = (
+    "portrait landscape cinematic lighting detailed sharp focus castle forest "
+    "river mountain sunset neon city night rain fog dragon knight wizard robot "
+    "cyberpunk watercolor oil painting sketch anime photorealistic bokeh macro "
+    "golden hour dramatic soft studio volumetric ancient futuristic ruins ocean"
+).split()
+
+
+def make_text(rng: random.Random, index: int) -> str:
+    """Return a unique pseudo-random prompt text."""
+    words = rng.choices(WORDS, k=rng.randint(8, 24))
+    return f"{' '.join(words)}, seed {index}"
+
+
+@contextlib.contextmanager
+def temp_database() -> Iterator[PromptDatabase]:
+    """Yield a PromptDatabase backed by a temporary file, removed afterwards."""
+    handle, path = tempfile.mkstemp(suffix=".db", prefix="pm-bench-")
+    os.close(handle)
+    os.unlink(path)
+    db = PromptDatabase(path)
+    try:
+        yield db
+    finally:
+        db.model.close()
+        for suffix in ("", "-wal", "-shm"):
+            with contextlib.suppress(FileNotFoundError):
+                os.unlink(path + suffix)
+
+
+def populate(
+    db: PromptDatabase,
+    prompts: int,
+    tags: int = 500,
+    max_tags_per_prompt: int = 5,
+    seed: int = 1,
+) -> List[int]:
+    """
+    Fill ``db`` with synthetic prompts and tag links.
+
+    Rows are written with raw ``executemany`` so setup time stays small
+    compared to what is being measured; the schema triggers still run.
+
+    Returns:
+        List of inserted prompt ids
+    """
+    rng = random.Random(seed)
+    categories = [f"category_{i}" for i in range(20)]
+    with db.model.get_connection() as conn:
+        conn.executemany(
+            "INSERT INTO tags (name) VALUES (?)",
+            [(f"tag_{i}",) for i in range(tags)],
+        )
+        tag_ids = [r[0] for r in conn.execute("SELECT id FROM tags").fetchall()]
+        rows = []
+        for i in range(prompts):
+            text = make_text(rng, i)
+            created = f"2024-01-01T00:00:00.{i:06d}+00:00"
+            rows.append(
+                (
+                    text,
+                    rng.choice(categories),
+                    rng.choice([None, 1, 2, 3, 4, 5]),
+                    generate_prompt_hash(text),
+                    created,
+                    created,
+                )
+            )
+        conn.executemany(
+            "INSERT INTO prompts (text, category, rating, hash, created_at, "
+            "updated_at) VALUES (?, ?, ?, ?, ?, ?)",
+            rows,
+        )
+        prompt_ids = [r[0] for r in conn.execute("SELECT id FROM prompts")]
+        links = []
+        for pid in prompt_ids:
+            for tid in rng.sample(tag_ids, rng.randint(0, max_tags_per_prompt)):
+                links.append((pid, tid))
+        conn.executemany(
+            "INSERT INTO prompt_tags (prompt_id, tag_id) VALUES (?, ?)", links
+        )
+        conn.commit()
+    return prompt_ids
+
+
+def timed(fn, repeat: int = 5) -> float:
+    """Return the best wall-clock time of ``repeat`` calls to ``fn``, in seconds."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
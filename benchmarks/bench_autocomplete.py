@@ -0,0 +1,48 @@
+"""
+/prompt_manager/suggest completions from the search index against shipping
+every tag name (``get_all_tags``) to the browser to filter there.
+
+Usage: python benchmarks/bench_autocomplete.py [prompt_count] [tag_count]
+"""
+
+import json
+import sys
+
+from _common import populate, temp_database, timed
+from database.search_index import PromptSearchIndex
+
+PREFIXES = ("t", "tag_", "tag_1", "tag_123", "cy", "neo", "zz")
+
+
+def main(count: int, tags: int) -> None:
+    with temp_database() as db:
+        populate(db, count, tags=tags)
+        index = PromptSearchIndex(db)
+        load = timed(index._load_all, repeat=1)
+        all_tags = timed(db.get_all_tags)
+        payload = len(json.dumps(db.get_all_tags()))
+        print(
+            f"{count} prompts, {tags} tags, index loaded in {load * 1000:.0f}ms; "
+            f"get_all_tags {all_tags * 1000:.1f}ms, {payload / 1024:.0f}KB"
+        )
+
+        print(f"{'prefix':<10}{'cold':>10}{'memo':>10}{'size':>9}")
+        for prefix in PREFIXES:
+
+            def cold():
+                index._completions = {}
+                return index.complete(prefix)
+
+            size = len(json.dumps(cold()))
+            print(
+                f"{prefix:<10}{timed(cold) * 1000:>8.2f}ms"
+                f"{timed(lambda: index.complete(prefix)) * 1000:>8.3f}ms"
+                f"{size:>8}B"
+            )
+
+
+if __name__ == "__main__":
+    main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 100_000,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 100_000,
+    )
@@ -0,0 +1,106 @@
+"""
+Bulk-edit 10k prompts with the per-row loops PromptDatabase used to run
+(old) and with the current chunked, set-based methods (new).
+
+Each case runs on a freshly populated database so both sides start from the
+same state.
+
+Usage: python benchmarks/bench_bulk_edit.py [prompt_count]
+"""
+
+import datetime
+import sys
+import time
+
+from _common import populate, temp_database
+
+
+def old_bulk_set_category(db, prompt_ids, category):
+    count = 0
+    now = datetime.datetime.now(datetime.timezone.utc).isoformat()
+    with db.model.get_connection() as conn:
+        for pid in prompt_ids:
+            cursor = conn.execute(
+                "UPDATE prompts SET category = ?, updated_at = ? WHERE id = ?",
+                (category, now, pid),
+            )
+            if cursor.rowcount > 0:
+                count += 1
+        conn.commit()
+    return count
+
+
+def old_bulk_add_tags(db, prompt_ids, new_tags):
+    count = 0
+    with db.model.get_connection() as conn:
+        for name in new_tags:
+            conn.execute("INSERT OR IGNORE INTO tags (name) VALUES (?)", (name,))
+        tag_map = {
+            row["name"]: row["id"]
+            for row in conn.execute(
+                f"SELECT id, name FROM tags WHERE name IN "
+                f"({','.join('?' * len(new_tags))})",
+                new_tags,
+            )
+        }
+        now = datetime.datetime.now(datetime.timezone.utc).isoformat()
+        for pid in prompt_ids:
+            if not conn.execute(
+                "SELECT id FROM prompts WHERE id = ?", (pid,)
+            ).fetchone():
+                continue
+            added = False
+            for tag_name in new_tags:
+                cursor = conn.execute(
+                    "INSERT OR IGNORE INTO prompt_tags (prompt_id, tag_id) VALUES (?, ?)",
+                    (pid, tag_map[tag_name]),
+                )
+                added = added or cursor.rowcount > 0
+            if added:
+                conn.execute(
+                    "UPDATE prompts SET updated_at = ? WHERE id = ?", (now, pid)
+                )
+                count += 1
+        conn.commit()
+    return count
+
+
+def old_bulk_delete_prompts(db, prompt_ids):
+    count = 0
+    with db.model.get_connection() as conn:
+        for pid in prompt_ids:
+            conn.execute("DELETE FROM generated_images WHERE prompt_id = ?", (pid,))
+            cursor = conn.execute("DELETE FROM prompts WHERE id = ?", (pid,))
+            if cursor.rowcount > 0:
+                count += 1
+        conn.commit()
+    return count
+
+
+CASES = [
+    ("set category", old_bulk_set_category, "bulk_set_category", ("bulk",)),
+    ("add 3 tags", old_bulk_add_tags, "bulk_add_tags", (["b1", "b2", "b3"],)),
+    ("delete", old_bulk_delete_prompts, "bulk_delete_prompts", ()),
+]
+
+
+def run(count, fn):
+    with temp_database() as db:
+        ids = populate(db, count)
+        start = time.perf_counter()
+        result = fn(db, ids)
+        return time.perf_counter() - start, result
+
+
+def main(count: int) -> None:
+    print(f"Bulk-editing {count} prompts")
+    print(f"{'case':<14}{'per-row':>12}{'set-based':>12}{'speedup':>10}")
+    for name, old_fn, method, args in CASES:
+        old, old_result = run(count, lambda db, ids: old_fn(db, ids, *args))
+        new, new_result = run(count, lambda db, ids: getattr(db, method)(ids, *args))
+        assert old_result == new_result, (name, old_result, new_result)
+        print(f"{name:<14}{old * 1000:>10.0f}ms{new * 1000:>10.0f}ms{old / new:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10_000)
@@ -0,0 +1,166 @@
+"""
+Detect and clean up duplicate prompts with the old per-id queries (old) and
+the indexed normalized_text key with set-based merging (new).
+
+A tenth of the prompts get one or two case/whitespace variants, each with an
+image linked. Each cleanup runs on a freshly populated database.
+
+Usage: python benchmarks/bench_duplicates.py [prompt_count]
+"""
+
+import random
+import sys
+import time
+
+from _common import populate, temp_database
+from utils.hashing import generate_prompt_hash
+
+GROUP_SQL = """
+    SELECT GROUP_CONCAT(id) AS ids, GROUP_CONCAT(created_at) AS created_dates
+    FROM prompts GROUP BY LOWER(TRIM(text)) HAVING COUNT(*) > 1
+"""
+
+
+def tags_of(conn, pid):
+    return [
+        r[0]
+        for r in conn.execute(
+            "SELECT t.name FROM tags t JOIN prompt_tags pt ON pt.tag_id = t.id "
+            "WHERE pt.prompt_id = ?",
+            (pid,),
+        )
+    ]
+
+
+def sorted_ids(group):
+    pairs = sorted(
+        zip(group["ids"].split(","), group["created_dates"].split(",")),
+        key=lambda x: x[1],
+    )
+    return [int(pid) for pid, _ in pairs]
+
+
+def old_find_duplicates(db):
+    with db.model.get_read_connection() as conn:
+        result = []
+        for group in conn.execute(GROUP_SQL).fetchall():
+            prompts = []
+            for pid in sorted_ids(group):
+                row = conn.execute(
+                    "SELECT id, text, category, rating, created_at, updated_at "
+                    "FROM prompts WHERE id = ?",
+                    (pid,),
+                ).fetchone()
+                prompt = dict(row)
+                prompt["tags"] = tags_of(conn, pid)
+                prompts.append(prompt)
+            result.append({"text": prompts[0]["text"], "prompts": prompts})
+        return result
+
+
+def old_cleanup_duplicates(db):
+    removed = 0
+    with db.model.get_connection() as conn:
+        for group in conn.execute(GROUP_SQL).fetchall():
+            primary, *dups = sorted_ids(group)
+            row = conn.execute(
+                "SELECT category, rating, notes FROM prompts WHERE id = ?", (primary,)
+            ).fetchone()
+            category, rating = row["category"], row["rating"]
+            notes, tags = row["notes"] or "", tags_of(conn, primary)
+            for dup in dups:
+                d = conn.execute(
+                    "SELECT category, rating, notes FROM prompts WHERE id = ?", (dup,)
+                ).fetchone()
+                category = category or d["category"]
+                tags += [t for t in tags_of(conn, dup) if t not in tags]
+                if d["rating"] and (not rating or d["rating"] > rating):
+                    rating = d["rating"]
+                if d["notes"] and d["notes"].strip():
+                    notes = f"{notes} | {d['notes']}" if notes else d["notes"]
+                conn.execute(
+                    "UPDATE generated_images SET prompt_id = ? WHERE prompt_id = ?",
+                    (primary, dup),
+                )
+            conn.execute(
+                "UPDATE prompts SET category = ?, rating = ?, notes = ? WHERE id = ?",
+                (category, rating, notes, primary),
+            )
+            db._sync_prompt_tags(conn, primary, tags)
+            for dup in dups:
+                conn.execute("DELETE FROM prompts WHERE id = ?", (dup,))
+                removed += 1
+        conn.commit()
+    return removed
+
+
+def add_duplicates(db, ids, seed=2):
+    rng = random.Random(seed)
+    with db.model.get_connection() as conn:
+        originals = conn.execute(
+            "SELECT id, text, created_at FROM prompts WHERE id % 10 = 0"
+        ).fetchall()
+        rows = []
+        for pid, text, created in originals:
+            for n in range(rng.randint(1, 2)):
+                variant = text.upper() if n else f"  {text} "
+                rows.append(
+                    (variant, generate_prompt_hash(f"{pid}:{n}"), created + f"~{n}")
+                )
+        conn.executemany(
+            "INSERT INTO prompts (text, hash, created_at, updated_at) "
+            "VALUES (?, ?, ?, ?)",
+            [(t, h, c, c) for t, h, c in rows],
+        )
+        conn.executemany(
+            "INSERT INTO generated_images (prompt_id, image_path, filename) "
+            "VALUES (?, ?, ?)",
+            [
+                (pid, f"/out/{pid}.png", f"{pid}.png")
+                for (pid,) in conn.execute(
+                    "SELECT id FROM prompts WHERE id > ?", (max(ids),)
+                )
+            ],
+        )
+        conn.commit()
+    return len(rows)
+
+
+def run(count, fn):
+    with temp_database() as db:
+        ids = populate(db, count)
+        add_duplicates(db, ids)
+        start = time.perf_counter()
+        result = fn(db)
+        elapsed = time.perf_counter() - start
+        with db.model.get_read_connection() as conn:
+            state = (
+                conn.execute("SELECT COUNT(*) FROM prompts").fetchone()[0],
+                conn.execute("SELECT SUM(usage_count) FROM tags").fetchone()[0],
+                conn.execute("SELECT COUNT(*) FROM generated_images").fetchone()[0],
+            )
+        return elapsed, result, state
+
+
+def main(count: int) -> None:
+    print(f"{count} prompts, duplicates added for every 10th")
+    print(f"{'case':<10}{'per-id':>12}{'set-based':>12}{'speedup':>10}")
+
+    old, old_groups, _ = run(count, old_find_duplicates)
+    new, new_groups, _ = run(count, lambda db: db.find_duplicates())
+    assert [[p["id"] for p in g["prompts"]] for g in old_groups] == [
+        [p["id"] for p in g["prompts"]] for g in new_groups
+    ]
+    print(f"{'find':<10}{old * 1000:>10.0f}ms{new * 1000:>10.0f}ms{old / new:>9.1f}x")
+
+    old, old_removed, old_state = run(count, old_cleanup_duplicates)
+    new, new_removed, new_state = run(count, lambda db: db.cleanup_duplicates())
+    assert old_removed == new_removed, (old_removed, new_removed)
+    assert old_state == new_state, (old_state, new_state)
+    print(
+        f"{'cleanup':<10}{old * 1000:>10.0f}ms{new * 1000:>10.0f}ms{old / new:>9.1f}x"
+    )
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 50_000)
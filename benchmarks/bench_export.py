@@ -0,0 +1,38 @@
+"""
+Measure streaming export throughput and peak Python memory per format.
+
+Peak memory should stay roughly flat as the library grows, since prompts are
+read and serialized one chunk at a time.
+
+Usage: python benchmarks/bench_export.py [prompt_count ...]
+"""
+
+import sys
+import time
+import tracemalloc
+
+from _common import populate, temp_database
+
+
+def main(counts) -> None:
+    print(f"{'prompts':>8}{'format':>8}{'time':>10}{'output':>10}{'peak mem':>11}")
+    for count in counts:
+        with temp_database() as db:
+            populate(db, count)
+            for export_format in ("json", "jsonl", "csv"):
+                size = 0
+                tracemalloc.start()
+                start = time.perf_counter()
+                for piece in db.export_chunks(export_format):
+                    size += len(piece)
+                elapsed = time.perf_counter() - start
+                peak = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+                print(
+                    f"{count:>8}{export_format:>8}{elapsed:>9.2f}s"
+                    f"{size / 2**20:>8.1f}MB{peak / 2**20:>9.1f}MB"
+                )
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or [10_000, 100_000])
@@ -0,0 +1,97 @@
+"""
+Filter prompts by image folder and list subfolders with the old LIKE scans
+over image_path (old) and the image_dirs suffix index (new).
+
+Images are spread over a year of dated output folders
+(``/output/2026/MM-Mon/2026-MM-DD``) plus a few named folders.
+
+Usage: python benchmarks/bench_folder_filter.py [image_count]
+"""
+
+import os
+import sys
+
+from _common import populate, temp_database, timed
+
+ROOTS = ["/output"]
+MONTHS = "Jan Feb Mar Apr May Jun Jul Aug Sep Oct Nov Dec".split()
+FOLDERS = ["2026/08-Aug", "2026-03-15", "portraits"]
+
+OLD_FOLDER_SQL = """
+    SELECT prompts.* FROM prompts WHERE prompts.id IN (
+      SELECT DISTINCT prompt_id FROM generated_images
+      WHERE image_path LIKE ? ESCAPE '\\'
+      OR image_path LIKE ? ESCAPE '\\'
+      OR image_path LIKE ? ESCAPE '\\')
+    ORDER BY created_at DESC LIMIT 100
+"""
+
+
+def old_search_folder(db, folder):
+    safe = folder.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    with db.model.get_read_connection() as conn:
+        return conn.execute(
+            OLD_FOLDER_SQL, (f"%/{safe}/%", f"%\\\\{safe}\\\\%", f"{safe}/%")
+        ).fetchall()
+
+
+def old_subfolders(db):
+    with db.model.get_read_connection() as conn:
+        paths = conn.execute(
+            "SELECT DISTINCT image_path FROM generated_images "
+            "WHERE image_path IS NOT NULL AND image_path != ''"
+        ).fetchall()
+    folders = set()
+    for (image_path,) in paths:
+        parent = os.path.dirname(image_path)
+        for root in ROOTS:
+            rel = os.path.relpath(parent, root)
+            if not rel.startswith(".."):
+                if rel != ".":
+                    folders.add(rel)
+                break
+        else:
+            folders.add(parent)
+    return sorted(folders)
+
+
+def folder_of(i):
+    if i % 10 == 0:
+        return "/output/portraits"
+    month, day = i % 12, i % 28 + 1
+    return (
+        f"/output/2026/{month + 1:02d}-{MONTHS[month]}/2026-{month + 1:02d}-{day:02d}"
+    )
+
+
+def main(count: int) -> None:
+    with temp_database() as db:
+        prompt_ids = populate(db, count // 4, tags=50)
+        db.bulk_link_images(
+            (prompt_ids[i % len(prompt_ids)], f"{folder_of(i)}/image_{i}.png")
+            for i in range(count)
+        )
+        print(f"{count} images in {len(db.get_prompt_subfolders())} folders")
+        print(f"{'case':<22}{'LIKE':>10}{'index':>10}{'speedup':>10}")
+
+        for folder in FOLDERS:
+            old_ids = [r["id"] for r in old_search_folder(db, folder)]
+            assert old_ids == [r["id"] for r in db.search_prompts(folder=folder)]
+            old = timed(lambda: old_search_folder(db, folder))
+            new = timed(lambda: db.search_prompts(folder=folder))
+            print(
+                f"{'folder=' + folder:<22}{old * 1000:>8.1f}ms"
+                f"{new * 1000:>8.1f}ms{old / new:>9.0f}x"
+            )
+
+        assert old_subfolders(db) == db.get_prompt_subfolders(root_dirs=ROOTS)
+        old = timed(lambda: old_subfolders(db))
+        new = timed(lambda: db.get_prompt_subfolders(root_dirs=ROOTS))
+        print(
+            f"{'subfolders':<22}{old * 1000:>8.1f}ms"
+            f"{new * 1000:>8.1f}ms{old / new:>9.0f}x"
+        )
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200_000)
@@ -0,0 +1,98 @@
+"""
+Store image workflow/prompt JSON inline on every generated_images row (old)
+and as deduplicated, zlib-compressed blobs (new), then compare file size and
+the time to read a gallery page.
+
+Images are linked in batches of 64 sharing one workflow, like a batch run.
+Old rows are written with raw SQL into the legacy inline columns, which the
+database layer still reads.
+
+Usage: python benchmarks/bench_image_blobs.py [image_count]
+"""
+
+import json
+import os
+import random
+import sys
+
+from _common import populate, temp_database, timed
+
+BATCH = 64
+
+
+def make_workflow(rng, seed):
+    nodes = [
+        {
+            "id": i,
+            "type": rng.choice(
+                ["KSampler", "CLIPTextEncode", "VAEDecode", "LoraLoader"]
+            ),
+            "pos": [rng.randint(0, 2000), rng.randint(0, 2000)],
+            "widgets_values": [seed, rng.random(), "euler", "normal", 1.0],
+            "inputs": [
+                {"name": f"in_{j}", "link": rng.randint(0, 500)} for j in range(4)
+            ],
+        }
+        for i in range(40)
+    ]
+    return {"nodes": nodes, "links": [[i, i + 1, 0] for i in range(60)]}
+
+
+def links(prompt_ids, count):
+    rng = random.Random(5)
+    for start in range(0, count, BATCH):
+        workflow = make_workflow(rng, start)
+        prompt = {
+            str(n["id"]): {"inputs": n["widgets_values"]} for n in workflow["nodes"]
+        }
+        metadata = {"workflow": workflow, "prompt": prompt}
+        pid = prompt_ids[(start // BATCH) % len(prompt_ids)]
+        for i in range(start, min(start + BATCH, count)):
+            yield pid, f"/output/batch_{start}/img_{i}.png", metadata
+
+
+def link_inline(db, prompt_ids, count):
+    rows = [
+        (
+            pid,
+            path,
+            os.path.basename(path),
+            json.dumps(m["workflow"]),
+            json.dumps(m["prompt"]),
+        )
+        for pid, path, m in links(prompt_ids, count)
+    ]
+    with db.model.get_connection() as conn:
+        conn.executemany(
+            "INSERT INTO generated_images (prompt_id, image_path, filename, "
+            "workflow_data, prompt_metadata) VALUES (?, ?, ?, ?, ?)",
+            rows,
+        )
+        conn.commit()
+    db._ensure_image_dirs()
+
+
+def measure(count, link):
+    with temp_database() as db:
+        prompt_ids = populate(db, 2_000, tags=50)
+        link(db, prompt_ids, count)
+        with db.model.get_connection() as conn:
+            conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        size = os.path.getsize(db.model.db_path)
+        page = timed(lambda: db.get_images_page(limit=100))
+        return size, page
+
+
+def main(count: int) -> None:
+    old_size, old_page = measure(count, link_inline)
+    new_size, new_page = measure(
+        count, lambda db, ids, n: db.bulk_link_images(links(ids, n))
+    )
+    print(f"{count} images in batches of {BATCH} sharing one workflow")
+    print(f"{'case':<14}{'inline':>12}{'blobs':>12}")
+    print(f"{'file size':<14}{old_size / 2**20:>10.1f}MB{new_size / 2**20:>10.1f}MB")
+    print(f"{'page of 100':<14}{old_page * 1000:>10.1f}ms{new_page * 1000:>10.1f}ms")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20_000)
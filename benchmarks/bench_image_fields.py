@@ -0,0 +1,55 @@
+"""
+Read image lists with every field (old behaviour) and with the summary
+projection a gallery grid uses (``include_metadata=false``).
+
+Every image gets its own workflow, the worst case for blob sharing.
+
+Usage: python benchmarks/bench_image_fields.py [image_count]
+"""
+
+import random
+import sys
+
+from _common import populate, temp_database, timed
+from database.operations import IMAGE_SUMMARY_FIELDS
+
+
+def links(prompt_ids, count):
+    rng = random.Random(6)
+    for i in range(count):
+        workflow = {
+            "nodes": [
+                {"id": n, "widgets_values": [rng.random(), "euler", i]}
+                for n in range(30)
+            ]
+        }
+        metadata = {
+            "workflow": workflow,
+            "prompt": {"3": {"inputs": {"seed": i, "cfg": 7.0}}},
+            "file_info": {"size": 1024, "dimensions": [512, 768], "format": "PNG"},
+        }
+        yield prompt_ids[i % len(prompt_ids)], f"/output/img_{i}.png", metadata
+
+
+def main(count: int) -> None:
+    with temp_database() as db:
+        prompt_ids = populate(db, count // 10, tags=50)
+        db.bulk_link_images(links(prompt_ids, count))
+        print(f"{count} images, one workflow each")
+        print(f"{'case':<16}{'all fields':>12}{'summary':>12}{'speedup':>10}")
+        cases = (
+            ("page of 100", lambda f: db.get_images_page(limit=100, fields=f)),
+            ("all images", lambda f: db.get_all_images(fields=f)),
+            ("prompt images", lambda f: db.get_prompt_images(prompt_ids[0], f)),
+        )
+        for name, read in cases:
+            full = timed(lambda: read(None), repeat=3)
+            summary = timed(lambda: read(IMAGE_SUMMARY_FIELDS), repeat=3)
+            print(
+                f"{name:<16}{full * 1000:>10.1f}ms{summary * 1000:>10.1f}ms"
+                f"{full / summary:>9.1f}x"
+            )
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20_000)
@@ -0,0 +1,60 @@
+"""
+Resolve gallery image paths to prompts with the old exact-or-suffix LIKE
+query (old) and the canonical-path/filename index lookups (new), one image
+at a time and as one batch for a gallery page.
+
+Usage: python benchmarks/bench_image_info.py [image_count]
+"""
+
+import os
+import sys
+
+from _common import populate, temp_database, timed
+
+PAGE = 50
+
+OLD_SQL = """
+    SELECT gi.prompt_id, p.text, p.category, p.rating, p.notes,
+           gi.workflow_data, gi.prompt_metadata, gi.generation_time, p.tag_list
+    FROM generated_images gi
+    JOIN prompts p ON gi.prompt_id = p.id
+    WHERE gi.image_path = ? OR gi.image_path LIKE ?
+"""
+
+
+def old_lookup(db, paths):
+    with db.model.get_read_connection() as conn:
+        for path in paths:
+            conn.execute(OLD_SQL, (path, f"%{os.path.basename(path)}")).fetchone()
+
+
+def main(count: int) -> None:
+    with temp_database() as db:
+        prompt_ids = populate(db, count // 4, tags=50)
+        db.bulk_link_images(
+            (prompt_ids[i % len(prompt_ids)], f"/output/day_{i % 365}/img_{i}.png")
+            for i in range(count)
+        )
+        page = [
+            f"/output/day_{i % 365}/img_{i}.png" for i in range(0, count, count // PAGE)
+        ]
+        moved = [path.replace("/output/", "/mnt/output/") for path in page]
+
+        print(f"{count} images, page of {len(page)}")
+        print(f"{'case':<26}{'old':>10}{'new':>10}{'speedup':>10}")
+        for name, paths in (("exact paths", page), ("moved install", moved)):
+            found = db.get_images_prompt_info(paths)
+            assert all(found[path] for path in paths)
+            old = timed(lambda: old_lookup(db, paths), repeat=3)
+            single = timed(lambda: [db.get_image_prompt_info(p) for p in paths])
+            batch = timed(lambda: db.get_images_prompt_info(paths))
+            for case, new in (("one by one", single), ("batch", batch)):
+                label = f"{name}, {case}"
+                print(
+                    f"{label:<26}{old * 1000:>8.1f}ms"
+                    f"{new * 1000:>8.1f}ms{old / new:>9.0f}x"
+                )
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200_000)
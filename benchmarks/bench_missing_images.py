@@ -0,0 +1,94 @@
+"""
+Remove image rows whose files are gone with the old per-file
+``os.path.exists`` loop (old) and the directory-batched ``os.scandir``
+cleanup (new).
+
+Files are created in a temporary tree of 100 folders; 10% of them are then
+deleted. Local disks answer ``stat`` quickly, so the gap is far larger on
+network mounts where each call is a round trip.
+
+Usage: python benchmarks/bench_missing_images.py [image_count]
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+from _common import populate, temp_database
+
+
+def old_cleanup_missing_images(db):
+    removed = 0
+    with db.model.get_connection() as conn:
+        for image in conn.execute("SELECT id, image_path FROM generated_images"):
+            if not os.path.exists(image["image_path"]):
+                conn.execute(
+                    "DELETE FROM generated_images WHERE id = ?", (image["id"],)
+                )
+                removed += 1
+        conn.commit()
+    return removed
+
+
+def build(db, root, count):
+    prompt_ids = populate(db, 100, tags=10)
+    rows = []
+    for i in range(count):
+        folder = os.path.join(root, f"folder_{i % 100}")
+        os.makedirs(folder, exist_ok=True)
+        path = os.path.join(folder, f"image_{i}.png")
+        open(path, "wb").close()
+        rows.append((prompt_ids[i % 100], path, f"image_{i}.png"))
+    with db.model.get_connection() as conn:
+        conn.executemany(
+            "INSERT INTO generated_images (prompt_id, image_path, filename) "
+            "VALUES (?, ?, ?)",
+            rows,
+        )
+        conn.commit()
+    for _, path, _ in rows[::10]:
+        os.unlink(path)
+
+
+def counted(calls, fn):
+    def wrapper(*args, **kwargs):
+        calls[0] += 1
+        return fn(*args, **kwargs)
+
+    return wrapper
+
+
+def run(count, fn):
+    root = tempfile.mkdtemp(prefix="pm-bench-images-")
+    exists, scandir = os.path.exists, os.scandir
+    calls = [0]
+    try:
+        with temp_database() as db:
+            build(db, root, count)
+            # Count the calls that each cost a round trip on network mounts
+            os.path.exists = counted(calls, exists)
+            os.scandir = counted(calls, scandir)
+            start = time.perf_counter()
+            removed = fn(db)
+            return time.perf_counter() - start, removed, calls[0]
+    finally:
+        os.path.exists, os.scandir = exists, scandir
+        shutil.rmtree(root)
+
+
+def main(count: int) -> None:
+    print(f"{count} images in 100 folders, 10% missing")
+    old, old_removed, old_calls = run(count, old_cleanup_missing_images)
+    new, new_removed, new_calls = run(count, lambda db: db.cleanup_missing_images())
+    par, par_removed, _ = run(count, lambda db: db.cleanup_missing_images(workers=8))
+    assert old_removed == new_removed == par_removed
+    print(f"{'case':<20}{'time':>8}{'fs calls':>10}")
+    print(f"{'per-file exists':<20}{old * 1000:>6.0f}ms{old_calls:>10}")
+    print(f"{'scandir per folder':<20}{new * 1000:>6.0f}ms{new_calls:>10}")
+    print(f"{'  with 8 workers':<20}{par * 1000:>6.0f}ms{new_calls:>10}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
@@ -0,0 +1,79 @@
+"""
+Find near-duplicate prompts with MinHash/LSH candidates and compare against
+an all-pairs scan.
+
+Two percent of the prompts get a variant with one word replaced. The LSH
+scan runs on the whole library; the all-pairs scan is timed on a sample and
+extrapolated, since it grows with the square of the library size.
+
+Usage: python benchmarks/bench_near_duplicates.py [prompt_count]
+"""
+
+import random
+import sys
+import time
+
+from _common import WORDS, populate, temp_database
+from utils.hashing import generate_prompt_hash, jaccard_similarity, prompt_shingles
+
+THRESHOLD = 0.6
+SAMPLE = 3_000
+
+
+def add_variants(db, seed=3):
+    rng = random.Random(seed)
+    with db.model.get_connection() as conn:
+        originals = conn.execute("SELECT id, text FROM prompts WHERE id % 50 = 0")
+        rows = []
+        for pid, text in originals.fetchall():
+            words = text.split(" ")
+            words[rng.randrange(len(words) - 2)] = rng.choice(WORDS)
+            variant = " ".join(words) + " extra"
+            rows.append((variant, generate_prompt_hash(variant)))
+        conn.executemany("INSERT INTO prompts (text, hash) VALUES (?, ?)", rows)
+        conn.commit()
+    return len(rows)
+
+
+def all_pairs(texts):
+    shingles = [prompt_shingles(t) for t in texts]
+    pairs = 0
+    for i, a in enumerate(shingles):
+        for b in shingles[i + 1 :]:
+            pairs += jaccard_similarity(a, b) >= THRESHOLD
+    return pairs
+
+
+def main(count: int) -> None:
+    with temp_database() as db:
+        populate(db, count)
+        planted = add_variants(db)
+        total = count + planted
+
+        start = time.perf_counter()
+        db._backfill_signatures()
+        backfill = time.perf_counter() - start
+
+        start = time.perf_counter()
+        groups = db.find_near_duplicates(THRESHOLD)
+        scan = time.perf_counter() - start
+
+        with db.model.get_read_connection() as conn:
+            texts = [
+                r[0]
+                for r in conn.execute("SELECT text FROM prompts LIMIT ?", (SAMPLE,))
+            ]
+        start = time.perf_counter()
+        all_pairs(texts)
+        sample = time.perf_counter() - start
+        extrapolated = sample * (total / SAMPLE) ** 2
+
+    found = sum(len(g["prompts"]) - 1 for g in groups)
+    print(f"{total} prompts, {planted} one-word variants planted")
+    print(f"signature backfill   {backfill:>8.1f}s  (once; then kept by save_prompt)")
+    print(f"LSH scan             {scan:>8.1f}s  {len(groups)} groups, {found} matches")
+    print(f"all-pairs (extrap.)  {extrapolated:>8.1f}s  from {SAMPLE} prompts")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
@@ -0,0 +1,38 @@
+"""
+Read-heavy page queries with and without the query result cache, and the
+cost of the first read after a write.
+
+Usage: python benchmarks/bench_result_cache.py [prompt_count]
+"""
+
+import sys
+
+from _common import populate, temp_database, timed
+
+QUERIES = (
+    ("categories", lambda db: db.get_all_categories()),
+    ("tags", lambda db: db.get_all_tags()),
+    ("tag counts", lambda db: db.get_tags_with_counts(sort="count_desc")),
+    ("statistics", lambda db: db.get_statistics()),
+    ("recent page 1", lambda db: db.get_recent_prompts(limit=50)),
+)
+
+
+def main(count: int) -> None:
+    with temp_database() as db:
+        populate(db, count, tags=2000)
+        cache = db.result_cache
+        print(f"{count} prompts")
+        print(f"{'query':<16}{'uncached':>12}{'cached':>12}")
+        for name, query in QUERIES:
+            cache.max_entries = 0
+            uncached = timed(lambda: query(db))
+            cache.max_entries = 256
+            query(db)
+            cached = timed(lambda: query(db))
+            print(f"{name:<16}{uncached * 1000:>10.2f}ms{cached * 1000:>10.3f}ms")
+        print(cache.stats())
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
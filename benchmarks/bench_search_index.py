@@ -0,0 +1,54 @@
+"""
+PromptSearchList queries answered by ``search_prompts`` (SQL, the old path)
+and by the in-memory search index, plus the cost of loading the index and of
+applying one saved prompt to it.
+
+Usage: python benchmarks/bench_search_index.py [prompt_count]
+"""
+
+import sys
+
+from _common import populate, temp_database, timed
+from database.search_index import PromptSearchIndex
+
+# Arguments as PromptSearchList passes them
+QUERIES = (
+    ("text", {"text": "castle"}),
+    ("text+tag", {"text": "dragon knight", "tags": ["tag_7"]}),
+    ("partial tags", {"tags": ["tag_1", "tag_2"]}),
+    ("tag+rating", {"tags": ["tag_3"], "rating_min": 4}),
+    ("category", {"category": "category_3"}),
+    ("no filter", {}),
+)
+
+
+def main(count: int) -> None:
+    with temp_database() as db:
+        populate(db, count, tags=500)
+        index = PromptSearchIndex(db)
+        load = timed(lambda: (index._load_all()), repeat=1)
+
+        print(f"{count} prompts, index loaded in {load * 1000:.0f}ms")
+        print(f"{'query':<14}{'SQL':>12}{'index':>12}{'speedup':>10}")
+        for name, query in QUERIES:
+            args = {"tag_partial": True, "limit": 50, **query}
+            expected = [r["id"] for r in db.search_prompts(**args)]
+            assert [r["id"] for r in index.search(**args)] == expected, name
+            sql = timed(lambda: db.search_prompts(**args))
+            memory = timed(lambda: index.search(**args))
+            print(
+                f"{name:<14}{sql * 1000:>10.2f}ms{memory * 1000:>10.3f}ms"
+                f"{sql / memory:>9.0f}x"
+            )
+
+        def save_and_search():
+            db.save_prompt(f"castle at dusk {save_and_search.n}", prompt_hash=None)
+            save_and_search.n += 1
+            index.search(text="castle", limit=50)
+
+        save_and_search.n = 0
+        print(f"save + search  {timed(save_and_search) * 1000:>8.2f}ms")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
@@ -0,0 +1,58 @@
+"""
+"Similar prompts": embedding cost, index load time and query latency of the
+inverted-list index, and how often its bounded scoring finds the same top
+10 as scoring every inverted list.
+
+The synthetic prompts draw on 40 words, so every bucket is common and each
+query hits the scoring budget; real libraries have far more rare words.
+
+Usage: python benchmarks/bench_similarity.py [prompt_count]
+"""
+
+import random
+import sys
+from unittest.mock import patch
+
+from _common import populate, temp_database, timed
+from database import similarity
+from database.similarity import get_vector_index
+
+QUERIES = 50
+
+
+def main(count: int) -> None:
+    with temp_database() as db:
+        ids = populate(db, count)
+        embed = timed(db.embed_prompts, repeat=1)
+        index = get_vector_index(db)
+        load = timed(index.refresh, repeat=1)
+        print(
+            f"{count} prompts embedded in {embed:.1f}s, "
+            f"index loaded in {load:.1f}s ({len(index._postings)} buckets)"
+        )
+
+        sample = random.Random(3).sample(ids, QUERIES)
+        fast = [timed(lambda: db.find_similar_prompts(pid), repeat=3) for pid in sample]
+        with patch.object(similarity, "POSTINGS_BUDGET", float("inf")):
+            full = [
+                timed(lambda: db.find_similar_prompts(pid), repeat=1) for pid in sample
+            ]
+            exact = {pid: db.find_similar_prompts(pid) for pid in sample}
+        found = 0
+        for pid in sample:
+            expected = {p["id"] for p in exact[pid]}
+            found += len(expected & {p["id"] for p in db.find_similar_prompts(pid)})
+        fast.sort()
+        full.sort()
+        print(
+            f"{'':<16}{'median':>10}{'p95':>10}\n"
+            f"{'bounded':<16}{fast[QUERIES // 2] * 1000:>8.1f}ms"
+            f"{fast[QUERIES * 95 // 100] * 1000:>8.1f}ms\n"
+            f"{'every list':<16}{full[QUERIES // 2] * 1000:>8.1f}ms"
+            f"{full[QUERIES * 95 // 100] * 1000:>8.1f}ms\n"
+            f"top-10 recall of the bounded search: {found / (10 * QUERIES):.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200_000)
@@ -0,0 +1,67 @@
+"""
+Read latency under each SQLite performance profile: ``safe`` (SQLite's
+defaults, the old behaviour), ``balanced`` (the default) and ``fast``.
+
+One database is built, then reopened under each profile and queried through
+fresh connections; the first pass of each query warms that profile's page
+cache and mmap, as a long-running ComfyUI process would. ``+ANALYZE`` shows
+the effect of the background ``PRAGMA optimize``/ANALYZE on top of the
+default profile.
+
+Usage: python benchmarks/bench_sqlite_profile.py [prompt_count]
+"""
+
+import sys
+
+from _common import populate, temp_database, timed
+from database.models import PromptModel
+
+QUERIES = (
+    ("text search", lambda db: db.search_prompts(text="castle", limit=100)),
+    (
+        "category+rating",
+        lambda db: db.search_prompts(category="category_3", rating_min=4),
+    ),
+    ("tag filter", lambda db: db.search_prompts(tags=["tag_7", "tag_9"])),
+    ("deep recent page", lambda db: db.get_recent_prompts(limit=50, offset=20_000)),
+    ("image page", lambda db: db.get_images_page(limit=100, offset=50_000)),
+    ("statistics", lambda db: db.get_statistics()),
+)
+
+
+def measure(db, path, profile, analyze=False):
+    db.model.close()
+    db.model = PromptModel(path, sqlite_profile=profile)
+    if analyze:
+        db.model.optimize_database(analyze=True)
+    results = {}
+    for name, query in QUERIES:
+        query(db)
+        results[name] = timed(lambda: query(db))
+    return results
+
+
+def main(count: int) -> None:
+    with temp_database() as db:
+        path = db.model.db_path
+        prompt_ids = populate(db, count, tags=500)
+        db.bulk_link_images(
+            (prompt_ids[i % len(prompt_ids)], f"/output/day_{i % 365}/img_{i}.png")
+            for i in range(count)
+        )
+        columns = (
+            ("safe", measure(db, path, "safe")),
+            ("balanced", measure(db, path, "balanced")),
+            ("fast", measure(db, path, "fast")),
+            ("+ANALYZE", measure(db, path, "balanced", analyze=True)),
+        )
+        print(f"{count} prompts, {count} images")
+        header = "".join(f"{label:>12}" for label, _ in columns)
+        print(f"{'query':<18}{header}")
+        for name, _ in QUERIES:
+            cells = "".join(f"{r[name] * 1000:>10.2f}ms" for _, r in columns)
+            print(f"{name:<18}{cells}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
@@ -0,0 +1,60 @@
+"""
+Compare reading prompt tags via the per-row junction subquery (old) against
+the trigger-maintained ``prompts.tag_list`` column (new).
+
+Usage: python benchmarks/bench_tag_list.py [prompt_count]
+"""
+
+import json
+import sys
+
+from _common import populate, temp_database, timed
+
+OLD_SELECT = (
+    "SELECT prompts.*, (SELECT GROUP_CONCAT(t.name, '|||') "
+    "FROM prompt_tags pt JOIN tags t ON pt.tag_id = t.id "
+    "WHERE pt.prompt_id = prompts.id) AS _tag_list FROM prompts"
+)
+NEW_SELECT = "SELECT prompts.* FROM prompts"
+
+
+def read_old(conn, sql):
+    for row in conn.execute(sql):
+        raw = row["_tag_list"]
+        raw.split("|||") if raw else []
+
+
+def read_new(conn, sql):
+    for row in conn.execute(sql):
+        raw = row["tag_list"]
+        json.loads(raw) if raw else []
+
+
+def main(count: int) -> None:
+    with temp_database() as db:
+        print(f"Populating {count} prompts...")
+        populate(db, count)
+        page = " ORDER BY created_at DESC LIMIT 50 OFFSET 5000"
+        untagged_old = (
+            " WHERE NOT EXISTS (SELECT 1 FROM prompt_tags "
+            "WHERE prompt_id = prompts.id) ORDER BY created_at DESC LIMIT 50"
+        )
+        untagged_new = " WHERE tag_list IS NULL ORDER BY created_at DESC LIMIT 50"
+        cases = [
+            ("full scan", OLD_SELECT, NEW_SELECT),
+            ("page of 50", OLD_SELECT + page, NEW_SELECT + page),
+            ("untagged page", OLD_SELECT + untagged_old, NEW_SELECT + untagged_new),
+        ]
+        with db.model.get_read_connection() as conn:
+            print(f"{'case':<16}{'subquery':>12}{'tag_list':>12}{'speedup':>10}")
+            for name, old_sql, new_sql in cases:
+                old = timed(lambda: read_old(conn, old_sql), repeat=3)
+                new = timed(lambda: read_new(conn, new_sql), repeat=3)
+                print(
+                    f"{name:<16}{old * 1000:>10.1f}ms{new * 1000:>10.1f}ms"
+                    f"{old / new:>9.1f}x"
+                )
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
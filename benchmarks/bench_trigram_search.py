@@ -0,0 +1,81 @@
+"""
+Text search through a LIKE scan, the FTS5 word index and the FTS5 trigram
+index, plus the disk cost of the trigram index and the cost of "did you
+mean" suggestions.
+
+Usage: python benchmarks/bench_trigram_search.py [prompt_count]
+"""
+
+import sqlite3
+import sys
+
+from _common import populate, temp_database, timed
+
+# (label, needle); words search as prefixes, substrings match anywhere
+QUERIES = (
+    ("common word", "cyberpunk"),
+    ("word prefix", "cyberp"),
+    ("infix", "berpun"),
+    ("phrase", "neon city night"),
+    ("rare", "seed 123456"),
+    ("rare infix", "ed 24999"),
+    ("no match", "zeppelin"),
+)
+
+
+def index_size(db, prefix: str) -> str:
+    """Pages used by the tables named ``prefix*``, or "n/a" without dbstat."""
+    with db.model.get_read_connection() as conn:
+        try:
+            row = conn.execute(
+                "SELECT SUM(pgsize) FROM dbstat WHERE name LIKE ?", (prefix + "%",)
+            ).fetchone()
+        except sqlite3.OperationalError:
+            return "n/a"
+    return f"{(row[0] or 0) / 1e6:.1f}MB"
+
+
+def main(count: int) -> None:
+    with temp_database() as db:
+        populate(db, count)
+        db.model.optimize_database(analyze=True)
+        model = db.model
+        print(
+            f"{count} prompts; FTS index {index_size(db, 'prompts_fts')}, "
+            f"trigram index {index_size(db, 'prompts_trigram')}"
+        )
+
+        def like(needle):
+            model.trigram_enabled = False
+            try:
+                return db.search_prompts(text=needle, substring=True, limit=50)
+            finally:
+                model.trigram_enabled = True
+
+        def trigram(needle):
+            return db.search_prompts(text=needle, substring=True, limit=50)
+
+        def word(needle):
+            return db.search_prompts(text=needle, limit=50)
+
+        print(f"{'query':<14}{'LIKE':>11}{'FTS word':>11}{'trigram':>11}{'rows':>6}")
+        for label, needle in QUERIES:
+            rows = trigram(needle)
+            assert [r["id"] for r in rows] == [r["id"] for r in like(needle)]
+            times = [timed(lambda: fn(needle)) * 1000 for fn in (like, word, trigram)]
+            print(
+                f"{label:<14}"
+                + "".join(f"{t:>9.2f}ms" for t in times)
+                + f"{len(rows):>6}"
+            )
+
+        first = timed(lambda: db.suggest_search_terms("cyberpnuk"), repeat=1)
+        warm = timed(lambda: db.suggest_search_terms("cyberpnuk watrcolor"))
+        print(
+            f"suggestions: {db.suggest_search_terms('cyberpnuk watrcolor')[:2]} "
+            f"first {first * 1000:.1f}ms (loads vocabulary), then {warm * 1000:.2f}ms"
+        )
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 250_000)
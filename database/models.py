@@ -2,10 +2,15 @@
 Database schema and models for KikoTextEncode prompt storage.
 """
 
+import hashlib
 import sqlite3
 import os
+import posixpath
+import queue
 import threading
-from typing import Optional
+import time
+import zlib
+from typing import Callable, Dict, FrozenSet, Iterable, List, Optional, Set
 
 # Import logging system
 try:
@@ -18,41 +23,387 @@ except ImportError:
     from utils.logging_config import get_logger
 
 
+DEFAULT_READ_POOL_SIZE = 4
+
+# Per-connection SQLite tuning. "safe" keeps SQLite's defaults. "balanced"
+# and "fast" sync only at WAL checkpoints (a power loss can drop the last
+# commits but never corrupts the file), memory-map the database for reads,
+# cache more pages and keep temp b-trees in memory.
+SQLITE_PROFILES: Dict[str, Dict[str, object]] = {
+    "safe": {
+        "synchronous": "FULL",
+        "cache_size": -2000,
+        "mmap_size": 0,
+        "temp_store": "DEFAULT",
+        "wal_autocheckpoint": 1000,
+    },
+    "balanced": {
+        "synchronous": "NORMAL",
+        "cache_size": -32768,
+        "mmap_size": 256 * 2**20,
+        "temp_store": "MEMORY",
+        "wal_autocheckpoint": 1000,
+    },
+    "fast": {
+        "synchronous": "NORMAL",
+        "cache_size": -131072,
+        "mmap_size": 1024 * 2**20,
+        "temp_store": "MEMORY",
+        "wal_autocheckpoint": 4000,
+    },
+}
+DEFAULT_SQLITE_PROFILE = "balanced"
+
+# PRAGMA values are spliced into SQL, so keyword settings are whitelisted
+# and the rest must be integers
+PRAGMA_KEYWORDS = {
+    "synchronous": ("OFF", "NORMAL", "FULL", "EXTRA"),
+    "temp_store": ("DEFAULT", "FILE", "MEMORY"),
+}
+PRAGMA_INTEGERS = ("cache_size", "mmap_size", "wal_autocheckpoint")
+
+# Rows sampled per index by the periodic ANALYZE, so it stays fast on
+# large databases
+ANALYSIS_LIMIT = 1000
+
+# Schema migrations in order: (version, method, description). PRAGMA
+# user_version holds the last version applied; new databases start at
+# SCHEMA_VERSION. Append new migrations here, never renumber.
+MIGRATIONS = (
+    (
+        1,
+        "_migrate_add_unique_constraint",
+        "add UNIQUE(prompt_id, filename) to generated_images",
+    ),
+    (2, "_migrate_workflow_name_removal", "remove prompts.workflow_name"),
+    (
+        3,
+        "_migrate_foreign_key_types",
+        "convert generated_images.prompt_id to INTEGER",
+    ),
+    (4, "_migrate_json_tags_to_junction", "move JSON tags into prompt_tags"),
+    (5, "_migrate_tag_usage_counts", "add tags.usage_count"),
+    (6, "_migrate_prompt_tag_list", "add prompts.tag_list"),
+    (7, "_migrate_prompt_normalized_text", "add prompts.normalized_text"),
+    (
+        8,
+        "_migrate_image_canonical_path",
+        "add generated_images.canonical_path",
+    ),
+    (9, "_migrate_image_dirs", "index image directories"),
+    (10, "_migrate_image_blobs", "move image metadata into blobs"),
+    (11, "_migrate_composite_indexes", "add composite sort indexes"),
+    (12, "_migrate_trigram_index", "add trigram substring index"),
+    (13, "_migrate_prompt_vectors", "add prompt similarity vectors"),
+)
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+# Online backup pacing: pages copied per backup step and pause between steps
+BACKUP_PAGES_PER_STEP = 1024
+BACKUP_STEP_SLEEP = 0.005
+
+
+def resolve_sqlite_pragmas(
+    profile: str = DEFAULT_SQLITE_PROFILE,
+    overrides: Optional[Dict[str, object]] = None,
+) -> Dict[str, object]:
+    """
+    Build the PRAGMA settings for a named profile plus per-setting overrides.
+
+    Args:
+        profile: Key of SQLITE_PROFILES
+        overrides: Settings replacing the profile's values
+
+    Returns:
+        Dict of PRAGMA name to normalized value
+
+    Raises:
+        ValueError: If the profile, a setting name or a value is invalid
+    """
+    if profile not in SQLITE_PROFILES:
+        raise ValueError(
+            f"Unknown SQLite profile {profile!r}, "
+            f"expected one of {', '.join(SQLITE_PROFILES)}"
+        )
+    pragmas = dict(SQLITE_PROFILES[profile])
+    for name, value in (overrides or {}).items():
+        if name in PRAGMA_KEYWORDS:
+            value = str(value).upper()
+            if value not in PRAGMA_KEYWORDS[name]:
+                raise ValueError(f"Invalid value {value!r} for PRAGMA {name}")
+        elif name in PRAGMA_INTEGERS:
+            if isinstance(value, bool) or not isinstance(value, int):
+                raise ValueError(f"PRAGMA {name} must be an integer")
+        else:
+            raise ValueError(f"Unsupported PRAGMA {name!r}")
+        pragmas[name] = value
+    return pragmas
+
+
+# Tag names of one prompt as a compact JSON array, NULL when it has none.
+# Used by the triggers and migration that maintain prompts.tag_list.
+TAG_LIST_SQL = (
+    "(SELECT NULLIF(json_group_array(t.name), '[]') "
+    "FROM prompt_tags pt JOIN tags t ON t.id = pt.tag_id "
+    "WHERE pt.prompt_id = {prompt_id})"
+)
+
+# Duplicate detection key of a prompt text: case-insensitive, ignoring
+# surrounding whitespace. Stored in prompts.normalized_text by triggers.
+NORMALIZED_TEXT_SQL = "LOWER(TRIM({text}))"
+
+
+# zlib level for stored workflow/metadata JSON: close to the best ratio at a
+# fraction of the CPU cost of level 9
+BLOB_COMPRESSION_LEVEL = 6
+
+# Images migrated to blob storage per step of _migrate_image_blobs
+BLOB_MIGRATION_BATCH = 1000
+
+# Trigger condition: the directory an image row used to point to has no
+# images left
+UNUSED_DIR_SQL = (
+    "old.dir_id IS NOT NULL AND NOT EXISTS "
+    "(SELECT 1 FROM generated_images WHERE dir_id = old.dir_id)"
+)
+
+
+def store_blob(
+    conn: sqlite3.Connection, text: str, known: Optional[Dict[bytes, int]] = None
+) -> int:
+    """Return the id of the ``blobs`` row holding ``text``, adding it if new.
+
+    Blobs are addressed by the SHA-256 of their text, so identical workflow
+    or metadata JSON is stored (and compressed) once.
+
+    Args:
+        conn: Active database connection
+        text: JSON text to store
+        known: Optional digest -> id cache shared across calls of one batch
+    """
+    raw = text.encode("utf-8")
+    digest = hashlib.sha256(raw).digest()
+    if known is not None and digest in known:
+        return known[digest]
+    row = conn.execute("SELECT id FROM blobs WHERE hash = ?", (digest,)).fetchone()
+    if row is not None:
+        blob_id = row[0]
+    else:
+        blob_id = conn.execute(
+            "INSERT INTO blobs (hash, data, size) VALUES (?, ?, ?)",
+            (digest, zlib.compress(raw, BLOB_COMPRESSION_LEVEL), len(raw)),
+        ).lastrowid
+    if known is not None:
+        known[digest] = blob_id
+    return blob_id
+
+
+def load_blob(data: bytes) -> str:
+    """Return the text of a ``blobs.data`` value."""
+    return zlib.decompress(data).decode("utf-8")
+
+
+def image_dir_key(image_path: str) -> str:
+    """Return the normalized parent directory of an image path.
+
+    Separators become ``/`` and redundant separators are collapsed, so the
+    same folder written with Windows or POSIX separators shares one key.
+    Returns an empty string for bare filenames.
+    """
+    parent = posixpath.dirname(image_path.replace("\\", "/"))
+    return posixpath.normpath(parent) if parent else ""
+
+
+def canonical_image_path(image_path: str) -> str:
+    """Return the lookup key of an image path.
+
+    The normalized parent directory (see ``image_dir_key``) joined with the
+    file name by ``/``; case-folded on Windows, where paths are
+    case-insensitive.
+    """
+    parent = image_dir_key(image_path)
+    name = image_path.replace("\\", "/").rpartition("/")[2]
+    if parent:
+        name = parent.rstrip("/") + "/" + name
+    return name.lower() if os.name == "nt" else name
+
+
+def image_dir_suffixes(dir_key: str) -> List[str]:
+    """Return every trailing run of path segments of a directory key.
+
+    ``/output/2026/08-Aug`` yields ``output/2026/08-Aug``, ``2026/08-Aug``
+    and ``08-Aug``. A folder filter matches a directory when it equals one
+    of these suffixes or is a ``/``-bounded prefix of one.
+    """
+    parts = [part for part in dir_key.split("/") if part and part != "."]
+    return ["/".join(parts[i:]) for i in range(len(parts))]
+
+
+# Change listener: called with the new write generation and the ids of
+# the prompts the write touched. None means the write did not say which
+# prompts it changed; an empty set means it changed no prompt.
+ChangeListener = Callable[[int, Optional[FrozenSet[int]]], None]
+
+
+class ChangeTracker:
+    """Process-wide write generation counter for one database file.
+
+    Every ``PromptModel`` opened on the same file shares one tracker, so a
+    write through the API's model is seen by caches built on a node's model.
+    Writes by other processes are not tracked.
+    """
+
+    def __init__(self):
+        self.logger = get_logger("prompt_manager.database.changes")
+        self._lock = threading.Lock()
+        self._listeners: List[ChangeListener] = []
+        self.generation = 0
+
+    def add_listener(self, listener: ChangeListener) -> None:
+        """Call ``listener`` after every committed write."""
+        with self._lock:
+            self._listeners.append(listener)
+
+    def remove_listener(self, listener: ChangeListener) -> None:
+        """Stop calling ``listener``; unknown listeners are ignored."""
+        with self._lock:
+            if listener in self._listeners:
+                self._listeners.remove(listener)
+
+    def record(self, prompt_ids: Optional[FrozenSet[int]]) -> int:
+        """Advance the generation after a write and notify listeners.
+
+        Returns:
+            The new generation
+        """
+        with self._lock:
+            self.generation += 1
+            generation = self.generation
+            listeners = list(self._listeners)
+        for listener in listeners:
+            try:
+                listener(generation, prompt_ids)
+            except Exception as e:
+                self.logger.error(f"Change listener failed: {e}", exc_info=True)
+        return generation
+
+
+_trackers: Dict[str, ChangeTracker] = {}
+_trackers_lock = threading.Lock()
+
+
+def get_change_tracker(db_path: str) -> ChangeTracker:
+    """Return the shared ChangeTracker of a database file."""
+    key = os.path.normcase(os.path.realpath(db_path))
+    with _trackers_lock:
+        tracker = _trackers.get(key)
+        if tracker is None:
+            tracker = _trackers[key] = ChangeTracker()
+        return tracker
+
+
+class WriterConnection:
+    """Context manager granting exclusive use of the shared writer connection.
+
+    The lock is held for the whole ``with`` block so transactions from
+    different threads never interleave. It is re-entrant, so a thread that
+    already holds the writer may enter again. When the outermost block
+    changed any rows, the model's write generation advances before the lock
+    is released.
+    """
+
+    def __init__(self, model: "PromptModel", conn: sqlite3.Connection):
+        self._model = model
+        self._conn = conn
+        self._lock = model._write_lock
+        self._changes = 0
+
+    def __enter__(self) -> sqlite3.Connection:
+        self._lock.acquire()
+        self._model._write_depth += 1
+        self._changes = self._conn.total_changes
+        return self._conn.__enter__()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        try:
+            return self._conn.__exit__(exc_type, exc_value, traceback)
+        finally:
+            try:
+                self._model._write_depth -= 1
+                if self._model._write_depth == 0:
+                    self._model._end_write(self._conn.total_changes != self._changes)
+            finally:
+                self._lock.release()
+
+
+class ReaderConnection:
+    """Context manager that borrows a read-only connection from the pool."""
+
+    def __init__(self, model: "PromptModel"):
+        self._model = model
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def __enter__(self) -> sqlite3.Connection:
+        self._conn = self._model._acquire_reader()
+        return self._conn
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        conn, self._conn = self._conn, None
+        self._model._release_reader(conn)
+        return False
+
+
 class PromptModel:
     """Database model for prompt storage and schema management."""
 
-    def __init__(self, db_path: str):
+    def __init__(
+        self,
+        db_path: str,
+        read_pool_size: int = DEFAULT_READ_POOL_SIZE,
+        sqlite_profile: str = DEFAULT_SQLITE_PROFILE,
+        sqlite_pragmas: Optional[Dict[str, object]] = None,
+    ):
         """
         Initialize the database model.
 
         Args:
             db_path: Absolute path to the SQLite database file
+            read_pool_size: Maximum number of pooled read-only connections.
+                0 disables the pool and routes reads through the writer.
+            sqlite_profile: Key of SQLITE_PROFILES applied to every connection
+            sqlite_pragmas: Overrides for individual profile settings
+
+        Raises:
+            ValueError: If the profile or an override is invalid
         """
         self.logger = get_logger("prompt_manager.database.models")
         self.logger.debug(f"Initializing database model with path: {db_path}")
         self.db_path = db_path
         self._conn: Optional[sqlite3.Connection] = None
         self._conn_lock = threading.Lock()
+        self._write_lock = threading.RLock()
+        self._write_depth = 0
+        self._noted_prompts: Optional[Set[int]] = None
+        self.changes = get_change_tracker(db_path)
+        self.read_pool_size = max(0, int(read_pool_size))
+        self.sqlite_profile = sqlite_profile
+        self.pragmas = resolve_sqlite_pragmas(sqlite_profile, sqlite_pragmas)
+        self.last_optimized: Optional[float] = None
+        self._read_pool: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue()
+        self._readers: List[sqlite3.Connection] = []
+        self.fts_enabled = False
+        self.trigram_enabled = False
         self._ensure_database_exists()
 
     def _ensure_database_exists(self) -> None:
         """
-        Create database and tables if they don't exist.
-
-        Sets up the database schema including tables for prompts and generated images,
-        creates necessary indexes, and applies any pending migrations.
+        Create the database or bring its schema up to date.
 
         Raises:
-            Exception: If database creation fails
+            Exception: If database creation or a migration fails
         """
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                conn.execute("PRAGMA journal_mode = WAL")
-                conn.execute("PRAGMA busy_timeout = 5000")
-                conn.execute("PRAGMA foreign_keys = ON")
-                self._create_tables(conn)
-                self._create_indexes(conn)
-                conn.commit()
+            self.migrate_database()
         except Exception as e:
             self.logger.error(f"Error creating database: {e}")
             raise
@@ -78,7 +429,9 @@ class PromptModel:
                 tags TEXT,
                 rating INTEGER CHECK(rating >= 1 AND rating <= 5),
                 notes TEXT,
-                hash TEXT UNIQUE
+                hash TEXT UNIQUE,
+                tag_list TEXT,
+                normalized_text TEXT
             )
         """)
 
@@ -97,16 +450,49 @@ class PromptModel:
                 workflow_data TEXT,
                 prompt_metadata TEXT,
                 parameters TEXT,
+                dir_id INTEGER,
+                canonical_path TEXT,
+                workflow_blob_id INTEGER,
+                metadata_blob_id INTEGER,
                 FOREIGN KEY (prompt_id) REFERENCES prompts(id) ON DELETE CASCADE,
                 UNIQUE(prompt_id, filename)
             )
         """)
 
+        # Distinct image directories and their path-segment suffixes, so
+        # folder filters are index lookups instead of LIKE scans of image_path
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS image_dirs (
+                id INTEGER PRIMARY KEY,
+                path TEXT NOT NULL UNIQUE
+            )
+        """)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS image_dir_suffixes (
+                suffix TEXT NOT NULL COLLATE NOCASE,
+                dir_id INTEGER NOT NULL,
+                PRIMARY KEY (suffix, dir_id)
+            ) WITHOUT ROWID
+        """)
+
+        # Compressed workflow/metadata JSON shared by all images with the same
+        # content. generated_images.workflow_data and prompt_metadata are only
+        # read for rows written before blob storage existed.
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS blobs (
+                id INTEGER PRIMARY KEY,
+                hash BLOB NOT NULL UNIQUE,
+                data BLOB NOT NULL,
+                size INTEGER NOT NULL
+            )
+        """)
+
         # Create normalized tag tables (junction table pattern)
         conn.execute("""
             CREATE TABLE IF NOT EXISTS tags (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
-                name TEXT NOT NULL UNIQUE
+                name TEXT NOT NULL UNIQUE,
+                usage_count INTEGER NOT NULL DEFAULT 0
             )
         """)
         conn.execute("""
@@ -119,17 +505,24 @@ class PromptModel:
             )
         """)
 
-        # Add unique constraint to existing databases (migration)
-        self._migrate_add_unique_constraint(conn)
-
-        # Check if we need to migrate from old schema with workflow_name
-        self._migrate_workflow_name_removal(conn)
-
-        # Fix foreign key data type mismatch
-        self._migrate_foreign_key_types(conn)
+        # MinHash signatures for near-duplicate detection (see utils.hashing)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS prompt_signatures (
+                prompt_id INTEGER PRIMARY KEY,
+                signature BLOB NOT NULL,
+                FOREIGN KEY (prompt_id) REFERENCES prompts(id) ON DELETE CASCADE
+            )
+        """)
 
-        # Migrate JSON tags to normalized junction tables
-        self._migrate_json_tags_to_junction(conn)
+        # Hashed term vectors for similarity search (see database.similarity)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS prompt_vectors (
+                prompt_id INTEGER PRIMARY KEY,
+                buckets BLOB NOT NULL,
+                weights BLOB NOT NULL,
+                FOREIGN KEY (prompt_id) REFERENCES prompts(id) ON DELETE CASCADE
+            )
+        """)
 
     def _create_indexes(self, conn: sqlite3.Connection) -> None:
         """
@@ -146,206 +539,532 @@ class PromptModel:
         """
         indexes = [
             "CREATE INDEX IF NOT EXISTS idx_prompts_text ON prompts(text)",
-            "CREATE INDEX IF NOT EXISTS idx_prompts_category ON prompts(category)",
+            "CREATE INDEX IF NOT EXISTS idx_prompts_category_created "
+            "ON prompts(category, created_at)",
             "CREATE INDEX IF NOT EXISTS idx_prompts_created_at ON prompts(created_at)",
             "CREATE INDEX IF NOT EXISTS idx_prompts_hash ON prompts(hash)",
-            "CREATE INDEX IF NOT EXISTS idx_prompts_rating ON prompts(rating)",
-            "CREATE INDEX IF NOT EXISTS idx_prompt_images ON generated_images(prompt_id)",
+            "CREATE INDEX IF NOT EXISTS idx_prompts_rating_created "
+            "ON prompts(rating, created_at)",
+            # DESC matches the newest-first preview window per prompt
+            "CREATE INDEX IF NOT EXISTS idx_images_prompt_time "
+            "ON generated_images(prompt_id, generation_time DESC)",
             "CREATE INDEX IF NOT EXISTS idx_image_path ON generated_images(image_path)",
             "CREATE INDEX IF NOT EXISTS idx_generation_time ON generated_images(generation_time)",
             "CREATE INDEX IF NOT EXISTS idx_prompt_tags_tag ON prompt_tags(tag_id)",
             "CREATE INDEX IF NOT EXISTS idx_tags_name ON tags(name)",
+            "CREATE INDEX IF NOT EXISTS idx_tags_name_nocase "
+            "ON tags(name COLLATE NOCASE)",
+            "CREATE INDEX IF NOT EXISTS idx_tags_usage_count "
+            "ON tags(usage_count DESC, name COLLATE NOCASE)",
+            "CREATE INDEX IF NOT EXISTS idx_prompts_untagged "
+            "ON prompts(created_at) WHERE tag_list IS NULL",
+            "CREATE INDEX IF NOT EXISTS idx_prompts_normalized_text "
+            "ON prompts(normalized_text, created_at, id)",
+            "CREATE INDEX IF NOT EXISTS idx_image_dir "
+            "ON generated_images(dir_id, prompt_id)",
+            "CREATE INDEX IF NOT EXISTS idx_images_canonical_path "
+            "ON generated_images(canonical_path)",
+            "CREATE INDEX IF NOT EXISTS idx_images_filename "
+            "ON generated_images(filename)",
+            "CREATE INDEX IF NOT EXISTS idx_images_workflow_blob "
+            "ON generated_images(workflow_blob_id)",
+            "CREATE INDEX IF NOT EXISTS idx_images_metadata_blob "
+            "ON generated_images(metadata_blob_id)",
         ]
 
         for index_sql in indexes:
             conn.execute(index_sql)
 
-    def get_connection(self) -> sqlite3.Connection:
+        self._create_triggers(conn)
+
+    def _create_triggers(self, conn: sqlite3.Connection) -> None:
         """
-        Get the persistent database connection.
+        Create triggers that maintain derived columns.
 
-        Returns a thread-safe, reusable connection protected by a lock.
-        The connection is created on first call and reused thereafter.
-        Callers use it as a context manager; the lock is held for the
-        duration of the ``with`` block.
+        Args:
+            conn: Active database connection
 
-        Returns:
-            sqlite3.Connection: Configured database connection
+        Creates triggers that keep:
+            - ``tags.usage_count`` equal to the number of prompts per tag
+            - ``prompts.tag_list`` equal to the prompt's tag names as a JSON
+              array (NULL when the prompt has no tags)
+            - ``prompts.normalized_text`` equal to ``NORMALIZED_TEXT_SQL`` of
+              the prompt text, the key duplicate detection groups on
+            - ``prompt_signatures`` free of signatures for outdated text; the
+              database layer recomputes missing signatures
+            - ``prompt_vectors`` free of vectors for outdated text; the
+              embedding worker recomputes them
+            - ``generated_images.dir_id`` cleared when an image path changes,
+              and ``image_dirs`` free of directories without images; the
+              database layer assigns missing directories and canonical paths
+            - ``blobs`` free of blobs no image refers to any more
         """
-        with self._conn_lock:
-            if self._conn is None:
-                self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
-                self._conn.row_factory = sqlite3.Row
-                self._conn.execute("PRAGMA journal_mode = WAL")
-                self._conn.execute("PRAGMA foreign_keys = ON")
-                self._conn.execute("PRAGMA busy_timeout = 5000")
-        return self._conn
+        old_tag_list = TAG_LIST_SQL.format(prompt_id="old.prompt_id")
+        new_tag_list = TAG_LIST_SQL.format(prompt_id="new.prompt_id")
+        normalized_text = NORMALIZED_TEXT_SQL.format(text="new.text")
+        triggers = [
+            """
+            CREATE TRIGGER IF NOT EXISTS prompt_tags_count_insert
+            AFTER INSERT ON prompt_tags
+            BEGIN
+                UPDATE tags SET usage_count = usage_count + 1
+                WHERE id = new.tag_id;
+            END
+            """,
+            """
+            CREATE TRIGGER IF NOT EXISTS prompt_tags_count_delete
+            AFTER DELETE ON prompt_tags
+            BEGIN
+                UPDATE tags SET usage_count = usage_count - 1
+                WHERE id = old.tag_id;
+            END
+            """,
+            """
+            CREATE TRIGGER IF NOT EXISTS prompt_tags_count_update
+            AFTER UPDATE OF tag_id ON prompt_tags
+            BEGIN
+                UPDATE tags SET usage_count = usage_count - 1
+                WHERE id = old.tag_id;
+                UPDATE tags SET usage_count = usage_count + 1
+                WHERE id = new.tag_id;
+            END
+            """,
+            f"""
+            CREATE TRIGGER IF NOT EXISTS prompt_tags_list_insert
+            AFTER INSERT ON prompt_tags
+            BEGIN
+                UPDATE prompts
+                SET tag_list = {new_tag_list}
+                WHERE id = new.prompt_id;
+            END
+            """,
+            f"""
+            CREATE TRIGGER IF NOT EXISTS prompt_tags_list_delete
+            AFTER DELETE ON prompt_tags
+            BEGIN
+                UPDATE prompts
+                SET tag_list = {old_tag_list}
+                WHERE id = old.prompt_id;
+            END
+            """,
+            f"""
+            CREATE TRIGGER IF NOT EXISTS prompt_tags_list_update
+            AFTER UPDATE ON prompt_tags
+            BEGIN
+                UPDATE prompts
+                SET tag_list = {old_tag_list}
+                WHERE id = old.prompt_id;
+                UPDATE prompts
+                SET tag_list = {new_tag_list}
+                WHERE id = new.prompt_id;
+            END
+            """,
+            f"""
+            CREATE TRIGGER IF NOT EXISTS tags_list_rename
+            AFTER UPDATE OF name ON tags
+            BEGIN
+                UPDATE prompts
+                SET tag_list = {TAG_LIST_SQL.format(prompt_id="prompts.id")}
+                WHERE id IN (
+                    SELECT prompt_id FROM prompt_tags WHERE tag_id = new.id
+                );
+            END
+            """,
+            f"""
+            CREATE TRIGGER IF NOT EXISTS prompts_normalized_text_insert
+            AFTER INSERT ON prompts
+            BEGIN
+                UPDATE prompts
+                SET normalized_text = {normalized_text}
+                WHERE id = new.id;
+            END
+            """,
+            f"""
+            CREATE TRIGGER IF NOT EXISTS prompts_normalized_text_update
+            AFTER UPDATE OF text ON prompts
+            BEGIN
+                UPDATE prompts
+                SET normalized_text = {normalized_text}
+                WHERE id = new.id;
+            END
+            """,
+            """
+            CREATE TRIGGER IF NOT EXISTS prompts_signature_stale
+            AFTER UPDATE OF text ON prompts
+            BEGIN
+                DELETE FROM prompt_signatures WHERE prompt_id = new.id;
+            END
+            """,
+            """
+            CREATE TRIGGER IF NOT EXISTS prompts_vector_stale
+            AFTER UPDATE OF text ON prompts
+            BEGIN
+                DELETE FROM prompt_vectors WHERE prompt_id = new.id;
+            END
+            """,
+            """
+            CREATE TRIGGER IF NOT EXISTS generated_images_dir_stale
+            AFTER UPDATE OF image_path ON generated_images
+            WHEN new.image_path IS NOT old.image_path
+            BEGIN
+                UPDATE generated_images SET dir_id = NULL WHERE id = new.id;
+            END
+            """,
+            f"""
+            CREATE TRIGGER IF NOT EXISTS generated_images_dir_delete
+            AFTER DELETE ON generated_images
+            WHEN {UNUSED_DIR_SQL}
+            BEGIN
+                DELETE FROM image_dir_suffixes WHERE dir_id = old.dir_id;
+                DELETE FROM image_dirs WHERE id = old.dir_id;
+            END
+            """,
+            f"""
+            CREATE TRIGGER IF NOT EXISTS generated_images_dir_update
+            AFTER UPDATE OF dir_id ON generated_images
+            WHEN new.dir_id IS NOT old.dir_id AND {UNUSED_DIR_SQL}
+            BEGIN
+                DELETE FROM image_dir_suffixes WHERE dir_id = old.dir_id;
+                DELETE FROM image_dirs WHERE id = old.dir_id;
+            END
+            """,
+            """
+            CREATE TRIGGER IF NOT EXISTS generated_images_blob_delete
+            AFTER DELETE ON generated_images
+            WHEN old.workflow_blob_id IS NOT NULL OR old.metadata_blob_id IS NOT NULL
+            BEGIN
+                DELETE FROM blobs
+                WHERE id IN (old.workflow_blob_id, old.metadata_blob_id)
+                AND NOT EXISTS (
+                    SELECT 1 FROM generated_images WHERE workflow_blob_id = blobs.id
+                )
+                AND NOT EXISTS (
+                    SELECT 1 FROM generated_images WHERE metadata_blob_id = blobs.id
+                );
+            END
+            """,
+        ]
 
-    def _migrate_workflow_name_removal(self, conn: sqlite3.Connection) -> None:
+        for trigger_sql in triggers:
+            conn.execute(trigger_sql)
+
+    def _create_fts_index(self, conn: sqlite3.Connection) -> bool:
         """
-        Remove workflow_name column if it exists in existing database.
+        Create the FTS5 full-text index over prompt text.
+
+        ``prompts_fts`` is an external-content table: it stores only the
+        inverted index and reads the text back from ``prompts``. Triggers keep
+        it in sync with inserts, deletes and text edits. When the table is
+        first created, existing prompts are backfilled with a rebuild.
 
         Args:
             conn: Active database connection
 
-        This migration handles legacy schema updates by removing the deprecated
-        workflow_name column while preserving all other data.
+        Returns:
+            bool: True if the FTS5 index is available, False if this SQLite
+            build lacks FTS5 (callers fall back to LIKE matching)
         """
-        try:
-            # Check if workflow_name column exists
-            cursor = conn.execute("PRAGMA table_info(prompts)")
-            columns = [column[1] for column in cursor.fetchall()]
-
-            if "workflow_name" in columns:
-                self.logger.info("Migrating database: removing workflow_name column")
-
-                # Create new table without workflow_name
-                conn.execute("""
-                    CREATE TABLE prompts_new (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        text TEXT NOT NULL,
-                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                        category TEXT,
-                        tags TEXT,
-                        rating INTEGER CHECK(rating >= 1 AND rating <= 5),
-                        notes TEXT,
-                        hash TEXT UNIQUE
-                    )
-                """)
+        cursor = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'prompts_fts'"
+        )
+        exists = cursor.fetchone() is not None
 
-                # Copy data from old table to new table
-                conn.execute("""
-                    INSERT INTO prompts_new (id, text, created_at, updated_at, category, tags, rating, notes, hash)
-                    SELECT id, text, created_at, updated_at, category, tags, rating, notes, hash
-                    FROM prompts
-                """)
+        try:
+            conn.execute("""
+                CREATE VIRTUAL TABLE IF NOT EXISTS prompts_fts USING fts5(
+                    text,
+                    content='prompts',
+                    content_rowid='id'
+                )
+            """)
+        except sqlite3.OperationalError as e:
+            self.logger.warning(
+                f"FTS5 not available, text search will use LIKE matching: {e}"
+            )
+            return False
 
-                # Drop old table and rename new one
-                conn.execute("DROP TABLE prompts")
-                conn.execute("ALTER TABLE prompts_new RENAME TO prompts")
+        # Read-only view of the indexed terms and their document counts
+        conn.execute("""
+            CREATE VIRTUAL TABLE IF NOT EXISTS prompts_fts_vocab
+            USING fts5vocab(prompts_fts, 'row')
+        """)
+        conn.execute("""
+            CREATE TRIGGER IF NOT EXISTS prompts_fts_insert AFTER INSERT ON prompts
+            BEGIN
+                INSERT INTO prompts_fts (rowid, text) VALUES (new.id, new.text);
+            END
+        """)
+        conn.execute("""
+            CREATE TRIGGER IF NOT EXISTS prompts_fts_delete AFTER DELETE ON prompts
+            BEGIN
+                INSERT INTO prompts_fts (prompts_fts, rowid, text)
+                VALUES ('delete', old.id, old.text);
+            END
+        """)
+        conn.execute("""
+            CREATE TRIGGER IF NOT EXISTS prompts_fts_update
+            AFTER UPDATE OF text ON prompts
+            BEGIN
+                INSERT INTO prompts_fts (prompts_fts, rowid, text)
+                VALUES ('delete', old.id, old.text);
+                INSERT INTO prompts_fts (rowid, text) VALUES (new.id, new.text);
+            END
+        """)
 
-                self.logger.info("Database migration completed")
+        if not exists:
+            self._migrate_backfill_fts_index(conn)
 
-        except Exception as e:
-            self.logger.error(f"Migration error: {e}")
-            # If migration fails, the table creation will handle it
+        return True
 
-    def _migrate_foreign_key_types(self, conn: sqlite3.Connection) -> None:
+    def _create_trigram_index(self, conn: sqlite3.Connection) -> bool:
         """
-        Fix foreign key data type mismatch in generated_images table.
+        Create the trigram index used for substring search.
+
+        ``prompts_trigram`` is an external-content FTS5 table with the
+        ``trigram`` tokenizer. It answers ``LIKE '%...%'`` patterns that
+        contain at least three consecutive literal characters from the index,
+        with the same results as LIKE on ``prompts.text``. It is kept in sync
+        by triggers and backfilled when first created.
 
         Args:
             conn: Active database connection
 
-        Converts prompt_id from TEXT to INTEGER type to match the prompts table's
-        primary key type, ensuring referential integrity.
+        Returns:
+            bool: True if the index is available, False if this SQLite build
+            lacks FTS5 or the trigram tokenizer (substring search scans)
         """
-        try:
-            # Check if generated_images table exists and has TEXT prompt_id
-            cursor = conn.execute("PRAGMA table_info(generated_images)")
-            columns = {column[1]: column[2] for column in cursor.fetchall()}
+        exists = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' "
+            "AND name = 'prompts_trigram'"
+        ).fetchone()
 
-            if "prompt_id" in columns and columns["prompt_id"] == "TEXT":
-                self.logger.info(
-                    "Migrating foreign key types: prompt_id TEXT -> INTEGER"
+        try:
+            conn.execute("""
+                CREATE VIRTUAL TABLE IF NOT EXISTS prompts_trigram USING fts5(
+                    text,
+                    content='prompts',
+                    content_rowid='id',
+                    tokenize='trigram'
                 )
+            """)
+        except sqlite3.OperationalError as e:
+            self.logger.warning(
+                f"Trigram index not available, substring search will scan: {e}"
+            )
+            return False
 
-                # Create new table with correct types
-                conn.execute("""
-                    CREATE TABLE generated_images_new (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        prompt_id INTEGER NOT NULL,
-                        image_path TEXT NOT NULL,
-                        filename TEXT NOT NULL,
-                        generation_time TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                        file_size INTEGER,
-                        width INTEGER,
-                        height INTEGER,
-                        format TEXT,
-                        workflow_data TEXT,
-                        prompt_metadata TEXT,
-                        parameters TEXT,
-                        FOREIGN KEY (prompt_id) REFERENCES prompts(id) ON DELETE CASCADE
-                    )
-                """)
-
-                # Copy data, converting prompt_id from TEXT to INTEGER
-                conn.execute("""
-                    INSERT INTO generated_images_new 
-                    (id, prompt_id, image_path, filename, generation_time, file_size, 
-                     width, height, format, workflow_data, prompt_metadata, parameters)
-                    SELECT id, CAST(prompt_id AS INTEGER), image_path, filename, generation_time, 
-                           file_size, width, height, format, workflow_data, prompt_metadata, parameters
-                    FROM generated_images
-                    WHERE prompt_id != '' AND prompt_id IS NOT NULL
-                    AND CAST(prompt_id AS INTEGER) IN (SELECT id FROM prompts)
-                """)
-
-                # Drop old table and rename new one
-                conn.execute("DROP TABLE generated_images")
+        conn.execute("""
+            CREATE TRIGGER IF NOT EXISTS prompts_trigram_insert AFTER INSERT ON prompts
+            BEGIN
+                INSERT INTO prompts_trigram (rowid, text) VALUES (new.id, new.text);
+            END
+        """)
+        conn.execute("""
+            CREATE TRIGGER IF NOT EXISTS prompts_trigram_delete AFTER DELETE ON prompts
+            BEGIN
+                INSERT INTO prompts_trigram (prompts_trigram, rowid, text)
+                VALUES ('delete', old.id, old.text);
+            END
+        """)
+        conn.execute("""
+            CREATE TRIGGER IF NOT EXISTS prompts_trigram_update
+            AFTER UPDATE OF text ON prompts
+            BEGIN
+                INSERT INTO prompts_trigram (prompts_trigram, rowid, text)
+                VALUES ('delete', old.id, old.text);
+                INSERT INTO prompts_trigram (rowid, text) VALUES (new.id, new.text);
+            END
+        """)
+
+        if not exists:
+            total = conn.execute("SELECT COUNT(*) FROM prompts").fetchone()[0]
+            if total:
+                self.logger.info(f"Building trigram index for {total} prompts")
                 conn.execute(
-                    "ALTER TABLE generated_images_new RENAME TO generated_images"
+                    "INSERT INTO prompts_trigram (prompts_trigram) VALUES ('rebuild')"
                 )
 
-                self.logger.info("Foreign key migration completed")
+        return True
 
-        except Exception as e:
-            self.logger.error(f"Foreign key migration error: {e}")
-            # If migration fails, continue with existing schema
+    def get_connection(self) -> WriterConnection:
+        """
+        Get the single writer connection.
 
-    def _migrate_add_unique_constraint(self, conn: sqlite3.Connection) -> None:
+        The connection is created on first call and reused thereafter.
+        Callers use it as a context manager; a re-entrant lock is held for
+        the duration of the ``with`` block, so only one thread writes at a
+        time and transactions never interleave.
+
+        Returns:
+            WriterConnection: Context manager yielding the sqlite3.Connection
         """
-        Add UNIQUE constraint on (prompt_id, filename) to prevent duplicate image entries.
+        with self._conn_lock:
+            if self._conn is None:
+                self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+                self._conn.row_factory = sqlite3.Row
+                self._conn.execute("PRAGMA journal_mode = WAL")
+                self._conn.execute("PRAGMA foreign_keys = ON")
+                self._conn.execute("PRAGMA busy_timeout = 5000")
+                self._apply_pragmas(self._conn)
+        return WriterConnection(self, self._conn)
 
-        This migration:
-        1. Checks if the constraint already exists
-        2. Removes duplicate entries (keeping the most recent)
-        3. Recreates the table with the UNIQUE constraint
+    def note_prompt_changes(self, prompt_ids: Iterable[int]) -> None:
+        """Record which prompts the current write changes.
+
+        Call inside the writer ``with`` block. Listeners receive the ids once
+        the outermost block exits; an empty iterable marks a write that
+        changes no prompt (image links, for example). Writes that never call
+        this are reported with ``None``, so listeners resynchronize fully.
+        """
+        if self._noted_prompts is None:
+            self._noted_prompts = set()
+        self._noted_prompts.update(prompt_ids)
+
+    def add_change_listener(self, listener: ChangeListener) -> None:
+        """Register a listener on this database's ChangeTracker."""
+        self.changes.add_listener(listener)
+
+    @property
+    def generation(self) -> int:
+        """Write generation of the database, advanced by every write."""
+        return self.changes.generation
+
+    def _end_write(self, changed: bool) -> None:
+        """Advance the write generation after the outermost writer block."""
+        noted, self._noted_prompts = self._noted_prompts, None
+        if changed:
+            self.changes.record(None if noted is None else frozenset(noted))
+
+    def get_read_connection(self):
+        """
+        Get a read-only connection from the reader pool.
+
+        Readers run against the WAL snapshot independently of the writer, so
+        API reads are not serialized behind a scan or bulk edit. The pool is
+        bounded by ``read_pool_size``; callers block until a connection is
+        free. With a pool size of 0 this falls back to the writer connection.
+
+        Returns:
+            Context manager yielding a read-only sqlite3.Connection
+        """
+        if self.read_pool_size == 0:
+            return self.get_connection()
+        return ReaderConnection(self)
+
+    def _acquire_reader(self) -> sqlite3.Connection:
+        """Take an idle reader from the pool, opening a new one if allowed."""
+        try:
+            return self._read_pool.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._conn_lock:
+            can_open = len(self._readers) < self.read_pool_size
+            if can_open:
+                conn = sqlite3.connect(self.db_path, check_same_thread=False)
+                conn.row_factory = sqlite3.Row
+                conn.execute("PRAGMA busy_timeout = 5000")
+                conn.execute("PRAGMA query_only = ON")
+                self._apply_pragmas(conn)
+                self._readers.append(conn)
+        if can_open:
+            return conn
+        return self._read_pool.get()
+
+    def _apply_pragmas(self, conn: sqlite3.Connection) -> None:
+        """Apply the performance profile to a newly opened connection."""
+        for name, value in self.pragmas.items():
+            conn.execute(f"PRAGMA {name} = {value}")
+
+    def _release_reader(self, conn: sqlite3.Connection) -> None:
+        """Return a reader to the pool, ending any open read transaction."""
+        if conn.in_transaction:
+            conn.rollback()
+        self._read_pool.put(conn)
+
+    def close(self) -> None:
+        """
+        Close the writer and all idle pooled reader connections.
+
+        Connections are reopened lazily on next use.
+        """
+        with self._write_lock, self._conn_lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+            while True:
+                try:
+                    conn = self._read_pool.get_nowait()
+                except queue.Empty:
+                    break
+                conn.close()
+                self._readers.remove(conn)
+
+    def _migrate_workflow_name_removal(self, conn: sqlite3.Connection) -> None:
+        """
+        Remove workflow_name column if it exists in existing database.
 
         Args:
             conn: Active database connection
+
+        This migration handles legacy schema updates by removing the deprecated
+        workflow_name column while preserving all other data.
         """
-        try:
-            # Check if the unique constraint already exists by looking at table info
-            cursor = conn.execute("PRAGMA index_list(generated_images)")
-            indexes = cursor.fetchall()
-
-            # Check if we have a unique index on prompt_id, filename
-            has_unique_constraint = False
-            for idx in indexes:
-                if idx[2] == 1:  # unique flag
-                    cursor = conn.execute(f"PRAGMA index_info({idx[1]})")
-                    columns = [col[2] for col in cursor.fetchall()]
-                    if "prompt_id" in columns and "filename" in columns:
-                        has_unique_constraint = True
-                        break
-
-            if has_unique_constraint:
-                return  # Already migrated
+        # Check if workflow_name column exists
+        cursor = conn.execute("PRAGMA table_info(prompts)")
+        columns = [column[1] for column in cursor.fetchall()]
 
-            self.logger.info(
-                "Migrating database: adding UNIQUE constraint on (prompt_id, filename)"
-            )
+        if "workflow_name" in columns:
+            self.logger.info("Migrating database: removing workflow_name column")
 
-            # First, remove duplicates keeping only the most recent (highest id)
+            # Create new table without workflow_name
             conn.execute("""
-                DELETE FROM generated_images
-                WHERE id NOT IN (
-                    SELECT MAX(id) FROM generated_images
-                    GROUP BY prompt_id, filename
+                CREATE TABLE prompts_new (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    text TEXT NOT NULL,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    category TEXT,
+                    tags TEXT,
+                    rating INTEGER CHECK(rating >= 1 AND rating <= 5),
+                    notes TEXT,
+                    hash TEXT UNIQUE
                 )
             """)
 
-            duplicates_removed = conn.total_changes
-            if duplicates_removed > 0:
-                self.logger.info(
-                    f"Removed {duplicates_removed} duplicate image entries"
-                )
+            # Copy data from old table to new table
+            conn.execute("""
+                INSERT INTO prompts_new (id, text, created_at, updated_at, category, tags, rating, notes, hash)
+                SELECT id, text, created_at, updated_at, category, tags, rating, notes, hash
+                FROM prompts
+            """)
 
-            # Create new table with UNIQUE constraint
+            # Drop old table and rename new one
+            conn.execute("DROP TABLE prompts")
+            conn.execute("ALTER TABLE prompts_new RENAME TO prompts")
+
+            self.logger.info("Database migration completed")
+
+    def _migrate_foreign_key_types(self, conn: sqlite3.Connection) -> None:
+        """
+        Fix foreign key data type mismatch in generated_images table.
+
+        Args:
+            conn: Active database connection
+
+        Converts prompt_id from TEXT to INTEGER type to match the prompts table's
+        primary key type, ensuring referential integrity.
+        """
+        # Check if generated_images table exists and has TEXT prompt_id
+        cursor = conn.execute("PRAGMA table_info(generated_images)")
+        columns = {column[1]: column[2] for column in cursor.fetchall()}
+
+        if "prompt_id" in columns and columns["prompt_id"] == "TEXT":
+            self.logger.info("Migrating foreign key types: prompt_id TEXT -> INTEGER")
+
+            # Create new table with correct types
             conn.execute("""
-                CREATE TABLE IF NOT EXISTS generated_images_new (
+                CREATE TABLE generated_images_new (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
                     prompt_id INTEGER NOT NULL,
                     image_path TEXT NOT NULL,
@@ -358,41 +1077,120 @@ class PromptModel:
                     workflow_data TEXT,
                     prompt_metadata TEXT,
                     parameters TEXT,
-                    FOREIGN KEY (prompt_id) REFERENCES prompts(id) ON DELETE CASCADE,
-                    UNIQUE(prompt_id, filename)
+                    FOREIGN KEY (prompt_id) REFERENCES prompts(id) ON DELETE CASCADE
                 )
             """)
 
-            # Copy data
+            # Copy data, converting prompt_id from TEXT to INTEGER
             conn.execute("""
-                INSERT INTO generated_images_new
-                (id, prompt_id, image_path, filename, generation_time, file_size,
+                INSERT INTO generated_images_new 
+                (id, prompt_id, image_path, filename, generation_time, file_size, 
                  width, height, format, workflow_data, prompt_metadata, parameters)
-                SELECT id, prompt_id, image_path, filename, generation_time, file_size,
-                       width, height, format, workflow_data, prompt_metadata, parameters
+                SELECT id, CAST(prompt_id AS INTEGER), image_path, filename, generation_time, 
+                       file_size, width, height, format, workflow_data, prompt_metadata, parameters
                 FROM generated_images
+                WHERE prompt_id != '' AND prompt_id IS NOT NULL
+                AND CAST(prompt_id AS INTEGER) IN (SELECT id FROM prompts)
             """)
 
             # Drop old table and rename new one
             conn.execute("DROP TABLE generated_images")
             conn.execute("ALTER TABLE generated_images_new RENAME TO generated_images")
 
-            # Recreate indexes
-            conn.execute(
-                "CREATE INDEX IF NOT EXISTS idx_prompt_images ON generated_images(prompt_id)"
-            )
-            conn.execute(
-                "CREATE INDEX IF NOT EXISTS idx_image_path ON generated_images(image_path)"
+            self.logger.info("Foreign key migration completed")
+
+    def _migrate_add_unique_constraint(self, conn: sqlite3.Connection) -> None:
+        """
+        Add UNIQUE constraint on (prompt_id, filename) to prevent duplicate image entries.
+
+        This migration:
+        1. Checks if the constraint already exists
+        2. Removes duplicate entries (keeping the most recent)
+        3. Recreates the table with the UNIQUE constraint
+
+        Args:
+            conn: Active database connection
+        """
+        # Check if the unique constraint already exists by looking at table info
+        cursor = conn.execute("PRAGMA index_list(generated_images)")
+        indexes = cursor.fetchall()
+
+        # Check if we have a unique index on prompt_id, filename
+        has_unique_constraint = False
+        for idx in indexes:
+            if idx[2] == 1:  # unique flag
+                cursor = conn.execute(f"PRAGMA index_info({idx[1]})")
+                columns = [col[2] for col in cursor.fetchall()]
+                if "prompt_id" in columns and "filename" in columns:
+                    has_unique_constraint = True
+                    break
+
+        if has_unique_constraint:
+            return  # Already migrated
+
+        self.logger.info(
+            "Migrating database: adding UNIQUE constraint on (prompt_id, filename)"
+        )
+
+        # First, remove duplicates keeping only the most recent (highest id)
+        conn.execute("""
+            DELETE FROM generated_images
+            WHERE id NOT IN (
+                SELECT MAX(id) FROM generated_images
+                GROUP BY prompt_id, filename
             )
-            conn.execute(
-                "CREATE INDEX IF NOT EXISTS idx_generation_time ON generated_images(generation_time)"
+        """)
+
+        duplicates_removed = conn.total_changes
+        if duplicates_removed > 0:
+            self.logger.info(f"Removed {duplicates_removed} duplicate image entries")
+
+        # Create new table with UNIQUE constraint
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS generated_images_new (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                prompt_id INTEGER NOT NULL,
+                image_path TEXT NOT NULL,
+                filename TEXT NOT NULL,
+                generation_time TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                file_size INTEGER,
+                width INTEGER,
+                height INTEGER,
+                format TEXT,
+                workflow_data TEXT,
+                prompt_metadata TEXT,
+                parameters TEXT,
+                FOREIGN KEY (prompt_id) REFERENCES prompts(id) ON DELETE CASCADE,
+                UNIQUE(prompt_id, filename)
             )
+        """)
 
-            self.logger.info("UNIQUE constraint migration completed successfully")
+        # Copy data
+        conn.execute("""
+            INSERT INTO generated_images_new
+            (id, prompt_id, image_path, filename, generation_time, file_size,
+             width, height, format, workflow_data, prompt_metadata, parameters)
+            SELECT id, prompt_id, image_path, filename, generation_time, file_size,
+                   width, height, format, workflow_data, prompt_metadata, parameters
+            FROM generated_images
+        """)
 
-        except Exception as e:
-            self.logger.error(f"UNIQUE constraint migration error: {e}")
-            # Continue with existing schema if migration fails
+        # Drop old table and rename new one
+        conn.execute("DROP TABLE generated_images")
+        conn.execute("ALTER TABLE generated_images_new RENAME TO generated_images")
+
+        # Recreate indexes
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_prompt_images ON generated_images(prompt_id)"
+        )
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_image_path ON generated_images(image_path)"
+        )
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_generation_time ON generated_images(generation_time)"
+        )
+
+        self.logger.info("UNIQUE constraint migration completed successfully")
 
     def _migrate_json_tags_to_junction(self, conn: sqlite3.Connection) -> None:
         """
@@ -401,54 +1199,490 @@ class PromptModel:
         Runs once: skips if the tags table already has data. Uses json_each()
         to extract tag names from the JSON arrays stored in prompts.tags.
         """
-        try:
-            cursor = conn.execute("SELECT COUNT(*) FROM tags")
-            if cursor.fetchone()[0] > 0:
-                return  # Already migrated
+        cursor = conn.execute("SELECT COUNT(*) FROM tags")
+        if cursor.fetchone()[0] > 0:
+            return  # Already migrated
+
+        cursor = conn.execute(
+            "SELECT COUNT(*) FROM prompts "
+            "WHERE tags IS NOT NULL AND tags != '' AND tags != '[]'"
+        )
+        if cursor.fetchone()[0] == 0:
+            return  # No tags to migrate
+
+        self.logger.info("Migrating JSON tags to normalized junction tables")
+
+        # Insert all unique tag names
+        conn.execute(
+            "INSERT OR IGNORE INTO tags (name) "
+            "SELECT DISTINCT je.value FROM prompts, json_each(prompts.tags) AS je "
+            "WHERE prompts.tags IS NOT NULL AND prompts.tags != '' AND prompts.tags != '[]'"
+        )
+
+        # Populate junction table
+        conn.execute(
+            "INSERT OR IGNORE INTO prompt_tags (prompt_id, tag_id) "
+            "SELECT p.id, t.id "
+            "FROM prompts p, json_each(p.tags) AS je "
+            "JOIN tags t ON t.name = je.value "
+            "WHERE p.tags IS NOT NULL AND p.tags != '' AND p.tags != '[]'"
+        )
+
+        tag_count = conn.execute("SELECT COUNT(*) FROM tags").fetchone()[0]
+        link_count = conn.execute("SELECT COUNT(*) FROM prompt_tags").fetchone()[0]
+        self.logger.info(
+            f"Tag migration complete: {tag_count} unique tags, {link_count} prompt-tag links"
+        )
+
+    def _migrate_tag_usage_counts(self, conn: sqlite3.Connection) -> None:
+        """
+        Add the ``tags.usage_count`` column and backfill it from prompt_tags.
 
-            cursor = conn.execute(
-                "SELECT COUNT(*) FROM prompts "
-                "WHERE tags IS NOT NULL AND tags != '' AND tags != '[]'"
-            )
-            if cursor.fetchone()[0] == 0:
-                return  # No tags to migrate
+        Runs once: skips if the column already exists. Afterwards the count is
+        maintained by the triggers created in ``_create_triggers``.
 
-            self.logger.info("Migrating JSON tags to normalized junction tables")
+        Args:
+            conn: Active database connection
+        """
+        cursor = conn.execute("PRAGMA table_info(tags)")
+        columns = [column[1] for column in cursor.fetchall()]
+        if "usage_count" in columns:
+            return
+
+        self.logger.info("Migrating database: adding tags.usage_count")
+        conn.execute(
+            "ALTER TABLE tags ADD COLUMN usage_count INTEGER NOT NULL DEFAULT 0"
+        )
+        self.rebuild_tag_counts(conn)
+
+    def _migrate_prompt_tag_list(self, conn: sqlite3.Connection) -> None:
+        """
+        Add the ``prompts.tag_list`` column and backfill it from prompt_tags.
 
-            # Insert all unique tag names
-            conn.execute(
-                "INSERT OR IGNORE INTO tags (name) "
-                "SELECT DISTINCT je.value FROM prompts, json_each(prompts.tags) AS je "
-                "WHERE prompts.tags IS NOT NULL AND prompts.tags != '' AND prompts.tags != '[]'"
-            )
+        Runs once: skips if the column already exists. Afterwards the column
+        is maintained by the triggers created in ``_create_triggers``.
 
-            # Populate junction table
-            conn.execute(
-                "INSERT OR IGNORE INTO prompt_tags (prompt_id, tag_id) "
-                "SELECT p.id, t.id "
-                "FROM prompts p, json_each(p.tags) AS je "
-                "JOIN tags t ON t.name = je.value "
-                "WHERE p.tags IS NOT NULL AND p.tags != '' AND p.tags != '[]'"
+        Args:
+            conn: Active database connection
+        """
+        cursor = conn.execute("PRAGMA table_info(prompts)")
+        columns = [column[1] for column in cursor.fetchall()]
+        if "tag_list" in columns:
+            return
+
+        self.logger.info("Migrating database: adding prompts.tag_list")
+        conn.execute("ALTER TABLE prompts ADD COLUMN tag_list TEXT")
+        conn.execute(
+            "UPDATE prompts SET tag_list = "
+            + TAG_LIST_SQL.format(prompt_id="prompts.id")
+            + " WHERE id IN (SELECT DISTINCT prompt_id FROM prompt_tags)"
+        )
+
+    def _migrate_prompt_normalized_text(self, conn: sqlite3.Connection) -> None:
+        """
+        Add the ``prompts.normalized_text`` column and backfill it.
+
+        Runs once: skips if the column already exists. Afterwards the column
+        is maintained by the triggers created in ``_create_triggers``.
+
+        Args:
+            conn: Active database connection
+        """
+        cursor = conn.execute("PRAGMA table_info(prompts)")
+        columns = [column[1] for column in cursor.fetchall()]
+        if "normalized_text" in columns:
+            return
+
+        self.logger.info("Migrating database: adding prompts.normalized_text")
+        conn.execute("ALTER TABLE prompts ADD COLUMN normalized_text TEXT")
+        conn.execute(
+            "UPDATE prompts SET normalized_text = "
+            + NORMALIZED_TEXT_SQL.format(text="text")
+        )
+
+    def _migrate_image_dirs(self, conn: sqlite3.Connection) -> None:
+        """
+        Add the ``generated_images.dir_id`` column and backfill it.
+
+        Runs once: skips if the column already exists. Afterwards images get
+        their directory when they are linked.
+
+        Args:
+            conn: Active database connection
+        """
+        cursor = conn.execute("PRAGMA table_info(generated_images)")
+        columns = [column[1] for column in cursor.fetchall()]
+        if "dir_id" in columns:
+            return
+
+        self.logger.info("Migrating database: adding generated_images.dir_id")
+        conn.execute("ALTER TABLE generated_images ADD COLUMN dir_id INTEGER")
+        assigned = self.assign_image_dirs(conn)
+        self.logger.info(f"Indexed directories of {assigned} images")
+
+    def _migrate_image_canonical_path(self, conn: sqlite3.Connection) -> None:
+        """
+        Add the ``generated_images.canonical_path`` column and backfill it.
+
+        Runs once: skips if the column already exists. Afterwards the column
+        is set by ``assign_image_dirs`` together with the image directory.
+
+        Args:
+            conn: Active database connection
+        """
+        cursor = conn.execute("PRAGMA table_info(generated_images)")
+        columns = [column[1] for column in cursor.fetchall()]
+        if "canonical_path" in columns:
+            return
+
+        self.logger.info("Migrating database: adding generated_images.canonical_path")
+        conn.execute("ALTER TABLE generated_images ADD COLUMN canonical_path TEXT")
+        rows = conn.execute("SELECT id, image_path FROM generated_images")
+        conn.executemany(
+            "UPDATE generated_images SET canonical_path = ? WHERE id = ?",
+            [
+                (canonical_image_path(image_path), image_id)
+                for image_id, image_path in rows.fetchall()
+            ],
+        )
+
+    def _migrate_image_blobs(self, conn: sqlite3.Connection) -> None:
+        """
+        Add blob references to generated_images and move existing JSON there.
+
+        Runs once: skips if the columns already exist. Each image's
+        workflow_data and prompt_metadata text is stored in ``blobs`` (once
+        per distinct content) and cleared from the image row. The freed pages
+        are reused by later writes; VACUUM shrinks the file.
+
+        Args:
+            conn: Active database connection
+        """
+        cursor = conn.execute("PRAGMA table_info(generated_images)")
+        columns = [column[1] for column in cursor.fetchall()]
+        if "workflow_blob_id" in columns:
+            return
+
+        self.logger.info("Migrating database: moving image metadata to blobs")
+        conn.execute("ALTER TABLE generated_images ADD COLUMN workflow_blob_id INTEGER")
+        conn.execute("ALTER TABLE generated_images ADD COLUMN metadata_blob_id INTEGER")
+
+        known: Dict[bytes, int] = {}
+        migrated = 0
+        last_id = 0
+        while True:
+            rows = conn.execute(
+                "SELECT id, workflow_data, prompt_metadata FROM generated_images "
+                "WHERE id > ? ORDER BY id LIMIT ?",
+                (last_id, BLOB_MIGRATION_BATCH),
+            ).fetchall()
+            if not rows:
+                break
+            last_id = rows[-1][0]
+            updates = [
+                (
+                    store_blob(conn, workflow, known) if workflow else None,
+                    store_blob(conn, metadata, known) if metadata else None,
+                    image_id,
+                )
+                for image_id, workflow, metadata in rows
+                if workflow or metadata
+            ]
+            conn.executemany(
+                "UPDATE generated_images SET workflow_blob_id = ?, "
+                "metadata_blob_id = ?, workflow_data = NULL, "
+                "prompt_metadata = NULL WHERE id = ?",
+                updates,
             )
+            migrated += len(updates)
 
-            tag_count = conn.execute("SELECT COUNT(*) FROM tags").fetchone()[0]
-            link_count = conn.execute("SELECT COUNT(*) FROM prompt_tags").fetchone()[0]
+        if migrated:
             self.logger.info(
-                f"Tag migration complete: {tag_count} unique tags, {link_count} prompt-tag links"
+                f"Moved metadata of {migrated} images into {len(known)} blobs; "
+                "run VACUUM to shrink the database file"
             )
 
+    def _migrate_trigram_index(self, conn: sqlite3.Connection) -> None:
+        """
+        Add the trigram substring index and the FTS vocabulary table.
+
+        Args:
+            conn: Active database connection
+        """
+        self.fts_enabled = self._create_fts_index(conn)
+        self.trigram_enabled = self._create_trigram_index(conn)
+
+    def _migrate_prompt_vectors(self, conn: sqlite3.Connection) -> None:
+        """
+        Add ``prompt_vectors`` for similarity search.
+
+        The table is created with the other tables and its trigger with the
+        schema objects. Vectors of existing prompts are computed by the
+        embedding worker in the background rather than here, so the upgrade
+        does not delay startup.
+
+        Args:
+            conn: Active database connection
+        """
+        self.logger.info(
+            "Similarity vectors of existing prompts will be computed in the background"
+        )
+
+    def _migrate_composite_indexes(self, conn: sqlite3.Connection) -> None:
+        """
+        Drop single-column indexes superseded by composite ones.
+
+        ``_create_indexes`` adds (category, created_at), (rating, created_at)
+        and (prompt_id, generation_time DESC), which serve every lookup the old
+        indexes did and also return rows in sort order.
+
+        Args:
+            conn: Active database connection
+        """
+        for name in ("idx_prompts_category", "idx_prompts_rating", "idx_prompt_images"):
+            conn.execute(f"DROP INDEX IF EXISTS {name}")
+
+    def assign_image_dirs(self, conn: sqlite3.Connection) -> int:
+        """
+        Point images without a directory at their ``image_dirs`` row.
+
+        Creates missing directories together with their path-segment
+        suffixes (see ``image_dir_suffixes``), and sets the images'
+        ``canonical_path``.
+
+        Args:
+            conn: Active database connection
+
+        Returns:
+            int: Number of images assigned a directory
+        """
+        rows = conn.execute(
+            "SELECT id, image_path FROM generated_images WHERE dir_id IS NULL"
+        ).fetchall()
+        if not rows:
+            return 0
+
+        by_dir: Dict[str, List[tuple]] = {}
+        for image_id, image_path in rows:
+            by_dir.setdefault(image_dir_key(image_path), []).append(
+                (canonical_image_path(image_path), image_id)
+            )
+
+        updates = []
+        for path, images in by_dir.items():
+            row = conn.execute(
+                "SELECT id FROM image_dirs WHERE path = ?", (path,)
+            ).fetchone()
+            if row is None:
+                dir_id = conn.execute(
+                    "INSERT INTO image_dirs (path) VALUES (?)", (path,)
+                ).lastrowid
+                conn.executemany(
+                    "INSERT OR IGNORE INTO image_dir_suffixes (suffix, dir_id) "
+                    "VALUES (?, ?)",
+                    [(suffix, dir_id) for suffix in image_dir_suffixes(path)],
+                )
+            else:
+                dir_id = row[0]
+            updates.extend((dir_id, *image) for image in images)
+
+        conn.executemany(
+            "UPDATE generated_images SET dir_id = ?, canonical_path = ? WHERE id = ?",
+            updates,
+        )
+        return len(rows)
+
+    def rebuild_tag_lists(self, conn: sqlite3.Connection) -> int:
+        """
+        Recompute ``prompts.tag_list`` from the prompt_tags junction table.
+
+        Args:
+            conn: Active database connection
+
+        Returns:
+            int: Number of prompts whose stored tag list was corrected
+        """
+        tag_list = TAG_LIST_SQL.format(prompt_id="prompts.id")
+        cursor = conn.execute(
+            f"UPDATE prompts SET tag_list = {tag_list} "
+            f"WHERE tag_list IS NOT {tag_list}"
+        )
+        return cursor.rowcount
+
+    def rebuild_tag_counts(self, conn: sqlite3.Connection) -> int:
+        """
+        Recompute ``tags.usage_count`` from the prompt_tags junction table.
+
+        Args:
+            conn: Active database connection
+
+        Returns:
+            int: Number of tags whose stored count was corrected
+        """
+        cursor = conn.execute("""
+            UPDATE tags SET usage_count = (
+                SELECT COUNT(*) FROM prompt_tags pt WHERE pt.tag_id = tags.id
+            )
+            WHERE usage_count != (
+                SELECT COUNT(*) FROM prompt_tags pt WHERE pt.tag_id = tags.id
+            )
+        """)
+        return cursor.rowcount
+
+    def _migrate_backfill_fts_index(self, conn: sqlite3.Connection) -> None:
+        """
+        Populate the FTS5 index from existing prompts.
+
+        Runs once, right after ``prompts_fts`` is created on a database that
+        already holds prompts.
+
+        Args:
+            conn: Active database connection
+        """
+        try:
+            cursor = conn.execute("SELECT COUNT(*) FROM prompts")
+            total = cursor.fetchone()[0]
+            if total == 0:
+                return
+
+            self.logger.info(f"Building full-text search index for {total} prompts")
+            conn.execute("INSERT INTO prompts_fts (prompts_fts) VALUES ('rebuild')")
+            self.logger.info("Full-text search index built")
+
         except Exception as e:
-            self.logger.error(f"Tag junction migration error: {e}")
+            self.logger.error(f"FTS backfill migration error: {e}")
 
-    def migrate_database(self) -> None:
+    def migrate_database(self) -> int:
         """
-        Apply any pending database migrations.
+        Create the schema or apply pending migrations.
+
+        ``PRAGMA user_version`` records the last migration in MIGRATIONS that
+        was applied, so an up-to-date database costs a single integer check.
+        A new database is created at SCHEMA_VERSION directly. Otherwise each
+        pending migration runs once in its own transaction together with the
+        version bump; the last one also (re)creates indexes, triggers and the
+        full-text index. A failed migration is rolled back and retried on the
+        next start.
 
-        This method serves as an entry point for future schema migrations.
-        Add new migration logic here as the database evolves.
+        Returns:
+            int: Number of migrations applied
+
+        Raises:
+            Exception: If a migration fails
         """
-        # Future migrations can be added here
-        pass
+        conn = sqlite3.connect(self.db_path)
+        try:
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.execute("PRAGMA busy_timeout = 5000")
+            self._apply_pragmas(conn)
+
+            version = conn.execute("PRAGMA user_version").fetchone()[0]
+            if version >= SCHEMA_VERSION:
+                if version > SCHEMA_VERSION:
+                    self.logger.warning(
+                        f"Database schema version {version} is newer than "
+                        f"this release ({SCHEMA_VERSION})"
+                    )
+                self._ensure_text_indexes(conn)
+                return 0
+
+            # Table rebuilds must not cascade deletes through foreign keys;
+            # the pragma is a no-op inside a transaction, so set it first
+            conn.execute("PRAGMA foreign_keys = OFF")
+            conn.execute("BEGIN IMMEDIATE")
+            exists = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'prompts'"
+            ).fetchone()
+            self._create_tables(conn)
+            if not exists:
+                self._create_schema_objects(conn)
+                conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+                conn.commit()
+                self.logger.debug(
+                    f"Created database at schema version {SCHEMA_VERSION}"
+                )
+                return 0
+            conn.commit()
+
+            pending = [m for m in MIGRATIONS if m[0] > version]
+            self.logger.info(
+                f"Migrating database schema from version {version} "
+                f"to {SCHEMA_VERSION} ({len(pending)} migrations)"
+            )
+            for step, (target, name, description) in enumerate(pending, 1):
+                conn.execute("BEGIN IMMEDIATE")
+                try:
+                    # Another process may have migrated while we waited
+                    current = conn.execute("PRAGMA user_version").fetchone()[0]
+                    if current >= target:
+                        conn.rollback()
+                        continue
+                    self.logger.info(
+                        f"Applying migration {step}/{len(pending)} "
+                        f"(version {target}): {description}"
+                    )
+                    start = time.perf_counter()
+                    getattr(self, name)(conn)
+                    if target == SCHEMA_VERSION:
+                        self._create_schema_objects(conn)
+                    conn.execute(f"PRAGMA user_version = {target}")
+                    conn.commit()
+                except Exception as e:
+                    conn.rollback()
+                    self.logger.error(
+                        f"Migration to schema version {target} failed: {e}"
+                    )
+                    raise
+                self.logger.info(
+                    f"Migration {target} done in {time.perf_counter() - start:.2f}s"
+                )
+            self._ensure_text_indexes(conn)
+            return len(pending)
+        finally:
+            conn.close()
+
+    def _create_schema_objects(self, conn: sqlite3.Connection) -> None:
+        """Create indexes, triggers and the text indexes for the current schema."""
+        self._create_indexes(conn)
+        self.fts_enabled = self._create_fts_index(conn)
+        self.trigram_enabled = self._create_trigram_index(conn)
+
+    def _ensure_text_indexes(self, conn: sqlite3.Connection) -> None:
+        """
+        Check the full-text and trigram indexes of an up-to-date database.
+
+        Creates (and backfills) either one if it is missing, e.g. for a
+        database first opened by an SQLite build without FTS5, and sets
+        ``fts_enabled`` and ``trigram_enabled``.
+        """
+        self.fts_enabled = self._ensure_text_index(
+            conn, "prompts_fts_vocab", self._create_fts_index
+        )
+        self.trigram_enabled = self._ensure_text_index(
+            conn, "prompts_trigram", self._create_trigram_index
+        )
+
+    def _ensure_text_index(
+        self,
+        conn: sqlite3.Connection,
+        table: str,
+        create: Callable[[sqlite3.Connection], bool],
+    ) -> bool:
+        """Return True if ``table`` can be queried, else try ``create``."""
+        try:
+            # Read a row: fts5vocab only notices a missing FTS table then
+            conn.execute(f"SELECT 1 FROM {table} LIMIT 1").fetchall()
+            return True
+        except sqlite3.OperationalError:
+            pass
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            available = create(conn)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        return available
 
     def vacuum_database(self) -> None:
         """
@@ -464,6 +1698,51 @@ class PromptModel:
         except Exception as e:
             self.logger.error(f"Error vacuuming database: {e}")
 
+    def optimize_database(self, analyze: bool = False) -> None:
+        """
+        Refresh the query planner statistics.
+
+        Runs ``PRAGMA optimize``, which re-analyzes only tables whose
+        statistics are stale. A full (sampled) ANALYZE is run when requested
+        or when no statistics exist yet.
+
+        Args:
+            analyze: Force ANALYZE of every table and index
+        """
+        with self.get_connection() as conn:
+            conn.execute(f"PRAGMA analysis_limit = {ANALYSIS_LIMIT}")
+            has_stats = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE name = 'sqlite_stat1'"
+            ).fetchone()
+            if analyze or not has_stats:
+                conn.execute("ANALYZE")
+            conn.execute("PRAGMA optimize")
+            conn.commit()
+        self.last_optimized = time.time()
+
+    def profile_info(self) -> dict:
+        """
+        Describe the active SQLite performance profile.
+
+        Returns:
+            dict: Profile name, configured settings and the values read back
+            from the writer connection
+        """
+        with self.get_connection() as conn:
+            active = {}
+            for name in self.pragmas:
+                value = conn.execute(f"PRAGMA {name}").fetchone()[0]
+                if name in PRAGMA_KEYWORDS:
+                    value = PRAGMA_KEYWORDS[name][value]
+                active[name] = value
+            active["journal_mode"] = conn.execute("PRAGMA journal_mode").fetchone()[0]
+        return {
+            "profile": self.sqlite_profile,
+            "settings": dict(self.pragmas),
+            "active": active,
+            "last_optimized": self.last_optimized,
+        }
+
     def get_database_info(self) -> dict:
         """
         Get information about the database.
@@ -472,7 +1751,7 @@ class PromptModel:
             dict: Database statistics and information
         """
         try:
-            with self.get_connection() as conn:
+            with self.get_read_connection() as conn:
                 cursor = conn.execute("SELECT COUNT(*) as total_prompts FROM prompts")
                 total_prompts = cursor.fetchone()["total_prompts"]
 
@@ -502,21 +1781,51 @@ class PromptModel:
             self.logger.error(f"Error getting database info: {e}")
             return {}
 
-    def backup_database(self, backup_path: str) -> bool:
+    def backup_database(
+        self,
+        backup_path: str,
+        pages: int = BACKUP_PAGES_PER_STEP,
+        sleep: float = BACKUP_STEP_SLEEP,
+    ) -> bool:
         """
-        Create a backup of the database.
+        Create a consistent online backup of the database.
+
+        Uses the SQLite backup API on a dedicated connection, copying
+        ``pages`` pages per step and sleeping between steps so other threads
+        keep running. The source connection holds a read transaction for the
+        whole copy, so every step reads the same WAL snapshot: writers are
+        never blocked and the backup never restarts. The copy is written to a
+        temporary file and renamed into place, and is switched out of WAL
+        mode so it is a single self-contained file.
 
         Args:
             backup_path: Path where the backup should be saved
+            pages: Pages copied per step (-1 copies everything in one step)
+            sleep: Seconds to sleep between steps
 
         Returns:
             bool: True if backup was successful, False otherwise
         """
+        temp_path = f"{backup_path}.partial"
         try:
-            import shutil
-
-            shutil.copy2(self.db_path, backup_path)
+            source = sqlite3.connect(self.db_path)
+            try:
+                target = sqlite3.connect(temp_path)
+                try:
+                    source.execute("BEGIN")
+                    source.execute("SELECT COUNT(*) FROM sqlite_master").fetchone()
+                    source.backup(target, pages=pages, sleep=sleep)
+                    source.rollback()
+                    target.execute("PRAGMA journal_mode = DELETE")
+                finally:
+                    target.close()
+            finally:
+                source.close()
+            os.replace(temp_path, backup_path)
             return True
         except Exception as e:
             self.logger.error(f"Error creating database backup: {e}")
+            for path in (temp_path, temp_path + "-wal", temp_path + "-shm"):
+                if os.path.exists(path):
+                    os.unlink(path)
             return False
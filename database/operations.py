@@ -3,32 +3,568 @@ Database operations for KikoTextEncode prompt storage and retrieval.
 """
 
 import sqlite3
+import base64
+import csv
 import json
 import datetime
+import gzip
+import io
+import math
 import os
-from typing import Optional, List, Dict, Any, Union
+import re
+import shutil
+import unicodedata
+from concurrent.futures import ThreadPoolExecutor
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    Union,
+)
 
-from .models import PromptModel
+from .models import (
+    DEFAULT_READ_POOL_SIZE,
+    DEFAULT_SQLITE_PROFILE,
+    PromptModel,
+    canonical_image_path,
+    image_dir_key,
+    load_blob,
+    resolve_sqlite_pragmas,
+    store_blob,
+)
+from .result_cache import DEFAULT_RESULT_CACHE_SIZE, ResultCache, cached_result
+from .sql_utils import FTS_TOKEN_RE, SQL_CHUNK_SIZE, chunked, sql_placeholders
 
 # Import logging system
 try:
+    from ..utils.hashing import (
+        LSH_BAND_BYTES,
+        LSH_BANDS,
+        generate_prompt_hash,
+        jaccard_similarity,
+        minhash_signature,
+        pack_signature,
+        pack_term_vector,
+        prompt_shingles,
+        term_vector,
+    )
     from ..utils.logging_config import get_logger
 except ImportError:
     import sys
 
     current_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
     sys.path.insert(0, current_dir)
+    from utils.hashing import (
+        LSH_BAND_BYTES,
+        LSH_BANDS,
+        generate_prompt_hash,
+        jaccard_similarity,
+        minhash_signature,
+        pack_signature,
+        pack_term_vector,
+        prompt_shingles,
+        term_vector,
+    )
     from utils.logging_config import get_logger
 
 
-# Subquery to fetch tags from junction table, embedded in SELECT statements
-TAG_SUBQUERY = (
-    "(SELECT GROUP_CONCAT(t.name, '|||') "
-    "FROM prompt_tags pt JOIN tags t ON pt.tag_id = t.id "
-    "WHERE pt.prompt_id = prompts.id) AS _tag_list"
+def _build_fts_query(text: str, prefix: bool = True) -> Optional[str]:
+    """Turn free-form search text into a safe FTS5 MATCH expression.
+
+    Each word is quoted so FTS5 operators and punctuation in prompts (``:``,
+    ``(``, ``-`` ...) are treated as plain text. Words are ANDed together.
+
+    Args:
+        text: User-supplied search text.
+        prefix: Match each word as a prefix (``"sun"*`` matches "sunset").
+
+    Returns:
+        MATCH expression, or None if the text contains no searchable words.
+    """
+    tokens = FTS_TOKEN_RE.findall(text)
+    if not tokens:
+        return None
+    suffix = "*" if prefix else ""
+    return " AND ".join(f'"{token}"{suffix}' for token in tokens)
+
+
+# A LIKE pattern can use the trigram index when it has three consecutive
+# literal (non-wildcard) characters
+_TRIGRAM_RUN_RE = re.compile(r"[^%_]{3}")
+
+# A match verified through the trigram index costs about as much as this many
+# prompts checked by a LIKE scan
+TRIGRAM_MATCH_COST = 4
+
+
+def encode_cursor(*values: Any) -> str:
+    """Encode keyset pagination values as an opaque URL-safe cursor string."""
+    raw = json.dumps(list(values), separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, size: int = 2) -> List[Any]:
+    """Decode a cursor produced by :func:`encode_cursor`.
+
+    Args:
+        cursor: Opaque cursor string from a previous page.
+        size: Number of key values the cursor must contain.
+
+    Returns:
+        List of key values, in the order they were encoded.
+
+    Raises:
+        ValueError: If the cursor is malformed.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except (ValueError, UnicodeError) as e:
+        raise ValueError(f"Invalid pagination cursor: {cursor!r}") from e
+    if not isinstance(values, list) or len(values) != size:
+        raise ValueError(f"Invalid pagination cursor: {cursor!r}")
+    return values
+
+
+DEFAULT_BACKUP_RETENTION = 7
+
+
+def _unique(items: Iterable[Any]) -> List[Any]:
+    """Drop duplicates and falsy values from ``items``, preserving order."""
+    return [item for item in dict.fromkeys(items) if item]
+
+
+def _shared_dir_depth(path: str, other: str) -> int:
+    """Count the trailing directory names two canonical image paths share."""
+    depth = 0
+    for a, b in zip(path.lower().split("/")[-2::-1], other.lower().split("/")[-2::-1]):
+        if a != b:
+            break
+        depth += 1
+    return depth
+
+
+def _loads_or_none(text: Optional[str]) -> Any:
+    """Parse JSON text; None when it is empty or invalid."""
+    try:
+        return json.loads(text) if text else None
+    except (json.JSONDecodeError, TypeError):
+        return None
+
+
+def _image_prompt_info(row: sqlite3.Row, blobs: "_BlobCache") -> Dict[str, Any]:
+    """Build the :meth:`PromptDatabase.get_image_prompt_info` result for a row."""
+    return {
+        "prompt_id": row["prompt_id"],
+        "text": row["text"],
+        "category": row["category"],
+        "tags": json.loads(row["tag_list"]) if row["tag_list"] else [],
+        "rating": row["rating"],
+        "notes": row["notes"],
+        "workflow_data": _loads_or_none(blobs.text(row, "workflow_data")),
+        "prompt_metadata": _loads_or_none(blobs.text(row, "prompt_metadata")),
+        "generation_time": row["generation_time"],
+    }
+
+
+# Image JSON fields kept in the blobs table, with the column referencing each
+BLOB_FIELDS = {
+    "workflow_data": "workflow_blob_id",
+    "prompt_metadata": "metadata_blob_id",
+}
+
+
+# Image fields returned by the list methods, in column order
+IMAGE_FIELDS = (
+    "id",
+    "prompt_id",
+    "image_path",
+    "filename",
+    "generation_time",
+    "file_size",
+    "width",
+    "height",
+    "format",
+    "workflow_data",
+    "prompt_metadata",
+    "parameters",
+)
+
+# Fields holding generation metadata as JSON: the expensive ones to read,
+# only needed by detail views
+IMAGE_METADATA_FIELDS = ("workflow_data", "prompt_metadata", "parameters")
+
+# What a gallery grid needs to show an image
+IMAGE_SUMMARY_FIELDS = tuple(f for f in IMAGE_FIELDS if f not in IMAGE_METADATA_FIELDS)
+
+
+def resolve_image_fields(
+    fields: Optional[Union[str, Iterable[str]]] = None,
+    include_metadata: bool = True,
+) -> Optional[Tuple[str, ...]]:
+    """Validate an image field projection.
+
+    Args:
+        fields: Field names, or a comma-separated string of them; None or
+            empty selects every field
+        include_metadata: If False, drop ``IMAGE_METADATA_FIELDS``
+
+    Returns:
+        Tuple of field names in ``IMAGE_FIELDS`` order, or None for all
+
+    Raises:
+        ValueError: If a field name is unknown
+    """
+    if isinstance(fields, str):
+        fields = [f.strip() for f in fields.split(",")]
+    selected = _unique(fields or ())
+    unknown = [f for f in selected if f not in IMAGE_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown image fields: {', '.join(unknown)}")
+    if not selected:
+        if include_metadata:
+            return None
+        return IMAGE_SUMMARY_FIELDS
+    return tuple(
+        f
+        for f in IMAGE_FIELDS
+        if f in selected and (include_metadata or f not in IMAGE_METADATA_FIELDS)
+    )
+
+
+def _image_columns(fields: Optional[Sequence[str]], *required: str) -> str:
+    """Return the ``gi.`` SELECT list for image ``fields`` (None = all).
+
+    ``id`` and any ``required`` fields are always selected; blob-backed
+    fields bring their blob reference along.
+    """
+    selected = _unique(("id",) + required + tuple(fields or IMAGE_FIELDS))
+    columns = []
+    for field in selected:
+        columns.append(f"gi.{field}")
+        if field in BLOB_FIELDS:
+            columns.append(f"gi.{BLOB_FIELDS[field]}")
+    return ", ".join(columns)
+
+
+class _BlobCache:
+    """Blob-backed image fields for one read.
+
+    A blob is only fetched and decompressed when a row that refers to it is
+    converted, and at most once per read. Callers parse the returned text
+    per row, so rows that share a blob never share parsed objects.
+    """
+
+    def __init__(self, conn: sqlite3.Connection):
+        self._conn = conn
+        self._texts: Dict[int, Optional[str]] = {}
+
+    def text(self, row: sqlite3.Row, field: str) -> Optional[str]:
+        """Return the JSON text of a blob-backed field of an image row."""
+        blob_id = row[BLOB_FIELDS[field]]
+        if blob_id is None:
+            # Rows written before blob storage keep their JSON inline
+            return row[field]
+        if blob_id not in self._texts:
+            blob = self._conn.execute(
+                "SELECT data FROM blobs WHERE id = ?", (blob_id,)
+            ).fetchone()
+            self._texts[blob_id] = load_blob(blob[0]) if blob else None
+        return self._texts[blob_id]
+
+
+IMAGE_LINK_SQL = """
+    INSERT OR IGNORE INTO generated_images
+    (prompt_id, image_path, filename, file_size, width, height, format,
+     workflow_blob_id, metadata_blob_id, parameters)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+# Prompt + image metadata of images whose {column} is one of the given values
+IMAGE_PROMPT_INFO_SQL = """
+    SELECT gi.id AS image_id, gi.canonical_path, gi.filename, gi.prompt_id,
+           p.text, p.category, p.rating, p.notes, gi.workflow_data,
+           gi.prompt_metadata, gi.workflow_blob_id, gi.metadata_blob_id,
+           gi.generation_time, p.tag_list
+    FROM generated_images gi
+    JOIN prompts p ON gi.prompt_id = p.id
+    WHERE gi.{column} IN ({placeholders})
+"""
+
+# Duplicate detection keys shared by more than one prompt, read from the
+# normalized_text index without touching the table rows
+DUPLICATE_KEYS_SQL = (
+    "SELECT normalized_text FROM prompts "
+    "GROUP BY normalized_text HAVING COUNT(*) > 1"
+)
+
+# Stores a prompt's MinHash signature unless the prompt was deleted or its
+# text changed since the signature was computed
+SIGNATURE_SQL = (
+    "INSERT OR REPLACE INTO prompt_signatures (prompt_id, signature) "
+    "SELECT id, ? FROM prompts WHERE id = ? AND text = ?"
+)
+
+# Word-shingle Jaccard similarity at which prompts are near duplicates
+DEFAULT_NEAR_DUPLICATE_THRESHOLD = 0.6
+
+
+def _signature_params(prompt_id: int, text: str) -> Tuple[bytes, int, str]:
+    """Build the SIGNATURE_SQL parameters for one prompt."""
+    return (pack_signature(minhash_signature(text)), prompt_id, text)
+
+
+# Stores a prompt's term vector unless the prompt was deleted or its text
+# changed since the vector was computed
+VECTOR_SQL = (
+    "INSERT OR REPLACE INTO prompt_vectors (prompt_id, buckets, weights) "
+    "SELECT id, ?, ? FROM prompts WHERE id = ? AND text = ?"
+)
+
+
+def _vector_params(prompt_id: int, text: str) -> Tuple[bytes, bytes, int, str]:
+    """Build the VECTOR_SQL parameters for one prompt."""
+    return (*pack_term_vector(term_vector(text)), prompt_id, text)
+
+
+# Image rows examined per cleanup_missing_images slice
+MISSING_IMAGE_SLICE_SIZE = 5000
+
+
+def _fold_name(name: str) -> str:
+    """Case- and Unicode-normalization-insensitive form of a file name."""
+    return unicodedata.normalize("NFC", name).casefold()
+
+
+def _list_directory(directory: str) -> Optional[Set[str]]:
+    """Return the entry names of ``directory`` with a single ``os.scandir``.
+
+    Returns an empty set if the directory does not exist, and None if it
+    exists but cannot be read (so callers can leave its rows alone).
+    """
+    try:
+        with os.scandir(directory or os.curdir) as entries:
+            return {entry.name for entry in entries}
+    except (FileNotFoundError, NotADirectoryError):
+        return set()
+    except OSError:
+        return None
+
+
+EXPORT_FORMATS = ("json", "jsonl", "csv")
+
+# Prompt columns written by CSV exports, in order
+EXPORT_CSV_FIELDS = (
+    "id",
+    "text",
+    "category",
+    "tags",
+    "rating",
+    "notes",
+    "hash",
+    "created_at",
+    "updated_at",
 )
 
 
+# Finds the start of the prompt array in an exported JSON document
+_JSON_PROMPTS_KEY_RE = re.compile(r'"prompts"\s*:\s*\[')
+
+
+def import_format_from_filename(filename: str) -> Optional[str]:
+    """Guess an import format from a file name, ignoring a ``.gz`` suffix."""
+    name = filename.lower()
+    if name.endswith(".gz"):
+        name = name[:-3]
+    ext = os.path.splitext(name)[1].lstrip(".")
+    ext = "jsonl" if ext == "ndjson" else ext
+    return ext if ext in EXPORT_FORMATS else None
+
+
+def _iter_json_records(
+    stream: io.TextIOBase, read_size: int = 1 << 16
+) -> Iterator[Any]:
+    """Incrementally decode the prompt array of an exported JSON document.
+
+    Accepts either a bare ``[...]`` array or an export document with a
+    ``"prompts": [...]`` key. Only the current element and one read buffer
+    are held in memory.
+
+    Raises:
+        ValueError: If the document is not a prompt array or is truncated.
+    """
+    decoder = json.JSONDecoder()
+    buf, pos, eof = "", 0, False
+
+    def fill() -> None:
+        nonlocal buf, pos, eof
+        chunk = stream.read(read_size)
+        eof = not chunk
+        buf, pos = buf[pos:] + chunk, 0
+
+    def skip(chars: str) -> None:
+        nonlocal pos
+        while True:
+            while pos < len(buf) and buf[pos] in chars:
+                pos += 1
+            if pos < len(buf) or eof:
+                return
+            fill()
+
+    skip(" \t\r\n")
+    if buf[pos : pos + 1] == "{":
+        while True:
+            match = _JSON_PROMPTS_KEY_RE.search(buf, pos)
+            if match:
+                pos = match.end()
+                break
+            if eof:
+                raise ValueError('JSON import has no "prompts" array')
+            pos = max(pos, len(buf) - 32)
+            fill()
+    elif buf[pos : pos + 1] == "[":
+        pos += 1
+    else:
+        raise ValueError("JSON import must be an array or an export document")
+
+    while True:
+        skip(" \t\r\n,")
+        if pos >= len(buf):
+            raise ValueError("JSON import ended before the prompt array closed")
+        if buf[pos] == "]":
+            return
+        try:
+            record, end = decoder.raw_decode(buf, pos)
+        except json.JSONDecodeError:
+            if eof:
+                raise ValueError("JSON import contains an invalid prompt record")
+            fill()
+            continue
+        # A value running up to the buffer end may be cut short; read on
+        if end >= len(buf) and not eof:
+            fill()
+            continue
+        pos = end
+        yield record
+
+
+def _csv_list(values: Iterable[str]) -> str:
+    """Encode a list field as a JSON array for one CSV cell."""
+    return json.dumps(list(values), ensure_ascii=False)
+
+
+def _parse_csv_list(value: Any, legacy_sep: str) -> List[Any]:
+    """Decode a list field written by :func:`_csv_list`.
+
+    Lists from JSON records pass through. Cells that are not a JSON array
+    come from older CSV exports and are split on ``legacy_sep``.
+    """
+    if not value:
+        return []
+    if not isinstance(value, str):
+        return value if isinstance(value, list) else []
+    if value.lstrip().startswith("["):
+        try:
+            decoded = json.loads(value)
+        except json.JSONDecodeError:
+            decoded = None
+        if isinstance(decoded, list):
+            return decoded
+    return value.split(legacy_sep)
+
+
+def _iter_jsonl_records(stream: io.TextIOBase) -> Iterator[Any]:
+    """Decode one JSON value per non-blank line."""
+    for line_no, line in enumerate(stream, 1):
+        line = line.strip()
+        if line:
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"Invalid JSON on line {line_no}: {e}") from e
+
+
+def _resolve_read_pool_size() -> int:
+    """Read the reader pool size from PromptManagerConfig, if available."""
+    try:
+        from py.config import PromptManagerConfig
+
+        return int(PromptManagerConfig.READ_POOL_SIZE)
+    except Exception:
+        return DEFAULT_READ_POOL_SIZE
+
+
+def _resolve_result_cache_size() -> int:
+    """Read how many query results to cache from PromptManagerConfig."""
+    try:
+        from py.config import PromptManagerConfig
+
+        return int(PromptManagerConfig.RESULT_CACHE_SIZE)
+    except Exception:
+        return DEFAULT_RESULT_CACHE_SIZE
+
+
+def _resolve_sqlite_profile() -> Tuple[str, Dict[str, Any]]:
+    """Read the SQLite profile and PRAGMA overrides from PromptManagerConfig.
+
+    An invalid profile or override is logged and the default profile used.
+    """
+    try:
+        from py.config import PromptManagerConfig
+
+        profile = PromptManagerConfig.SQLITE_PROFILE
+        overrides = dict(PromptManagerConfig.SQLITE_PRAGMAS or {})
+    except Exception:
+        return DEFAULT_SQLITE_PROFILE, {}
+    try:
+        resolve_sqlite_pragmas(profile, overrides)
+    except ValueError as e:
+        get_logger("prompt_manager.database").warning(
+            f"{e}; using the {DEFAULT_SQLITE_PROFILE!r} SQLite profile"
+        )
+        return DEFAULT_SQLITE_PROFILE, {}
+    return profile, overrides
+
+
+def _resolve_backup_retention() -> int:
+    """Read how many backups of each kind to keep from PromptManagerConfig."""
+    try:
+        from py.config import PromptManagerConfig
+
+        return int(PromptManagerConfig.BACKUP_RETENTION)
+    except Exception:
+        return DEFAULT_BACKUP_RETENTION
+
+
+def _resolve_near_duplicate_threshold() -> Optional[float]:
+    """Near-duplicate threshold for duplicate scans, None if fuzzy search is off."""
+    try:
+        from py.config import PromptManagerConfig
+
+        if not PromptManagerConfig.ENABLE_FUZZY_SEARCH:
+            return None
+        return float(PromptManagerConfig.NEAR_DUPLICATE_THRESHOLD)
+    except Exception:
+        return None
+
+
+def _resolve_similarity_search() -> bool:
+    """Whether similarity search is on (ENABLE_SIMILARITY_SEARCH, default on)."""
+    try:
+        from py.config import PromptManagerConfig
+
+        return bool(PromptManagerConfig.ENABLE_SIMILARITY_SEARCH)
+    except Exception:
+        return True
+
+
 def _resolve_db_path(db_path: Optional[str] = None) -> str:
     """Resolve the database path from config, falling back to defaults.
 
@@ -78,7 +614,15 @@ class PromptDatabase:
         self.logger = get_logger("prompt_manager.database")
         db_path = _resolve_db_path(db_path)
         self.logger.debug(f"Initializing database operations with path: {db_path}")
-        self.model = PromptModel(db_path)
+        sqlite_profile, sqlite_pragmas = _resolve_sqlite_profile()
+        self.model = PromptModel(
+            db_path,
+            read_pool_size=_resolve_read_pool_size(),
+            sqlite_profile=sqlite_profile,
+            sqlite_pragmas=sqlite_pragmas,
+        )
+        # Aggregate reads repeated by page loads, dropped on every write
+        self.result_cache = ResultCache(_resolve_result_cache_size())
         self.logger.debug("Database operations initialized successfully")
 
     def save_prompt(
@@ -138,10 +682,131 @@ class PromptDatabase:
             prompt_id = cursor.lastrowid
             if tags:
                 self._sync_prompt_tags(conn, prompt_id, tags)
+            conn.execute(SIGNATURE_SQL, _signature_params(prompt_id, text.strip()))
+            self.model.note_prompt_changes([prompt_id])
             conn.commit()
             self.logger.debug(f"Successfully saved prompt with ID: {prompt_id}")
             return prompt_id
 
+    def bulk_upsert_prompts(
+        self,
+        prompts: Iterable[Dict[str, Any]],
+        chunk_size: int = SQL_CHUNK_SIZE,
+        merge_tags: bool = False,
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Insert many prompts, skipping any whose hash is already stored.
+
+        Entries are de-duplicated by hash in memory (first one wins) and
+        written with ``INSERT ... ON CONFLICT(hash) DO NOTHING`` in one
+        transaction per chunk. Existing prompts are left unchanged unless
+        ``merge_tags`` is set, in which case the entry's tags are added.
+
+        Args:
+            prompts: Iterable of dicts with ``text`` and ``hash`` keys and
+                optional ``category``, ``tags``, ``rating``, ``notes``,
+                ``created_at`` and ``updated_at``
+            chunk_size: Number of prompts written per transaction
+            merge_tags: Also add tags to prompts that already exist
+
+        Returns:
+            Mapping of hash to ``{"id": prompt_id, "created": bool}``
+
+        Raises:
+            ValueError: If an entry has empty text, no hash or an invalid
+                rating. Chunks written before the bad entry stay committed.
+        """
+        results: Dict[str, Dict[str, Any]] = {}
+        pending: Dict[str, Dict[str, Any]] = {}
+
+        for entry in prompts:
+            text = (entry.get("text") or "").strip()
+            prompt_hash = entry.get("hash")
+            rating = entry.get("rating")
+            if not text:
+                raise ValueError("Prompt text cannot be empty")
+            if not prompt_hash:
+                raise ValueError("Prompt hash is required for bulk upsert")
+            if rating is not None and (rating < 1 or rating > 5):
+                raise ValueError("Rating must be between 1 and 5")
+            if prompt_hash in results or prompt_hash in pending:
+                continue
+            pending[prompt_hash] = {**entry, "text": text}
+            if len(pending) >= chunk_size:
+                results.update(self._upsert_prompt_chunk(pending, merge_tags))
+                pending = {}
+        if pending:
+            results.update(self._upsert_prompt_chunk(pending, merge_tags))
+        return results
+
+    def _upsert_prompt_chunk(
+        self, entries: Dict[str, Dict[str, Any]], merge_tags: bool = False
+    ) -> Dict[str, Dict[str, Any]]:
+        """Write one chunk for :meth:`bulk_upsert_prompts` in a transaction."""
+        hashes = list(entries)
+        marks = sql_placeholders(hashes)
+        now = datetime.datetime.now(datetime.timezone.utc).isoformat()
+        with self.model.get_connection() as conn:
+            existing = {
+                row["hash"]
+                for row in conn.execute(
+                    f"SELECT hash FROM prompts WHERE hash IN ({marks})", hashes
+                ).fetchall()
+            }
+            conn.executemany(
+                """
+                INSERT INTO prompts (
+                    text, category, tags, rating, notes, hash, created_at, updated_at
+                ) VALUES (?, ?, NULL, ?, ?, ?, ?, ?)
+                ON CONFLICT(hash) DO NOTHING
+                """,
+                [
+                    (
+                        entry["text"],
+                        entry.get("category"),
+                        entry.get("rating"),
+                        entry.get("notes"),
+                        prompt_hash,
+                        entry.get("created_at") or now,
+                        entry.get("updated_at") or entry.get("created_at") or now,
+                    )
+                    for prompt_hash, entry in entries.items()
+                    if prompt_hash not in existing
+                ],
+            )
+            ids = {
+                row["hash"]: row["id"]
+                for row in conn.execute(
+                    f"SELECT id, hash FROM prompts WHERE hash IN ({marks})", hashes
+                ).fetchall()
+            }
+
+            created = [h for h in hashes if h not in existing]
+            conn.executemany(
+                SIGNATURE_SQL,
+                [_signature_params(ids[h], entries[h]["text"]) for h in created],
+            )
+            tagged = hashes if merge_tags else created
+            tag_map = self._ensure_tags(
+                conn, [tag for h in tagged for tag in entries[h].get("tags") or []]
+            )
+            conn.executemany(
+                "INSERT OR IGNORE INTO prompt_tags (prompt_id, tag_id) VALUES (?, ?)",
+                [
+                    (ids[h], tag_map[tag])
+                    for h in tagged
+                    for tag in entries[h].get("tags") or []
+                    if tag in tag_map
+                ],
+            )
+            self.model.note_prompt_changes(ids[h] for h in tagged)
+            conn.commit()
+
+        self.logger.debug(
+            f"Bulk upsert: {len(created)} new, {len(existing)} existing prompts"
+        )
+        return {h: {"id": ids[h], "created": h not in existing} for h in hashes}
+
     def get_prompt_by_id(self, prompt_id: int) -> Optional[Dict[str, Any]]:
         """
         Get a prompt by its ID.
@@ -152,9 +817,9 @@ class PromptDatabase:
         Returns:
             Dict containing prompt data or None if not found
         """
-        with self.model.get_connection() as conn:
+        with self.model.get_read_connection() as conn:
             cursor = conn.execute(
-                f"SELECT prompts.*, {TAG_SUBQUERY} FROM prompts WHERE id = ?",
+                "SELECT prompts.* FROM prompts WHERE id = ?",
                 (prompt_id,),
             )
             row = cursor.fetchone()
@@ -170,9 +835,9 @@ class PromptDatabase:
         Returns:
             Dict containing prompt data or None if not found
         """
-        with self.model.get_connection() as conn:
+        with self.model.get_read_connection() as conn:
             cursor = conn.execute(
-                f"SELECT prompts.*, {TAG_SUBQUERY} FROM prompts WHERE hash = ?",
+                "SELECT prompts.* FROM prompts WHERE hash = ?",
                 (prompt_hash,),
             )
             row = cursor.fetchone()
@@ -191,10 +856,17 @@ class PromptDatabase:
         limit: int = 100,
         offset: int = 0,
         tag_partial: bool = False,
+        prefix: bool = True,
+        rank: bool = False,
+        substring: bool = False,
     ) -> List[Dict[str, Any]]:
         """
         Search prompts with various filters.
 
+        Text matching uses the FTS5 word index when available and falls back
+        to substring LIKE matching otherwise. Substring matches are answered
+        from the trigram index when possible.
+
         Args:
             text: Text to search for in prompt content
             category: Filter by category
@@ -207,16 +879,34 @@ class PromptDatabase:
             limit: Maximum number of results
             offset: Number of results to skip
             tag_partial: Use LIKE matching for tags instead of exact match
+            prefix: Match each search word as a prefix (FTS only)
+            rank: Order text matches by BM25 relevance instead of recency
+                (FTS only)
+            substring: Match ``text`` anywhere in the prompt, including
+                inside words ("berpun" finds "cyberpunk"), instead of by words
 
         Returns:
             List of dictionaries containing prompt data
         """
-        query_parts = [f"SELECT prompts.*, {TAG_SUBQUERY} FROM prompts WHERE 1=1"]
-        params = []
+        fts_query = None
+        if text and self.model.fts_enabled and not substring:
+            fts_query = _build_fts_query(text, prefix=prefix)
 
-        if text:
-            query_parts.append("AND text LIKE ?")
-            params.append(f"%{text}%")
+        if fts_query:
+            query_parts = [
+                "SELECT prompts.* FROM prompts "
+                "JOIN prompts_fts ON prompts_fts.rowid = prompts.id "
+                "WHERE prompts_fts MATCH ?"
+            ]
+            params = [fts_query]
+        else:
+            query_parts = ["SELECT prompts.* FROM prompts WHERE 1=1"]
+            params = []
+            if text:
+                query_parts.append(
+                    "AND " + self._substring_condition("prompts", text, limit + offset)
+                )
+                params.append(f"%{text}%")
 
         if category:
             query_parts.append("AND category = ?")
@@ -225,10 +915,12 @@ class PromptDatabase:
         if tags:
             for tag in tags:
                 if tag_partial:
+                    # Match tag names first, then their links by tag_id
                     query_parts.append(
                         "AND prompts.id IN ("
                         "  SELECT pt.prompt_id FROM prompt_tags pt"
-                        "  JOIN tags t ON pt.tag_id = t.id WHERE t.name LIKE ?)"
+                        "  WHERE pt.tag_id IN ("
+                        "    SELECT id FROM tags WHERE name LIKE ?))"
                     )
                     params.append(f"%{tag}%")
                 else:
@@ -240,31 +932,28 @@ class PromptDatabase:
                     params.append(tag)
 
         if folder:
-            # Escape LIKE wildcards in the folder name
-            safe_folder = (
-                folder.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
-            )
+            # A folder matches directories where it is a run of whole path
+            # segments: equal to a stored suffix, or a "/"-bounded prefix of one
+            self._ensure_image_dirs()
+            folder_key = folder.replace("\\", "/").strip("/")
             query_parts.append(
                 "AND prompts.id IN ("
-                "  SELECT DISTINCT prompt_id FROM generated_images"
-                "  WHERE image_path LIKE ? ESCAPE '\\'"
-                "  OR image_path LIKE ? ESCAPE '\\'"
-                "  OR image_path LIKE ? ESCAPE '\\'"
-                ")"
+                "  SELECT gi.prompt_id FROM generated_images gi"
+                "  WHERE gi.dir_id IN ("
+                "    SELECT dir_id FROM image_dir_suffixes"
+                "    WHERE suffix = ? OR (suffix >= ? AND suffix < ?)))"
             )
-            # Pattern 1: folder between forward slashes (Unix + normalized Windows)
-            params.append(f"%/{safe_folder}/%")
-            # Pattern 2: folder between backslashes (Windows native)
-            params.append(f"%\\\\{safe_folder}\\\\%")
-            # Pattern 3: folder at start of a relative path
-            params.append(f"{safe_folder}/%")
+            params.extend([folder_key, folder_key + "/", folder_key + "0"])
 
+        # Ratings are five values, so a rating range is never selective;
+        # unary + keeps the planner walking created_at for the page instead
+        # of sorting every prompt in the range
         if rating_min is not None:
-            query_parts.append("AND rating >= ?")
+            query_parts.append("AND +rating >= ?")
             params.append(rating_min)
 
         if rating_max is not None:
-            query_parts.append("AND rating <= ?")
+            query_parts.append("AND +rating <= ?")
             params.append(rating_max)
 
         if date_from:
@@ -275,12 +964,16 @@ class PromptDatabase:
             query_parts.append("AND created_at <= ?")
             params.append(date_to)
 
-        query_parts.append("ORDER BY created_at DESC LIMIT ? OFFSET ?")
+        if fts_query and rank:
+            query_parts.append("ORDER BY bm25(prompts_fts), created_at DESC")
+        else:
+            query_parts.append("ORDER BY created_at DESC")
+        query_parts.append("LIMIT ? OFFSET ?")
         params.extend([limit, offset])
 
         query = " ".join(query_parts)
 
-        with self.model.get_connection() as conn:
+        with self.model.get_read_connection() as conn:
             cursor = conn.execute(query, params)
             rows = cursor.fetchall()
             prompts = [self._row_to_dict(row) for row in rows]
@@ -291,30 +984,105 @@ class PromptDatabase:
 
             return prompts
 
-    def get_recent_prompts(self, limit: int = 10, offset: int = 0) -> Dict[str, Any]:
+    def _substring_condition(
+        self, alias: str, text: str, limit: Optional[int] = None
+    ) -> str:
+        """SQL condition for ``{alias}.text LIKE ?`` bound to ``%text%``.
+
+        Uses the trigram index when it is cheaper than the plain LIKE; the
+        results are the same. A LIKE scan newest first stops after ``limit``
+        matches, visiting about ``limit * prompts / matches`` rows, while the
+        index verifies every match. Matches are therefore counted through the
+        index only up to the break-even point, so a common needle costs a
+        short probe and a rare one is found through the index.
+
+        Args:
+            alias: Alias of the prompts table in the query
+            text: Substring to match
+            limit: Rows the query needs; None if it reads every match
+        """
+        if not (self.model.trigram_enabled and _TRIGRAM_RUN_RE.search(text)):
+            return f"{alias}.text LIKE ?"
+        use_index = True
+        if limit is not None:
+            with self.model.get_read_connection() as conn:
+                total = conn.execute("SELECT MAX(id) FROM prompts").fetchone()[0]
+                cap = math.isqrt(limit * (total or 0) // TRIGRAM_MATCH_COST) + 1
+                found = conn.execute(
+                    "SELECT COUNT(*) FROM (SELECT 1 FROM prompts_trigram "
+                    "WHERE prompts_trigram.text LIKE ? LIMIT ?)",
+                    (f"%{text}%", cap),
+                ).fetchone()[0]
+            use_index = found < cap
+        if use_index:
+            return (
+                f"{alias}.id IN (SELECT rowid FROM prompts_trigram "
+                "WHERE prompts_trigram.text LIKE ?)"
+            )
+        return f"{alias}.text LIKE ?"
+
+    def suggest_search_terms(self, text: str, limit: int = 5) -> List[str]:
+        """
+        Suggest corrected spellings of a text search ("did you mean").
+
+        Words that match no indexed term (as a prefix) are replaced by the
+        most similar indexed terms by trigram overlap; see
+        ``database.spelling``.
+
+        Args:
+            text: Search text that found nothing
+            limit: Maximum number of suggestions
+
+        Returns:
+            Corrected search strings, best first; empty if every word is
+            known, nothing similar exists or FTS5 is unavailable
+        """
+        from .spelling import get_spelling_suggester
+
+        if not self.model.fts_enabled:
+            return []
+        return get_spelling_suggester(self).suggest(text, limit)
+
+    @cached_result
+    def get_recent_prompts(
+        self, limit: int = 10, offset: int = 0, cursor: Optional[str] = None
+    ) -> Dict[str, Any]:
         """
         Get the most recent prompts with pagination support.
 
+        Pages can be addressed either by ``offset`` or by the opaque
+        ``next_cursor`` returned with the previous page. Cursor pages seek on
+        the ``(created_at, id)`` index, so deep pages cost the same as the
+        first one.
+
         Args:
             limit: Maximum number of prompts to return
-            offset: Number of prompts to skip (for pagination)
+            offset: Number of prompts to skip (ignored when cursor is given)
+            cursor: Cursor from a previous page's ``next_cursor``
 
         Returns:
             Dictionary containing prompt data and pagination info
         """
-        with self.model.get_connection() as conn:
+        params: list = []
+        where = ""
+        if cursor:
+            where = "WHERE (created_at, id) < (?, ?)"
+            params.extend(decode_cursor(cursor))
+            offset = 0
+
+        with self.model.get_read_connection() as conn:
             # Get total count
-            cursor = conn.execute("SELECT COUNT(*) FROM prompts")
-            row = cursor.fetchone()
+            row = conn.execute("SELECT COUNT(*) FROM prompts").fetchone()
             total_count = (row[0] if row else 0) or 0
 
-            # Get paginated results
-            cursor = conn.execute(
-                f"SELECT prompts.*, {TAG_SUBQUERY} FROM prompts ORDER BY created_at DESC LIMIT ? OFFSET ?",
-                (limit, offset),
-            )
-            rows = cursor.fetchall()
-            prompts = [self._row_to_dict(row) for row in rows]
+            # Get paginated results (one extra row tells us if there is more)
+            rows = conn.execute(
+                f"SELECT prompts.* FROM prompts {where} "
+                "ORDER BY created_at DESC, id DESC LIMIT ? OFFSET ?",
+                params + [limit + 1, offset],
+            ).fetchall()
+            has_more = len(rows) > limit
+            prompts = [self._row_to_dict(row) for row in rows[:limit]]
 
             if prompts:
                 prompt_ids = [p["id"] for p in prompts]
@@ -325,7 +1093,8 @@ class PromptDatabase:
                 "total": total_count,
                 "limit": limit,
                 "offset": offset,
-                "has_more": (offset + limit) < total_count,
+                "has_more": has_more,
+                "next_cursor": self._next_prompt_cursor(prompts, has_more),
                 "page": (offset // limit) + 1,
                 "total_pages": (total_count + limit - 1) // limit,  # Ceiling division
             }
@@ -343,9 +1112,10 @@ class PromptDatabase:
         Returns:
             List of dictionaries containing prompt data
         """
-        with self.model.get_connection() as conn:
+        with self.model.get_read_connection() as conn:
             cursor = conn.execute(
-                f"SELECT prompts.*, {TAG_SUBQUERY} FROM prompts WHERE category = ? ORDER BY created_at DESC LIMIT ?",
+                "SELECT prompts.* FROM prompts WHERE category = ? "
+                "ORDER BY created_at DESC LIMIT ?",
                 (category, limit),
             )
             rows = cursor.fetchall()
@@ -361,10 +1131,10 @@ class PromptDatabase:
         Returns:
             List of dictionaries containing prompt data
         """
-        with self.model.get_connection() as conn:
+        with self.model.get_read_connection() as conn:
             cursor = conn.execute(
-                f"""
-                SELECT prompts.*, {TAG_SUBQUERY} FROM prompts
+                """
+                SELECT prompts.* FROM prompts
                 WHERE rating IS NOT NULL
                 ORDER BY rating DESC, created_at DESC
                 LIMIT ?
@@ -431,6 +1201,7 @@ class PromptDatabase:
                         prompt_id,
                     ),
                 )
+            self.model.note_prompt_changes([prompt_id])
             conn.commit()
             return True
 
@@ -451,6 +1222,7 @@ class PromptDatabase:
             )
             # Then delete the prompt
             cursor = conn.execute("DELETE FROM prompts WHERE id = ?", (prompt_id,))
+            self.model.note_prompt_changes([prompt_id])
             conn.commit()
             return cursor.rowcount > 0
 
@@ -483,9 +1255,11 @@ class PromptDatabase:
                 f"DELETE FROM prompts WHERE id IN ({placeholders})",
                 ids,
             )
+            self.model.note_prompt_changes(ids)
             conn.commit()
             return cursor.rowcount
 
+    @cached_result
     def get_all_categories(self) -> List[str]:
         """
         Get all unique categories from the database.
@@ -493,7 +1267,7 @@ class PromptDatabase:
         Returns:
             List of category names
         """
-        with self.model.get_connection() as conn:
+        with self.model.get_read_connection() as conn:
             cursor = conn.execute(
                 "SELECT DISTINCT TRIM(category) as category FROM prompts WHERE category IS NOT NULL AND TRIM(category) != '' ORDER BY category"
             )
@@ -507,8 +1281,9 @@ class PromptDatabase:
         """
         Get distinct subfolder paths from generated_images.
 
-        Extracts the directory portion of image_path, made relative to
-        root_dirs if provided. Returns sorted unique folder names.
+        Reads the distinct image directories kept in ``image_dirs`` and makes
+        them relative to the first of root_dirs that contains them. Returns
+        sorted unique folder names, always separated by ``/``.
 
         Args:
             root_dirs: Gallery root directories for computing relative paths
@@ -516,48 +1291,43 @@ class PromptDatabase:
                 so that hierarchical tree navigation works. For example, a path
                 ``2026/08-Aug/2026-08-06`` also adds ``2026`` and ``2026/08-Aug``.
         """
-        with self.model.get_connection() as conn:
-            cursor = conn.execute(
-                "SELECT DISTINCT image_path FROM generated_images "
-                "WHERE image_path IS NOT NULL AND image_path != ''"
-            )
-
-            folders = set()
-            for row in cursor.fetchall():
-                image_path = row["image_path"]
-                parent = os.path.dirname(image_path)
-                if not parent:
-                    continue
-
-                made_relative = False
-                if root_dirs:
-                    for root in root_dirs:
-                        try:
-                            rel = os.path.relpath(parent, root)
-                            if not rel.startswith(".."):
-                                if rel != ".":
-                                    folders.add(rel)
-                                made_relative = True
-                                break
-                        except ValueError:
-                            continue
-
-                if not made_relative:
-                    # Preserve full relative-style path instead of collapsing
-                    # to just the basename, which loses hierarchy and creates
-                    # ambiguity (e.g. foo/bar and baz/bar both become "bar").
-                    folders.add(parent)
+        self._ensure_image_dirs()
+        with self.model.get_read_connection() as conn:
+            cursor = conn.execute("SELECT path FROM image_dirs WHERE path != ''")
+            dirs = [row["path"] for row in cursor.fetchall()]
+
+        prefixes = []
+        for root in root_dirs or []:
+            root_key = image_dir_key(os.path.join(root, ""))
+            prefix = root_key if root_key.endswith("/") else root_key + "/"
+            prefixes.append((os.path.normcase(root_key), os.path.normcase(prefix)))
+
+        folders = set()
+        for path in dirs:
+            folded = os.path.normcase(path)
+            for root_key, prefix in prefixes:
+                if folded == root_key:
+                    break
+                if folded.startswith(prefix):
+                    folders.add(path[len(prefix) :])
+                    break
+            else:
+                # Preserve full relative-style path instead of collapsing
+                # to just the basename, which loses hierarchy and creates
+                # ambiguity (e.g. foo/bar and baz/bar both become "bar").
+                folders.add(path)
 
         if include_ancestors:
             ancestors = set()
             for folder in folders:
-                parts = folder.replace("\\", "/").split("/")
+                parts = folder.split("/")
                 for i in range(1, len(parts)):
                     ancestors.add("/".join(parts[:i]))
             folders.update(ancestors)
 
         return sorted(folders)
 
+    @cached_result
     def get_all_tags(self) -> List[str]:
         """
         Get all unique tags that are in use (linked to at least one prompt).
@@ -565,15 +1335,13 @@ class PromptDatabase:
         Returns:
             Sorted list of tag names
         """
-        with self.model.get_connection() as conn:
+        with self.model.get_read_connection() as conn:
             cursor = conn.execute(
-                "SELECT DISTINCT t.name AS tag "
-                "FROM prompt_tags pt "
-                "JOIN tags t ON pt.tag_id = t.id "
-                "ORDER BY t.name"
+                "SELECT name AS tag FROM tags WHERE usage_count > 0 ORDER BY name"
             )
             return [row["tag"] for row in cursor.fetchall()]
 
+    @cached_result
     def get_tags_with_counts(
         self,
         limit: int = 50,
@@ -582,7 +1350,10 @@ class PromptDatabase:
         sort: str = "alpha_asc",
     ) -> Dict[str, Any]:
         """
-        Get all unique tags with their usage counts via junction table.
+        Get all unique tags with their usage counts.
+
+        Counts come from the trigger-maintained ``tags.usage_count`` column,
+        so a page costs O(page) instead of a full junction-table GROUP BY.
 
         Args:
             limit: Maximum number of tags to return
@@ -593,41 +1364,36 @@ class PromptDatabase:
         Returns:
             Dict with tags list, total count, and pagination info
         """
-        search_clause = ""
+        # The count range-scans the covering usage_count index. For the page,
+        # unary + keeps the planner from using usage_count for the filter, so
+        # it walks the index matching ORDER BY and stops after one page.
+        where = "usage_count > 0"
         params: list = []
         if search:
-            search_clause = "HAVING t.name LIKE ?"
+            where += " AND name LIKE ?"
             params.append(f"%{search}%")
 
         sort_map = {
-            "alpha_desc": "tag COLLATE NOCASE DESC",
-            "count_desc": "count DESC, tag COLLATE NOCASE ASC",
-            "count_asc": "count ASC, tag COLLATE NOCASE ASC",
+            "alpha_desc": "name COLLATE NOCASE DESC",
+            "count_desc": "usage_count DESC, name COLLATE NOCASE ASC",
+            "count_asc": "usage_count ASC, name COLLATE NOCASE ASC",
         }
-        order = sort_map.get(sort, "tag COLLATE NOCASE ASC")
+        order = sort_map.get(sort, "name COLLATE NOCASE ASC")
 
-        with self.model.get_connection() as conn:
-            count_sql = (
-                "SELECT COUNT(*) as total FROM ("
-                "  SELECT t.name AS tag, COUNT(*) AS count"
-                "  FROM prompt_tags pt JOIN tags t ON pt.tag_id = t.id"
-                f"  GROUP BY t.name {search_clause}"
-                ")"
-            )
-            cursor = conn.execute(count_sql, params)
-            row = cursor.fetchone()
+        with self.model.get_read_connection() as conn:
+            row = conn.execute(
+                f"SELECT COUNT(*) AS total FROM tags WHERE {where}", params
+            ).fetchone()
             total = (row[0] if row else 0) or 0
 
-            data_sql = (
-                "SELECT t.name AS tag, COUNT(*) AS count"
-                " FROM prompt_tags pt JOIN tags t ON pt.tag_id = t.id"
-                f" GROUP BY t.name {search_clause}"
-                f" ORDER BY {order}"
-                " LIMIT ? OFFSET ?"
+            cursor = conn.execute(
+                f"SELECT name, usage_count FROM tags WHERE +{where} "
+                f"ORDER BY {order} LIMIT ? OFFSET ?",
+                params + [limit, offset],
             )
-            cursor = conn.execute(data_sql, params + [limit, offset])
             tags = [
-                {"name": row["tag"], "count": row["count"]} for row in cursor.fetchall()
+                {"name": row["name"], "count": row["usage_count"]}
+                for row in cursor.fetchall()
             ]
 
         return {
@@ -639,7 +1405,12 @@ class PromptDatabase:
         }
 
     def get_prompts_by_tags(
-        self, tags: List[str], mode: str = "and", limit: int = 20, offset: int = 0
+        self,
+        tags: List[str],
+        mode: str = "and",
+        limit: int = 20,
+        offset: int = 0,
+        cursor: Optional[str] = None,
     ) -> Dict[str, Any]:
         """
         Get prompts that match the given tags with AND/OR filtering.
@@ -651,7 +1422,8 @@ class PromptDatabase:
             tags: List of tag names to filter by
             mode: 'and' (must have all tags) or 'or' (must have any tag)
             limit: Maximum number of prompts to return
-            offset: Number of prompts to skip
+            offset: Number of prompts to skip (ignored when cursor is given)
+            cursor: Cursor from a previous page's ``next_cursor``
 
         Returns:
             Dict with prompts list (including preview images), total count, pagination
@@ -663,9 +1435,17 @@ class PromptDatabase:
                 "limit": limit,
                 "offset": offset,
                 "has_more": False,
+                "next_cursor": None,
             }
 
-        with self.model.get_connection() as conn:
+        seek_clause = ""
+        seek_params: list = []
+        if cursor:
+            seek_clause = "AND (created_at, id) < (?, ?) "
+            seek_params = decode_cursor(cursor)
+            offset = 0
+
+        with self.model.get_read_connection() as conn:
             placeholders = ",".join(["?"] * len(tags))
             if mode == "and":
                 where_clause = (
@@ -688,20 +1468,19 @@ class PromptDatabase:
                 )
                 tag_params = list(tags)
 
-            cursor = conn.execute(
+            row = conn.execute(
                 f"SELECT COUNT(*) FROM prompts WHERE {where_clause}",
                 tag_params,
-            )
-            row = cursor.fetchone()
+            ).fetchone()
             total = (row[0] if row else 0) or 0
 
-            cursor = conn.execute(
-                f"SELECT prompts.*, {TAG_SUBQUERY} FROM prompts WHERE {where_clause} "
-                "ORDER BY created_at DESC LIMIT ? OFFSET ?",
-                tag_params + [limit, offset],
-            )
-            rows = cursor.fetchall()
-            prompts = [self._row_to_dict(row) for row in rows]
+            rows = conn.execute(
+                f"SELECT prompts.* FROM prompts WHERE {where_clause} "
+                f"{seek_clause}ORDER BY created_at DESC, id DESC LIMIT ? OFFSET ?",
+                tag_params + seek_params + [limit + 1, offset],
+            ).fetchall()
+            has_more = len(rows) > limit
+            prompts = [self._row_to_dict(row) for row in rows[:limit]]
 
             if prompts:
                 prompt_ids = [p["id"] for p in prompts]
@@ -712,7 +1491,8 @@ class PromptDatabase:
                 "total": total,
                 "limit": limit,
                 "offset": offset,
-                "has_more": (offset + limit) < total,
+                "has_more": has_more,
+                "next_cursor": self._next_prompt_cursor(prompts, has_more),
             }
 
     def rename_tag_all_prompts(self, old_name: str, new_name: str) -> Dict[str, Any]:
@@ -886,14 +1666,15 @@ class PromptDatabase:
         Returns:
             Number of untagged prompts
         """
-        with self.model.get_connection() as conn:
+        with self.model.get_read_connection() as conn:
             cursor = conn.execute(
-                "SELECT COUNT(*) as total FROM prompts "
-                "WHERE NOT EXISTS (SELECT 1 FROM prompt_tags WHERE prompt_id = prompts.id)"
+                "SELECT COUNT(*) as total FROM prompts WHERE tag_list IS NULL"
             )
             return cursor.fetchone()["total"]
 
-    def get_untagged_prompts(self, limit: int = 20, offset: int = 0) -> Dict[str, Any]:
+    def get_untagged_prompts(
+        self, limit: int = 20, offset: int = 0, cursor: Optional[str] = None
+    ) -> Dict[str, Any]:
         """
         Get prompts that have no tags, with pagination.
 
@@ -901,28 +1682,33 @@ class PromptDatabase:
 
         Args:
             limit: Maximum number of prompts to return
-            offset: Number of prompts to skip
+            offset: Number of prompts to skip (ignored when cursor is given)
+            cursor: Cursor from a previous page's ``next_cursor``
 
         Returns:
             Dict with prompts list, total count, and pagination
         """
-        with self.model.get_connection() as conn:
-            where = (
-                "NOT EXISTS (SELECT 1 FROM prompt_tags WHERE prompt_id = prompts.id)"
-            )
+        seek_clause = ""
+        seek_params: list = []
+        if cursor:
+            seek_clause = "AND (created_at, id) < (?, ?) "
+            seek_params = decode_cursor(cursor)
+            offset = 0
 
-            cursor = conn.execute(
+        with self.model.get_read_connection() as conn:
+            where = "tag_list IS NULL"
+
+            total = conn.execute(
                 f"SELECT COUNT(*) as total FROM prompts WHERE {where}"
-            )
-            total = cursor.fetchone()["total"]
+            ).fetchone()["total"]
 
-            cursor = conn.execute(
-                f"SELECT prompts.*, {TAG_SUBQUERY} FROM prompts WHERE {where} "
-                "ORDER BY created_at DESC LIMIT ? OFFSET ?",
-                (limit, offset),
-            )
-            rows = cursor.fetchall()
-            prompts = [self._row_to_dict(row) for row in rows]
+            rows = conn.execute(
+                f"SELECT prompts.* FROM prompts WHERE {where} "
+                f"{seek_clause}ORDER BY created_at DESC, id DESC LIMIT ? OFFSET ?",
+                seek_params + [limit + 1, offset],
+            ).fetchall()
+            has_more = len(rows) > limit
+            prompts = [self._row_to_dict(row) for row in rows[:limit]]
 
             if prompts:
                 prompt_ids = [p["id"] for p in prompts]
@@ -933,9 +1719,20 @@ class PromptDatabase:
                 "total": total,
                 "limit": limit,
                 "offset": offset,
-                "has_more": (offset + limit) < total,
+                "has_more": has_more,
+                "next_cursor": self._next_prompt_cursor(prompts, has_more),
             }
 
+    @staticmethod
+    def _next_prompt_cursor(
+        prompts: List[Dict[str, Any]], has_more: bool
+    ) -> Optional[str]:
+        """Build the ``(created_at, id)`` cursor that follows the last prompt."""
+        if not has_more or not prompts:
+            return None
+        last = prompts[-1]
+        return encode_cursor(last["created_at"], last["id"])
+
     def _attach_preview_images(
         self,
         conn: sqlite3.Connection,
@@ -980,31 +1777,45 @@ class PromptDatabase:
         self, conn: sqlite3.Connection, tag_names: List[str]
     ) -> Dict[str, int]:
         """Ensure tag names exist in tags table, return name->id mapping."""
+        tag_names = _unique(tag_names)
         if not tag_names:
             return {}
-        for name in tag_names:
-            conn.execute("INSERT OR IGNORE INTO tags (name) VALUES (?)", (name,))
-        placeholders = ",".join(["?"] * len(tag_names))
-        cursor = conn.execute(
-            f"SELECT id, name FROM tags WHERE name IN ({placeholders})",
-            list(tag_names),
+        conn.executemany(
+            "INSERT OR IGNORE INTO tags (name) VALUES (?)",
+            [(name,) for name in tag_names],
         )
-        return {row["name"]: row["id"] for row in cursor.fetchall()}
+        tag_map: Dict[str, int] = {}
+        for chunk in chunked(tag_names):
+            cursor = conn.execute(
+                f"SELECT id, name FROM tags WHERE name IN ({sql_placeholders(chunk)})",
+                chunk,
+            )
+            tag_map.update((row["name"], row["id"]) for row in cursor.fetchall())
+        return tag_map
 
     def _sync_prompt_tags(
         self, conn: sqlite3.Connection, prompt_id: int, tags: List[str]
     ) -> None:
-        """Replace all junction table entries for a prompt."""
-        conn.execute("DELETE FROM prompt_tags WHERE prompt_id = ?", (prompt_id,))
-        if tags:
-            tag_map = self._ensure_tags(conn, tags)
-            for tag_name in tags:
-                tag_id = tag_map.get(tag_name)
-                if tag_id:
-                    conn.execute(
-                        "INSERT OR IGNORE INTO prompt_tags (prompt_id, tag_id) VALUES (?, ?)",
-                        (prompt_id, tag_id),
-                    )
+        """Replace all junction table entries for a prompt.
+
+        Only the difference against the current links is written, so tags
+        that stay on the prompt do not churn the tag triggers.
+        """
+        wanted = set(self._ensure_tags(conn, tags).values()) if tags else set()
+        current = {
+            row["tag_id"]
+            for row in conn.execute(
+                "SELECT tag_id FROM prompt_tags WHERE prompt_id = ?", (prompt_id,)
+            ).fetchall()
+        }
+        conn.executemany(
+            "DELETE FROM prompt_tags WHERE prompt_id = ? AND tag_id = ?",
+            [(prompt_id, tag_id) for tag_id in current - wanted],
+        )
+        conn.executemany(
+            "INSERT OR IGNORE INTO prompt_tags (prompt_id, tag_id) VALUES (?, ?)",
+            [(prompt_id, tag_id) for tag_id in sorted(wanted - current)],
+        )
 
     def _get_prompt_tags(self, conn: sqlite3.Connection, prompt_id: int) -> List[str]:
         """Get tag names for a prompt from junction table."""
@@ -1028,14 +1839,13 @@ class PromptDatabase:
         """
         data = dict(row)
 
-        # Parse tags from junction table subquery result (preferred)
-        if "_tag_list" in data and data["_tag_list"]:
-            data["tags"] = data["_tag_list"].split("|||")
-            del data["_tag_list"]
-        elif "_tag_list" in data:
-            # TAG_SUBQUERY present but NULL (no tags)
-            data["tags"] = []
-            del data["_tag_list"]
+        # Internal duplicate detection key, not part of the prompt record
+        data.pop("normalized_text", None)
+
+        # Parse tags from the trigger-maintained tag_list column (preferred)
+        if "tag_list" in data:
+            tag_list = data.pop("tag_list")
+            data["tags"] = json.loads(tag_list) if tag_list else []
         elif data.get("tags"):
             # Fallback: parse legacy JSON column
             try:
@@ -1053,109 +1863,475 @@ class PromptDatabase:
 
         return data
 
-    def export_prompts(self, file_path: str, format: str = "json") -> bool:
+    def iter_export_prompts(
+        self, chunk_size: int = SQL_CHUNK_SIZE, include_images: bool = True
+    ) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Yield every prompt in id order, ``chunk_size`` prompts at a time.
+
+        Each chunk is read with its own keyset query (``id > last``), so the
+        read connection is released between chunks and memory use does not
+        grow with library size. Tags come from ``tag_list``; images for the
+        whole chunk are fetched in a single query.
+
+        Args:
+            chunk_size: Number of prompts per chunk
+            include_images: Attach ``images`` and ``image_count`` to prompts
+
+        Yields:
+            Lists of prompt dictionaries
+        """
+        last_id = 0
+        while True:
+            with self.model.get_read_connection() as conn:
+                rows = conn.execute(
+                    "SELECT prompts.* FROM prompts WHERE id > ? ORDER BY id LIMIT ?",
+                    (last_id, chunk_size),
+                ).fetchall()
+                prompts = [self._row_to_dict(row) for row in rows]
+                if prompts and include_images:
+                    self._attach_export_images(conn, prompts)
+            if not prompts:
+                return
+            last_id = prompts[-1]["id"]
+            yield prompts
+            if len(prompts) < chunk_size:
+                return
+
+    def _attach_export_images(
+        self, conn: sqlite3.Connection, prompts: List[Dict[str, Any]]
+    ) -> None:
+        """Attach all image records (without workflow blobs) to export prompts."""
+        prompt_ids = [p["id"] for p in prompts]
+        images_by_prompt: Dict[int, list] = {}
+        for row in conn.execute(
+            "SELECT id, prompt_id, image_path, filename, generation_time, "
+            "file_size, width, height, format FROM generated_images "
+            f"WHERE prompt_id IN ({sql_placeholders(prompt_ids)}) "
+            "ORDER BY prompt_id, generation_time",
+            prompt_ids,
+        ).fetchall():
+            images_by_prompt.setdefault(row["prompt_id"], []).append(dict(row))
+        for prompt in prompts:
+            prompt["images"] = images_by_prompt.get(prompt["id"], [])
+            prompt["image_count"] = len(prompt["images"])
+
+    def export_chunks(
+        self,
+        format: str = "jsonl",
+        chunk_size: int = SQL_CHUNK_SIZE,
+        include_images: bool = True,
+    ) -> Iterator[str]:
+        """
+        Serialize all prompts incrementally in one of ``EXPORT_FORMATS``.
+
+        ``json`` produces the same document as the export endpoint always
+        has (``export_date``, ``total_prompts``, ``prompts``), pretty printed.
+        ``jsonl`` writes one prompt object per line. ``csv`` writes one row
+        per prompt with tags and image paths flattened into text columns.
+
+        Args:
+            format: One of ``EXPORT_FORMATS``
+            chunk_size: Number of prompts serialized per yielded piece
+            include_images: Include each prompt's image records
+
+        Returns:
+            Iterator of text pieces that concatenate to the full export
+
+        Raises:
+            ValueError: If the format is not supported
+        """
+        format = format.lower()
+        if format not in EXPORT_FORMATS:
+            raise ValueError(f"Unsupported export format: {format}")
+        chunks = self.iter_export_prompts(chunk_size, include_images)
+        if format == "jsonl":
+            return (
+                "".join(json.dumps(p, ensure_ascii=False) + "\n" for p in chunk)
+                for chunk in chunks
+            )
+        if format == "csv":
+            return self._export_csv(chunks, include_images)
+        return self._export_json_document(chunks)
+
+    def _export_json_document(
+        self, chunks: Iterator[List[Dict[str, Any]]]
+    ) -> Iterator[str]:
+        """Stream the pretty-printed ``{"prompts": [...]}`` export document."""
+        with self.model.get_read_connection() as conn:
+            total = conn.execute("SELECT COUNT(*) FROM prompts").fetchone()[0]
+        export_date = datetime.datetime.now(datetime.timezone.utc).isoformat()
+        yield (
+            "{\n"
+            f'  "export_date": {json.dumps(export_date)},\n'
+            f'  "total_prompts": {total},\n'
+            '  "prompts": ['
+        )
+        separator = "\n"
+        for chunk in chunks:
+            pieces = []
+            for prompt in chunk:
+                body = json.dumps(prompt, indent=2, ensure_ascii=False)
+                indented = body.replace("\n", "\n    ")
+                pieces.append(f"{separator}    {indented}")
+                separator = ",\n"
+            yield "".join(pieces)
+        # An empty list closes on the same line: "prompts": []
+        yield "]\n}\n" if separator == "\n" else "\n  ]\n}\n"
+
+    def _export_csv(
+        self, chunks: Iterator[List[Dict[str, Any]]], include_images: bool
+    ) -> Iterator[str]:
+        """Stream prompts as CSV rows with list fields flattened to text."""
+        fields = list(EXPORT_CSV_FIELDS)
+        if include_images:
+            fields += ["image_count", "images"]
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=fields, extrasaction="ignore")
+        writer.writeheader()
+        for chunk in chunks:
+            for prompt in chunk:
+                # JSON arrays keep tags and paths that contain the separator
+                row = dict(prompt, tags=_csv_list(prompt.get("tags") or []))
+                if include_images:
+                    row["images"] = _csv_list(
+                        img["image_path"] for img in prompt["images"]
+                    )
+                writer.writerow(row)
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+        if buffer.tell():
+            yield buffer.getvalue()
+
+    def export_prompts(
+        self, file_path: str, format: str = "json", compress: bool = False
+    ) -> bool:
         """
         Export all prompts to a file.
 
+        The export is streamed chunk by chunk, so memory use stays flat
+        regardless of library size.
+
         Args:
             file_path: Path to save the export file
-            format: Export format ("json" or "csv")
+            format: Export format ("json", "jsonl" or "csv")
+            compress: Write the file gzip-compressed
 
         Returns:
             bool: True if export was successful, False otherwise
         """
         try:
-            prompts = self.search_prompts(limit=10000)  # Get all prompts
-
-            if format.lower() == "json":
-                with open(file_path, "w", encoding="utf-8") as f:
-                    json.dump(prompts, f, indent=2, ensure_ascii=False)
-            elif format.lower() == "csv":
-                import csv
-
-                if prompts:
-                    with open(file_path, "w", newline="", encoding="utf-8") as f:
-                        writer = csv.DictWriter(f, fieldnames=prompts[0].keys())
-                        writer.writeheader()
-                        for prompt in prompts:
-                            # Convert lists to strings for CSV
-                            row = prompt.copy()
-                            if isinstance(row.get("tags"), list):
-                                row["tags"] = ", ".join(row["tags"])
-                            writer.writerow(row)
+            pieces = self.export_chunks(format)
+            if compress:
+                f = gzip.open(file_path, "wt", encoding="utf-8", newline="")
             else:
-                raise ValueError(f"Unsupported export format: {format}")
+                f = open(file_path, "w", encoding="utf-8", newline="")
+            with f:
+                for piece in pieces:
+                    f.write(piece)
 
             return True
         except Exception as e:
             self.logger.error(f"Error exporting prompts: {e}")
             return False
 
-    def find_duplicates(self) -> List[Dict[str, Any]]:
+    def import_prompts(
+        self,
+        file_path: str,
+        format: Optional[str] = None,
+        chunk_size: int = SQL_CHUNK_SIZE,
+        link_images: bool = True,
+        progress: Optional[Callable[[int, int, Dict[str, int]], None]] = None,
+    ) -> Dict[str, int]:
         """
-        Find duplicate prompts based on text content without removing them.
+        Merge an export file (JSON, JSON Lines or CSV) into the database.
+
+        The file is parsed incrementally and written ``chunk_size`` records
+        at a time, so memory stays bounded for multi-GB files. Prompts are
+        de-duplicated by text hash: new ones are inserted with their tags
+        and timestamps, and existing ones only gain the imported tags.
+        Gzip-compressed files are detected automatically.
+
+        Args:
+            file_path: Path of the file to import
+            format: One of ``EXPORT_FORMATS``; guessed from the file name
+                when omitted
+            chunk_size: Number of records written per transaction
+            link_images: Also recreate the records' image links
+            progress: Called after each chunk with (bytes read, file size,
+                counts so far)
 
         Returns:
-            List of duplicate groups, each containing:
-            - text: The duplicate text content
-            - prompts: List of prompt records with same text
-        """
-        self.logger.info("Scanning for duplicate prompts")
+            Dict with ``processed``, ``imported``, ``existing``, ``skipped``
+            and ``images_linked`` counts
+
+        Raises:
+            ValueError: If the format is unknown or the file is malformed.
+                Chunks written before the error stay committed.
+        """
+        format = (format or import_format_from_filename(file_path) or "").lower()
+        if format not in EXPORT_FORMATS:
+            raise ValueError(f"Unsupported import format: {format or 'unknown'}")
+
+        counts = {
+            "processed": 0,
+            "imported": 0,
+            "existing": 0,
+            "skipped": 0,
+            "images_linked": 0,
+        }
+        total_bytes = os.path.getsize(file_path)
+
+        with open(file_path, "rb") as raw:
+            compressed = raw.read(2) == b"\x1f\x8b"
+            raw.seek(0)
+            binary = gzip.GzipFile(fileobj=raw) if compressed else raw
+            text = io.TextIOWrapper(binary, encoding="utf-8-sig", newline="")
+            if format == "csv":
+                records: Iterator[Any] = csv.DictReader(text)
+            elif format == "jsonl":
+                records = _iter_jsonl_records(text)
+            else:
+                records = _iter_json_records(text)
+
+            batch: List[Dict[str, Any]] = []
+            for record in records:
+                counts["processed"] += 1
+                entry = self._import_entry(record)
+                if entry is None:
+                    counts["skipped"] += 1
+                    continue
+                batch.append(entry)
+                if len(batch) >= chunk_size:
+                    self._import_batch(batch, counts, link_images)
+                    batch = []
+                    if progress:
+                        progress(raw.tell(), total_bytes, dict(counts))
+            if batch:
+                self._import_batch(batch, counts, link_images)
+
+        if progress:
+            progress(total_bytes, total_bytes, dict(counts))
+        self.logger.info(
+            f"Imported {file_path}: {counts['imported']} new, "
+            f"{counts['existing']} existing, {counts['skipped']} skipped"
+        )
+        return counts
+
+    def _import_entry(self, record: Any) -> Optional[Dict[str, Any]]:
+        """Normalize one imported record; None if it has no usable text."""
+        if not isinstance(record, dict):
+            return None
+        text = record.get("text")
+        if not isinstance(text, str) or not text.strip():
+            return None
+
         try:
-            with self.model.get_connection() as conn:
-                # Find duplicates by text content (case-insensitive)
-                # Note: Removed ORDER BY from GROUP_CONCAT for SQLite compatibility
-                # We'll sort the IDs manually after fetching
-                cursor = conn.execute("""
-                    SELECT LOWER(TRIM(text)) as normalized_text, COUNT(*) as count,
-                           GROUP_CONCAT(id) as ids,
-                           GROUP_CONCAT(created_at) as created_dates
-                    FROM prompts
-                    GROUP BY LOWER(TRIM(text))
-                    HAVING COUNT(*) > 1
-                """)
+            rating = int(record["rating"]) if record.get("rating") else None
+        except (TypeError, ValueError):
+            rating = None
+        if rating is not None and not 1 <= rating <= 5:
+            rating = None
 
-                duplicate_groups = cursor.fetchall()
-                self.logger.debug(
-                    f"Found {len(duplicate_groups)} groups of duplicate prompts"
+        tags = _parse_csv_list(record.get("tags"), ",")
+        images = _parse_csv_list(record.get("images"), ";")
+
+        return {
+            "text": text.strip(),
+            # Re-hash so dedupe does not depend on the exporter's hashing
+            "hash": generate_prompt_hash(text),
+            "category": record.get("category") or None,
+            "tags": [str(t).strip() for t in tags if t and str(t).strip()],
+            "rating": rating,
+            "notes": record.get("notes") or None,
+            "created_at": record.get("created_at") or None,
+            "updated_at": record.get("updated_at") or None,
+            "images": [
+                path.strip()
+                for path in (
+                    img.get("image_path") if isinstance(img, dict) else img
+                    for img in images
                 )
+                if isinstance(path, str) and path.strip()
+            ],
+        }
 
-                result = []
+    def _import_batch(
+        self,
+        batch: List[Dict[str, Any]],
+        counts: Dict[str, int],
+        link_images: bool,
+    ) -> None:
+        """Upsert one chunk of normalized import entries and their images."""
+        stored = self.bulk_upsert_prompts(batch, chunk_size=len(batch), merge_tags=True)
+        created = sum(1 for result in stored.values() if result["created"])
+        counts["imported"] += created
+        counts["existing"] += len(batch) - created
+        if link_images:
+            counts["images_linked"] += self.bulk_link_images(
+                (stored[entry["hash"]]["id"], path)
+                for entry in batch
+                for path in entry["images"]
+            )
 
-                for group in duplicate_groups:
-                    ids = group["ids"].split(",")
-                    created_dates = group["created_dates"].split(",")
+    def backup_dir(self) -> str:
+        """Return the folder holding backups, next to the database file."""
+        db_dir = os.path.dirname(os.path.abspath(self.model.db_path))
+        return os.path.join(db_dir, "backups")
 
-                    # Sort IDs by created_at date
-                    id_date_pairs = list(zip(ids, created_dates))
-                    id_date_pairs.sort(key=lambda x: x[1])  # Sort by date
-                    ids = [pair[0] for pair in id_date_pairs]
+    def create_backup(
+        self, kind: str = "manual", compress: bool = False, keep: Optional[int] = None
+    ) -> str:
+        """
+        Write an online backup into :meth:`backup_dir` and rotate old ones.
 
-                    # Get full details for all prompts in this duplicate group
-                    prompts = []
-                    for prompt_id in ids:
-                        cursor = conn.execute(
-                            "SELECT id, text, category, rating, created_at, updated_at "
-                            "FROM prompts WHERE id = ?",
-                            (int(prompt_id),),
-                        )
-                        prompt_data = cursor.fetchone()
-                        if prompt_data:
-                            prompt_dict = dict(prompt_data)
-                            prompt_dict["tags"] = self._get_prompt_tags(
-                                conn, int(prompt_id)
-                            )
-                            prompts.append(prompt_dict)
+        Backups are named ``prompts_<kind>_<timestamp>.db`` (``.db.gz`` when
+        compressed). After writing, only the newest ``keep`` backups of the
+        same kind are kept.
+
+        Args:
+            kind: Backup family used for naming and rotation, e.g. "manual"
+                for downloads or "auto" for scheduled backups
+            compress: Gzip the backup file
+            keep: Backups of this kind to keep (default: BACKUP_RETENTION)
+
+        Returns:
+            str: Path of the new backup file
+
+        Raises:
+            RuntimeError: If the SQLite backup fails
+        """
+        directory = self.backup_dir()
+        os.makedirs(directory, exist_ok=True)
+        # Microseconds keep back-to-back backups from reusing a file name
+        timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+        path = os.path.join(directory, f"prompts_{kind}_{timestamp}.db")
+
+        if not self.model.backup_database(path):
+            raise RuntimeError("Database backup failed")
+        if compress:
+            # Compress into a temporary file so a crash never leaves a
+            # truncated .gz that rotation would treat as the newest backup
+            temp_path = f"{path}.gz.partial"
+            try:
+                with open(path, "rb") as src, gzip.open(temp_path, "wb") as dst:
+                    shutil.copyfileobj(src, dst, 1024 * 1024)
+                os.replace(temp_path, path + ".gz")
+            except BaseException:
+                if os.path.exists(temp_path):
+                    os.unlink(temp_path)
+                raise
+            finally:
+                os.unlink(path)
+            path += ".gz"
+
+        removed = self.prune_backups(
+            kind, keep if keep is not None else _resolve_backup_retention()
+        )
+        self.logger.info(f"Created backup {path} ({removed} old backups removed)")
+        return path
+
+    def prune_backups(self, kind: str, keep: int) -> int:
+        """
+        Delete all but the newest ``keep`` backups of one kind.
+
+        Returns:
+            int: Number of backup files removed
+        """
+        directory = self.backup_dir()
+        if not os.path.isdir(directory):
+            return 0
+        prefix = f"prompts_{kind}_"
+        backups = sorted(
+            name
+            for name in os.listdir(directory)
+            if name.startswith(prefix) and name.endswith((".db", ".db.gz"))
+        )
+        stale = backups[: max(len(backups) - max(keep, 1), 0)]
+        for name in stale:
+            os.unlink(os.path.join(directory, name))
+        return len(stale)
+
+    def latest_backup_time(self, kind: str) -> Optional[float]:
+        """Return the modification time of the newest backup of one kind."""
+        directory = self.backup_dir()
+        if not os.path.isdir(directory):
+            return None
+        times = [
+            entry.stat().st_mtime
+            for entry in os.scandir(directory)
+            if entry.name.startswith(f"prompts_{kind}_")
+            and entry.name.endswith((".db", ".db.gz"))
+        ]
+        return max(times, default=None)
+
+    def find_duplicates(
+        self, near_threshold: Optional[float] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Find duplicate prompts based on text content without removing them.
+
+        Prompts are duplicates when their indexed ``normalized_text`` matches
+        (case-insensitive, ignoring surrounding whitespace). All groups are
+        read with one ordered query; tags come from ``tag_list``.
+
+        With a ``near_threshold`` (or ``ENABLE_FUZZY_SEARCH`` turned on in
+        the config) the near-duplicate groups of :meth:`find_near_duplicates`
+        follow the exact groups. Near groups that hold exactly the prompts of
+        an exact group are left out. Only exact groups are merged by
+        :meth:`cleanup_duplicates`.
+
+        Args:
+            near_threshold: Optional shingle similarity for near duplicates
 
-                    if prompts:
+        Returns:
+            List of duplicate groups, each containing:
+            - text: The duplicate text content
+            - kind: "exact", or "near" for near-duplicate groups
+            - prompts: List of prompt records with same text, oldest first
+            Near groups also carry ``similarity``.
+        """
+        if near_threshold is None:
+            near_threshold = _resolve_near_duplicate_threshold()
+        result = self._find_exact_duplicates()
+        if near_threshold is None:
+            return result
+
+        exact_ids = {frozenset(p["id"] for p in g["prompts"]) for g in result}
+        try:
+            near_groups = self.find_near_duplicates(near_threshold)
+        except Exception as e:
+            self.logger.error(f"Error finding near duplicates: {e}")
+            return result
+        for group in near_groups:
+            if frozenset(p["id"] for p in group["prompts"]) not in exact_ids:
+                result.append(dict(group, kind="near"))
+        return result
+
+    def _find_exact_duplicates(self) -> List[Dict[str, Any]]:
+        """Group prompts by ``normalized_text``; see :meth:`find_duplicates`."""
+        self.logger.info("Scanning for duplicate prompts")
+        try:
+            with self.model.get_read_connection() as conn:
+                cursor = conn.execute(f"""
+                    SELECT id, text, category, rating, created_at, updated_at,
+                           tag_list, normalized_text
+                    FROM prompts
+                    WHERE normalized_text IN ({DUPLICATE_KEYS_SQL})
+                    ORDER BY normalized_text, created_at, id
+                """)
+
+                result = []
+                current_key = None
+                for row in cursor:
+                    if row["normalized_text"] != current_key:
+                        current_key = row["normalized_text"]
+                        # Use the actual text (not normalized) of the oldest
                         result.append(
-                            {
-                                "text": prompts[0][
-                                    "text"
-                                ],  # Use the actual text (not normalized)
-                                "prompts": prompts,
-                            }
+                            {"text": row["text"], "kind": "exact", "prompts": []}
                         )
+                    result[-1]["prompts"].append(self._row_to_dict(row))
 
                 self.logger.info(f"Found {len(result)} groups with duplicates")
                 return result
@@ -1164,95 +2340,367 @@ class PromptDatabase:
             self.logger.error(f"Error finding duplicates: {e}")
             return []
 
-    def cleanup_duplicates(self) -> int:
+    def find_near_duplicates(
+        self, threshold: float = DEFAULT_NEAR_DUPLICATE_THRESHOLD
+    ) -> List[Dict[str, Any]]:
         """
-        Remove duplicate prompts based on text content, preserving all image links.
-        Merges metadata and transfers images to the retained prompt.
+        Group prompts whose word shingles are at least ``threshold`` similar.
+
+        Candidates come from LSH banding of the stored MinHash signatures:
+        for each band, one ``GROUP BY`` over the signature slice returns the
+        prompts that agree on it. Only candidate pairs are compared exactly,
+        so the scan grows with the number of near duplicates rather than
+        with the square of the library size. Similar pairs are joined into
+        groups, so a group may chain prompts that are each similar to a
+        neighbour but not to every member. Exact duplicates form groups too.
+
+        Missing signatures (prompts stored before this index existed, or
+        whose text was edited in place) are computed first.
+
+        Args:
+            threshold: Minimum Jaccard similarity of word shingles (0-1]
 
         Returns:
-            int: Number of duplicates removed
+            List of groups ordered by their oldest prompt, each containing:
+            - text: Text of the oldest prompt in the group
+            - similarity: Lowest similarity of a member to the oldest prompt
+            - prompts: Prompt records oldest first, each with a
+              ``similarity`` to the oldest prompt
+
+        Raises:
+            ValueError: If threshold is not in (0, 1]
         """
-        self.logger.info("Starting duplicate cleanup process with image preservation")
-        try:
-            with self.model.get_connection() as conn:
-                # Find duplicates by text content (case-insensitive)
-                # Note: Removed ORDER BY from GROUP_CONCAT for SQLite compatibility
-                # We'll sort the IDs manually after fetching
-                cursor = conn.execute("""
-                    SELECT LOWER(TRIM(text)) as normalized_text, COUNT(*) as count,
-                           GROUP_CONCAT(id) as ids,
-                           GROUP_CONCAT(created_at) as created_dates
-                    FROM prompts
-                    GROUP BY LOWER(TRIM(text))
-                    HAVING COUNT(*) > 1
-                """)
+        if not 0 < threshold <= 1:
+            raise ValueError("Threshold must be greater than 0 and at most 1")
+        self.logger.info(f"Scanning for near-duplicate prompts (>= {threshold})")
+        self._backfill_signatures()
 
-                duplicates = cursor.fetchall()
-                self.logger.debug(
-                    f"Found {len(duplicates)} groups of duplicate prompts"
+        buckets = []
+        with self.model.get_read_connection() as conn:
+            for band in range(LSH_BANDS):
+                cursor = conn.execute(
+                    "SELECT group_concat(prompt_id) FROM prompt_signatures "
+                    "WHERE length(signature) > 0 "
+                    "GROUP BY substr(signature, ?, ?) HAVING COUNT(*) > 1",
+                    (band * LSH_BAND_BYTES + 1, LSH_BAND_BYTES),
                 )
-                total_removed = 0
-                total_images_transferred = 0
+                buckets.extend([int(i) for i in row[0].split(",")] for row in cursor)
+            candidates = _unique(pid for bucket in buckets for pid in bucket)
+            shingles = {}
+            for chunk in chunked(candidates):
+                for row in conn.execute(
+                    "SELECT id, text FROM prompts "
+                    f"WHERE id IN ({sql_placeholders(chunk)})",
+                    chunk,
+                ):
+                    shingles[row["id"]] = prompt_shingles(row["text"])
+
+        # Union-find over verified pairs; pairs already joined are skipped
+        parent = {pid: pid for pid in shingles}
+
+        def find(pid):
+            while parent[pid] != pid:
+                parent[pid] = parent[parent[pid]]
+                pid = parent[pid]
+            return pid
+
+        checked = set()
+        for bucket in buckets:
+            bucket = [pid for pid in bucket if pid in parent]
+            for i, a in enumerate(bucket):
+                for b in bucket[i + 1 :]:
+                    root_a, root_b = find(a), find(b)
+                    if root_a == root_b or (a, b) in checked:
+                        continue
+                    checked.add((a, b))
+                    if jaccard_similarity(shingles[a], shingles[b]) >= threshold:
+                        parent[root_b] = root_a
+
+        members: Dict[int, List[int]] = {}
+        for pid in parent:
+            members.setdefault(find(pid), []).append(pid)
+        grouped = [pid for group in members.values() if len(group) > 1 for pid in group]
+
+        prompts = {}
+        with self.model.get_read_connection() as conn:
+            for chunk in chunked(grouped):
+                for row in conn.execute(
+                    "SELECT prompts.* FROM prompts "
+                    f"WHERE id IN ({sql_placeholders(chunk)})",
+                    chunk,
+                ):
+                    prompts[row["id"]] = self._row_to_dict(row)
 
-                for duplicate in duplicates:
-                    ids = duplicate["ids"].split(",")
-                    created_dates = duplicate["created_dates"].split(",")
+        result = []
+        for group in members.values():
+            group = sorted(
+                (prompts[pid] for pid in group if pid in prompts),
+                key=lambda p: (p["created_at"] or "", p["id"]),
+            )
+            if len(group) < 2:
+                continue
+            oldest = shingles[group[0]["id"]]
+            for prompt in group:
+                prompt["similarity"] = round(
+                    jaccard_similarity(oldest, shingles[prompt["id"]]), 4
+                )
+            result.append(
+                {
+                    "text": group[0]["text"],
+                    "similarity": min(p["similarity"] for p in group[1:]),
+                    "prompts": group,
+                }
+            )
+        result.sort(
+            key=lambda g: (g["prompts"][0]["created_at"] or "", g["prompts"][0]["id"])
+        )
 
-                    # Sort IDs by created_at date to keep the oldest
-                    id_date_pairs = list(zip(ids, created_dates))
-                    id_date_pairs.sort(key=lambda x: x[1])  # Sort by date
-                    sorted_ids = [int(pair[0]) for pair in id_date_pairs]
+        self.logger.info(
+            f"Found {len(result)} near-duplicate groups from "
+            f"{len(checked)} candidate pairs"
+        )
+        return result
 
-                    # Keep the oldest one (first), merge and delete the rest
-                    primary_id = sorted_ids[0]  # Keep the oldest
-                    duplicate_ids = sorted_ids[1:]
+    def _backfill_signatures(self, chunk_size: int = SQL_CHUNK_SIZE) -> int:
+        """
+        Compute MinHash signatures for prompts that have none.
 
-                    self.logger.debug(
-                        f"Merging duplicates: keeping {primary_id}, removing {duplicate_ids}"
-                    )
+        Signatures are computed outside the writer lock, ``chunk_size``
+        prompts at a time; a prompt edited or deleted in the meantime is
+        skipped by ``SIGNATURE_SQL`` and picked up on the next call.
 
-                    # Get primary prompt details
-                    cursor = conn.execute(
-                        "SELECT * FROM prompts WHERE id = ?", (primary_id,)
-                    )
-                    primary_prompt = cursor.fetchone()
-                    if not primary_prompt:
-                        continue
+        Returns:
+            Number of prompts processed
+        """
+        processed = 0
+        last_id = 0
+        while True:
+            with self.model.get_read_connection() as conn:
+                rows = conn.execute(
+                    "SELECT id, text FROM prompts p WHERE id > ? AND NOT EXISTS "
+                    "(SELECT 1 FROM prompt_signatures s WHERE s.prompt_id = p.id) "
+                    "ORDER BY id LIMIT ?",
+                    (last_id, chunk_size),
+                ).fetchall()
+            if not rows:
+                break
+            params = [_signature_params(row["id"], row["text"]) for row in rows]
+            with self.model.get_connection() as conn:
+                conn.executemany(SIGNATURE_SQL, params)
+                self.model.note_prompt_changes(())
+                conn.commit()
+            processed += len(rows)
+            last_id = rows[-1]["id"]
+        if processed:
+            self.logger.info(
+                f"Computed near-duplicate signatures for {processed} prompts"
+            )
+        return processed
 
-                    # Collect and merge metadata from all duplicates
-                    merged_metadata = self._merge_duplicate_metadata(
-                        conn, primary_id, duplicate_ids
-                    )
+    def similarity_search_enabled(self) -> bool:
+        """Whether :meth:`find_similar_prompts` vectors are maintained.
 
-                    # Transfer all images from duplicates to primary prompt
-                    images_transferred = self._transfer_images_to_primary(
-                        conn, primary_id, duplicate_ids
-                    )
-                    total_images_transferred += images_transferred
+        Read from ``ENABLE_SIMILARITY_SEARCH`` on every call, so config
+        changes apply without a restart.
+        """
+        return _resolve_similarity_search()
 
-                    # Update primary prompt with merged metadata
-                    if merged_metadata:
-                        self._update_primary_with_merged_metadata(
-                            conn, primary_id, merged_metadata
-                        )
+    def embed_prompts(
+        self,
+        prompt_ids: Optional[Iterable[int]] = None,
+        chunk_size: int = SQL_CHUNK_SIZE,
+    ) -> int:
+        """
+        Compute the term vectors used by :meth:`find_similar_prompts`.
 
-                    # Delete duplicate prompts (images already transferred)
-                    for duplicate_id in duplicate_ids:
-                        conn.execute(
-                            "DELETE FROM prompts WHERE id = ?", (duplicate_id,)
-                        )
-                        total_removed += 1
-                        self.logger.debug(f"Removed duplicate prompt {duplicate_id}")
+        Vectors are computed outside the writer lock, ``chunk_size`` prompts
+        at a time; a prompt edited or deleted in the meantime is skipped by
+        ``VECTOR_SQL`` and picked up on the next call. The embedding worker
+        calls this after prompts are saved.
+
+        Args:
+            prompt_ids: Prompts to (re)compute; None computes every prompt
+                that has no vector yet
+
+        Returns:
+            Number of prompts processed
+        """
+        from .similarity import vectors_stored
 
+        processed = 0
+        for rows in self._rows_to_embed(prompt_ids, chunk_size):
+            params = [_vector_params(row["id"], row["text"]) for row in rows]
+            with self.model.get_connection() as conn:
+                conn.executemany(VECTOR_SQL, params)
+                self.model.note_prompt_changes(())
                 conn.commit()
+            vectors_stored(self, [row["id"] for row in rows])
+            processed += len(rows)
+        if processed:
+            self.logger.debug(f"Computed similarity vectors for {processed} prompts")
+        return processed
+
+    def _rows_to_embed(
+        self, prompt_ids: Optional[Iterable[int]], chunk_size: int
+    ) -> Iterator[List[sqlite3.Row]]:
+        """Yield batches of (id, text) rows for :meth:`embed_prompts`."""
+        if prompt_ids is not None:
+            for chunk in chunked(_unique(prompt_ids), chunk_size):
+                with self.model.get_read_connection() as conn:
+                    rows = conn.execute(
+                        "SELECT id, text FROM prompts "
+                        f"WHERE id IN ({sql_placeholders(chunk)})",
+                        chunk,
+                    ).fetchall()
+                if rows:
+                    yield rows
+            return
+        last_id = 0
+        while True:
+            with self.model.get_read_connection() as conn:
+                rows = conn.execute(
+                    "SELECT id, text FROM prompts p WHERE id > ? AND NOT EXISTS "
+                    "(SELECT 1 FROM prompt_vectors v WHERE v.prompt_id = p.id) "
+                    "ORDER BY id LIMIT ?",
+                    (last_id, chunk_size),
+                ).fetchall()
+            if not rows:
+                return
+            yield rows
+            last_id = rows[-1]["id"]
 
-                if total_removed > 0:
-                    self.logger.info(
-                        f"Removed {total_removed} duplicate prompts, transferred {total_images_transferred} images"
-                    )
-                else:
-                    self.logger.info("No duplicate prompts found")
+    def find_similar_prompts(
+        self, prompt_id: int, limit: int = 10
+    ) -> Optional[List[Dict[str, Any]]]:
+        """
+        Find the prompts whose wording is most similar to a prompt.
+
+        Prompts are ranked by the cosine similarity of their TF-IDF weighted
+        term vectors (see ``database.similarity``), so prompts sharing rare
+        words and word pairs rank above prompts sharing common ones.
+        Prompts whose vectors were not computed yet are not found.
+
+        Args:
+            prompt_id: Prompt to compare with
+            limit: Maximum number of prompts
+
+        Returns:
+            Prompt records most similar first, each with a ``similarity``
+            (0-1]; None if the prompt does not exist
+        """
+        from .similarity import get_vector_index
+
+        with self.model.get_read_connection() as conn:
+            row = conn.execute(
+                "SELECT text FROM prompts WHERE id = ?", (prompt_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        matches = get_vector_index(self).nearest(
+            term_vector(row["text"]), limit, exclude=prompt_id
+        )
+        if not matches:
+            return []
+
+        ids = [pid for pid, _ in matches]
+        prompts = {}
+        with self.model.get_read_connection() as conn:
+            for row in conn.execute(
+                f"SELECT prompts.* FROM prompts WHERE id IN ({sql_placeholders(ids)})",
+                ids,
+            ):
+                prompts[row["id"]] = self._row_to_dict(row)
+        result = []
+        for pid, similarity in matches:
+            prompt = prompts.get(pid)
+            if prompt is not None:
+                prompt["similarity"] = similarity
+                result.append(prompt)
+        return result
+
+    def cleanup_duplicates(
+        self, progress: Optional[Callable[[str, int, int], None]] = None
+    ) -> int:
+        """
+        Remove duplicate prompts based on text content, preserving all image links.
+
+        The oldest prompt of each duplicate group is kept. It receives the
+        first non-empty category, the highest rating, the notes and the tags
+        of the whole group, and the images of the removed prompts. Group
+        members are ranked once into a temporary table with window functions;
+        every merge step is then a single set-based statement, all in one
+        transaction.
+
+        Args:
+            progress: Optional callback ``progress(stage, done, total)``
+                called as the cleanup advances. ``stage`` is one of
+                ``"scanning"``, ``"merging"`` (done/total in groups),
+                ``"moving_images"`` or ``"removing"`` (done/total in prompts).
 
+        Returns:
+            int: Number of duplicates removed
+        """
+        self.logger.info("Starting duplicate cleanup process with image preservation")
+        report = progress or (lambda stage, done, total: None)
+        try:
+            with self.model.get_connection() as conn:
+                try:
+                    report("scanning", 0, 0)
+                    groups, removable = self._rank_duplicate_members(conn)
+                    self.logger.debug(f"Found {groups} groups of duplicate prompts")
+                    if not removable:
+                        self.logger.info("No duplicate prompts found")
+                        return 0
+
+                    report("merging", 0, groups)
+                    self._merge_duplicate_members(conn)
+                    report("merging", groups, groups)
+
+                    report("moving_images", 0, removable)
+                    cursor = conn.execute("""
+                        UPDATE OR IGNORE generated_images SET prompt_id = (
+                            SELECT m.primary_id FROM temp.duplicate_members m
+                            WHERE m.prompt_id = generated_images.prompt_id
+                        )
+                        WHERE prompt_id IN (
+                            SELECT prompt_id FROM temp.duplicate_members
+                            WHERE position > 1
+                        )
+                    """)
+                    images_transferred = cursor.rowcount
+                    report("moving_images", removable, removable)
+
+                    duplicate_ids = [
+                        row[0]
+                        for row in conn.execute(
+                            "SELECT prompt_id FROM temp.duplicate_members "
+                            "WHERE position > 1 ORDER BY prompt_id"
+                        )
+                    ]
+                    total_removed = 0
+                    report("removing", 0, removable)
+                    for chunk in chunked(duplicate_ids):
+                        marks = sql_placeholders(chunk)
+                        # Images that clashed with one already on the primary
+                        conn.execute(
+                            "DELETE FROM generated_images "
+                            f"WHERE prompt_id IN ({marks})",
+                            chunk,
+                        )
+                        cursor = conn.execute(
+                            f"DELETE FROM prompts WHERE id IN ({marks})", chunk
+                        )
+                        total_removed += cursor.rowcount
+                        report("removing", total_removed, removable)
+
+                    conn.commit()
+                finally:
+                    conn.execute("DROP TABLE IF EXISTS temp.duplicate_members")
+
+                self.logger.info(
+                    f"Removed {total_removed} duplicate prompts, "
+                    f"transferred {images_transferred} images"
+                )
                 return total_removed
 
         except Exception as e:
@@ -1307,86 +2755,194 @@ class PromptDatabase:
 
                 # Proceed with linking
                 filename = os.path.basename(image_path)
-                file_info = metadata.get("file_info", {}) if metadata else {}
 
                 # Use INSERT OR IGNORE to skip duplicates (same prompt_id + filename)
-                cursor = conn.execute(
-                    """
-                    INSERT OR IGNORE INTO generated_images
-                    (prompt_id, image_path, filename, file_size, width, height, format,
-                     workflow_data, prompt_metadata, parameters)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                    """,
-                    (
-                        prompt_id_int,
-                        image_path,
-                        filename,
-                        file_info.get("size"),
-                        (
-                            file_info.get("dimensions", [None, None])[0]
-                            if file_info.get("dimensions")
-                            else None
-                        ),
-                        (
-                            file_info.get("dimensions", [None, None])[1]
-                            if file_info.get("dimensions")
-                            else None
-                        ),
-                        file_info.get("format"),
-                        json.dumps(metadata.get("workflow", {}) if metadata else {}),
-                        json.dumps(metadata.get("prompt", {}) if metadata else {}),
-                        json.dumps(metadata.get("parameters", {}) if metadata else {}),
-                    ),
-                )
+                params = self._image_link_params(prompt_id_int, image_path, metadata)
+                image_ids = self._insert_image_links(conn, [params])
+                if image_ids:
+                    self.model.assign_image_dirs(conn)
+                self.model.note_prompt_changes(())
                 conn.commit()
 
-                if cursor.lastrowid == 0:
+                if not image_ids:
                     self.logger.debug(
                         f"Image {filename} already linked to prompt {prompt_id_int}"
                     )
                     return 0
 
-                return cursor.lastrowid
+                return image_ids[0]
 
         except Exception as e:
             self.logger.error(f"Error linking image to prompt {prompt_id}: {e}")
             return 0
 
-    def get_prompt_images(self, prompt_id: str) -> List[Dict[str, Any]]:
+    def _image_link_params(
+        self,
+        prompt_id: int,
+        image_path: str,
+        metadata: Optional[Dict[str, Any]] = None,
+    ) -> tuple:
+        """Build the ``IMAGE_LINK_SQL`` parameters for one image.
+
+        The workflow and prompt JSON are returned as text; see
+        :meth:`_insert_image_links`.
+        """
+        file_info = metadata.get("file_info", {}) if metadata else {}
+        dimensions = file_info.get("dimensions") or [None, None]
+        return (
+            prompt_id,
+            image_path,
+            os.path.basename(image_path),
+            file_info.get("size"),
+            dimensions[0],
+            dimensions[1],
+            file_info.get("format"),
+            json.dumps(metadata.get("workflow", {}) if metadata else {}),
+            json.dumps(metadata.get("prompt", {}) if metadata else {}),
+            json.dumps(metadata.get("parameters", {}) if metadata else {}),
+        )
+
+    def _insert_image_links(
+        self, conn: sqlite3.Connection, rows: List[tuple]
+    ) -> List[int]:
+        """Insert ``_image_link_params`` rows; return the ids of new images.
+
+        Blobs are stored only for rows the insert did not ignore, so
+        re-linking a known image never leaves unreferenced blobs behind.
+        """
+        known: Dict[bytes, int] = {}
+        image_ids = []
+        for row in rows:
+            cursor = conn.execute(IMAGE_LINK_SQL, row[:7] + (None, None) + row[9:])
+            if not cursor.rowcount:
+                continue
+            conn.execute(
+                "UPDATE generated_images "
+                "SET workflow_blob_id = ?, metadata_blob_id = ? WHERE id = ?",
+                (
+                    store_blob(conn, row[7], known),
+                    store_blob(conn, row[8], known),
+                    cursor.lastrowid,
+                ),
+            )
+            image_ids.append(cursor.lastrowid)
+        return image_ids
+
+    def bulk_link_images(
+        self,
+        links: Iterable[tuple],
+        chunk_size: int = SQL_CHUNK_SIZE,
+    ) -> int:
+        """
+        Link many images to prompts, one transaction per chunk.
+
+        Links to prompts that do not exist, and non-numeric prompt ids such
+        as ``temp_*``, are skipped. Images already linked to the same prompt
+        (same filename) are ignored.
+
+        Args:
+            links: Iterable of ``(prompt_id, image_path)`` or
+                ``(prompt_id, image_path, metadata)`` tuples
+            chunk_size: Number of links written per transaction
+
+        Returns:
+            int: Number of image records created
+        """
+        linked = 0
+        chunk: List[tuple] = []
+        for link in links:
+            prompt_id, image_path = link[0], link[1]
+            metadata = link[2] if len(link) > 2 else None
+            if isinstance(prompt_id, str) and prompt_id.isdigit():
+                prompt_id = int(prompt_id)
+            if not isinstance(prompt_id, int) or not image_path:
+                continue
+            chunk.append(self._image_link_params(prompt_id, image_path, metadata))
+            if len(chunk) >= chunk_size:
+                linked += self._link_image_chunk(chunk)
+                chunk = []
+        if chunk:
+            linked += self._link_image_chunk(chunk)
+        return linked
+
+    def _link_image_chunk(self, rows: List[tuple]) -> int:
+        """Write one chunk for :meth:`bulk_link_images` in a transaction."""
+        prompt_ids = _unique(row[0] for row in rows)
+        with self.model.get_connection() as conn:
+            known = {
+                row["id"]
+                for row in conn.execute(
+                    "SELECT id FROM prompts "
+                    f"WHERE id IN ({sql_placeholders(prompt_ids)})",
+                    prompt_ids,
+                ).fetchall()
+            }
+            linked = len(
+                self._insert_image_links(conn, [r for r in rows if r[0] in known])
+            )
+            if linked:
+                self.model.assign_image_dirs(conn)
+            self.model.note_prompt_changes(())
+            conn.commit()
+        return linked
+
+    def _ensure_image_dirs(self) -> None:
+        """Assign directories to images added without ``link_image_to_prompt``."""
+        with self.model.get_read_connection() as conn:
+            missing = conn.execute(
+                "SELECT 1 FROM generated_images WHERE dir_id IS NULL LIMIT 1"
+            ).fetchone()
+        if missing is None:
+            return
+        with self.model.get_connection() as conn:
+            assigned = self.model.assign_image_dirs(conn)
+            self.model.note_prompt_changes(())
+            conn.commit()
+        self.logger.debug(f"Indexed directories of {assigned} images")
+
+    def get_prompt_images(
+        self, prompt_id: str, fields: Optional[Sequence[str]] = None
+    ) -> List[Dict[str, Any]]:
         """
         Get all images associated with a prompt.
 
         Args:
             prompt_id: The prompt ID
+            fields: Image fields to return (see ``resolve_image_fields``);
+                None returns all of them
 
         Returns:
             List of image records
         """
-        with self.model.get_connection() as conn:
+        with self.model.get_read_connection() as conn:
             cursor = conn.execute(
-                """
-                SELECT * FROM generated_images
-                WHERE prompt_id = ?
-                ORDER BY generation_time DESC
+                f"""
+                SELECT {_image_columns(fields)}
+                FROM generated_images gi
+                WHERE gi.prompt_id = ?
+                ORDER BY gi.generation_time DESC
                 """,
                 (prompt_id,),
             )
-            return [self._image_row_to_dict(row) for row in cursor.fetchall()]
+            return self._image_rows_to_dicts(conn, cursor.fetchall())
 
-    def get_recent_images(self, limit: int = 50) -> List[Dict[str, Any]]:
+    def get_recent_images(
+        self, limit: int = 50, fields: Optional[Sequence[str]] = None
+    ) -> List[Dict[str, Any]]:
         """
         Get recently generated images across all prompts.
 
         Args:
             limit: Maximum number of images to return
+            fields: Image fields to return; None returns all of them
 
         Returns:
             List of image records with prompt text
         """
-        with self.model.get_connection() as conn:
+        with self.model.get_read_connection() as conn:
             cursor = conn.execute(
-                """
-                SELECT gi.*, p.text as prompt_text
+                f"""
+                SELECT {_image_columns(fields)}, p.text as prompt_text
                 FROM generated_images gi
                 LEFT JOIN prompts p ON gi.prompt_id = p.id
                 ORDER BY gi.generation_time DESC
@@ -1394,72 +2950,133 @@ class PromptDatabase:
                 """,
                 (limit,),
             )
-            return [self._image_row_to_dict(row) for row in cursor.fetchall()]
+            return self._image_rows_to_dicts(conn, cursor.fetchall())
 
     def get_all_images(
         self,
         limit: int = 0,
         offset: int = 0,
+        cursor: Optional[str] = None,
+        fields: Optional[Sequence[str]] = None,
     ) -> List[Dict[str, Any]]:
         """
         Get generated images with their linked prompts.
 
         Args:
             limit: Maximum number of images to return (0 = all).
-            offset: Number of images to skip.
+            offset: Number of images to skip (ignored when cursor is given).
+            cursor: Opaque ``(generation_time, id)`` cursor; only images
+                after it are returned.
+            fields: Image fields to return; None returns all of them
 
         Returns:
             List of image records with prompt text and tags
         """
         sql = (
-            "SELECT gi.*, p.text as prompt_text, "
-            "(SELECT GROUP_CONCAT(t.name, '|||') FROM prompt_tags pt "
-            "JOIN tags t ON pt.tag_id = t.id WHERE pt.prompt_id = p.id) AS _prompt_tags_list "
+            f"SELECT {_image_columns(fields, 'generation_time')}, "
+            "p.text as prompt_text, p.tag_list AS _prompt_tag_list "
             "FROM generated_images gi "
             "INNER JOIN prompts p ON gi.prompt_id = p.id "
             "WHERE gi.image_path IS NOT NULL AND gi.image_path != '' "
-            "ORDER BY gi.generation_time DESC"
         )
         params: list = []
+        if cursor:
+            sql += "AND (gi.generation_time, gi.id) < (?, ?) "
+            params.extend(decode_cursor(cursor))
+            offset = 0
+        sql += "ORDER BY gi.generation_time DESC, gi.id DESC"
         if limit > 0:
             sql += " LIMIT ? OFFSET ?"
-            params = [limit, offset]
+            params.extend([limit, offset])
 
-        with self.model.get_connection() as conn:
-            cursor = conn.execute(sql, params)
-            rows = cursor.fetchall()
+        with self.model.get_read_connection() as conn:
+            rows = conn.execute(sql, params).fetchall()
             result = []
-            for row in rows:
-                data = self._image_row_to_dict(row)
-                if row["_prompt_tags_list"]:
-                    data["prompt_tags"] = row["_prompt_tags_list"].split("|||")
-                else:
-                    data["prompt_tags"] = []
+            for data in self._image_rows_to_dicts(conn, rows):
+                tag_list = data.pop("_prompt_tag_list", None)
+                data["prompt_tags"] = json.loads(tag_list) if tag_list else []
                 result.append(data)
             return result
 
-    def search_images_by_prompt(self, search_term: str) -> List[Dict[str, Any]]:
+    def get_images_page(
+        self,
+        limit: int = 100,
+        offset: int = 0,
+        cursor: Optional[str] = None,
+        fields: Optional[Sequence[str]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Get one page of images for infinite scroll, with a keyset cursor.
+
+        Args:
+            limit: Maximum number of images to return
+            offset: Number of images to skip (ignored when cursor is given)
+            cursor: Cursor from a previous page's ``next_cursor``
+            fields: Image fields to return; None returns all of them
+
+        Returns:
+            Dict with images list, has_more and next_cursor
+        """
+        images = self.get_all_images(limit + 1, offset, cursor, fields)
+        has_more = len(images) > limit
+        images = images[:limit]
+        next_cursor = None
+        if has_more and images:
+            last = images[-1]
+            next_cursor = encode_cursor(last["generation_time"], last["id"])
+        return {
+            "images": images,
+            "limit": limit,
+            "offset": 0 if cursor else offset,
+            "has_more": has_more,
+            "next_cursor": next_cursor,
+        }
+
+    def search_images_by_prompt(
+        self, search_term: str, fields: Optional[Sequence[str]] = None
+    ) -> List[Dict[str, Any]]:
         """
         Search images by prompt text.
 
+        Uses the FTS5 index (prefix matching) when available, otherwise a
+        substring LIKE match.
+
         Args:
             search_term: Text to search for in prompt content
+            fields: Image fields to return; None returns all of them
 
         Returns:
             List of image records with prompt text
         """
-        with self.model.get_connection() as conn:
-            cursor = conn.execute(
-                """
-                SELECT gi.*, p.text as prompt_text
+        fts_query = None
+        if self.model.fts_enabled:
+            fts_query = _build_fts_query(search_term or "")
+
+        columns = _image_columns(fields)
+        if fts_query:
+            sql = f"""
+                SELECT {columns}, p.text as prompt_text
                 FROM generated_images gi
                 JOIN prompts p ON gi.prompt_id = p.id
-                WHERE p.text LIKE ?
+                WHERE p.id IN (
+                    SELECT rowid FROM prompts_fts WHERE prompts_fts MATCH ?
+                )
                 ORDER BY gi.generation_time DESC
-                """,
-                (f"%{search_term}%",),
-            )
-            return [self._image_row_to_dict(row) for row in cursor.fetchall()]
+            """
+            params = (fts_query,)
+        else:
+            sql = f"""
+                SELECT {columns}, p.text as prompt_text
+                FROM generated_images gi
+                JOIN prompts p ON gi.prompt_id = p.id
+                WHERE {self._substring_condition("p", search_term or "")}
+                ORDER BY gi.generation_time DESC
+            """
+            params = (f"%{search_term}%",)
+
+        with self.model.get_read_connection() as conn:
+            cursor = conn.execute(sql, params)
+            return self._image_rows_to_dicts(conn, cursor.fetchall())
 
     def get_image_by_id(self, image_id: int) -> Optional[Dict[str, Any]]:
         """
@@ -1471,12 +3088,14 @@ class PromptDatabase:
         Returns:
             Image record or None if not found
         """
-        with self.model.get_connection() as conn:
+        with self.model.get_read_connection() as conn:
             cursor = conn.execute(
-                "SELECT * FROM generated_images WHERE id = ?", (image_id,)
+                f"SELECT {_image_columns(None)} FROM generated_images gi "
+                "WHERE gi.id = ?",
+                (image_id,),
             )
             row = cursor.fetchone()
-            return self._image_row_to_dict(row) if row else None
+            return self._image_rows_to_dicts(conn, [row])[0] if row else None
 
     def delete_image(self, image_id: int) -> bool:
         """
@@ -1492,32 +3111,118 @@ class PromptDatabase:
             cursor = conn.execute(
                 "DELETE FROM generated_images WHERE id = ?", (image_id,)
             )
+            self.model.note_prompt_changes(())
             conn.commit()
             return cursor.rowcount > 0
 
-    def cleanup_missing_images(self) -> int:
+    def cleanup_missing_images(
+        self,
+        progress: Optional[Callable[[int, int, Dict[str, int]], None]] = None,
+        after_id: int = 0,
+        workers: int = 1,
+        slice_size: int = MISSING_IMAGE_SLICE_SIZE,
+    ) -> int:
         """
         Remove image records where the actual file no longer exists.
 
+        Rows are processed in id-ordered slices of ``slice_size``. Each slice
+        is grouped by parent directory and every directory is listed once
+        with ``os.scandir`` (cached while later slices still reference it)
+        instead of stat-ing each file. A name missing from a listing is only
+        confirmed with ``os.path.exists`` when it matches an entry up to case
+        or Unicode normalization, so case-insensitive file systems do not
+        lose rows. Missing rows are deleted in chunked batches; the
+        writer lock is only held for those deletes, never for file system
+        access. Directories that exist but cannot be read are skipped.
+
+        Each slice commits on its own, so an interrupted run can be resumed
+        by passing the last reported ``last_id`` as ``after_id``.
+
+        Args:
+            progress: Optional callback ``progress(checked, total, counts)``
+                called after each slice, where ``counts`` holds ``checked``,
+                ``removed``, ``total`` and ``last_id``
+            after_id: Only check images with a greater id (resume point)
+            workers: Number of threads listing directories in parallel
+            slice_size: Number of image rows per slice
+
         Returns:
             int: Number of orphaned records removed
         """
-        removed_count = 0
+        with self.model.get_read_connection() as conn:
+            total = conn.execute(
+                "SELECT COUNT(*) FROM generated_images WHERE id > ?", (after_id,)
+            ).fetchone()[0]
+        counts = {"checked": 0, "removed": 0, "total": total, "last_id": after_id}
+        listings: Dict[str, Optional[Set[str]]] = {}
+        pool = ThreadPoolExecutor(max_workers=workers) if workers > 1 else None
 
-        with self.model.get_connection() as conn:
-            cursor = conn.execute("SELECT id, image_path FROM generated_images")
-            images = cursor.fetchall()
-
-            for image in images:
-                if not os.path.exists(image["image_path"]):
-                    conn.execute(
-                        "DELETE FROM generated_images WHERE id = ?", (image["id"],)
+        try:
+            while True:
+                with self.model.get_read_connection() as conn:
+                    rows = conn.execute(
+                        "SELECT id, image_path FROM generated_images "
+                        "WHERE id > ? ORDER BY id LIMIT ?",
+                        (counts["last_id"], slice_size),
+                    ).fetchall()
+                if not rows:
+                    break
+
+                by_directory: Dict[str, List[Tuple[int, str, str]]] = {}
+                for image_id, path in rows:
+                    directory, name = os.path.split(path)
+                    by_directory.setdefault(directory, []).append(
+                        (image_id, name, path)
                     )
-                    removed_count += 1
 
-            conn.commit()
+                # Keep listings only for directories this slice still uses
+                listings = {d: listings[d] for d in by_directory if d in listings}
+                unlisted = [d for d in by_directory if d not in listings]
+                mapper = pool.map if pool else map
+                listings.update(zip(unlisted, mapper(_list_directory, unlisted)))
 
-        return removed_count
+                missing = []
+                for directory, entries in by_directory.items():
+                    names = listings[directory]
+                    if names is None:
+                        continue
+                    folded = None
+                    for image_id, name, path in entries:
+                        if name in names:
+                            continue
+                        # Case or Unicode form may differ on some file
+                        # systems; only then is the file itself checked
+                        if folded is None:
+                            folded = {_fold_name(n) for n in names}
+                        if _fold_name(name) not in folded or not os.path.exists(path):
+                            missing.append(image_id)
+
+                if missing:
+                    with self.model.get_connection() as conn:
+                        for chunk in chunked(missing):
+                            cursor = conn.execute(
+                                "DELETE FROM generated_images "
+                                f"WHERE id IN ({sql_placeholders(chunk)})",
+                                chunk,
+                            )
+                            counts["removed"] += cursor.rowcount
+                        self.model.note_prompt_changes(())
+                        conn.commit()
+
+                counts["checked"] += len(rows)
+                counts["last_id"] = rows[-1][0]
+                if progress:
+                    progress(counts["checked"], total, dict(counts))
+        finally:
+            if pool:
+                pool.shutdown()
+
+        if counts["removed"]:
+            self.logger.info(
+                f"Removed {counts['removed']} image records with missing files "
+                f"(checked {counts['checked']})"
+            )
+        return counts["removed"]
 
     def _clean_nan_values(self, obj: Any) -> Any:
         """
@@ -1538,148 +3243,102 @@ class PromptDatabase:
         else:
             return obj
 
-    def _merge_duplicate_metadata(
-        self, conn: sqlite3.Connection, primary_id: int, duplicate_ids: List[int]
-    ) -> Dict[str, Any]:
+    def _rank_duplicate_members(self, conn: sqlite3.Connection) -> Tuple[int, int]:
         """
-        Merge metadata from duplicate prompts, prioritizing non-empty values.
+        Fill ``temp.duplicate_members`` with every prompt that has duplicates.
+
+        Each row maps a prompt to the oldest prompt of its group
+        (``primary_id``) with its 1-based ``position`` in the group by age.
 
         Args:
-            conn: Database connection
-            primary_id: ID of the prompt to keep
-            duplicate_ids: List of duplicate prompt IDs
+            conn: Writer connection
 
         Returns:
-            Dict containing merged metadata
-        """
-        try:
-            cursor = conn.execute(
-                "SELECT category, rating, notes FROM prompts WHERE id = ?",
-                (primary_id,),
+            Tuple of (number of groups, number of prompts to remove)
+        """
+        conn.execute("DROP TABLE IF EXISTS temp.duplicate_members")
+        conn.execute("""
+            CREATE TEMP TABLE duplicate_members (
+                prompt_id INTEGER PRIMARY KEY,
+                primary_id INTEGER NOT NULL,
+                position INTEGER NOT NULL
             )
-            primary_data = cursor.fetchone()
-            if not primary_data:
-                return {}
-
-            merged = {
-                "category": primary_data["category"],
-                "tags": self._get_prompt_tags(conn, primary_id),
-                "rating": primary_data["rating"],
-                "notes": primary_data["notes"] or "",
-            }
-
-            for dup_id in duplicate_ids:
-                cursor = conn.execute(
-                    "SELECT category, rating, notes FROM prompts WHERE id = ?",
-                    (dup_id,),
-                )
-                dup_data = cursor.fetchone()
-                if not dup_data:
-                    continue
-
-                if not merged["category"] and dup_data["category"]:
-                    merged["category"] = dup_data["category"]
-
-                dup_tags = self._get_prompt_tags(conn, dup_id)
-                for tag in dup_tags:
-                    if tag not in merged["tags"]:
-                        merged["tags"].append(tag)
-
-                if dup_data["rating"] and (
-                    not merged["rating"] or dup_data["rating"] > merged["rating"]
-                ):
-                    merged["rating"] = dup_data["rating"]
-
-                if dup_data["notes"] and dup_data["notes"].strip():
-                    if merged["notes"]:
-                        merged["notes"] += f" | {dup_data['notes']}"
-                    else:
-                        merged["notes"] = dup_data["notes"]
-
-            return merged
-
-        except Exception as e:
-            self.logger.error(f"Error merging metadata: {e}", exc_info=True)
-            return {}
-
-    def _transfer_images_to_primary(
-        self, conn: sqlite3.Connection, primary_id: int, duplicate_ids: List[int]
-    ) -> int:
-        """
-        Transfer all images from duplicate prompts to the primary prompt.
-
-        Args:
-            conn: Database connection
-            primary_id: ID of the prompt to keep
-            duplicate_ids: List of duplicate prompt IDs
+        """)
+        conn.execute(f"""
+            INSERT INTO temp.duplicate_members (prompt_id, primary_id, position)
+            SELECT id, FIRST_VALUE(id) OVER by_age, ROW_NUMBER() OVER by_age
+            FROM prompts
+            WHERE normalized_text IN ({DUPLICATE_KEYS_SQL})
+            WINDOW by_age AS (PARTITION BY normalized_text ORDER BY created_at, id)
+        """)
+        conn.execute(
+            "CREATE INDEX temp.idx_duplicate_members_primary "
+            "ON duplicate_members(primary_id, position)"
+        )
+        row = conn.execute(
+            "SELECT COALESCE(SUM(position = 1), 0), COALESCE(SUM(position > 1), 0) "
+            "FROM temp.duplicate_members"
+        ).fetchone()
+        return row[0], row[1]
 
-        Returns:
-            Number of images transferred
+    def _merge_duplicate_members(self, conn: sqlite3.Connection) -> None:
         """
-        transferred_count = 0
-        try:
-            for dup_id in duplicate_ids:
-                # Update all images to point to primary prompt
-                cursor = conn.execute(
-                    "UPDATE generated_images SET prompt_id = ? WHERE prompt_id = ?",
-                    (primary_id, dup_id),
-                )
-                transferred_count += cursor.rowcount
-
-                if cursor.rowcount > 0:
-                    self.logger.debug(
-                        f"Transferred {cursor.rowcount} images from prompt {dup_id} to {primary_id}"
-                    )
-
-            return transferred_count
+        Merge the metadata of each duplicate group into its primary prompt.
 
-        except Exception as e:
-            self.logger.error(f"Error transferring images: {e}", exc_info=True)
-            return 0
-
-    def _update_primary_with_merged_metadata(
-        self, conn: sqlite3.Connection, primary_id: int, merged_metadata: Dict[str, Any]
-    ) -> None:
-        """
-        Update the primary prompt with merged metadata.
+        Works on ``temp.duplicate_members`` (see ``_rank_duplicate_members``).
+        Primaries keep their own category unless it is empty, take the
+        highest rating in the group, and get the non-blank notes of the group
+        joined oldest first. Tags of the removed prompts are linked to the
+        primary; the tag triggers keep ``usage_count`` and ``tag_list`` right.
 
         Args:
-            conn: Database connection
-            primary_id: ID of the prompt to update
-            merged_metadata: Merged metadata dictionary
-        """
-        try:
-            conn.execute(
-                """
-                UPDATE prompts
-                SET category = ?, rating = ?, notes = ?, updated_at = ?
-                WHERE id = ?
-                """,
-                (
-                    merged_metadata.get("category"),
-                    merged_metadata.get("rating"),
-                    merged_metadata.get("notes"),
-                    datetime.datetime.now(datetime.timezone.utc).isoformat(),
-                    primary_id,
+            conn: Writer connection
+        """
+        conn.execute(
+            """
+            UPDATE prompts SET
+                category = COALESCE((
+                    SELECT p.category FROM temp.duplicate_members m
+                    JOIN prompts p ON p.id = m.prompt_id
+                    WHERE m.primary_id = prompts.id AND p.category != ''
+                    ORDER BY m.position LIMIT 1
+                ), category),
+                rating = (
+                    SELECT MAX(p.rating) FROM temp.duplicate_members m
+                    JOIN prompts p ON p.id = m.prompt_id
+                    WHERE m.primary_id = prompts.id
                 ),
+                notes = COALESCE((
+                    SELECT group_concat(notes, ' | ') FROM (
+                        SELECT p.notes FROM temp.duplicate_members m
+                        JOIN prompts p ON p.id = m.prompt_id
+                        WHERE m.primary_id = prompts.id AND TRIM(p.notes) != ''
+                        ORDER BY m.position
+                    )
+                ), notes),
+                updated_at = ?
+            WHERE id IN (
+                SELECT prompt_id FROM temp.duplicate_members WHERE position = 1
             )
-            self._sync_prompt_tags(conn, primary_id, merged_metadata.get("tags", []))
-            self.logger.debug(
-                f"Updated primary prompt {primary_id} with merged metadata"
-            )
-
-        except Exception as e:
-            self.logger.error(
-                f"Error updating primary prompt metadata: {e}", exc_info=True
-            )
+            """,
+            (datetime.datetime.now(datetime.timezone.utc).isoformat(),),
+        )
+        conn.execute("""
+            INSERT OR IGNORE INTO prompt_tags (prompt_id, tag_id)
+            SELECT m.primary_id, pt.tag_id
+            FROM temp.duplicate_members m
+            JOIN prompt_tags pt ON pt.prompt_id = m.prompt_id
+            WHERE m.position > 1
+        """)
 
     # ------------------------------------------------------------------
     # Methods extracted from api.py raw SQL (Fix 3.1)
     # ------------------------------------------------------------------
 
+    @cached_result
     def get_statistics(self) -> Dict[str, Any]:
         """Get comprehensive database statistics."""
-        with self.model.get_connection() as conn:
+        with self.model.get_read_connection() as conn:
             cursor = conn.execute("SELECT COUNT(*) FROM prompts")
             row = cursor.fetchone()
             total_prompts = (row[0] if row else 0) or 0
@@ -1697,10 +3356,7 @@ class PromptDatabase:
             row = cursor.fetchone()
             avg_rating = row[0] if row else None
 
-            cursor = conn.execute(
-                "SELECT COUNT(*) FROM tags t "
-                "WHERE EXISTS (SELECT 1 FROM prompt_tags pt WHERE pt.tag_id = t.id)"
-            )
+            cursor = conn.execute("SELECT COUNT(*) FROM tags WHERE usage_count > 0")
             row = cursor.fetchone()
             total_tags = (row[0] if row else 0) or 0
 
@@ -1708,8 +3364,11 @@ class PromptDatabase:
             row = cursor.fetchone()
             total_images = (row[0] if row else 0) or 0
 
+            # A DISTINCT subquery walks idx_images_prompt_time in order; with
+            # ANALYZE statistics COUNT(DISTINCT) would build a temp b-tree
             cursor = conn.execute(
-                "SELECT COUNT(DISTINCT prompt_id) FROM generated_images"
+                "SELECT COUNT(*) FROM "
+                "(SELECT DISTINCT prompt_id FROM generated_images)"
             )
             row = cursor.fetchone()
             images_with_prompts = (row[0] if row else 0) or 0
@@ -1740,6 +3399,9 @@ class PromptDatabase:
                     prompt_id,
                 ),
             )
+            if cursor.rowcount > 0:
+                conn.execute(SIGNATURE_SQL, _signature_params(prompt_id, new_text))
+            self.model.note_prompt_changes([prompt_id])
             conn.commit()
             return cursor.rowcount > 0
 
@@ -1758,6 +3420,7 @@ class PromptDatabase:
                     prompt_id,
                 ),
             )
+            self.model.note_prompt_changes([prompt_id])
             conn.commit()
             return cursor.rowcount > 0
 
@@ -1769,6 +3432,7 @@ class PromptDatabase:
                 "UPDATE prompts SET updated_at = ? WHERE id = ?",
                 (datetime.datetime.now(datetime.timezone.utc).isoformat(), prompt_id),
             )
+            self.model.note_prompt_changes([prompt_id])
             conn.commit()
 
     def bulk_delete_prompts(self, prompt_ids: List[int]) -> int:
@@ -1779,11 +3443,16 @@ class PromptDatabase:
         """
         count = 0
         with self.model.get_connection() as conn:
-            for pid in prompt_ids:
-                conn.execute("DELETE FROM generated_images WHERE prompt_id = ?", (pid,))
-                cursor = conn.execute("DELETE FROM prompts WHERE id = ?", (pid,))
-                if cursor.rowcount > 0:
-                    count += 1
+            for chunk in chunked(_unique(prompt_ids)):
+                marks = sql_placeholders(chunk)
+                conn.execute(
+                    f"DELETE FROM generated_images WHERE prompt_id IN ({marks})", chunk
+                )
+                cursor = conn.execute(
+                    f"DELETE FROM prompts WHERE id IN ({marks})", chunk
+                )
+                count += cursor.rowcount
+                self.model.note_prompt_changes(chunk)
             conn.commit()
         return count
 
@@ -1795,27 +3464,40 @@ class PromptDatabase:
         """
         count = 0
         with self.model.get_connection() as conn:
-            tag_map = self._ensure_tags(conn, new_tags)
+            tag_ids = sorted(self._ensure_tags(conn, new_tags).values())
+            if not tag_ids:
+                conn.commit()
+                return 0
+            tag_marks = sql_placeholders(tag_ids)
             now = datetime.datetime.now(datetime.timezone.utc).isoformat()
-            for pid in prompt_ids:
-                cursor = conn.execute("SELECT id FROM prompts WHERE id = ?", (pid,))
-                if not cursor.fetchone():
+            for chunk in chunked(_unique(prompt_ids)):
+                # Existing prompts that are missing at least one of the tags
+                changed = [
+                    row["id"]
+                    for row in conn.execute(
+                        "SELECT id FROM prompts "
+                        f"WHERE id IN ({sql_placeholders(chunk)}) "
+                        "AND (SELECT COUNT(*) FROM prompt_tags pt "
+                        "WHERE pt.prompt_id = prompts.id "
+                        f"AND pt.tag_id IN ({tag_marks})) < ?",
+                        [*chunk, *tag_ids, len(tag_ids)],
+                    ).fetchall()
+                ]
+                if not changed:
                     continue
-                added = False
-                for tag_name in new_tags:
-                    tag_id = tag_map.get(tag_name)
-                    if tag_id:
-                        cursor = conn.execute(
-                            "INSERT OR IGNORE INTO prompt_tags (prompt_id, tag_id) VALUES (?, ?)",
-                            (pid, tag_id),
-                        )
-                        if cursor.rowcount > 0:
-                            added = True
-                if added:
-                    conn.execute(
-                        "UPDATE prompts SET updated_at = ? WHERE id = ?", (now, pid)
-                    )
-                    count += 1
+                marks = sql_placeholders(changed)
+                conn.execute(
+                    "INSERT OR IGNORE INTO prompt_tags (prompt_id, tag_id) "
+                    "SELECT p.id, t.id FROM prompts p, tags t "
+                    f"WHERE p.id IN ({marks}) AND t.id IN ({tag_marks})",
+                    [*changed, *tag_ids],
+                )
+                conn.execute(
+                    f"UPDATE prompts SET updated_at = ? WHERE id IN ({marks})",
+                    [now, *changed],
+                )
+                self.model.note_prompt_changes(changed)
+                count += len(changed)
             conn.commit()
         return count
 
@@ -1828,13 +3510,14 @@ class PromptDatabase:
         count = 0
         now = datetime.datetime.now(datetime.timezone.utc).isoformat()
         with self.model.get_connection() as conn:
-            for pid in prompt_ids:
+            for chunk in chunked(_unique(prompt_ids)):
                 cursor = conn.execute(
-                    "UPDATE prompts SET category = ?, updated_at = ? WHERE id = ?",
-                    (category, now, pid),
+                    "UPDATE prompts SET category = ?, updated_at = ? "
+                    f"WHERE id IN ({sql_placeholders(chunk)})",
+                    [category, now, *chunk],
                 )
-                if cursor.rowcount > 0:
-                    count += 1
+                count += cursor.rowcount
+                self.model.note_prompt_changes(chunk)
             conn.commit()
         return count
 
@@ -1842,44 +3525,82 @@ class PromptDatabase:
         """Look up prompt + image metadata for a given image path.
 
         Returns a dict with prompt_id, text, category, tags, rating, notes,
-        workflow_data, prompt_metadata, generation_time — or None.
+        workflow_data, prompt_metadata, generation_time — or None. See
+        :meth:`get_images_prompt_info` for how paths are matched.
         """
-        with self.model.get_connection() as conn:
-            cursor = conn.execute(
-                """SELECT gi.prompt_id, p.text, p.category, p.rating, p.notes,
-                          gi.workflow_data, gi.prompt_metadata, gi.generation_time
-                   FROM generated_images gi
-                   JOIN prompts p ON gi.prompt_id = p.id
-                   WHERE gi.image_path = ? OR gi.image_path LIKE ?""",
-                (image_path, f"%{os.path.basename(image_path)}"),
+        return self.get_images_prompt_info([image_path]).get(image_path)
+
+    def get_images_prompt_info(
+        self, image_paths: Iterable[str]
+    ) -> Dict[str, Optional[Dict[str, Any]]]:
+        """Look up prompt + image metadata for many image paths at once.
+
+        Each path is matched on its canonical form first. Paths without an
+        exact match fall back to images with the same file name, preferring
+        the one whose directory shares the most trailing folders with the
+        requested path, then the most recently linked one. Both steps are
+        index lookups, a few queries for the whole batch.
+
+        Args:
+            image_paths: Image paths as shown in the gallery
+
+        Returns:
+            Dict mapping each requested path to its metadata dict (as
+            returned by :meth:`get_image_prompt_info`) or None
+        """
+        keys = {path: canonical_image_path(path) for path in _unique(image_paths)}
+        if not keys:
+            return {}
+        self._ensure_image_dirs()
+
+        exact: Dict[str, sqlite3.Row] = {}
+        by_name: Dict[str, List[sqlite3.Row]] = {}
+        with self.model.get_read_connection() as conn:
+            for chunk in chunked(_unique(keys.values())):
+                for row in conn.execute(
+                    IMAGE_PROMPT_INFO_SQL.format(
+                        column="canonical_path", placeholders=sql_placeholders(chunk)
+                    ),
+                    chunk,
+                ):
+                    best = exact.get(row["canonical_path"])
+                    if best is None or row["image_id"] > best["image_id"]:
+                        exact[row["canonical_path"]] = row
+
+            names = _unique(
+                os.path.basename(path) for path, key in keys.items() if key not in exact
             )
-            row = cursor.fetchone()
-            if not row:
-                return None
-            tags = self._get_prompt_tags(conn, row[0])
-            try:
-                workflow = json.loads(row[5]) if row[5] else None
-            except (json.JSONDecodeError, TypeError):
-                workflow = None
-            try:
-                prompt_meta = json.loads(row[6]) if row[6] else None
-            except (json.JSONDecodeError, TypeError):
-                prompt_meta = None
-            return {
-                "prompt_id": row[0],
-                "text": row[1],
-                "category": row[2],
-                "tags": tags,
-                "rating": row[3],
-                "notes": row[4],
-                "workflow_data": workflow,
-                "prompt_metadata": prompt_meta,
-                "generation_time": row[7],
-            }
+            for chunk in chunked(names):
+                for row in conn.execute(
+                    IMAGE_PROMPT_INFO_SQL.format(
+                        column="filename", placeholders=sql_placeholders(chunk)
+                    ),
+                    chunk,
+                ):
+                    by_name.setdefault(row["filename"], []).append(row)
+
+            blobs = _BlobCache(conn)
+            results: Dict[str, Optional[Dict[str, Any]]] = {}
+            for path, key in keys.items():
+                row = exact.get(key)
+                if row is None:
+                    candidates = by_name.get(os.path.basename(path), [])
+                    row = max(
+                        candidates,
+                        key=lambda c: (
+                            _shared_dir_depth(key, c["canonical_path"] or ""),
+                            c["image_id"],
+                        ),
+                        default=None,
+                    )
+                results[path] = (
+                    _image_prompt_info(row, blobs) if row is not None else None
+                )
+        return results
 
     def get_prompt_id_for_image(self, image_path: str) -> Optional[int]:
         """Return the prompt_id linked to an image, or None."""
-        with self.model.get_connection() as conn:
+        with self.model.get_read_connection() as conn:
             cursor = conn.execute(
                 "SELECT prompt_id FROM generated_images WHERE image_path = ?",
                 (image_path,),
@@ -1892,7 +3613,7 @@ class PromptDatabase:
 
         Returns list of dicts with 'hash' and 'count'.
         """
-        with self.model.get_connection() as conn:
+        with self.model.get_read_connection() as conn:
             cursor = conn.execute(
                 "SELECT hash, COUNT(*) as count FROM prompts "
                 "WHERE hash IS NOT NULL GROUP BY hash HAVING COUNT(*) > 1"
@@ -1928,7 +3649,7 @@ class PromptDatabase:
     def check_consistency(self) -> List[str]:
         """Run consistency checks and return a list of issue descriptions."""
         issues: List[str] = []
-        with self.model.get_connection() as conn:
+        with self.model.get_read_connection() as conn:
             # Check for orphaned prompt_tags entries
             cursor = conn.execute("""
                 SELECT pt.prompt_id, pt.tag_id FROM prompt_tags pt
@@ -1950,22 +3671,74 @@ class PromptDatabase:
                 issues.append(
                     f"Image {ref['id']} references non-existent prompt {ref['prompt_id']}"
                 )
+
+            # Check trigger-maintained tag usage counts against the junction table
+            cursor = conn.execute("""
+                SELECT t.name, t.usage_count, COUNT(pt.tag_id) AS actual
+                FROM tags t LEFT JOIN prompt_tags pt ON pt.tag_id = t.id
+                GROUP BY t.id
+                HAVING t.usage_count != COUNT(pt.tag_id)
+            """)
+            for ref in cursor.fetchall():
+                issues.append(
+                    f"Tag '{ref['name']}' usage_count is {ref['usage_count']}, "
+                    f"expected {ref['actual']}"
+                )
+
+            # Check trigger-maintained prompt tag lists against the junction table
+            cursor = conn.execute("""
+                SELECT p.id FROM prompts p
+                WHERE COALESCE(json_array_length(p.tag_list), 0) != (
+                    SELECT COUNT(*) FROM prompt_tags pt WHERE pt.prompt_id = p.id
+                )
+            """)
+            for ref in cursor.fetchall():
+                issues.append(f"Prompt {ref['id']} has a stale tag_list")
         return issues
 
-    def _image_row_to_dict(self, row: sqlite3.Row) -> Dict[str, Any]:
+    def rebuild_tag_counts(self) -> int:
+        """Recompute cached tag usage counts and prompt tag lists.
+
+        Returns:
+            Number of tags whose count was corrected.
+        """
+        with self.model.get_connection() as conn:
+            repaired = self.model.rebuild_tag_counts(conn)
+            lists_repaired = self.model.rebuild_tag_lists(conn)
+            conn.commit()
+        if repaired:
+            self.logger.info(f"Rebuilt usage counts for {repaired} tags")
+        if lists_repaired:
+            self.logger.info(f"Rebuilt tag lists for {lists_repaired} prompts")
+        return repaired
+
+    def _image_rows_to_dicts(
+        self, conn: sqlite3.Connection, rows: Iterable[sqlite3.Row]
+    ) -> List[Dict[str, Any]]:
+        """Convert image rows read on ``conn``, sharing one blob cache."""
+        blobs = _BlobCache(conn)
+        return [self._image_row_to_dict(row, blobs) for row in rows]
+
+    def _image_row_to_dict(self, row: sqlite3.Row, blobs: _BlobCache) -> Dict[str, Any]:
         """
         Convert an image database row to a dictionary with parsed JSON fields.
 
         Args:
             row: SQLite row object
+            blobs: Blob cache of the connection the row was read on
 
         Returns:
             Dictionary representation of the row
         """
         data = dict(row)
 
-        # Parse JSON fields
-        for field in ["workflow_data", "prompt_metadata", "parameters"]:
+        # Parse JSON fields; workflow and prompt metadata live in blobs
+        for field in IMAGE_METADATA_FIELDS:
+            if field not in data:
+                continue
+            if field in BLOB_FIELDS:
+                data.pop(BLOB_FIELDS[field], None)
+                data[field] = blobs.text(row, field)
             if data.get(field):
                 try:
                     parsed_data = json.loads(data[field])
@@ -0,0 +1,153 @@
+"""
+Bounded LRU cache for the results of read-only PromptDatabase queries.
+
+Gallery and tag pages ask for the same aggregates (categories, tags,
+statistics, the first page of recent prompts) on every load. Results are
+cached per method and arguments, and the whole cache is dropped as soon as
+the database's write generation moves on (see ``PromptModel.generation``),
+so a cached result is never older than the last write made through
+PromptManager.
+"""
+
+import functools
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Tuple, TypeVar
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+DEFAULT_RESULT_CACHE_SIZE = 256
+
+# Values shared between copies of a cached result
+_SCALARS = frozenset((str, int, float, bool, bytes, type(None)))
+
+
+def _copy_result(value: Any) -> Any:
+    """Copy the lists and dicts of a query result; scalars are immutable.
+
+    Much cheaper than ``copy.deepcopy`` for the plain JSON-like rows the
+    cached methods return.
+    """
+    if type(value) is list:
+        return [v if type(v) in _SCALARS else _copy_result(v) for v in value]
+    if type(value) is dict:
+        return {
+            k: v if type(v) in _SCALARS else _copy_result(v) for k, v in value.items()
+        }
+    if type(value) is tuple:
+        return tuple(_copy_result(v) for v in value)
+    return value
+
+
+class ResultCache:
+    """LRU map of query results, valid for one write generation."""
+
+    def __init__(self, max_entries: int = DEFAULT_RESULT_CACHE_SIZE):
+        """
+        Initialize an empty cache.
+
+        Args:
+            max_entries: Results kept before the least recently used one is
+                evicted; 0 disables caching
+        """
+        self.max_entries = max(0, int(max_entries))
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self._entries: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, generation: int) -> Tuple[bool, Any]:
+        """
+        Look up ``key`` for the given write generation.
+
+        Returns:
+            (True, value) on a hit, (False, None) on a miss
+        """
+        with self._lock:
+            if generation < self.generation:
+                # Asked by a query that started before the latest write
+                self.misses += 1
+                return False, None
+            self._sync(generation)
+            try:
+                value = self._entries[key]
+            except KeyError:
+                self.misses += 1
+                return False, None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return True, value
+
+    def put(self, key: Hashable, generation: int, value: Any) -> None:
+        """Store a result computed at ``generation``; older results are dropped."""
+        with self._lock:
+            if not self.max_entries or generation < self.generation:
+                return
+            self._sync(generation)
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        """Drop every cached result."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters for /prompt_manager/stats."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else None,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "generation": self.generation,
+            }
+
+    def _sync(self, generation: int) -> None:
+        """Forget results of earlier generations (lock held)."""
+        if generation > self.generation:
+            if self._entries:
+                self._entries.clear()
+                self.invalidations += 1
+            self.generation = generation
+
+
+def cached_result(method: F) -> F:
+    """Serve a PromptDatabase read method from ``self.result_cache``.
+
+    The key is the method name and its arguments; calls with unhashable
+    arguments bypass the cache. Callers get their own copy, so mutating a
+    returned list or dict cannot change what later calls see.
+    """
+    name = method.__name__
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        cache: ResultCache = self.result_cache
+        if not cache.max_entries:
+            return method(self, *args, **kwargs)
+        key = (name, args, tuple(sorted(kwargs.items())))
+        try:
+            hash(key)
+        except TypeError:
+            return method(self, *args, **kwargs)
+        # Read the generation first: a write racing with the query leaves
+        # the result filed under the older generation, which is dropped
+        generation = self.model.generation
+        hit, value = cache.get(key, generation)
+        if not hit:
+            value = method(self, *args, **kwargs)
+            cache.put(key, generation, value)
+        return _copy_result(value)
+
+    return wrapper  # type: ignore[return-value]
@@ -0,0 +1,567 @@
+"""
+In-memory inverted index over prompt text, tags, categories and ratings.
+
+``PromptSearchList`` runs the same search on every queued job of a batch. The
+index answers it with set intersections instead of FTS joins and ``LIKE``
+subqueries, and returns the same prompts, newest first, as
+``PromptDatabase.search_prompts`` for the filters it supports.
+
+The same postings answer search-as-you-type completion of tag names and
+prompt words (:meth:`PromptSearchIndex.complete`), ranked by usage.
+
+The index is loaded from the database on first use and kept current through
+the model's change listener: writes that name the prompts they touched are
+re-read on the next search, any other write reloads the index.
+"""
+
+import bisect
+import heapq
+import json
+import re
+import threading
+import unicodedata
+from collections import defaultdict
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Dict,
+    FrozenSet,
+    Iterable,
+    List,
+    NamedTuple,
+    Optional,
+    Pattern,
+    Set,
+    Tuple,
+)
+
+from .models import ChangeTracker
+from .sql_utils import FTS_TOKEN_RE, chunked, sql_placeholders
+
+try:
+    from ..utils.logging_config import get_logger
+except ImportError:
+    from utils.logging_config import get_logger
+
+if TYPE_CHECKING:
+    from .operations import PromptDatabase
+
+# Token characters of the FTS5 unicode61 tokenizer: letters and digits.
+# Underscores and punctuation separate tokens.
+_INDEX_TOKEN_RE = re.compile(r"[^\W_]+", re.UNICODE)
+
+INDEX_COLUMNS = "id, text, category, rating, created_at, tag_list"
+
+# Prompt words offered as completions must occur in this many prompts
+MIN_WORD_USES = 2
+
+# Most used tag names and words kept aside for completing short prefixes
+POPULAR_SIZE = 512
+
+# Sorts after every string starting with a given prefix
+_PREFIX_END = "\U0010ffff"
+
+
+def _fold(text: str) -> str:
+    """Lower-case text and strip diacritics, as unicode61 does."""
+    text = text.lower()
+    if text.isascii():
+        return text
+    decomposed = unicodedata.normalize("NFD", text)
+    return unicodedata.normalize(
+        "NFC", "".join(c for c in decomposed if not unicodedata.combining(c))
+    )
+
+
+def index_tokens(text: str) -> List[str]:
+    """Split text into folded tokens, in order."""
+    return _INDEX_TOKEN_RE.findall(_fold(text))
+
+
+def like_pattern(needle: str) -> Pattern:
+    """Compile ``LIKE '%needle%'`` into an equivalent regular expression.
+
+    ``%`` and ``_`` keep their wildcard meaning and only ASCII letters
+    compare case-insensitively, as in SQLite's built-in LIKE.
+    """
+    body = "".join(
+        ".*" if c == "%" else "." if c == "_" else re.escape(c) for c in needle
+    )
+    return re.compile(body, re.IGNORECASE | re.ASCII | re.DOTALL)
+
+
+class IndexedPrompt(NamedTuple):
+    """Stored fields of one indexed prompt."""
+
+    text: str
+    category: Optional[str]
+    rating: Optional[int]
+    created_at: Optional[str]
+    tags: tuple
+
+
+class PromptSearchIndex:
+    """Process-wide search index of one prompt database.
+
+    Use :func:`get_search_index` rather than creating instances directly, so
+    every node and route shares one copy.
+    """
+
+    def __init__(self, db: "PromptDatabase"):
+        """
+        Initialize an empty index and subscribe to database changes.
+
+        Args:
+            db: PromptDatabase the index is loaded from
+        """
+        self.db = db
+        self.logger = get_logger("prompt_manager.search_index")
+        # _pending_lock guards the change backlog and is only held briefly,
+        # since listeners run while a writer holds the database;
+        # _index_lock serializes refreshes and searches
+        self._pending_lock = threading.Lock()
+        self._index_lock = threading.Lock()
+        self._stale = True
+        self._dirty: Set[int] = set()
+        self.generation = db.model.generation
+        self.loads = 0
+
+        self._prompts: Dict[int, IndexedPrompt] = {}
+        # Posting sets: folded token / tag name / category -> prompt ids
+        self._tokens: Dict[str, Set[int]] = defaultdict(set)
+        self._vocabulary: List[str] = []
+        self._tags: Dict[str, Set[int]] = defaultdict(set)
+        # (folded name, name) of every tag in use, sorted for prefix lookups
+        self._tag_names: List[Tuple[str, str]] = []
+        self._categories: Dict[str, Set[int]] = defaultdict(set)
+        # Sort keys of every prompt, oldest first; see _sort_key
+        self._order: List[tuple] = []
+        # Posting sets derived for a query (prefix and partial tag unions),
+        # reused by repeated searches until the index changes
+        self._derived: Dict[tuple, Set[int]] = {}
+        # Completions per (folded prefix, kind, limit), dropped on change
+        self._completions: Dict[tuple, List[Dict[str, Any]]] = {}
+        # Per source ("tag", "word"): popular names (name -> folded name) and
+        # a floor; names outside the popular set are used at most floor times
+        self._popular: Dict[str, Dict[str, str]] = {"tag": {}, "word": {}}
+        self._popular_floor: Dict[str, int] = {"tag": 0, "word": 0}
+
+        db.model.add_change_listener(self._on_change)
+
+    def _on_change(self, generation: int, prompt_ids: Optional[FrozenSet[int]]):
+        """Change listener: queue changed prompts for the next refresh."""
+        if prompt_ids is not None and not prompt_ids:
+            return
+        with self._pending_lock:
+            if prompt_ids is None:
+                self._stale = True
+            else:
+                self._dirty.update(prompt_ids)
+            self.generation = generation
+
+    def search(
+        self,
+        text: Optional[str] = None,
+        category: Optional[str] = None,
+        tags: Optional[List[str]] = None,
+        rating_min: Optional[int] = None,
+        rating_max: Optional[int] = None,
+        limit: int = 100,
+        tag_partial: bool = False,
+        prefix: bool = True,
+    ) -> List[Dict[str, Any]]:
+        """
+        Search prompts, newest first.
+
+        Arguments match :meth:`PromptDatabase.search_prompts`. Text is
+        matched word by word like the FTS5 index (each word as a prefix
+        unless ``prefix`` is False), or as a ``LIKE`` substring when the
+        database has no FTS5 index or the text has no words.
+
+        Returns:
+            List of dicts with ``id``, ``text``, ``category``, ``tags``,
+            ``rating`` and ``created_at``
+        """
+        with self._index_lock:
+            self._refresh()
+            filters: List[Set[int]] = []
+
+            if category:
+                filters.append(self._categories.get(category, set()))
+            for tag in tags or []:
+                filters.append(self._tag_ids(tag, tag_partial))
+
+            phrases: List[List[str]] = []
+            like: Optional[Pattern] = None
+            words = FTS_TOKEN_RE.findall(text) if text else []
+            if text and self.db.model.fts_enabled and words:
+                for word in words:
+                    parts = index_tokens(word)
+                    if not parts:
+                        return []
+                    if len(parts) > 1:
+                        phrases.append(parts)
+                    for i, part in enumerate(parts):
+                        last = i == len(parts) - 1
+                        filters.append(self._token_ids(part, prefix and last))
+            elif text:
+                like = like_pattern(text)
+
+            def matches(prompt_id: int) -> bool:
+                prompt = self._prompts[prompt_id]
+                if rating_min is not None and (
+                    prompt.rating is None or prompt.rating < rating_min
+                ):
+                    return False
+                if rating_max is not None and (
+                    prompt.rating is None or prompt.rating > rating_max
+                ):
+                    return False
+                if like is not None and not like.search(prompt.text):
+                    return False
+                return all(
+                    self._has_phrase(prompt.text, parts, prefix) for parts in phrases
+                )
+
+            filters.sort(key=len)
+            if filters and not filters[0]:
+                return []
+            if self._walk_is_cheaper(filters, limit):
+                found = []
+                for key in reversed(self._order):
+                    prompt_id = key[-1]
+                    for ids in filters:
+                        if prompt_id not in ids:
+                            break
+                    else:
+                        if matches(prompt_id):
+                            found.append(prompt_id)
+                            if len(found) >= limit:
+                                break
+            else:
+                candidates = filters[0].intersection(*filters[1:])
+                found = heapq.nlargest(
+                    limit, filter(matches, candidates), key=self._sort_key
+                )
+            return [self._to_dict(prompt_id) for prompt_id in found]
+
+    def _walk_is_cheaper(self, filters: List[Set[int]], limit: int) -> bool:
+        """Whether to scan prompts newest first instead of sorting matches.
+
+        Filters are assumed independent: walking until ``limit`` matches
+        visits about ``limit / selectivity`` prompts, while intersecting
+        touches every id of the smallest posting set.
+        """
+        if not filters:
+            return True
+        total = len(self._prompts)
+        selectivity = 1.0
+        for ids in filters:
+            selectivity *= len(ids) / total
+        return limit / selectivity < len(filters[0])
+
+    def _tag_ids(self, tag: str, partial: bool) -> Set[int]:
+        """Prompts carrying ``tag``, or any tag containing it when partial."""
+        if not partial:
+            return self._tags.get(tag, set())
+        key = ("tag", tag)
+        ids = self._derived.get(key)
+        if ids is None:
+            pattern = like_pattern(tag)
+            ids = self._derived[key] = set().union(
+                *(tagged for name, tagged in self._tags.items() if pattern.search(name))
+            )
+        return ids
+
+    def _token_ids(self, token: str, prefix: bool) -> Set[int]:
+        """Prompts containing ``token``, or a token starting with it."""
+        if not prefix:
+            return self._tokens.get(token, set())
+        vocabulary = self._vocabulary
+        start = bisect.bisect_left(vocabulary, token)
+        end = bisect.bisect_left(vocabulary, token + _PREFIX_END, start)
+        if end - start == 1:
+            return self._tokens[vocabulary[start]]
+        key = ("token", token)
+        ids = self._derived.get(key)
+        if ids is None:
+            ids = self._derived[key] = set().union(
+                *(self._tokens[word] for word in vocabulary[start:end])
+            )
+        return ids
+
+    def complete(
+        self, prefix: str, limit: int = 10, kind: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Tag names and prompt words starting with ``prefix``, most used first.
+
+        Matching ignores case and diacritics. Words must occur in at least
+        ``MIN_WORD_USES`` prompts and numbers are left out. Ties are listed
+        tags first, then alphabetically.
+
+        Args:
+            prefix: Text typed so far
+            limit: Maximum number of completions
+            kind: "tag" or "word" to complete only one of them
+
+        Returns:
+            List of dicts with ``text``, ``type`` ("tag" or "word") and
+            ``count`` (number of prompts using it)
+        """
+        key = _fold(prefix.strip())
+        if not key or limit <= 0:
+            return []
+        with self._index_lock:
+            self._refresh()
+            memo_key = (key, kind, limit)
+            completions = self._completions.get(memo_key)
+            if completions is None:
+                hits = []
+                for source in ("tag", "word"):
+                    if kind in (None, source):
+                        hits.extend(self._top_completions(source, key, limit))
+                completions = self._completions[memo_key] = [
+                    {"text": name, "type": source, "count": -negated}
+                    for negated, source, _, name in heapq.nsmallest(limit, hits)
+                ]
+            return [dict(completion) for completion in completions]
+
+    def _top_completions(self, source: str, key: str, limit: int) -> List[tuple]:
+        """Best ``limit`` completions of one source.
+
+        Bisecting the sorted names gives the prefix range. A short prefix
+        spans much of it, so the popular names are tried first: when at least
+        ``limit`` of them match above the floor, no other name can outrank
+        them.
+
+        Returns:
+            Sortable (-count, source, folded name, name) tuples
+        """
+        if source == "tag":
+            postings = self._tags
+            names = self._tag_names
+            start = bisect.bisect_left(names, (key,))
+            end = bisect.bisect_left(names, (key + _PREFIX_END,), start)
+        else:
+            postings = self._tokens
+            names = self._vocabulary
+            start = bisect.bisect_left(names, key)
+            end = bisect.bisect_left(names, key + _PREFIX_END, start)
+
+        def accept(name: str, count: int) -> bool:
+            if source == "tag":
+                return True
+            return count >= MIN_WORD_USES and not name.isdigit()
+
+        popular = self._popular[source]
+        if end - start > len(popular):
+            floor = self._popular_floor[source]
+            hits = [
+                (-count, source, folded, name)
+                for name, folded in popular.items()
+                if folded.startswith(key)
+                for count in (len(postings[name]),)
+                if count > floor and accept(name, count)
+            ]
+            if len(hits) >= limit:
+                return heapq.nsmallest(limit, hits)
+        entries = names[start:end]
+        if source == "word":
+            entries = [(word, word) for word in entries]
+        return heapq.nsmallest(
+            limit,
+            (
+                (-count, source, folded, name)
+                for folded, name in entries
+                for count in (len(postings[name]),)
+                if accept(name, count)
+            ),
+        )
+
+    def _rank_popular(self, source: str) -> None:
+        """Recompute the popular names and floor of a source."""
+        postings = self._tags if source == "tag" else self._tokens
+        top = heapq.nlargest(POPULAR_SIZE + 1, postings, key=lambda n: len(postings[n]))
+        floor = len(postings[top[-1]]) if len(top) > POPULAR_SIZE else 0
+        self._popular[source] = {name: _fold(name) for name in top[:POPULAR_SIZE]}
+        self._popular_floor[source] = floor
+
+    def _note_usage(self, source: str, names: Iterable[str]) -> None:
+        """Keep names whose usage grew above the floor among the popular."""
+        postings = self._tags if source == "tag" else self._tokens
+        popular = self._popular[source]
+        floor = self._popular_floor[source]
+        for name in names:
+            if name not in popular and len(postings[name]) > floor:
+                popular[name] = _fold(name)
+        if len(popular) > 4 * POPULAR_SIZE:
+            self._rank_popular(source)
+
+    @staticmethod
+    def _has_phrase(text: str, parts: List[str], prefix: bool) -> bool:
+        """Whether ``parts`` occur as consecutive tokens of ``text``.
+
+        A word such as ``Clip_1`` is an FTS5 phrase of the tokens ``clip``
+        and ``1``; the posting lists only prove each token occurs somewhere.
+        """
+        tokens = index_tokens(text)
+        head, last = parts[:-1], parts[-1]
+        for start in range(len(tokens) - len(parts) + 1):
+            end = start + len(head)
+            if tokens[start:end] != head:
+                continue
+            if tokens[end] == last or (prefix and tokens[end].startswith(last)):
+                return True
+        return False
+
+    def _sort_key(self, prompt_id: int) -> tuple:
+        created_at = self._prompts[prompt_id].created_at
+        return (created_at is not None, created_at or "", prompt_id)
+
+    def _to_dict(self, prompt_id: int) -> Dict[str, Any]:
+        prompt = self._prompts[prompt_id]
+        return {
+            "id": prompt_id,
+            "text": prompt.text,
+            "category": prompt.category,
+            "tags": list(prompt.tags),
+            "rating": prompt.rating,
+            "created_at": prompt.created_at,
+        }
+
+    def refresh(self) -> None:
+        """Apply pending database changes now instead of on the next search."""
+        with self._index_lock:
+            self._refresh()
+
+    def _refresh(self) -> None:
+        while True:
+            with self._pending_lock:
+                stale, dirty = self._stale, self._dirty
+                self._stale, self._dirty = False, set()
+            if stale:
+                self._load_all()
+            elif dirty:
+                self._reload(dirty)
+            else:
+                return
+
+    def _load_all(self) -> None:
+        """Rebuild the whole index from the database."""
+        self._prompts = {}
+        self._tokens = defaultdict(set)
+        self._tags = defaultdict(set)
+        self._categories = defaultdict(set)
+        self._derived = {}
+        self._completions = {}
+        with self.db.model.get_read_connection() as conn:
+            for row in conn.execute(f"SELECT {INDEX_COLUMNS} FROM prompts"):
+                self._add(row)
+        self._vocabulary = sorted(self._tokens)
+        self._tag_names = sorted((_fold(tag), tag) for tag in self._tags)
+        self._rank_popular("tag")
+        self._rank_popular("word")
+        self._order = sorted(map(self._sort_key, self._prompts))
+        self.loads += 1
+        self.logger.debug(f"Search index loaded {len(self._prompts)} prompts")
+
+    def _reload(self, prompt_ids: Iterable[int]) -> None:
+        """Re-read changed prompts; ids no longer in the database are dropped."""
+        prompt_ids = sorted(prompt_ids)
+        rows = []
+        with self.db.model.get_read_connection() as conn:
+            for chunk in chunked(prompt_ids):
+                rows.extend(
+                    conn.execute(
+                        f"SELECT {INDEX_COLUMNS} FROM prompts "
+                        f"WHERE id IN ({sql_placeholders(chunk)})",
+                        chunk,
+                    ).fetchall()
+                )
+        self._derived = {}
+        self._completions = {}
+        for prompt_id in prompt_ids:
+            self._remove(prompt_id)
+        for row in rows:
+            self._add(row, incremental=True)
+
+    def _add(self, row, incremental: bool = False) -> None:
+        prompt_id = row["id"]
+        text = row["text"] or ""
+        tags = tuple(json.loads(row["tag_list"])) if row["tag_list"] else ()
+        self._prompts[prompt_id] = IndexedPrompt(
+            text, row["category"], row["rating"], row["created_at"], tags
+        )
+        tokens = set(index_tokens(text))
+        if incremental:
+            for token in tokens:
+                if token not in self._tokens:
+                    bisect.insort(self._vocabulary, token)
+            for tag in tags:
+                if tag not in self._tags:
+                    bisect.insort(self._tag_names, (_fold(tag), tag))
+            bisect.insort(self._order, self._sort_key(prompt_id))
+        postings = self._tokens
+        for token in tokens:
+            postings[token].add(prompt_id)
+        for tag in tags:
+            self._tags[tag].add(prompt_id)
+        if row["category"]:
+            self._categories[row["category"]].add(prompt_id)
+        if incremental:
+            self._note_usage("word", tokens)
+            self._note_usage("tag", tags)
+
+    def _remove(self, prompt_id: int) -> None:
+        prompt = self._prompts.get(prompt_id)
+        if prompt is None:
+            return
+        del self._order[bisect.bisect_left(self._order, self._sort_key(prompt_id))]
+        del self._prompts[prompt_id]
+        for token in set(index_tokens(prompt.text)):
+            postings = self._tokens[token]
+            postings.discard(prompt_id)
+            if not postings:
+                del self._tokens[token]
+                del self._vocabulary[bisect.bisect_left(self._vocabulary, token)]
+                self._popular["word"].pop(token, None)
+        for tag in prompt.tags:
+            if self._discard(self._tags, tag, prompt_id):
+                entry = (_fold(tag), tag)
+                del self._tag_names[bisect.bisect_left(self._tag_names, entry)]
+                self._popular["tag"].pop(tag, None)
+        if prompt.category:
+            self._discard(self._categories, prompt.category, prompt_id)
+
+    @staticmethod
+    def _discard(postings: Dict[str, Set[int]], key: str, prompt_id: int) -> bool:
+        """Remove ``prompt_id`` from a posting set; True if the key went away."""
+        ids = postings.get(key)
+        if ids is not None:
+            ids.discard(prompt_id)
+            if not ids:
+                del postings[key]
+                return True
+        return False
+
+
+# One index per database file, keyed by the file's shared ChangeTracker
+_indexes: Dict[ChangeTracker, PromptSearchIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_search_index(db: "PromptDatabase") -> PromptSearchIndex:
+    """Get or create the shared search index of ``db``'s database file.
+
+    Args:
+        db: PromptDatabase instance (only used when the index is created)
+
+    Returns:
+        The PromptSearchIndex for the database file
+    """
+    with _indexes_lock:
+        index = _indexes.get(db.model.changes)
+        if index is None:
+            index = _indexes[db.model.changes] = PromptSearchIndex(db)
+        return index
@@ -0,0 +1,313 @@
+"""
+In-memory vector index answering "find similar prompts".
+
+Every prompt has a hashed term vector in ``prompt_vectors`` (see
+``utils.hashing.term_vector``), computed in the background by the embedding
+worker. The index weighs the vectors by inverse document frequency,
+normalizes them and keeps them as inverted lists (bucket -> prompt ids and
+weights), so the cosine similarity with a query only touches prompts that
+share a bucket with it.
+
+A query walks its buckets rarest first. Rare buckets say the most about a
+prompt and have the shortest lists; once POSTINGS_BUDGET entries were
+scored the remaining common buckets are skipped and the best candidates are
+re-scored exactly from their stored vectors instead.
+
+Prompts that change are kept beside the main lists (the old entries are
+ignored and the new vectors kept in a small dictionary) until enough of them
+accumulate to rebuild the index.
+"""
+
+import heapq
+import math
+import sys
+import threading
+from array import array
+from collections import Counter
+from typing import TYPE_CHECKING, Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+
+from .models import ChangeTracker
+from .sql_utils import chunked, sql_placeholders
+
+try:
+    from ..utils.logging_config import get_logger
+except ImportError:
+    from utils.logging_config import get_logger
+
+if TYPE_CHECKING:
+    from .operations import PromptDatabase
+
+# Inverted list entries scored per query before common buckets are skipped
+POSTINGS_BUDGET = 50_000
+
+# Candidates re-scored from their stored vectors when buckets were skipped
+RERANK_SIZE = 100
+
+# Changed prompts kept beside the main lists before the index is rebuilt:
+# at least MIN_REBUILD, or REBUILD_FRACTION of the indexed prompts
+MIN_REBUILD = 2000
+REBUILD_FRACTION = 0.1
+
+
+def _unpack(blob: bytes, typecode: str) -> array:
+    """Read a little-endian array packed by ``pack_term_vector``."""
+    values = array(typecode)
+    values.frombytes(blob)
+    if sys.byteorder == "big":
+        values.byteswap()
+    return values
+
+
+class PromptVectorIndex:
+    """TF-IDF cosine similarity search over the term vectors of one database.
+
+    Use :func:`get_vector_index` rather than creating instances directly, so
+    every route shares one copy.
+    """
+
+    def __init__(self, db: "PromptDatabase"):
+        """
+        Initialize an empty index and subscribe to database changes.
+
+        Args:
+            db: PromptDatabase the vectors are read from
+        """
+        self.db = db
+        self.logger = get_logger("prompt_manager.similarity")
+        # _pending_lock guards the change backlog and is only held briefly,
+        # since listeners run while a writer holds the database;
+        # _index_lock serializes refreshes and queries
+        self._pending_lock = threading.Lock()
+        self._index_lock = threading.Lock()
+        self._stale = True
+        self._dirty: Set[int] = set()
+        self.loads = 0
+
+        # Number of prompts in the main lists and the IDF of their buckets
+        self.size = 0
+        self._idf: Dict[int, float] = {}
+        self._default_idf = 1.0
+        # Main inverted lists: bucket -> (prompt ids, normalized weights)
+        self._postings: Dict[int, Tuple[array, array]] = {}
+        # Prompts whose main list entries are outdated
+        self._removed: Set[int] = set()
+        # Current vectors of changed prompts: bucket -> {prompt id: weight}
+        self._changed: Dict[int, Dict[int, float]] = {}
+        self._changed_vectors: Dict[int, List[Tuple[int, float]]] = {}
+
+        db.model.add_change_listener(self._on_change)
+
+    def _on_change(self, generation: int, prompt_ids: Optional[FrozenSet[int]]):
+        """Change listener: queue changed prompts for the next refresh."""
+        if prompt_ids is not None and not prompt_ids:
+            return
+        with self._pending_lock:
+            if prompt_ids is None:
+                self._stale = True
+            else:
+                self._dirty.update(prompt_ids)
+
+    def mark_dirty(self, prompt_ids: Iterable[int]) -> None:
+        """Re-read the vectors of ``prompt_ids`` on the next refresh."""
+        with self._pending_lock:
+            self._dirty.update(prompt_ids)
+
+    def nearest(
+        self,
+        vector: Dict[int, float],
+        limit: int = 10,
+        exclude: Optional[int] = None,
+    ) -> List[Tuple[int, float]]:
+        """
+        Find the prompts most similar to a term vector.
+
+        Args:
+            vector: Term vector of the query (``term_vector`` of its text)
+            limit: Maximum number of prompts
+            exclude: Prompt id left out of the results (the query prompt)
+
+        Returns:
+            List of (prompt id, cosine similarity) tuples, most similar
+            first; prompts sharing no bucket with the query are left out
+        """
+        if limit <= 0 or not vector:
+            return []
+        with self._index_lock:
+            self._refresh()
+            query = dict(self._normalize(vector.items()))
+            if not query:
+                return []
+
+            scores: Dict[int, float] = {}
+            get = scores.get
+            postings = self._postings
+            skipped = False
+            scored = 0
+            for bucket in sorted(query, key=lambda b: len(postings.get(b, ((),))[0])):
+                entry = postings.get(bucket)
+                if entry is None:
+                    continue
+                if scored and scored + len(entry[0]) > POSTINGS_BUDGET:
+                    skipped = True
+                    break
+                scored += len(entry[0])
+                weight = query[bucket]
+                for prompt_id, value in zip(*entry):
+                    scores[prompt_id] = get(prompt_id, 0.0) + weight * value
+            for prompt_id in self._removed:
+                scores.pop(prompt_id, None)
+            for bucket, weight in query.items():
+                for prompt_id, value in self._changed.get(bucket, {}).items():
+                    scores[prompt_id] = get(prompt_id, 0.0) + weight * value
+            scores.pop(exclude, None)
+
+            if skipped:
+                candidates = heapq.nlargest(
+                    max(RERANK_SIZE, limit), scores, key=scores.__getitem__
+                )
+                scores = self._exact_scores(query, candidates)
+
+        best = heapq.nlargest(
+            limit, scores.items(), key=lambda item: (item[1], -item[0])
+        )
+        return [
+            (prompt_id, round(min(score, 1.0), 4))
+            for prompt_id, score in best
+            if score > 0
+        ]
+
+    def _exact_scores(
+        self, query: Dict[int, float], prompt_ids: List[int]
+    ) -> Dict[int, float]:
+        """Cosine similarity of ``query`` with the stored vectors of prompts."""
+        scores = {}
+        with self.db.model.get_read_connection() as conn:
+            for chunk in chunked(prompt_ids):
+                for row in conn.execute(
+                    "SELECT prompt_id, buckets, weights FROM prompt_vectors "
+                    f"WHERE prompt_id IN ({sql_placeholders(chunk)})",
+                    chunk,
+                ):
+                    vector = self._normalize(
+                        zip(_unpack(row[1], "I"), _unpack(row[2], "f"))
+                    )
+                    scores[row[0]] = sum(query.get(b, 0.0) * w for b, w in vector)
+        return scores
+
+    def _normalize(self, items: Iterable[Tuple[int, float]]) -> List[Tuple[int, float]]:
+        """Weigh (bucket, weight) pairs by IDF and scale them to unit length."""
+        idf = self._idf
+        default = self._default_idf
+        weighted = [
+            (bucket, weight * idf.get(bucket, default)) for bucket, weight in items
+        ]
+        norm = math.sqrt(sum(weight * weight for _, weight in weighted))
+        if not norm:
+            return []
+        return [(bucket, weight / norm) for bucket, weight in weighted]
+
+    def refresh(self) -> None:
+        """Apply pending changes now instead of on the next query."""
+        with self._index_lock:
+            self._refresh()
+
+    def _refresh(self) -> None:
+        while True:
+            with self._pending_lock:
+                stale, dirty = self._stale, self._dirty
+                self._stale, self._dirty = False, set()
+            if stale:
+                self._load_all()
+            elif dirty:
+                self._reload(dirty)
+            else:
+                return
+
+    def _load_all(self) -> None:
+        """Rebuild the index from ``prompt_vectors``."""
+        self._postings = {}
+        self._removed = set()
+        self._changed = {}
+        self._changed_vectors = {}
+        with self.db.model.get_read_connection() as conn:
+            counts: Counter = Counter()
+            size = 0
+            for (buckets,) in conn.execute("SELECT buckets FROM prompt_vectors"):
+                counts.update(_unpack(buckets, "I"))
+                size += 1
+            self.size = size
+            self._idf = {
+                bucket: math.log((size + 1) / (count + 1)) + 1
+                for bucket, count in counts.items()
+            }
+            self._default_idf = math.log(size + 1) + 1
+
+            postings = self._postings
+            for prompt_id, buckets, weights in conn.execute(
+                "SELECT prompt_id, buckets, weights FROM prompt_vectors"
+            ):
+                for bucket, weight in self._normalize(
+                    zip(_unpack(buckets, "I"), _unpack(weights, "f"))
+                ):
+                    entry = postings.get(bucket)
+                    if entry is None:
+                        entry = postings[bucket] = (array("I"), array("f"))
+                    entry[0].append(prompt_id)
+                    entry[1].append(weight)
+        self.loads += 1
+        self.logger.debug(f"Similarity index loaded {size} prompt vectors")
+
+    def _reload(self, prompt_ids: Set[int]) -> None:
+        """Re-read changed vectors; prompts without a vector are dropped."""
+        ids = sorted(prompt_ids)
+        rows = []
+        with self.db.model.get_read_connection() as conn:
+            for chunk in chunked(ids):
+                rows.extend(
+                    conn.execute(
+                        "SELECT prompt_id, buckets, weights FROM prompt_vectors "
+                        f"WHERE prompt_id IN ({sql_placeholders(chunk)})",
+                        chunk,
+                    ).fetchall()
+                )
+        self._removed.update(ids)
+        for prompt_id in ids:
+            for bucket, _ in self._changed_vectors.pop(prompt_id, ()):
+                self._changed[bucket].pop(prompt_id, None)
+        for prompt_id, buckets, weights in rows:
+            vector = self._normalize(zip(_unpack(buckets, "I"), _unpack(weights, "f")))
+            self._changed_vectors[prompt_id] = vector
+            for bucket, weight in vector:
+                self._changed.setdefault(bucket, {})[prompt_id] = weight
+
+        if len(self._removed) > max(MIN_REBUILD, REBUILD_FRACTION * self.size):
+            self._load_all()
+
+
+# One index per database file, keyed by the file's shared ChangeTracker
+_indexes: Dict[ChangeTracker, PromptVectorIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_vector_index(db: "PromptDatabase") -> PromptVectorIndex:
+    """Get or create the shared vector index of ``db``'s database file.
+
+    Args:
+        db: PromptDatabase instance (only used when the index is created)
+
+    Returns:
+        The PromptVectorIndex for the database file
+    """
+    with _indexes_lock:
+        index = _indexes.get(db.model.changes)
+        if index is None:
+            index = _indexes[db.model.changes] = PromptVectorIndex(db)
+        return index
+
+
+def vectors_stored(db: "PromptDatabase", prompt_ids: Iterable[int]) -> None:
+    """Tell the vector index of ``db``'s file, if loaded, about new vectors."""
+    with _indexes_lock:
+        index = _indexes.get(db.model.changes)
+    if index is not None:
+        index.mark_dirty(prompt_ids)
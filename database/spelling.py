@@ -0,0 +1,171 @@
+"""
+"Did you mean" suggestions for text searches that find nothing.
+
+The terms of the FTS5 word index (read through ``prompts_fts_vocab``) are
+kept in memory with a trigram posting list: every term is split into the
+trigrams of ``$term$``. A word that matches no term is compared with the
+terms sharing its trigrams, and the most similar ones (Dice coefficient,
+then number of prompts using the term) are suggested in its place.
+
+The vocabulary is loaded on the first suggestion and reloaded lazily after
+prompts change.
+"""
+
+import bisect
+import heapq
+import itertools
+import threading
+from collections import Counter, defaultdict
+from typing import TYPE_CHECKING, Dict, FrozenSet, List, Optional, Set, Tuple
+
+from .models import ChangeTracker
+from .search_index import index_tokens
+
+if TYPE_CHECKING:
+    from .operations import PromptDatabase
+
+# Minimum Dice coefficient between the trigram sets of a word and a term
+MIN_SIMILARITY = 0.45
+
+# Alternatives considered per misspelt word
+CANDIDATES_PER_WORD = 3
+
+# Above this many misspelt words only the best alternative of each is used,
+# so the number of combinations stays small
+MAX_COMBINED_WORDS = 3
+
+
+def term_trigrams(term: str) -> Set[str]:
+    """Trigrams of a term padded with ``$``, so its ends weigh more."""
+    padded = f"${term}$"
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+
+class SpellingSuggester:
+    """Trigram similarity search over the FTS vocabulary of one database.
+
+    Use :func:`get_spelling_suggester` to share one instance per file.
+    """
+
+    def __init__(self, db: "PromptDatabase"):
+        """
+        Initialize the suggester and subscribe to database changes.
+
+        Args:
+            db: PromptDatabase the vocabulary is read from
+        """
+        self.db = db
+        self._lock = threading.Lock()
+        self._stale = True
+        self._terms: List[str] = []
+        self._docs: List[int] = []
+        self._sizes: List[int] = []
+        self._trigrams: Dict[str, List[int]] = {}
+        db.model.add_change_listener(self._on_change)
+
+    def _on_change(self, generation: int, prompt_ids: Optional[FrozenSet[int]]):
+        if prompt_ids is None or prompt_ids:
+            self._stale = True
+
+    def suggest(self, text: str, limit: int = 5) -> List[str]:
+        """
+        Suggest corrected versions of ``text``.
+
+        Args:
+            text: Search text
+            limit: Maximum number of suggestions
+
+        Returns:
+            Corrected search strings (folded words joined by spaces), best
+            first; empty when there is nothing to correct
+        """
+        words = index_tokens(text)
+        with self._lock:
+            if self._stale:
+                self._stale = False
+                self._load()
+            unknown = [word for word in words if not self._known(word)]
+            if not unknown:
+                return []
+            per_word = CANDIDATES_PER_WORD if len(unknown) <= MAX_COMBINED_WORDS else 1
+            options: List[List[Tuple[float, str]]] = []
+            for word in words:
+                if word in unknown:
+                    found = self.corrections(word, per_word)
+                    if not found:
+                        return []
+                    options.append(found)
+                else:
+                    options.append([(1.0, word)])
+
+        combos = heapq.nlargest(
+            limit,
+            itertools.product(*options),
+            key=lambda combo: sum(score for score, _ in combo),
+        )
+        return [" ".join(term for _, term in combo) for combo in combos]
+
+    def corrections(self, word: str, limit: int = CANDIDATES_PER_WORD):
+        """
+        Most similar indexed terms to ``word``.
+
+        Returns:
+            List of (similarity, term) tuples, best first
+        """
+        grams = term_trigrams(word)
+        shared = Counter()
+        for gram in grams:
+            shared.update(self._trigrams.get(gram, ()))
+        scored = []
+        for term_id, count in shared.items():
+            similarity = 2 * count / (len(grams) + self._sizes[term_id])
+            if similarity >= MIN_SIMILARITY:
+                scored.append((similarity, self._docs[term_id], self._terms[term_id]))
+        return [
+            (round(similarity, 3), term)
+            for similarity, _, term in heapq.nlargest(limit, scored)
+        ]
+
+    def _known(self, word: str) -> bool:
+        """Whether some term starts with ``word`` (search words are prefixes).
+
+        Numbers and one- or two-letter words are never corrected.
+        """
+        if len(word) < 3 or not word.isalpha():
+            return True
+        terms = self._terms
+        i = bisect.bisect_left(terms, word)
+        return i < len(terms) and terms[i].startswith(word)
+
+    def _load(self) -> None:
+        """Read the vocabulary and build the trigram posting list."""
+        with self.db.model.get_read_connection() as conn:
+            rows = conn.execute(
+                "SELECT term, doc FROM prompts_fts_vocab ORDER BY term"
+            ).fetchall()
+        self._terms = [row[0] for row in rows]
+        self._docs = [row[1] for row in rows]
+        self._sizes = []
+        trigrams: Dict[str, List[int]] = defaultdict(list)
+        for term_id, term in enumerate(self._terms):
+            grams = term_trigrams(term)
+            self._sizes.append(len(grams))
+            # Only words are offered as corrections, not numbers
+            if term.isalpha():
+                for gram in grams:
+                    trigrams[gram].append(term_id)
+        self._trigrams = trigrams
+
+
+# One suggester per database file, keyed by the file's shared ChangeTracker
+_suggesters: Dict[ChangeTracker, SpellingSuggester] = {}
+_suggesters_lock = threading.Lock()
+
+
+def get_spelling_suggester(db: "PromptDatabase") -> SpellingSuggester:
+    """Get or create the shared SpellingSuggester of ``db``'s database file."""
+    with _suggesters_lock:
+        suggester = _suggesters.get(db.model.changes)
+        if suggester is None:
+            suggester = _suggesters[db.model.changes] = SpellingSuggester(db)
+        return suggester
@@ -0,0 +1,28 @@
+"""
+Small SQL helpers shared by the database modules.
+
+Kept free of imports from the rest of the package, so ``operations``, the
+search index and the similarity index can all import them at module level.
+"""
+
+import re
+from typing import Any, Iterator, Sequence
+
+# Bound parameter lists well under SQLite's variable limit (999 on old builds)
+SQL_CHUNK_SIZE = 500
+
+# Word characters as seen by the FTS5 unicode61 tokenizer
+FTS_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def chunked(
+    items: Sequence[Any], size: int = SQL_CHUNK_SIZE
+) -> Iterator[Sequence[Any]]:
+    """Yield consecutive slices of ``items`` holding at most ``size`` entries."""
+    for start in range(0, len(items), size):
+        yield items[start : start + size]
+
+
+def sql_placeholders(items: Sequence[Any]) -> str:
+    """Return a ``?,?,...`` placeholder list for an ``IN (...)`` clause."""
+    return ",".join("?" * len(items))
@@ -6,7 +6,7 @@ OUTPUT_IS_LIST=True, allowing direct connection to nodes that accept list inputs
 """
 
 import re
-from typing import Any, Dict, List, Tuple
+from typing import Any, Dict, List, Optional, Tuple
 
 try:
     from .utils.logging_config import get_logger
@@ -32,12 +32,25 @@ except ImportError:
 
 try:
     from .database.operations import PromptDatabase
+    from .database.search_index import get_search_index
 except ImportError:
     import os
     import sys
 
     sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
     from database.operations import PromptDatabase
+    from database.search_index import get_search_index
+
+
+# Database used by IS_CHANGED, which runs before any node instance exists
+_shared_db: Optional[PromptDatabase] = None
+
+
+def _shared_database() -> PromptDatabase:
+    global _shared_db
+    if _shared_db is None:
+        _shared_db = PromptDatabase()
+    return _shared_db
 
 
 class PromptSearchList(ComfyNodeABC):
@@ -50,6 +63,8 @@ class PromptSearchList(ComfyNodeABC):
     - Filter by category, tags, and minimum rating
     - Outputs as OUTPUT_IS_LIST for batch node compatibility
     - Read-only operation (no database writes)
+    - Answered from the shared in-memory search index, so batch workflows
+      that queue the same search many times do not re-query the database
     """
 
     def __init__(self):
@@ -159,7 +174,7 @@ class PromptSearchList(ComfyNodeABC):
                 tags_list = [tag.strip() for tag in tags.split(",") if tag.strip()]
 
             # Perform search with partial tag matching for discovery
-            results = self.db.search_prompts(
+            results = get_search_index(self.db).search(
                 text=text.strip() if text and text.strip() else None,
                 category=category.strip() if category and category.strip() else None,
                 tags=tags_list,
@@ -222,11 +237,16 @@ class PromptSearchList(ComfyNodeABC):
         cls, text="", category="", tags="", min_rating=0, limit=50, skip_multipart=True
     ):
         """
-        Always re-execute to get fresh results from the database.
+        Return the search index generation.
 
-        The database contents may have changed since the last execution,
-        so we always return a unique value to trigger re-execution.
+        It advances whenever a prompt is saved, edited or deleted, so
+        ComfyUI re-runs the search only when its results may have changed.
+        Falls back to a unique value (always re-run) if the database cannot
+        be opened.
         """
-        import time
+        try:
+            return get_search_index(_shared_database()).generation
+        except Exception:
+            import time
 
-        return time.time()
+            return time.time()
@@ -152,6 +152,73 @@ class PromptManagerAPI(
             return await loop.run_in_executor(None, call)
         return await loop.run_in_executor(None, func, *args)
 
+    async def _stream_executor_progress(
+        self,
+        request,
+        func,
+        *args,
+        make_event,
+        make_complete,
+        make_error,
+        first_event=None,
+        **kwargs,
+    ):
+        """Run a blocking job in the executor, streaming its progress as SSE.
+
+        ``func`` is called with ``progress=`` plus the given arguments. Each
+        progress call is turned into an event by ``make_event`` on the worker
+        thread and sent from the event loop. When the job ends, the event
+        from ``make_complete(result)`` or ``make_error(exception)`` is sent
+        and the stream is closed.
+
+        Args:
+            request: Incoming request the stream responds to
+            func: Blocking job taking a ``progress`` callback
+            make_event: Maps progress callback arguments to an event dict
+            make_complete: Maps the job's return value to the final event
+            make_error: Maps an exception raised by the job to the final event
+            first_event: Optional event sent before the job starts
+        """
+        response = web.StreamResponse(
+            status=200,
+            reason="OK",
+            headers={
+                "Content-Type": "text/event-stream",
+                "Cache-Control": "no-cache",
+                "Connection": "keep-alive",
+            },
+        )
+        await response.prepare(request)
+
+        async def send(data):
+            await response.write(f"data: {json.dumps(data)}\n\n".encode("utf-8"))
+
+        loop = asyncio.get_running_loop()
+        events = asyncio.Queue()
+
+        def progress(*progress_args):
+            event = make_event(*progress_args)
+            loop.call_soon_threadsafe(events.put_nowait, event)
+
+        if first_event is not None:
+            await send(first_event)
+        task = asyncio.ensure_future(
+            self._run_in_executor(func, *args, progress=progress, **kwargs)
+        )
+        # The sentinel is queued after every progress event already scheduled
+        task.add_done_callback(lambda _: events.put_nowait(None))
+        while (event := await events.get()) is not None:
+            await send(event)
+
+        try:
+            final_event = make_complete(task.result())
+        except Exception as e:
+            final_event = make_error(e)
+        await send(final_event)
+
+        await response.write_eof()
+        return response
+
     def invalidate_gallery_cache(self):
         """Invalidate the cached gallery file listing.
 
@@ -13,6 +13,24 @@ from pathlib import Path
 
 from aiohttp import web
 
+# Share of the overall progress bar per duplicate cleanup stage: (start, span)
+CLEANUP_STAGE_PROGRESS = {
+    "scanning": (0, 10),
+    "merging": (10, 10),
+    "moving_images": (20, 10),
+    "removing": (30, 69),
+}
+
+CLEANUP_STAGE_STATUS = {
+    "scanning": "Scanning for duplicate prompts...",
+    "merging": "Merging metadata of {total} duplicate groups...",
+    "moving_images": "Moving images of {total} duplicate prompts...",
+    "removing": "Removed {done} of {total} duplicate prompts...",
+}
+
+# Upper bound for parallel directory listings in missing-image cleanup
+MAX_CLEANUP_WORKERS = 16
+
 
 class AdminRoutesMixin:
     """Mixin providing admin, diagnostics, and maintenance API endpoints."""
@@ -26,10 +44,18 @@ class AdminRoutesMixin:
         async def delete_duplicate_images_route(request):
             return await self.delete_duplicate_images_endpoint(request)
 
+        @routes.get("/prompt_manager/near_duplicates")
+        async def near_duplicates_route(request):
+            return await self.near_duplicates_endpoint(request)
+
         @routes.post("/prompt_manager/cleanup")
         async def cleanup_duplicates_route(request):
             return await self.cleanup_duplicates_endpoint(request)
 
+        @routes.post("/prompt_manager/cleanup_missing_images")
+        async def cleanup_missing_images_route(request):
+            return await self.cleanup_missing_images_endpoint(request)
+
         @routes.post("/prompt_manager/maintenance")
         async def maintenance_route(request):
             return await self.run_maintenance(request)
@@ -89,26 +115,135 @@ class AdminRoutesMixin:
                 status=500,
             )
 
-    async def cleanup_duplicates_endpoint(self, request):
-        """Cleanup duplicate prompts endpoint."""
+    async def near_duplicates_endpoint(self, request):
+        """List groups of near-duplicate prompts.
+
+        Query params:
+            threshold: Minimum word-shingle similarity, 0-1 (default from
+                ``NEAR_DUPLICATE_THRESHOLD``)
+        """
         try:
-            removed_count = await self._run_in_executor(self.db.cleanup_duplicates)
+            from ..config import PromptManagerConfig
 
+            threshold = float(
+                request.query.get(
+                    "threshold", PromptManagerConfig.NEAR_DUPLICATE_THRESHOLD
+                )
+            )
+            groups = await self._run_in_executor(
+                self.db.find_near_duplicates, threshold
+            )
             return web.json_response(
                 {
                     "success": True,
-                    "message": "Cleanup completed",
-                    "duplicates_removed": removed_count,
+                    "threshold": threshold,
+                    "groups": groups,
+                    "count": len(groups),
                 }
             )
 
+        except ValueError as e:
+            return web.json_response({"success": False, "error": str(e)}, status=400)
         except Exception as e:
-            self.logger.error(f"Cleanup error: {e}")
+            self.logger.error(f"Near duplicates error: {e}")
             return web.json_response(
-                {"success": False, "error": f"Failed to cleanup duplicates: {str(e)}"},
+                {
+                    "success": False,
+                    "error": f"Failed to find near duplicates: {str(e)}",
+                },
                 status=500,
             )
 
+    async def cleanup_duplicates_endpoint(self, request):
+        """Merge and remove duplicate prompts, streaming progress as SSE.
+
+        Emits ``progress`` events with the current stage while the cleanup
+        runs in the executor, then a single ``complete`` event carrying
+        ``duplicates_removed`` (or an ``error`` event).
+        """
+
+        def make_event(stage, done, total):
+            start, span = CLEANUP_STAGE_PROGRESS[stage]
+            fraction = done / total if total else 0
+            return {
+                "type": "progress",
+                "stage": stage,
+                "progress": start + int(span * fraction),
+                "status": CLEANUP_STAGE_STATUS[stage].format(done=done, total=total),
+            }
+
+        def make_error(e):
+            self.logger.error(f"Cleanup error: {e}")
+            return {"type": "error", "message": f"Failed to cleanup duplicates: {e}"}
+
+        return await self._stream_executor_progress(
+            request,
+            self.db.cleanup_duplicates,
+            make_event=make_event,
+            make_complete=lambda removed_count: {
+                "type": "complete",
+                "progress": 100,
+                "message": "Cleanup completed",
+                "duplicates_removed": removed_count,
+            },
+            make_error=make_error,
+        )
+
+    async def cleanup_missing_images_endpoint(self, request):
+        """Remove image records whose files are gone, streaming progress as SSE.
+
+        Query params:
+            after_id: Resume after this image id (``last_id`` of an earlier
+                progress event)
+            workers: Directories listed in parallel (default 1, max 16)
+        """
+        try:
+            after_id = int(request.query.get("after_id", 0))
+            workers = int(request.query.get("workers", 1))
+        except ValueError:
+            return web.json_response(
+                {"success": False, "error": "after_id and workers must be integers"},
+                status=400,
+            )
+        workers = max(1, min(workers, MAX_CLEANUP_WORKERS))
+
+        # Progress events run ahead of the final event, so the last one seen
+        # holds the id to resume from
+        last_id = after_id
+
+        def make_event(checked, total, counts):
+            nonlocal last_id
+            last_id = counts["last_id"]
+            return {
+                "type": "progress",
+                "progress": min(int(checked / total * 100) if total else 100, 99),
+                "status": f"Checked {checked} of {total} images...",
+                **counts,
+            }
+
+        def make_error(e):
+            self.logger.error(f"Missing image cleanup error: {e}")
+            return {
+                "type": "error",
+                "message": f"Failed to cleanup missing images: {e}",
+                "last_id": last_id,
+            }
+
+        return await self._stream_executor_progress(
+            request,
+            self.db.cleanup_missing_images,
+            after_id=after_id,
+            workers=workers,
+            make_event=make_event,
+            make_complete=lambda removed: {
+                "type": "complete",
+                "progress": 100,
+                "removed": removed,
+                "last_id": last_id,
+            },
+            make_error=make_error,
+        )
+
     async def find_duplicate_images(self):
         """Find duplicate images in ComfyUI output directory using content hashing."""
         self.logger.info("Scanning for duplicate images")
@@ -327,6 +462,7 @@ class AdminRoutesMixin:
         """Get database statistics."""
         try:
             stats = await self._run_in_executor(self.db.get_statistics)
+            stats["result_cache"] = self.db.result_cache.stats()
 
             return web.json_response({"success": True, "stats": stats})
 
@@ -579,6 +715,18 @@ class AdminRoutesMixin:
                     "message": f"Database error: {str(e)}",
                 }
 
+            # Report the SQLite performance profile
+            try:
+                results["sqlite_profile"] = {
+                    "status": "ok",
+                    **self.db.model.profile_info(),
+                }
+            except Exception as e:
+                results["sqlite_profile"] = {
+                    "status": "error",
+                    "message": f"Failed to read SQLite settings: {str(e)}",
+                }
+
             # Check dependencies
             dependencies = {}
             try:
@@ -835,10 +983,13 @@ class AdminRoutesMixin:
                 if "check_consistency" in operations:
                     try:
                         consistency_issues = self.db.check_consistency()
+                        # Derived tag counts can always be rebuilt safely
+                        tag_counts_repaired = self.db.rebuild_tag_counts()
                         results["check_consistency"] = {
                             "success": True,
                             "issues_found": len(consistency_issues),
                             "issues": consistency_issues[:10],
+                            "tag_counts_repaired": tag_counts_repaired,
                             "message": f"Found {len(consistency_issues)} consistency issues",
                         }
                     except Exception as e:
@@ -871,7 +1022,13 @@ class AdminRoutesMixin:
             )
 
     async def backup_database(self, request):
-        """Backup the entire prompts.db database file."""
+        """Download an online backup of the prompts.db database.
+
+        The backup is taken with the SQLite backup API (consistent even while
+        the database is being written), kept in the ``backups`` folder next
+        to the database with the newest BACKUP_RETENTION downloads, and sent
+        with FileResponse. Pass ``gzip=true`` for a compressed download.
+        """
         try:
             db_path = self.db.model.db_path
 
@@ -880,25 +1037,19 @@ class AdminRoutesMixin:
                     {"success": False, "error": "Database file not found"}, status=404
                 )
 
-            with tempfile.NamedTemporaryFile(delete=False, suffix=".db") as temp_file:
-                temp_path = temp_file.name
-
-            shutil.copy2(db_path, temp_path)
-
-            with open(temp_path, "rb") as f:
-                file_data = f.read()
-
-            os.unlink(temp_path)
-
-            timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-            filename = f"prompts_backup_{timestamp}.db"
+            compress = request.query.get("gzip", "false").lower() == "true"
+            backup_path = await self._run_in_executor(
+                self.db.create_backup, "manual", compress
+            )
+            filename = os.path.basename(backup_path)
 
-            return web.Response(
-                body=file_data,
-                content_type="application/octet-stream",
+            return web.FileResponse(
+                backup_path,
                 headers={
+                    "Content-Type": (
+                        "application/gzip" if compress else "application/octet-stream"
+                    ),
                     "Content-Disposition": f'attachment; filename="{filename}"',
-                    "Content-Length": str(len(file_data)),
                 },
             )
 
@@ -973,7 +1124,16 @@ class AdminRoutesMixin:
                     shutil.copy2(db_path, backup_path)
                     self.logger.info(f"Current database backed up to: {backup_path}")
 
-                shutil.copy2(temp_path, db_path)
+                # Copy the pages through SQLite rather than over the file, so
+                # connections already open on it (other PromptDatabase
+                # instances included) read the restored database
+                source = sqlite3.connect(temp_path)
+                try:
+                    with self.db.model.get_connection() as conn:
+                        source.backup(conn)
+                finally:
+                    source.close()
+                self.db.model.close()
 
                 # Reinitialize the database connection
                 try:
@@ -988,7 +1148,11 @@ class AdminRoutesMixin:
                         ),
                     )
                     from database.operations import PromptDatabase
-                self.db = PromptDatabase()
+                self.db = PromptDatabase(db_path)
+                # The file was swapped outside the writer: advance the shared
+                # generation so caches and in-memory indexes of every
+                # PromptDatabase on the file resync in full
+                self.db.model.changes.record(None)
 
                 return web.json_response(
                     {
@@ -1055,6 +1219,34 @@ class AdminRoutesMixin:
                     results.append((f, {}))
             return results
 
+        def _store_batch(found):
+            """Save new prompts and link a batch of images in bulk (blocking I/O).
+
+            Returns (new prompts added, images linked to already known prompts).
+            """
+            stored = self.db.bulk_upsert_prompts(
+                {
+                    "text": prompt_text,
+                    "category": "scanned",
+                    "tags": ["auto-scanned"],
+                    "notes": f"Auto-scanned from {media_file.name}",
+                    "hash": prompt_hash,
+                }
+                for media_file, prompt_text, prompt_hash in found
+            )
+            self.db.bulk_link_images(
+                (stored[prompt_hash]["id"], str(media_file))
+                for media_file, _, prompt_hash in found
+            )
+            added, linked, claimed = 0, 0, set()
+            for _, _, prompt_hash in found:
+                if stored[prompt_hash]["created"] and prompt_hash not in claimed:
+                    claimed.add(prompt_hash)
+                    added += 1
+                else:
+                    linked += 1
+            return added, linked
+
         async def stream_response():
             try:
                 self.logger.info("Starting image scan operation")
@@ -1104,6 +1296,7 @@ class AdminRoutesMixin:
                         _extract_batch_metadata, batch
                     )
 
+                    found = []
                     for media_file, metadata in batch_results:
                         try:
                             processed_count += 1
@@ -1128,45 +1321,14 @@ class AdminRoutesMixin:
                             if not (prompt_text and prompt_text.strip()):
                                 continue
 
-                            prompt_hash = generate_prompt_hash(prompt_text.strip())
-                            existing = await self._run_in_executor(
-                                self.db.get_prompt_by_hash, prompt_hash
-                            )
-
-                            if existing:
-                                try:
-                                    await self._run_in_executor(
-                                        self.db.link_image_to_prompt,
-                                        existing["id"],
-                                        str(media_file),
-                                    )
-                                    linked_count += 1
-                                except Exception as e:
-                                    self.logger.error(
-                                        f"Failed to link {media_file.name} to existing prompt: {e}"
-                                    )
-                            else:
-                                prompt_id = await self._run_in_executor(
-                                    self.db.save_prompt,
-                                    prompt_text.strip(),
-                                    "scanned",
-                                    ["auto-scanned"],
-                                    None,
-                                    f"Auto-scanned from {media_file.name}",
-                                    prompt_hash,
+                            prompt_text = prompt_text.strip()
+                            found.append(
+                                (
+                                    media_file,
+                                    prompt_text,
+                                    generate_prompt_hash(prompt_text),
                                 )
-                                if prompt_id:
-                                    added_count += 1
-                                    try:
-                                        await self._run_in_executor(
-                                            self.db.link_image_to_prompt,
-                                            prompt_id,
-                                            str(media_file),
-                                        )
-                                    except Exception as e:
-                                        self.logger.error(
-                                            f"Failed to link {media_file.name} to new prompt: {e}"
-                                        )
+                            )
 
                         except Exception as e:
                             self.logger.error(
@@ -1174,6 +1336,16 @@ class AdminRoutesMixin:
                             )
                             continue
 
+                    if found:
+                        try:
+                            added, linked = await self._run_in_executor(
+                                _store_batch, found
+                            )
+                            added_count += added
+                            linked_count += linked
+                        except Exception as e:
+                            self.logger.error(f"Failed to store scanned batch: {e}")
+
                     # Progress update after each batch
                     progress = int(
                         min(batch_start + len(batch), total_files) / total_files * 100
@@ -170,7 +170,9 @@ class AutotagRoutesMixin:
 
                 yield f"data: {json.dumps({'type': 'progress', 'progress': 5, 'status': 'Model loaded. Fetching all images from database...'})}\n\n"
 
-                images = await self._run_in_executor(self.db.get_all_images)
+                images = await self._run_in_executor(
+                    self.db.get_all_images, fields=("prompt_id", "image_path")
+                )
 
                 total_files = len(images)
                 if total_files == 0:
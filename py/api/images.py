@@ -11,6 +11,9 @@ from pathlib import Path
 from aiohttp import web
 from PIL import Image
 
+# Most image paths resolved by one batch prompt-info request
+MAX_IMAGE_INFO_BATCH = 500
+
 
 class ImageRoutesMixin:
     """Mixin providing image and gallery-related API endpoints."""
@@ -52,6 +55,10 @@ class ImageRoutesMixin:
         async def get_image_prompt_route(request):
             return await self.get_image_prompt(request)
 
+        @routes.post("/prompt_manager/images/prompt_info")
+        async def get_images_prompt_route(request):
+            return await self.get_images_prompt(request)
+
         @routes.delete("/prompt_manager/images/{image_id}")
         async def delete_image_route(request):
             return await self.delete_image(request)
@@ -72,11 +79,34 @@ class ImageRoutesMixin:
         async def get_gallery_subfolders_route(request):
             return await self.get_gallery_subfolders(request)
 
+    def _image_fields(self, request):
+        """Parse the field projection of an image list request.
+
+        ``fields`` is a comma-separated list of image fields to return;
+        ``include_metadata=false`` drops the workflow/prompt/parameters JSON,
+        which grid views never show.
+
+        Raises:
+            ValueError: If an unknown field is requested
+        """
+        try:
+            from ...database.operations import resolve_image_fields
+        except ImportError:
+            from database.operations import resolve_image_fields
+
+        include_metadata = request.query.get("include_metadata", "true").lower()
+        return resolve_image_fields(
+            request.query.get("fields"), include_metadata != "false"
+        )
+
     async def get_prompt_images(self, request):
         """Get all images for a specific prompt."""
         try:
             prompt_id = request.match_info["prompt_id"]
-            images = await self._run_in_executor(self.db.get_prompt_images, prompt_id)
+            fields = self._image_fields(request)
+            images = await self._run_in_executor(
+                self.db.get_prompt_images, prompt_id, fields
+            )
 
             # Clean up any NaN values that cause JSON parsing errors (recursive)
             cleaned_images = [self._clean_nan_recursive(image) for image in images]
@@ -106,6 +136,8 @@ class ImageRoutesMixin:
                 # Fallback to original response
                 return web.json_response({"success": True, "images": cleaned_images})
 
+        except ValueError as e:
+            return web.json_response({"success": False, "error": str(e)}, status=400)
         except Exception as e:
             self.logger.error(f"Get prompt images error: {e}")
             return web.json_response({"success": False, "error": str(e)}, status=500)
@@ -114,21 +146,59 @@ class ImageRoutesMixin:
         """Get recently generated images."""
         try:
             limit = int(request.query.get("limit", 50))
-            images = await self._run_in_executor(self.db.get_recent_images, limit)
+            fields = self._image_fields(request)
+            images = await self._run_in_executor(
+                self.db.get_recent_images, limit, fields
+            )
 
             return web.json_response({"success": True, "images": images})
+        except ValueError as e:
+            return web.json_response({"success": False, "error": str(e)}, status=400)
         except Exception as e:
             self.logger.error(f"Get recent images error: {e}")
             return web.json_response({"success": False, "error": str(e)}, status=500)
 
     async def get_all_images(self, request):
-        """Get all generated images with linked prompts."""
+        """Get generated images with linked prompts.
+
+        Without ``limit`` or ``cursor`` every image is returned. With them,
+        one page is returned along with ``next_cursor`` for the next request.
+        ``fields`` / ``include_metadata`` select the image fields returned.
+        """
         try:
-            images = await self._run_in_executor(self.db.get_all_images)
+            limit = int(request.query.get("limit", 0))
+            offset = int(request.query.get("offset", 0))
+            cursor = request.query.get("cursor") or None
+            fields = self._image_fields(request)
 
+            if limit <= 0 and not cursor:
+                images = await self._run_in_executor(
+                    self.db.get_all_images, fields=fields
+                )
+                return web.json_response(
+                    {
+                        "success": True,
+                        "images": images,
+                        "count": len(images),
+                        "has_more": False,
+                        "next_cursor": None,
+                    }
+                )
+
+            page = await self._run_in_executor(
+                self.db.get_images_page, min(limit or 100, 1000), offset, cursor, fields
+            )
             return web.json_response(
-                {"success": True, "images": images, "count": len(images)}
+                {
+                    "success": True,
+                    "images": page["images"],
+                    "count": len(page["images"]),
+                    "has_more": page["has_more"],
+                    "next_cursor": page["next_cursor"],
+                }
             )
+        except ValueError as e:
+            return web.json_response({"success": False, "error": str(e)}, status=400)
         except Exception as e:
             self.logger.error(f"Get all images error: {e}")
             return web.json_response({"success": False, "error": str(e)}, status=500)
@@ -142,11 +212,16 @@ class ImageRoutesMixin:
                     {"success": False, "error": "Search query required"}, status=400
                 )
 
-            images = await self._run_in_executor(self.db.search_images_by_prompt, query)
+            fields = self._image_fields(request)
+            images = await self._run_in_executor(
+                self.db.search_images_by_prompt, query, fields
+            )
 
             return web.json_response(
                 {"success": True, "images": images, "query": query}
             )
+        except ValueError as e:
+            return web.json_response({"success": False, "error": str(e)}, status=400)
         except Exception as e:
             self.logger.error(f"Search images error: {e}")
             return web.json_response({"success": False, "error": str(e)}, status=500)
@@ -1201,11 +1276,7 @@ class ImageRoutesMixin:
                     {"success": False, "error": "Image path is required"}, status=400
                 )
 
-            # Convert relative path to absolute if needed
-            if not os.path.isabs(image_path):
-                output_dir = self._find_comfyui_output_dir()
-                if output_dir:
-                    image_path = str(Path(output_dir) / image_path)
+            image_path = self._absolute_output_path(image_path)
 
             # Look up the image in generated_images table
             try:
@@ -1235,6 +1306,61 @@ class ImageRoutesMixin:
             self.logger.error(f"Get image prompt error: {e}")
             return web.json_response({"success": False, "error": str(e)}, status=500)
 
+    async def get_images_prompt(self, request):
+        """Get prompt information for a page of gallery images in one lookup.
+
+        Expects a JSON body ``{"image_paths": [...]}`` with paths as accepted
+        by the single-image endpoint. Responds with ``prompts`` mapping each
+        requested path to its prompt information, or null when none is linked.
+        """
+        try:
+            data = await request.json()
+            image_paths = data.get("image_paths") if isinstance(data, dict) else None
+            if not isinstance(image_paths, list) or not all(
+                isinstance(p, str) for p in image_paths
+            ):
+                return web.json_response(
+                    {"success": False, "error": "image_paths must be a list of paths"},
+                    status=400,
+                )
+            if len(image_paths) > MAX_IMAGE_INFO_BATCH:
+                return web.json_response(
+                    {
+                        "success": False,
+                        "error": f"At most {MAX_IMAGE_INFO_BATCH} paths per request",
+                    },
+                    status=400,
+                )
+
+            resolved = {path: self._absolute_output_path(path) for path in image_paths}
+            found = await self._run_in_executor(
+                self.db.get_images_prompt_info, list(resolved.values())
+            )
+            prompts = {}
+            for path, image_path in resolved.items():
+                prompt_data = found.get(image_path)
+                if prompt_data:
+                    prompt_data = dict(prompt_data, image_path=image_path)
+                prompts[path] = prompt_data
+
+            return web.json_response({"success": True, "prompts": prompts})
+
+        except json.JSONDecodeError:
+            return web.json_response(
+                {"success": False, "error": "Invalid JSON body"}, status=400
+            )
+        except Exception as e:
+            self.logger.error(f"Get images prompt error: {e}")
+            return web.json_response({"success": False, "error": str(e)}, status=500)
+
+    def _absolute_output_path(self, image_path: str) -> str:
+        """Resolve a path relative to the ComfyUI output directory."""
+        if image_path and not os.path.isabs(image_path):
+            output_dir = self._find_comfyui_output_dir()
+            if output_dir:
+                return str(Path(output_dir) / image_path)
+        return image_path
+
     async def delete_image(self, request):
         """Delete an image record."""
         try:
@@ -1,5 +1,6 @@
 """LoraManager integration API routes for PromptManager."""
 
+import hashlib
 import json
 import os
 from pathlib import Path
@@ -153,6 +154,7 @@ class LoraIntegrationMixin:
 
         Streams progress as SSE, matching the existing scan pattern.
         """
+        BATCH_SIZE = 50  # LoRAs per bulk database write
         try:
             from ..config import IntegrationConfig
             from ..lora_utils import (
@@ -236,6 +238,40 @@ class LoraIntegrationMixin:
             )
 
             cache_dir = get_lora_image_cache_dir()
+            pending = []
+
+            def _store_batch(batch):
+                """Save a batch of LoRA prompts and link their images in bulk.
+
+                Returns (prompts imported, LoRAs skipped as already known).
+                """
+                if not batch:
+                    return 0, 0
+                try:
+                    stored = self.db.bulk_upsert_prompts(
+                        {
+                            "text": prompt_text,
+                            "category": "lora-manager",
+                            "tags": tags,
+                            "hash": prompt_hash,
+                        }
+                        for _, prompt_text, prompt_hash, tags, _ in batch
+                    )
+                    self.db.bulk_link_images(
+                        (stored[prompt_hash]["id"], path)
+                        for _, _, prompt_hash, _, images in batch
+                        for path in images
+                    )
+                except Exception as e:
+                    names = ", ".join(entry[0] for entry in batch)
+                    self.logger.warning(f"Failed to import LoRAs {names}: {e}")
+                    return 0, len(batch)
+                imported, claimed = 0, set()
+                for _, _, prompt_hash, _, _ in batch:
+                    if stored[prompt_hash]["created"] and prompt_hash not in claimed:
+                        claimed.add(prompt_hash)
+                        imported += 1
+                return imported, len(batch) - imported
 
             for i, meta_file in enumerate(meta_files):
                 metadata = await self._run_in_executor(read_lora_metadata, meta_file)
@@ -274,52 +310,21 @@ class LoraIntegrationMixin:
                 tags = ["lora-manager", f"lora:{model_name}"]
                 tags.extend(trigger_words)
 
-                # Save to database via existing mechanism
-                try:
-                    import hashlib
-
+                if not (prompt_text and prompt_text.strip()):
+                    skipped += 1
+                else:
                     prompt_hash = hashlib.sha256(
                         prompt_text.strip().lower().encode("utf-8")
                     ).hexdigest()
-
-                    existing = await self._run_in_executor(
-                        self.db.get_prompt_by_hash, prompt_hash
+                    pending.append(
+                        (model_name, prompt_text, prompt_hash, tags, all_images)
                     )
 
-                    if existing:
-                        # Link all images
-                        for pp in all_images:
-                            await self._run_in_executor(
-                                self.db.link_image_to_prompt,
-                                existing["id"],
-                                pp,
-                            )
-                        skipped += 1
-                    else:
-                        prompt_id = await self._run_in_executor(
-                            self.db.save_prompt,
-                            prompt_text,
-                            "lora-manager",  # category
-                            tags,
-                            None,  # rating
-                            None,  # notes
-                            prompt_hash,
-                        )
-
-                        if prompt_id:
-                            for pp in all_images:
-                                await self._run_in_executor(
-                                    self.db.link_image_to_prompt,
-                                    prompt_id,
-                                    pp,
-                                )
-                            imported += 1
-                        else:
-                            skipped += 1
-
-                except Exception as e:
-                    self.logger.warning(f"Failed to import LoRA {model_name}: {e}")
-                    skipped += 1
+                if len(pending) >= BATCH_SIZE:
+                    added, existing = await self._run_in_executor(_store_batch, pending)
+                    imported += added
+                    skipped += existing
+                    pending = []
 
                 # Progress update for every LoRA
                 progress = int(5 + (90 * (i + 1) / max(total, 1)))
@@ -338,6 +343,10 @@ class LoraIntegrationMixin:
                     }
                 )
 
+            added, existing = await self._run_in_executor(_store_batch, pending)
+            imported += added
+            skipped += existing
+
             await send_progress(
                 {
                     "type": "complete",
@@ -1,7 +1,9 @@
 """Prompt API routes for PromptManager."""
 
 import datetime
-import json
+import os
+import tempfile
+import zlib
 
 from aiohttp import web
 
@@ -14,6 +16,8 @@ try:
         sanitize_input,
     )
     from ...utils.hashing import generate_prompt_hash
+    from ...database.operations import import_format_from_filename
+    from ...database.search_index import get_search_index
 except ImportError:
     from utils.validators import (
         validate_prompt_text,
@@ -23,6 +27,24 @@ except ImportError:
         sanitize_input,
     )
     from utils.hashing import generate_prompt_hash
+    from database.operations import import_format_from_filename
+    from database.search_index import get_search_index
+
+# Upload bytes read per await while spooling an import to disk
+IMPORT_READ_SIZE = 1024 * 1024
+
+# Most completions one /prompt_manager/suggest request may ask for
+MAX_SUGGESTIONS = 50
+
+# Most prompts one /prompt_manager/prompts/{id}/similar request may ask for
+MAX_SIMILAR_PROMPTS = 50
+
+# Formats offered by /prompt_manager/export (and accepted by import)
+EXPORT_CONTENT_TYPES = {
+    "json": "application/json",
+    "jsonl": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
 
 
 class PromptRoutesMixin:
@@ -33,6 +55,10 @@ class PromptRoutesMixin:
         async def search_prompts_route(request):
             return await self.search_prompts(request)
 
+        @routes.get("/prompt_manager/suggest")
+        async def suggest_route(request):
+            return await self.suggest(request)
+
         @routes.get("/prompt_manager/recent")
         async def get_recent_prompts_route(request):
             return await self.get_recent_prompts(request)
@@ -84,6 +110,10 @@ class PromptRoutesMixin:
         async def update_prompt_route(request):
             return await self.update_prompt(request)
 
+        @routes.get("/prompt_manager/prompts/{prompt_id}/similar")
+        async def similar_prompts_route(request):
+            return await self.get_similar_prompts(request)
+
         @routes.put("/prompt_manager/prompts/{prompt_id}/rating")
         async def update_rating_route(request):
             return await self.update_prompt_rating(request)
@@ -122,6 +152,10 @@ class PromptRoutesMixin:
         async def export_prompts_route(request):
             return await self.export_prompts(request)
 
+        @routes.post("/prompt_manager/import")
+        async def import_prompts_route(request):
+            return await self.import_prompts(request)
+
     async def search_prompts(self, request):
         """Search for prompts using multiple filter criteria."""
         try:
@@ -132,6 +166,9 @@ class PromptRoutesMixin:
             limit = int(request.query.get("limit", 50))
 
             folder = request.query.get("folder", "").strip() or None
+            prefix = request.query.get("prefix", "true").lower() != "false"
+            rank = request.query.get("sort", "").lower() == "relevance"
+            substring = request.query.get("match", "").lower() == "substring"
 
             tags = None
             if tags_str:
@@ -150,11 +187,26 @@ class PromptRoutesMixin:
                 rating_min=min_rating,
                 limit=limit,
                 folder=folder,
+                prefix=prefix,
+                rank=rank,
+                substring=substring,
             )
             self._enrich_prompt_images(results)
 
+            # "Did you mean" alternatives when a text search finds nothing
+            suggestions = []
+            if text and not results:
+                suggestions = await self._run_in_executor(
+                    self.db.suggest_search_terms, text
+                )
+
             return web.json_response(
-                {"success": True, "results": results, "count": len(results)}
+                {
+                    "success": True,
+                    "results": results,
+                    "count": len(results),
+                    "suggestions": suggestions,
+                }
             )
 
         except Exception as e:
@@ -164,6 +216,34 @@ class PromptRoutesMixin:
                 status=500,
             )
 
+    async def suggest(self, request):
+        """Complete a typed prefix with tag names and prompt words."""
+        try:
+            prefix = request.query.get("q", "")
+            kind = request.query.get("type") or None
+            try:
+                limit = min(int(request.query.get("limit", 10)), MAX_SUGGESTIONS)
+            except ValueError:
+                return web.json_response(
+                    {"success": False, "error": "Invalid limit parameter"},
+                    status=400,
+                )
+            if kind not in (None, "tag", "word"):
+                return web.json_response(
+                    {"success": False, "error": "type must be 'tag' or 'word'"},
+                    status=400,
+                )
+
+            suggestions = await self._run_in_executor(
+                get_search_index(self.db).complete, prefix, limit, kind
+            )
+            return web.json_response({"success": True, "suggestions": suggestions})
+        except Exception as e:
+            self.logger.error(f"Suggest error: {e}")
+            return web.json_response(
+                {"success": False, "error": str(e), "suggestions": []}, status=500
+            )
+
     async def get_subfolders(self, request):
         """Get distinct subfolder values derived from generated image paths."""
         try:
@@ -187,6 +267,7 @@ class PromptRoutesMixin:
             limit = int(request.query.get("limit", 50))
             page = int(request.query.get("page", 1))
             offset = int(request.query.get("offset", 0))
+            cursor = request.query.get("cursor") or None
 
             if page > 1 and offset == 0:
                 offset = (page - 1) * limit
@@ -197,7 +278,7 @@ class PromptRoutesMixin:
                 limit = 1
 
             results = await self._run_in_executor(
-                self.db.get_recent_prompts, limit=limit, offset=offset
+                self.db.get_recent_prompts, limit=limit, offset=offset, cursor=cursor
             )
             self._enrich_prompt_images(results["prompts"])
 
@@ -212,11 +293,16 @@ class PromptRoutesMixin:
                         "page": results["page"],
                         "total_pages": results["total_pages"],
                         "has_more": results["has_more"],
+                        "next_cursor": results["next_cursor"],
                         "count": len(results["prompts"]),
                     },
                 }
             )
 
+        except ValueError as e:
+            return web.json_response(
+                {"success": False, "error": str(e), "results": []}, status=400
+            )
         except Exception as e:
             self.logger.error(f"Recent prompts error: {e}", exc_info=True)
             return web.json_response(
@@ -345,6 +431,7 @@ class PromptRoutesMixin:
         """Get prompts matching multiple tags with AND/OR mode, or untagged prompts."""
         try:
             untagged = request.query.get("untagged", "").lower() == "true"
+            cursor = request.query.get("cursor") or None
 
             if untagged:
                 try:
@@ -359,7 +446,7 @@ class PromptRoutesMixin:
                         status=400,
                     )
                 result = await self._run_in_executor(
-                    self.db.get_untagged_prompts, limit, offset
+                    self.db.get_untagged_prompts, limit, offset, cursor
                 )
                 self._enrich_prompt_images(result["prompts"])
                 return web.json_response(
@@ -373,6 +460,7 @@ class PromptRoutesMixin:
                             "limit": result["limit"],
                             "offset": result["offset"],
                             "has_more": result["has_more"],
+                            "next_cursor": result["next_cursor"],
                         },
                     }
                 )
@@ -398,7 +486,7 @@ class PromptRoutesMixin:
                 )
 
             result = await self._run_in_executor(
-                self.db.get_prompts_by_tags, tags_list, mode, limit, offset
+                self.db.get_prompts_by_tags, tags_list, mode, limit, offset, cursor
             )
             self._enrich_prompt_images(result["prompts"])
 
@@ -413,9 +501,12 @@ class PromptRoutesMixin:
                         "limit": result["limit"],
                         "offset": result["offset"],
                         "has_more": result["has_more"],
+                        "next_cursor": result["next_cursor"],
                     },
                 }
             )
+        except ValueError as e:
+            return web.json_response({"success": False, "error": str(e)}, status=400)
         except Exception as e:
             self.logger.error(f"Tags filter error: {e}", exc_info=True)
             return web.json_response({"success": False, "error": str(e)}, status=500)
@@ -719,6 +810,43 @@ class PromptRoutesMixin:
                 status=500,
             )
 
+    async def get_similar_prompts(self, request):
+        """List the prompts whose wording is most similar to a prompt.
+
+        Query params:
+            limit: Maximum number of prompts (default 10)
+        """
+        try:
+            if not self.db.similarity_search_enabled():
+                return web.json_response(
+                    {"success": False, "error": "Similarity search is disabled"},
+                    status=400,
+                )
+            try:
+                prompt_id = int(request.match_info["prompt_id"])
+                limit = min(int(request.query.get("limit", 10)), MAX_SIMILAR_PROMPTS)
+            except ValueError:
+                return web.json_response(
+                    {"success": False, "error": "Invalid prompt ID or limit"},
+                    status=400,
+                )
+
+            results = await self._run_in_executor(
+                self.db.find_similar_prompts, prompt_id, limit
+            )
+            if results is None:
+                return web.json_response(
+                    {"success": False, "error": "Prompt not found"}, status=404
+                )
+            return web.json_response(
+                {"success": True, "results": results, "count": len(results)}
+            )
+        except Exception as e:
+            self.logger.error(f"Similar prompts error: {e}")
+            return web.json_response(
+                {"success": False, "error": str(e), "results": []}, status=500
+            )
+
     async def add_prompt_tag(self, request):
         """Add tag to prompt."""
         try:
@@ -950,29 +1078,153 @@ class PromptRoutesMixin:
             )
 
     async def export_prompts(self, request):
-        """Export all prompts to JSON."""
+        """Stream all prompts as a JSON, JSON Lines or CSV download.
+
+        Query params:
+            format: ``json`` (default), ``jsonl`` or ``csv``
+            gzip: ``true`` to gzip the download
+            include_images: ``false`` to leave out image records
+        """
+        export_format = request.query.get("format", "json").lower()
+        if export_format not in EXPORT_CONTENT_TYPES:
+            return web.json_response(
+                {
+                    "success": False,
+                    "error": "format must be one of: "
+                    + ", ".join(EXPORT_CONTENT_TYPES),
+                },
+                status=400,
+            )
+        compress = request.query.get("gzip", "false").lower() == "true"
+        include_images = request.query.get("include_images", "true").lower() != "false"
+
+        pieces = self.db.export_chunks(export_format, include_images=include_images)
+        # wbits=31 selects the gzip container
+        compressor = zlib.compressobj(6, zlib.DEFLATED, 31) if compress else None
+
+        def next_block():
+            """Serialize (and compress) the next chunk; returns (bytes, done)."""
+            piece = next(pieces, None)
+            if piece is None:
+                return (compressor.flush() if compressor else b""), True
+            data = piece.encode("utf-8")
+            return (compressor.compress(data) if compressor else data), False
+
+        timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+        filename = f"prompt_manager_{timestamp}.{export_format}"
+        headers = {
+            "Content-Type": EXPORT_CONTENT_TYPES[export_format],
+            "Content-Disposition": f'attachment; filename="{filename}"',
+        }
+        if compress:
+            headers["Content-Type"] = "application/gzip"
+            headers["Content-Disposition"] = f'attachment; filename="{filename}.gz"'
+
+        response = web.StreamResponse(status=200, reason="OK", headers=headers)
+        await response.prepare(request)
         try:
-            prompts = await self._run_in_executor(self.db.search_prompts, limit=10000)
+            done = False
+            while not done:
+                block, done = await self._run_in_executor(next_block)
+                if block:
+                    await response.write(block)
+        except Exception as e:
+            # Headers are already sent; the truncated body signals the failure
+            self.logger.error(f"Export error: {e}")
+        await response.write_eof()
+        return response
 
-            export_data = {
-                "export_date": datetime.datetime.now(datetime.timezone.utc).isoformat(),
-                "total_prompts": len(prompts),
-                "prompts": prompts,
-            }
+    async def import_prompts(self, request):
+        """Merge an uploaded JSON, JSON Lines or CSV export into the database.
 
-            json_data = json.dumps(export_data, indent=2, ensure_ascii=False)
+        Expects a multipart upload with a ``file`` field, optionally gzipped.
+        The upload is spooled to a temporary file rather than held in
+        memory, then imported in chunks while progress is streamed as SSE.
 
-            return web.Response(
-                text=json_data,
-                content_type="application/json",
-                headers={
-                    "Content-Disposition": f'attachment; filename="prompt_manager_{datetime.datetime.now().strftime("%Y%m%d_%H%M%S")}.json"'
+        Query params:
+            format: ``json``, ``jsonl`` or ``csv`` (default: from file name)
+            images: ``false`` to skip recreating image links
+        """
+        try:
+            reader = await request.multipart()
+            field = await reader.next()
+        except Exception:
+            field = None
+        if not field or field.name != "file":
+            return web.json_response(
+                {
+                    "success": False,
+                    "error": "No file uploaded. Expected field name: file",
                 },
+                status=400,
             )
 
-        except Exception as e:
-            self.logger.error(f"Export error: {e}")
+        import_format = (
+            request.query.get("format")
+            or import_format_from_filename(field.filename or "")
+            or ""
+        ).lower()
+        if import_format not in EXPORT_CONTENT_TYPES:
             return web.json_response(
-                {"success": False, "error": f"Failed to export prompts: {str(e)}"},
-                status=500,
+                {
+                    "success": False,
+                    "error": "Could not determine import format; pass format="
+                    + " | ".join(EXPORT_CONTENT_TYPES),
+                },
+                status=400,
             )
+        link_images = request.query.get("images", "true").lower() != "false"
+
+        fd, temp_path = tempfile.mkstemp(prefix="prompt_manager_import_")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                while True:
+                    chunk = await field.read_chunk(IMPORT_READ_SIZE)
+                    if not chunk:
+                        break
+                    await self._run_in_executor(f.write, chunk)
+
+            def make_event(done_bytes, total_bytes, counts):
+                percent = int(done_bytes / total_bytes * 100) if total_bytes else 100
+                return {
+                    "type": "progress",
+                    "progress": min(percent, 99),
+                    "status": f"Imported {counts['processed']} records...",
+                    **counts,
+                }
+
+            def make_error(e):
+                if isinstance(e, ValueError):
+                    return {"type": "error", "message": str(e)}
+                self.logger.exception("Import error")
+                return {
+                    "type": "error",
+                    "message": (
+                        "An internal error occurred. Check server logs for details."
+                    ),
+                }
+
+            return await self._stream_executor_progress(
+                request,
+                self.db.import_prompts,
+                temp_path,
+                import_format,
+                link_images=link_images,
+                make_event=make_event,
+                make_complete=lambda counts: {
+                    "type": "complete",
+                    "progress": 100,
+                    **counts,
+                },
+                make_error=make_error,
+                first_event={
+                    "type": "progress",
+                    "progress": 0,
+                    "status": "Importing...",
+                },
+            )
+        finally:
+            try:
+                os.unlink(temp_path)
+            except OSError as e:
+                self.logger.warning(f"Could not remove import temp file: {e}")
@@ -259,8 +259,28 @@ class PromptManagerConfig:
         SHOW_TEST_BUTTON (bool): Show API test button in node interface
         WEBUI_DISPLAY_MODE (str): Display mode for web UI ('popup' or 'newtab')
         MAX_SEARCH_RESULTS (int): Maximum number of search results to return
-        ENABLE_FUZZY_SEARCH (bool): Enable fuzzy search capabilities
+        ENABLE_FUZZY_SEARCH (bool): Include near-duplicate prompts (differing
+            by a token or a weight) in duplicate scans
+        NEAR_DUPLICATE_THRESHOLD (float): Word-shingle Jaccard similarity
+            (0-1) at which prompts count as near duplicates
         AUTO_BACKUP_INTERVAL (int): Hours between automatic database backups
+            (0 disables scheduled backups)
+        BACKUP_RETENTION (int): Number of backups of each kind (scheduled,
+            downloaded) kept in the ``backups`` folder next to the database
+        READ_POOL_SIZE (int): Number of pooled read-only SQLite connections
+            (0 routes reads through the single writer connection)
+        SQLITE_PROFILE (str): SQLite tuning applied to every connection:
+            'safe' (SQLite defaults), 'balanced' or 'fast'
+        SQLITE_PRAGMAS (dict): Overrides for individual profile settings
+            (synchronous, cache_size, mmap_size, temp_store,
+            wal_autocheckpoint)
+        OPTIMIZE_INTERVAL (int): Hours between background ``PRAGMA optimize``
+            runs that refresh query planner statistics (0 disables)
+        RESULT_CACHE_SIZE (int): Query results (tag lists, categories,
+            statistics, recent pages) cached until the next write
+            (0 disables)
+        ENABLE_SIMILARITY_SEARCH (bool): Compute term vectors of saved
+            prompts in the background and serve "similar prompts" lookups
     """
 
     # Database settings
@@ -275,8 +295,16 @@ class PromptManagerConfig:
 
     # Performance settings
     MAX_SEARCH_RESULTS = 100
-    ENABLE_FUZZY_SEARCH = False  # Requires fuzzywuzzy
+    ENABLE_FUZZY_SEARCH = False  # Near duplicates in find_duplicates
+    NEAR_DUPLICATE_THRESHOLD = 0.6
     AUTO_BACKUP_INTERVAL = 24  # Hours
+    BACKUP_RETENTION = 7  # Backups kept per kind
+    READ_POOL_SIZE = 4  # Read-only connections shared by API worker threads
+    SQLITE_PROFILE = "balanced"  # 'safe', 'balanced' or 'fast'
+    SQLITE_PRAGMAS: Dict[str, Any] = {}  # Per-setting profile overrides
+    OPTIMIZE_INTERVAL = 24  # Hours
+    RESULT_CACHE_SIZE = 256  # Cached query results
+    ENABLE_SIMILARITY_SEARCH = True  # /prompt_manager/prompts/{id}/similar
 
     @classmethod
     def get_config(cls) -> Dict[str, Any]:
@@ -308,7 +336,15 @@ class PromptManagerConfig:
             "performance": {
                 "max_search_results": cls.MAX_SEARCH_RESULTS,
                 "enable_fuzzy_search": cls.ENABLE_FUZZY_SEARCH,
+                "near_duplicate_threshold": cls.NEAR_DUPLICATE_THRESHOLD,
                 "auto_backup_interval": cls.AUTO_BACKUP_INTERVAL,
+                "backup_retention": cls.BACKUP_RETENTION,
+                "read_pool_size": cls.READ_POOL_SIZE,
+                "sqlite_profile": cls.SQLITE_PROFILE,
+                "sqlite_pragmas": dict(cls.SQLITE_PRAGMAS),
+                "optimize_interval": cls.OPTIMIZE_INTERVAL,
+                "result_cache_size": cls.RESULT_CACHE_SIZE,
+                "enable_similarity_search": cls.ENABLE_SIMILARITY_SEARCH,
             },
             "gallery": GalleryConfig.get_config(),
             "integrations": IntegrationConfig.get_config(),
@@ -420,8 +456,24 @@ class PromptManagerConfig:
             cls.MAX_SEARCH_RESULTS = performance["max_search_results"]
         if "enable_fuzzy_search" in performance:
             cls.ENABLE_FUZZY_SEARCH = performance["enable_fuzzy_search"]
+        if "near_duplicate_threshold" in performance:
+            cls.NEAR_DUPLICATE_THRESHOLD = performance["near_duplicate_threshold"]
         if "auto_backup_interval" in performance:
             cls.AUTO_BACKUP_INTERVAL = performance["auto_backup_interval"]
+        if "backup_retention" in performance:
+            cls.BACKUP_RETENTION = performance["backup_retention"]
+        if "read_pool_size" in performance:
+            cls.READ_POOL_SIZE = performance["read_pool_size"]
+        if "sqlite_profile" in performance:
+            cls.SQLITE_PROFILE = performance["sqlite_profile"]
+        if "sqlite_pragmas" in performance:
+            cls.SQLITE_PRAGMAS = dict(performance["sqlite_pragmas"])
+        if "optimize_interval" in performance:
+            cls.OPTIMIZE_INTERVAL = performance["optimize_interval"]
+        if "result_cache_size" in performance:
+            cls.RESULT_CACHE_SIZE = performance["result_cache_size"]
+        if "enable_similarity_search" in performance:
+            cls.ENABLE_SIMILARITY_SEARCH = performance["enable_similarity_search"]
 
         # Update gallery config
         if "gallery" in new_config:
@@ -5,6 +5,9 @@ Uses aiohttp test client to test request/response contracts
 without requiring a full ComfyUI server.
 """
 
+import csv
+import gzip
+import io
 import json
 import os
 import sys
@@ -13,6 +16,7 @@ import unittest
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+import aiohttp
 from aiohttp import web
 from aiohttp.test_utils import AioHTTPTestCase
 
@@ -145,6 +149,79 @@ class TestSearch(APITestCase):
         self.assertTrue(data["success"])
         self.assertEqual(len(data["results"]), 0)
 
+    async def test_search_substring(self):
+        self._save_prompt("Beautiful mountain landscape")
+        resp = await self.client.request(
+            "GET", "/prompt_manager/search?text=ountai&match=substring"
+        )
+        data = await resp.json()
+        self.assertEqual(len(data["results"]), 1)
+        self.assertEqual(data["suggestions"], [])
+
+    async def test_search_suggestions(self):
+        self._save_prompt("Beautiful mountain landscape")
+        resp = await self.client.request(
+            "GET", "/prompt_manager/search?text=moutnain%20landscpe"
+        )
+        data = await resp.json()
+        self.assertEqual(data["results"], [])
+        self.assertEqual(data["suggestions"][0], "mountain landscape")
+
+
+class TestSuggest(APITestCase):
+
+    async def test_suggest_tags_and_words(self):
+        self._save_prompt("Mountain lake", tags=["mountain"])
+        self._save_prompt("Mountain pass", tags=["mountain", "moody"])
+        resp = await self.client.request("GET", "/prompt_manager/suggest?q=mo")
+        self.assertEqual(resp.status, 200)
+        data = await resp.json()
+        self.assertEqual(
+            data["suggestions"],
+            [
+                {"text": "mountain", "type": "tag", "count": 2},
+                {"text": "mountain", "type": "word", "count": 2},
+                {"text": "moody", "type": "tag", "count": 1},
+            ],
+        )
+
+    async def test_suggest_type_filter(self):
+        self._save_prompt("Mountain lake", tags=["mountain"])
+        resp = await self.client.request(
+            "GET", "/prompt_manager/suggest?q=mo&type=tag&limit=1"
+        )
+        data = await resp.json()
+        self.assertEqual([s["type"] for s in data["suggestions"]], ["tag"])
+
+    async def test_suggest_invalid_type(self):
+        resp = await self.client.request(
+            "GET", "/prompt_manager/suggest?q=mo&type=category"
+        )
+        self.assertEqual(resp.status, 400)
+
+
+class TestSimilarPrompts(APITestCase):
+
+    async def test_similar_prompts(self):
+        castle = self._save_prompt("Gothic castle at night")
+        other = self._save_prompt("Gothic castle at dawn")
+        self._save_prompt("Portrait of a cat")
+        self.api.db.embed_prompts()
+        resp = await self.client.request(
+            "GET", f"/prompt_manager/prompts/{castle}/similar?limit=5"
+        )
+        self.assertEqual(resp.status, 200)
+        data = await resp.json()
+        self.assertEqual([p["id"] for p in data["results"]], [other])
+        self.assertGreater(data["results"][0]["similarity"], 0.3)
+        self.assertEqual(data["count"], 1)
+
+    async def test_similar_prompts_errors(self):
+        resp = await self.client.request("GET", "/prompt_manager/prompts/999/similar")
+        self.assertEqual(resp.status, 404)
+        resp = await self.client.request("GET", "/prompt_manager/prompts/x/similar")
+        self.assertEqual(resp.status, 400)
+
 
 class TestSaveAndDelete(APITestCase):
 
@@ -293,6 +370,86 @@ class TestStats(APITestCase):
         self.assertTrue(data["success"])
         self.assertIn("stats", data)
 
+    async def test_stats_report_result_cache(self):
+        self._save_prompt("P1", category="test")
+        for _ in range(2):
+            await self.client.request("GET", "/prompt_manager/categories")
+        resp = await self.client.request("GET", "/prompt_manager/stats")
+        cache = (await resp.json())["stats"]["result_cache"]
+        self.assertEqual(cache["hits"], 1)
+        self.assertEqual(cache["misses"], 2)
+
+
+class TestImageFieldProjection(APITestCase):
+    """Test fields / include_metadata on image list endpoints."""
+
+    async def test_include_metadata_false(self):
+        pid = self._save_prompt("gallery prompt")
+        self.api.db.link_image_to_prompt(
+            str(pid), "/out/img.png", {"workflow": {"nodes": [1]}}
+        )
+        for url in (
+            f"/prompt_manager/prompts/{pid}/images",
+            "/prompt_manager/images/recent",
+            "/prompt_manager/images/all",
+            "/prompt_manager/images/all?limit=10",
+            "/prompt_manager/images/search?q=gallery",
+        ):
+            sep = "&" if "?" in url else "?"
+            resp = await self.client.get(f"{url}{sep}include_metadata=false")
+            data = await resp.json()
+            self.assertTrue(data["success"], url)
+            self.assertEqual(data["images"][0]["image_path"], "/out/img.png")
+            self.assertNotIn("workflow_data", data["images"][0], url)
+
+        resp = await self.client.get("/prompt_manager/images/recent")
+        data = await resp.json()
+        self.assertEqual(data["images"][0]["workflow_data"], {"nodes": [1]})
+
+    async def test_fields_and_unknown_field(self):
+        pid = self._save_prompt("gallery prompt")
+        self.api.db.link_image_to_prompt(str(pid), "/out/img.png")
+        resp = await self.client.get("/prompt_manager/images/recent?fields=filename")
+        data = await resp.json()
+        self.assertEqual(set(data["images"][0]), {"id", "filename", "prompt_text"})
+
+        resp = await self.client.get("/prompt_manager/images/recent?fields=nope")
+        self.assertEqual(resp.status, 400)
+
+
+class TestImagePromptInfo(APITestCase):
+    """Test single and batch image-to-prompt lookups."""
+
+    async def test_single_and_batch(self):
+        pid = self._save_prompt("gallery prompt")
+        self.api.db.link_image_to_prompt(str(pid), "/out/img.png")
+
+        resp = await self.client.get("/prompt_manager/images/prompt//out/img.png")
+        data = await resp.json()
+        self.assertTrue(data["success"])
+        self.assertEqual(data["prompt"]["prompt_id"], pid)
+
+        resp = await self.client.post(
+            "/prompt_manager/images/prompt_info",
+            json={"image_paths": ["/out/img.png", "/out/none.png"]},
+        )
+        data = await resp.json()
+        self.assertTrue(data["success"])
+        self.assertEqual(data["prompts"]["/out/img.png"]["text"], "gallery prompt")
+        self.assertEqual(data["prompts"]["/out/img.png"]["image_path"], "/out/img.png")
+        self.assertIsNone(data["prompts"]["/out/none.png"])
+
+    async def test_batch_validation(self):
+        resp = await self.client.post(
+            "/prompt_manager/images/prompt_info", json={"image_paths": "x"}
+        )
+        self.assertEqual(resp.status, 400)
+        resp = await self.client.post(
+            "/prompt_manager/images/prompt_info",
+            json={"image_paths": ["/a.png"] * 501},
+        )
+        self.assertEqual(resp.status, 400)
+
 
 class TestExport(APITestCase):
 
@@ -307,6 +464,252 @@ class TestExport(APITestCase):
         self.assertIn("prompts", data)
         self.assertEqual(len(data["prompts"]), 1)
 
+    async def test_export_jsonl_gzip(self):
+        for i in range(3):
+            self._save_prompt(f"Line {i}", tags=["export"])
+        resp = await self.client.request(
+            "GET", "/prompt_manager/export?format=jsonl&gzip=true"
+        )
+        self.assertEqual(resp.status, 200)
+        self.assertEqual(resp.headers["Content-Type"], "application/gzip")
+        self.assertIn(".jsonl.gz", resp.headers["Content-Disposition"])
+        lines = gzip.decompress(await resp.read()).decode("utf-8").splitlines()
+        self.assertEqual(len(lines), 3)
+        self.assertEqual(json.loads(lines[0])["tags"], ["export"])
+
+    async def test_export_csv(self):
+        self._save_prompt('Comma, quoted "text"', tags=["a", "b"])
+        resp = await self.client.request(
+            "GET", "/prompt_manager/export?format=csv&include_images=false"
+        )
+        self.assertEqual(resp.status, 200)
+        rows = list(csv.DictReader(io.StringIO(await resp.text())))
+        self.assertEqual(rows[0]["text"], 'Comma, quoted "text"')
+        self.assertEqual(json.loads(rows[0]["tags"]), ["a", "b"])
+        self.assertNotIn("images", rows[0])
+
+    async def test_export_rejects_unknown_format(self):
+        resp = await self.client.request("GET", "/prompt_manager/export?format=xml")
+        self.assertEqual(resp.status, 400)
+        data = await resp.json()
+        self.assertFalse(data["success"])
+
+
+class TestImport(APITestCase):
+
+    def _events(self, body):
+        return [
+            json.loads(line[len("data: ") :])
+            for line in body.split("\n\n")
+            if line.startswith("data: ")
+        ]
+
+    async def test_import_jsonl_upload(self):
+        self._save_prompt("Already here", tags=["local"])
+        lines = [
+            {"text": "Already here", "tags": ["remote"]},
+            {"text": "Brand new", "tags": ["remote"], "rating": 4},
+            {"text": "   "},
+        ]
+        form = aiohttp.FormData()
+        form.add_field(
+            "file",
+            "".join(json.dumps(line) + "\n" for line in lines).encode("utf-8"),
+            filename="export.jsonl",
+        )
+        resp = await self.client.post("/prompt_manager/import", data=form)
+        self.assertEqual(resp.status, 200)
+        events = self._events(await resp.text())
+        complete = events[-1]
+        self.assertEqual(complete["type"], "complete")
+        self.assertEqual(complete["imported"], 1)
+        self.assertEqual(complete["existing"], 1)
+        self.assertEqual(complete["skipped"], 1)
+        existing = self.api.db.get_prompt_by_hash(generate_prompt_hash("Already here"))
+        self.assertEqual(sorted(existing["tags"]), ["local", "remote"])
+
+    async def test_import_malformed_file_reports_error(self):
+        form = aiohttp.FormData()
+        form.add_field("file", b'{"prompts": [{"text": "a"}, {"te', filename="x.json")
+        resp = await self.client.post("/prompt_manager/import", data=form)
+        self.assertEqual(resp.status, 200)
+        self.assertEqual(self._events(await resp.text())[-1]["type"], "error")
+
+    async def test_import_rejects_unknown_format(self):
+        form = aiohttp.FormData()
+        form.add_field("file", b"data", filename="prompts.xml")
+        resp = await self.client.post("/prompt_manager/import", data=form)
+        self.assertEqual(resp.status, 400)
+
+    async def test_import_requires_file_field(self):
+        form = aiohttp.FormData()
+        form.add_field("other", b"data", filename="prompts.jsonl")
+        resp = await self.client.post("/prompt_manager/import", data=form)
+        self.assertEqual(resp.status, 400)
+
+
+class TestRestore(APITestCase):
+
+    def _backup_of(self, texts, **fields):
+        """Bytes of a separate database holding ``texts`` as prompts."""
+        path = self._temp_db.name + ".upload"
+        db = PromptDatabase(path)
+        for text in texts:
+            db.save_prompt(text=text, prompt_hash=generate_prompt_hash(text), **fields)
+        db.embed_prompts()
+        db.model.close()
+        with open(path, "rb") as f:
+            data = f.read()
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(path + suffix):
+                os.unlink(path + suffix)
+        return data
+
+    async def _restore(self, texts, **fields):
+        form = aiohttp.FormData()
+        form.add_field(
+            "database_file", self._backup_of(texts, **fields), filename="p.db"
+        )
+        resp = await self.client.post("/prompt_manager/restore", data=form)
+        self.assertEqual(resp.status, 200)
+        data = await resp.json()
+        self.assertTrue(data["success"])
+        if data["backup_created"]:
+            os.unlink(data["backup_created"])
+        return data
+
+    async def _search(self, text):
+        resp = await self.client.request("GET", f"/prompt_manager/search?text={text}")
+        return [p["text"] for p in (await resp.json())["results"]]
+
+    async def test_restore_replaces_search_results(self):
+        self._save_prompt("Beautiful mountain landscape")
+        self.assertEqual(len(await self._search("mountain")), 1)
+        generation = self.api.db.model.generation
+
+        await self._restore(["Quiet harbor at dawn"])
+        self.assertEqual(await self._search("mountain"), [])
+        self.assertEqual(await self._search("harbor"), ["Quiet harbor at dawn"])
+        self.assertGreater(self.api.db.model.generation, generation)
+
+    async def test_restore_refreshes_cached_reads_of_other_instances(self):
+        self._save_prompt("Beautiful mountain landscape", category="nature", tags=["a"])
+        # A second instance on the file, like the one shared by the nodes
+        other = PromptDatabase(self._temp_db.name)
+        self.assertEqual(other.get_all_categories(), ["nature"])
+        self.assertEqual(other.get_all_tags(), ["a"])
+        self.assertEqual(other.get_statistics()["total_prompts"], 1)
+
+        await self._restore(["Quiet harbor", "Busy harbor"], category="sea", tags=["b"])
+        self.assertEqual(other.get_all_categories(), ["sea"])
+        self.assertEqual(other.get_all_tags(), ["b"])
+        self.assertEqual(
+            [t["name"] for t in other.get_tags_with_counts()["tags"]], ["b"]
+        )
+        self.assertEqual(other.get_statistics()["total_prompts"], 2)
+        recent = other.get_recent_prompts()["prompts"]
+        self.assertEqual(
+            sorted(p["text"] for p in recent), ["Busy harbor", "Quiet harbor"]
+        )
+        other.model.close()
+
+    async def test_restore_refreshes_spelling_suggestions(self):
+        self._save_prompt("Beautiful mountain landscape")
+        resp = await self.client.request("GET", "/prompt_manager/search?text=moutnain")
+        self.assertEqual((await resp.json())["suggestions"][0], "mountain")
+
+        await self._restore(["Quiet harbor at dawn"])
+        resp = await self.client.request("GET", "/prompt_manager/search?text=moutnain")
+        self.assertEqual((await resp.json())["suggestions"], [])
+        resp = await self.client.request("GET", "/prompt_manager/search?text=harbr")
+        self.assertEqual((await resp.json())["suggestions"][0], "harbor")
+
+    async def test_restore_refreshes_similar_prompts(self):
+        castle = self._save_prompt("Gothic castle at night")
+        self._save_prompt("Portrait of a cat")
+        dusk = self._save_prompt("Gothic castle at dusk")
+        self.api.db.embed_prompts()
+        resp = await self.client.request(
+            "GET", f"/prompt_manager/prompts/{castle}/similar"
+        )
+        self.assertEqual([p["id"] for p in (await resp.json())["results"]], [dusk])
+
+        await self._restore(
+            ["Portrait of a cat", "Gothic castle at dawn", "Portrait of a dog"]
+        )
+        resp = await self.client.request("GET", "/prompt_manager/prompts/1/similar")
+        results = (await resp.json())["results"]
+        self.assertEqual(
+            [(p["id"], p["text"]) for p in results], [(3, "Portrait of a dog")]
+        )
+
+
+class TestDuplicateCleanup(APITestCase):
+
+    async def test_cleanup_streams_progress(self):
+        keep = self._save_prompt("Dup text")
+        self.api.db.save_prompt(text="dup TEXT", prompt_hash=generate_prompt_hash("x"))
+        resp = await self.client.post("/prompt_manager/cleanup")
+        self.assertEqual(resp.status, 200)
+        self.assertEqual(resp.headers["Content-Type"], "text/event-stream")
+        events = [
+            json.loads(line[len("data: ") :])
+            for line in (await resp.text()).split("\n\n")
+            if line.startswith("data: ")
+        ]
+        self.assertEqual(events[0]["stage"], "scanning")
+        self.assertEqual(events[-1]["type"], "complete")
+        self.assertEqual(events[-1]["duplicates_removed"], 1)
+        self.assertEqual(self.api.db.find_duplicates(), [])
+        self.assertIsNotNone(self.api.db.get_prompt_by_id(keep))
+
+
+class TestCleanupMissingImages(APITestCase):
+
+    async def test_streams_progress_and_result(self):
+        pid = self._save_prompt("Has a missing image")
+        self.api.db.link_image_to_prompt(str(pid), "/nonexistent/dir/image.png")
+        resp = await self.client.post(
+            "/prompt_manager/cleanup_missing_images?workers=2"
+        )
+        self.assertEqual(resp.status, 200)
+        events = [
+            json.loads(line[len("data: ") :])
+            for line in (await resp.text()).split("\n\n")
+            if line.startswith("data: ")
+        ]
+        self.assertEqual(events[-1]["type"], "complete")
+        self.assertEqual(events[-1]["removed"], 1)
+        self.assertEqual(events[-2]["checked"], 1)
+        self.assertEqual(events[-1]["last_id"], events[-2]["last_id"])
+        self.assertEqual(self.api.db.get_prompt_images(str(pid)), [])
+
+    async def test_rejects_bad_resume_point(self):
+        resp = await self.client.post(
+            "/prompt_manager/cleanup_missing_images?after_id=x"
+        )
+        self.assertEqual(resp.status, 400)
+
+
+class TestNearDuplicates(APITestCase):
+
+    async def test_near_duplicates_endpoint(self):
+        text = "portrait of a knight, (armor:{}), castle gate, dusk light, rain, fog"
+        self._save_prompt(text.format("1.2"))
+        self._save_prompt(text.format("1.3"))
+        resp = await self.client.get("/prompt_manager/near_duplicates?threshold=0.6")
+        self.assertEqual(resp.status, 200)
+        data = await resp.json()
+        self.assertTrue(data["success"])
+        self.assertEqual(data["count"], 1)
+        self.assertEqual(len(data["groups"][0]["prompts"]), 2)
+
+    async def test_near_duplicates_rejects_bad_threshold(self):
+        resp = await self.client.get("/prompt_manager/near_duplicates?threshold=2")
+        self.assertEqual(resp.status, 400)
+        resp = await self.client.get("/prompt_manager/near_duplicates?threshold=x")
+        self.assertEqual(resp.status, 400)
+
 
 class TestResponseEnvelope(APITestCase):
     """Verify all responses follow the {success: bool, ...} envelope."""
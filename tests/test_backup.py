@@ -0,0 +1,163 @@
+"""
+Tests for online database backups, backup rotation and the backup scheduler.
+"""
+
+import gzip
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.operations import PromptDatabase
+from utils.background_worker import shared_worker
+from utils.backup_scheduler import BackupScheduler, get_backup_scheduler
+from utils.hashing import generate_prompt_hash
+
+
+class BackupTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.db = PromptDatabase(os.path.join(self.tmp_dir, "prompts.db"))
+
+    def tearDown(self):
+        self.db.model.close()
+        shutil.rmtree(self.tmp_dir)
+
+    def _save(self, text):
+        return self.db.save_prompt(text, prompt_hash=generate_prompt_hash(text))
+
+    def _count(self, path):
+        with sqlite3.connect(path) as conn:
+            self.assertEqual(conn.execute("PRAGMA integrity_check").fetchone()[0], "ok")
+            return conn.execute("SELECT COUNT(*) FROM prompts").fetchone()[0]
+
+
+class TestOnlineBackup(BackupTestCase):
+    def test_backup_is_self_contained_copy(self):
+        for i in range(20):
+            self._save(f"prompt {i}")
+        path = os.path.join(self.tmp_dir, "copy.db")
+        self.assertTrue(self.db.model.backup_database(path, pages=1, sleep=0))
+        self.assertEqual(self._count(path), 20)
+        with sqlite3.connect(path) as conn:
+            mode = conn.execute("PRAGMA journal_mode").fetchone()[0]
+        self.assertEqual(mode, "delete")
+        self.assertFalse(os.path.exists(path + ".partial"))
+
+    def test_backup_during_writes_is_consistent(self):
+        for i in range(200):
+            self._save(f"seed {i} " + "x" * 500)
+        stop = threading.Event()
+
+        def write():
+            i = 0
+            while not stop.is_set():
+                self._save(f"concurrent {i}")
+                i += 1
+
+        writer = threading.Thread(target=write)
+        writer.start()
+        try:
+            path = os.path.join(self.tmp_dir, "live.db")
+            self.assertTrue(self.db.model.backup_database(path, pages=1, sleep=0))
+        finally:
+            stop.set()
+            writer.join()
+        self.assertGreaterEqual(self._count(path), 200)
+
+    def test_failed_backup_leaves_no_partial_file(self):
+        path = os.path.join(self.tmp_dir, "missing_dir", "copy.db")
+        self.assertFalse(self.db.model.backup_database(path))
+        self.assertFalse(os.path.exists(path))
+
+
+class TestBackupRotation(BackupTestCase):
+    def test_create_compressed_backup(self):
+        self._save("compressed")
+        path = self.db.create_backup("manual", compress=True)
+        self.assertTrue(path.endswith(".db.gz"))
+        self.assertEqual(os.path.dirname(path), self.db.backup_dir())
+        restored = os.path.join(self.tmp_dir, "restored.db")
+        with gzip.open(path, "rb") as src, open(restored, "wb") as dst:
+            shutil.copyfileobj(src, dst)
+        self.assertEqual(self._count(restored), 1)
+
+    def test_back_to_back_backups_get_distinct_files(self):
+        paths = [self.db.create_backup("manual", compress=True) for _ in range(3)]
+        self.assertEqual(len(set(paths)), 3)
+        self.assertEqual(
+            sorted(os.listdir(self.db.backup_dir())),
+            sorted(os.path.basename(p) for p in paths),
+        )
+
+    def test_prune_keeps_newest_per_kind(self):
+        os.makedirs(self.db.backup_dir())
+        for day in range(1, 6):
+            for kind in ("auto", "manual"):
+                name = f"prompts_{kind}_2024010{day}_000000.db"
+                open(os.path.join(self.db.backup_dir(), name), "w").close()
+        self.assertEqual(self.db.prune_backups("auto", 2), 3)
+        remaining = sorted(os.listdir(self.db.backup_dir()))
+        self.assertEqual(
+            [n for n in remaining if "_auto_" in n],
+            ["prompts_auto_20240104_000000.db", "prompts_auto_20240105_000000.db"],
+        )
+        self.assertEqual(len([n for n in remaining if "_manual_" in n]), 5)
+
+    def test_create_backup_rotates(self):
+        os.makedirs(self.db.backup_dir())
+        for day in range(1, 4):
+            name = f"prompts_auto_2024010{day}_000000.db"
+            open(os.path.join(self.db.backup_dir(), name), "w").close()
+        path = self.db.create_backup("auto", keep=2)
+        names = sorted(os.listdir(self.db.backup_dir()))
+        self.assertEqual(
+            names, ["prompts_auto_20240103_000000.db", os.path.basename(path)]
+        )
+
+
+class TestBackupScheduler(BackupTestCase):
+    def test_due_immediately_without_backups(self):
+        scheduler = BackupScheduler(self.db)
+        self.assertEqual(scheduler.seconds_until_due(), 0.0)
+        path = scheduler.run_once()
+        self.assertTrue(os.path.basename(path).startswith("prompts_auto_"))
+        # Next backup is one interval (default 24h) after the newest one
+        self.assertGreater(scheduler.seconds_until_due(), 23 * 3600)
+        self.assertIsNone(scheduler.run_once())
+
+    def test_zero_interval_disables(self):
+        scheduler = BackupScheduler(self.db)
+        with patch("utils.backup_scheduler._backup_interval_hours", return_value=0):
+            self.assertIsNone(scheduler.seconds_until_due())
+            self.assertIsNone(scheduler.run_once())
+        self.assertFalse(os.path.exists(self.db.backup_dir()))
+
+    def test_getter_shares_one_instance_per_class(self):
+        scheduler = get_backup_scheduler(self.db)
+        self.assertIs(get_backup_scheduler(None), scheduler)
+        self.assertIs(shared_worker(BackupScheduler, None), scheduler)
+        self.assertFalse(scheduler.is_running)
+
+    def test_thread_runs_and_stops(self):
+        scheduler = BackupScheduler(self.db, startup_delay=0)
+        scheduler.start()
+        try:
+            deadline = time.time() + 5
+            while self.db.latest_backup_time("auto") is None and time.time() < deadline:
+                time.sleep(0.01)
+            self.assertIsNotNone(self.db.latest_backup_time("auto"))
+        finally:
+            scheduler.stop()
+        self.assertFalse(scheduler.is_running)
+
+
+if __name__ == "__main__":
+    unittest.main()
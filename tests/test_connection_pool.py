@@ -0,0 +1,143 @@
+"""
+Tests for the PromptModel reader pool and serialized writer connection.
+"""
+
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.models import PromptModel, WriterConnection
+from database.operations import PromptDatabase
+from utils.hashing import generate_prompt_hash
+
+
+class ConnectionPoolTestCase(unittest.TestCase):
+    def setUp(self):
+        self.temp_db = tempfile.NamedTemporaryFile(delete=False, suffix=".db")
+        self.temp_db.close()
+        self.db = PromptDatabase(self.temp_db.name)
+        self.model = self.db.model
+
+    def tearDown(self):
+        self.model.close()
+        for path in (
+            self.temp_db.name,
+            self.temp_db.name + "-wal",
+            self.temp_db.name + "-shm",
+        ):
+            if os.path.exists(path):
+                os.unlink(path)
+
+    def _save(self, text):
+        return self.db.save_prompt(text, prompt_hash=generate_prompt_hash(text))
+
+
+class TestReaderPool(ConnectionPoolTestCase):
+    def test_reader_is_read_only(self):
+        with self.model.get_read_connection() as conn:
+            with self.assertRaises(sqlite3.OperationalError):
+                conn.execute("INSERT INTO tags (name) VALUES ('x')")
+
+    def test_reader_sees_committed_writes(self):
+        pid = self._save("visible to readers")
+        with self.model.get_read_connection() as conn:
+            row = conn.execute("SELECT text FROM prompts WHERE id = ?", (pid,))
+            self.assertEqual(row.fetchone()["text"], "visible to readers")
+
+    def test_reads_not_blocked_by_writer(self):
+        self._save("existing prompt")
+        writer_holding = threading.Event()
+        release_writer = threading.Event()
+
+        def hold_writer():
+            with self.model.get_connection() as conn:
+                conn.execute("INSERT INTO tags (name) VALUES ('pending')")
+                writer_holding.set()
+                release_writer.wait(5)
+
+        thread = threading.Thread(target=hold_writer)
+        thread.start()
+        try:
+            self.assertTrue(writer_holding.wait(5))
+            results = []
+            reader = threading.Thread(
+                target=lambda: results.append(self.db.get_recent_prompts()["total"])
+            )
+            reader.start()
+            reader.join(2)
+            self.assertFalse(reader.is_alive())
+            self.assertEqual(results, [1])
+        finally:
+            release_writer.set()
+            thread.join()
+
+    def test_pool_is_bounded(self):
+        self._save("pool prompt")
+        barrier = threading.Barrier(8)
+
+        def read():
+            barrier.wait()
+            for _ in range(20):
+                self.db.get_prompt_by_hash(generate_prompt_hash("pool prompt"))
+
+        threads = [threading.Thread(target=read) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertLessEqual(len(self.model._readers), self.model.read_pool_size)
+
+    def test_zero_pool_size_uses_writer(self):
+        model = PromptModel(self.temp_db.name, read_pool_size=0)
+        try:
+            self.assertIsInstance(model.get_read_connection(), WriterConnection)
+        finally:
+            model.close()
+
+
+class TestSerializedWriter(ConnectionPoolTestCase):
+    def test_concurrent_read_modify_write(self):
+        pid = self._save("counter")
+        self.db.update_prompt_rating(pid, 1)
+
+        def bump():
+            for _ in range(50):
+                with self.model.get_connection() as conn:
+                    row = conn.execute(
+                        "SELECT notes FROM prompts WHERE id = ?", (pid,)
+                    ).fetchone()
+                    value = int(row["notes"] or 0) + 1
+                    conn.execute(
+                        "UPDATE prompts SET notes = ? WHERE id = ?", (str(value), pid)
+                    )
+                    conn.commit()
+
+        threads = [threading.Thread(target=bump) for _ in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(self.db.get_prompt_by_id(pid)["notes"], "200")
+
+    def test_writer_is_reentrant(self):
+        with self.model.get_connection() as outer:
+            with self.model.get_connection() as inner:
+                self.assertIs(outer, inner)
+
+    def test_failed_block_rolls_back(self):
+        with self.assertRaises(RuntimeError):
+            with self.model.get_connection() as conn:
+                conn.execute("INSERT INTO tags (name) VALUES ('rolled_back')")
+                raise RuntimeError("boom")
+        with self.model.get_read_connection() as conn:
+            row = conn.execute("SELECT COUNT(*) FROM tags WHERE name = 'rolled_back'")
+            self.assertEqual(row.fetchone()[0], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -6,7 +6,11 @@ search, statistics, image linking, and edge cases using
 an in-memory SQLite database.
 """
 
+import gzip
+import io
+import json
 import os
+import shutil
 import sys
 import tempfile
 import unittest
@@ -184,6 +188,61 @@ class TestTagJunctionTables(DatabaseTestCase):
         counts = {t["name"]: t["count"] for t in result["tags"]}
         self.assertEqual(counts["target"], 3)
 
+    def test_usage_counts_follow_edits(self):
+        p1 = self._save("P1", tags=["a", "b"])
+        self._save("P2", tags=["a"])
+        self._save("P3", tags=["c"])
+        self.db.delete_prompt(p1)
+        self.db.merge_tags(["c"], "a")
+        counts = {t["name"]: t["count"] for t in self.db.get_tags_with_counts()["tags"]}
+        self.assertEqual(counts, {"a": 2})
+        self.assertEqual(self.db.check_consistency(), [])
+
+    def test_tags_with_counts_sorting(self):
+        self._save("P1", tags=["beta", "Alpha"])
+        self._save("P2", tags=["beta"])
+        result = self.db.get_tags_with_counts(sort="count_desc")
+        self.assertEqual([t["name"] for t in result["tags"]], ["beta", "Alpha"])
+        result = self.db.get_tags_with_counts(sort="alpha_asc", search="ALP")
+        self.assertEqual(result["tags"], [{"name": "Alpha", "count": 1}])
+        self.assertEqual(result["total"], 1)
+
+    def test_rebuild_tag_counts_repairs_drift(self):
+        self._save("P1", tags=["drift"])
+        with self.db.model.get_connection() as conn:
+            conn.execute("UPDATE tags SET usage_count = 7 WHERE name = 'drift'")
+            conn.commit()
+        self.assertEqual(len(self.db.check_consistency()), 1)
+        self.assertEqual(self.db.rebuild_tag_counts(), 1)
+        self.assertEqual(self.db.check_consistency(), [])
+        counts = self.db.get_tags_with_counts()["tags"]
+        self.assertEqual(counts, [{"name": "drift", "count": 1}])
+
+    def test_tag_list_follows_rename_merge_and_delete(self):
+        p1 = self._save("P1", tags=["old", "keep"])
+        p2 = self._save("P2", tags=["src"])
+        self.db.rename_tag_all_prompts("old", "renamed")
+        self.assertEqual(
+            sorted(self.db.get_prompt_by_id(p1)["tags"]), ["keep", "renamed"]
+        )
+        self.db.merge_tags(["src"], "keep")
+        self.assertEqual(self.db.get_prompt_by_id(p2)["tags"], ["keep"])
+        self.db.delete_tag_all_prompts("keep")
+        self.assertEqual(self.db.get_prompt_by_id(p1)["tags"], ["renamed"])
+        self.assertEqual(self.db.get_prompt_by_id(p2)["tags"], [])
+        self.assertEqual(self.db.get_untagged_prompts_count(), 1)
+        self.assertEqual(self.db.check_consistency(), [])
+
+    def test_tag_list_drift_is_repaired(self):
+        pid = self._save("P1", tags=["x", "y"])
+        with self.db.model.get_connection() as conn:
+            conn.execute("UPDATE prompts SET tag_list = NULL WHERE id = ?", (pid,))
+            conn.commit()
+        self.assertEqual(len(self.db.check_consistency()), 1)
+        self.db.rebuild_tag_counts()
+        self.assertEqual(self.db.check_consistency(), [])
+        self.assertEqual(sorted(self.db.get_prompt_by_id(pid)["tags"]), ["x", "y"])
+
     def test_bulk_add_tags(self):
         p1 = self._save("P1", tags=["existing"])
         p2 = self._save("P2")
@@ -195,6 +254,35 @@ class TestTagJunctionTables(DatabaseTestCase):
         self.assertIn("existing", prompt1["tags"])
         self.assertIn("bulk1", prompt2["tags"])
 
+    def test_bulk_add_tags_counts_only_modified_prompts(self):
+        p1 = self._save("P1", tags=["bulk1", "bulk2"])
+        p2 = self._save("P2", tags=["bulk1"])
+        p3 = self._save("P3")
+        count = self.db.bulk_add_tags([p1, p2, p3, p3, 99999], ["bulk1", "bulk2"])
+        self.assertEqual(count, 2)
+        self.assertEqual(
+            sorted(self.db.get_prompt_by_id(p2)["tags"]), ["bulk1", "bulk2"]
+        )
+        self.assertEqual(self.db.check_consistency(), [])
+
+    def test_bulk_operations_span_chunks(self):
+        from database.sql_utils import SQL_CHUNK_SIZE
+
+        ids = [self._save(f"Bulk prompt {i}") for i in range(SQL_CHUNK_SIZE + 7)]
+        self.assertEqual(self.db.bulk_add_tags(ids, ["many"]), len(ids))
+        self.assertEqual(self.db.bulk_set_category(ids + [99999], "cat"), len(ids))
+        counts = {t["name"]: t["count"] for t in self.db.get_tags_with_counts()["tags"]}
+        self.assertEqual(counts["many"], len(ids))
+        self.assertEqual(self.db.bulk_delete_prompts(ids + ids[:3]), len(ids))
+        self.assertEqual(self.db.get_recent_prompts()["total"], 0)
+        self.assertEqual(self.db.get_all_tags(), [])
+
+    def test_set_prompt_tags_keeps_unchanged_links(self):
+        pid = self._save("Partial retag", tags=["stay", "go"])
+        self.db.set_prompt_tags(pid, ["stay", "new", "new"])
+        self.assertEqual(sorted(self.db.get_prompt_by_id(pid)["tags"]), ["new", "stay"])
+        self.assertEqual(self.db.check_consistency(), [])
+
     def test_untagged_prompts(self):
         self._save("Tagged", tags=["has_tag"])
         self._save("Untagged1")
@@ -205,6 +293,178 @@ class TestTagJunctionTables(DatabaseTestCase):
         self.assertEqual(len(result["prompts"]), 2)
 
 
+class TestBulkIngest(DatabaseTestCase):
+    """Test bulk_upsert_prompts and bulk_link_images."""
+
+    def _entry(self, text, **extra):
+        return {"text": text, "hash": generate_prompt_hash(text), **extra}
+
+    def test_upsert_dedupes_in_memory_and_against_existing(self):
+        existing_id = self._save("Already stored", category="mine")
+        result = self.db.bulk_upsert_prompts(
+            [
+                self._entry("Already stored", category="scanned", tags=["auto"]),
+                self._entry("  Fresh prompt ", category="scanned", tags=["auto"]),
+                self._entry("fresh prompt", category="other"),
+            ],
+            chunk_size=2,
+        )
+        self.assertEqual(len(result), 2)
+        stored = result[generate_prompt_hash("Already stored")]
+        self.assertEqual(stored, {"id": existing_id, "created": False})
+        fresh = self.db.get_prompt_by_id(
+            result[generate_prompt_hash("fresh prompt")]["id"]
+        )
+        self.assertEqual(fresh["text"], "Fresh prompt")
+        self.assertEqual(fresh["category"], "scanned")
+        self.assertEqual(fresh["tags"], ["auto"])
+        # Existing prompts are not modified
+        self.assertEqual(self.db.get_prompt_by_id(existing_id)["category"], "mine")
+        self.assertEqual(self.db.get_prompt_by_id(existing_id)["tags"], [])
+        self.assertEqual(self.db.check_consistency(), [])
+
+    def test_upsert_rejects_invalid_entries(self):
+        with self.assertRaises(ValueError):
+            self.db.bulk_upsert_prompts([{"text": "  ", "hash": "x"}])
+        with self.assertRaises(ValueError):
+            self.db.bulk_upsert_prompts([{"text": "no hash"}])
+        with self.assertRaises(ValueError):
+            self.db.bulk_upsert_prompts([self._entry("bad", rating=9)])
+
+    def test_link_images_in_chunks(self):
+        pid = self._save("Linked prompt")
+        links = [(pid, f"/out/img_{i}.png") for i in range(5)]
+        links += [
+            (pid, "/out/img_0.png"),
+            (str(pid), "/out/as_string.png"),
+            ("temp_123", "/out/temp.png"),
+            (99999, "/out/orphan.png"),
+            (pid, "/out/meta.png", {"file_info": {"dimensions": [64, 32]}}),
+        ]
+        self.assertEqual(self.db.bulk_link_images(iter(links), chunk_size=3), 7)
+        images = {img["filename"]: img for img in self.db.get_prompt_images(pid)}
+        self.assertEqual(len(images), 7)
+        self.assertEqual(images["meta.png"]["width"], 64)
+        self.assertEqual(images["meta.png"]["height"], 32)
+
+
+class TestStreamingExport(DatabaseTestCase):
+    """Test chunked prompt export."""
+
+    def setUp(self):
+        super().setUp()
+        self.ids = [
+            self._save(f"Export prompt {i}", tags=["t"] if i % 2 else None)
+            for i in range(7)
+        ]
+        self.db.link_image_to_prompt(self.ids[0], "/out/a.png")
+        self.db.link_image_to_prompt(self.ids[0], "/out/b.png")
+
+    def test_iter_export_prompts_chunks_in_id_order(self):
+        chunks = list(self.db.iter_export_prompts(chunk_size=3))
+        self.assertEqual([len(c) for c in chunks], [3, 3, 1])
+        self.assertEqual([p["id"] for c in chunks for p in c], self.ids)
+        self.assertEqual(chunks[0][0]["image_count"], 2)
+        self.assertEqual(chunks[0][1]["tags"], ["t"])
+
+    def test_json_document_matches_single_dump(self):
+        text = "".join(self.db.export_chunks("json", chunk_size=2))
+        data = json.loads(text)
+        self.assertEqual(data["total_prompts"], 7)
+        self.assertEqual([p["id"] for p in data["prompts"]], self.ids)
+
+    def test_export_prompts_to_gzip_file(self):
+        path = self.temp_db.name + ".jsonl.gz"
+        try:
+            self.assertTrue(self.db.export_prompts(path, "jsonl", compress=True))
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                self.assertEqual(len(f.readlines()), 7)
+        finally:
+            os.unlink(path)
+
+    def test_unknown_format(self):
+        with self.assertRaises(ValueError):
+            self.db.export_chunks("xml")
+        self.assertFalse(self.db.export_prompts(self.temp_db.name + ".x", "xml"))
+
+
+class TestStreamingImport(DatabaseTestCase):
+    """Test chunked import of exported prompt files."""
+
+    def _write(self, suffix, content):
+        path = self.temp_db.name + suffix
+        self.addCleanup(os.unlink, path)
+        opener = gzip.open if suffix.endswith(".gz") else open
+        with opener(path, "wt", encoding="utf-8", newline="") as f:
+            f.write(content)
+        return path
+
+    def test_round_trip_all_formats(self):
+        for i in range(5):
+            pid = self._save(f"Round trip {i}", category="c", tags=["t"], rating=3)
+            self.db.link_image_to_prompt(pid, f"/out/{i}.png")
+        for fmt in ("json", "jsonl", "csv"):
+            export = self._write(f".{fmt}.gz", "".join(self.db.export_chunks(fmt)))
+            target = PromptDatabase(self.temp_db.name + f".{fmt}.db")
+            self.addCleanup(os.unlink, self.temp_db.name + f".{fmt}.db")
+            counts = target.import_prompts(export, chunk_size=2)
+            self.assertEqual(counts["imported"], 5, fmt)
+            self.assertEqual(counts["images_linked"], 5, fmt)
+            prompt = target.get_prompt_by_hash(generate_prompt_hash("Round trip 2"))
+            self.assertEqual((prompt["tags"], prompt["rating"]), (["t"], 3), fmt)
+            self.assertEqual(target.check_consistency(), [])
+            target.model.close()
+
+    def test_csv_round_trip_keeps_commas_in_tags(self):
+        pid = self._save("Comma tags", tags=["tag, with comma", "b"])
+        self.db.link_image_to_prompt(pid, "/out/a;b.png")
+        export = self._write(".csv", "".join(self.db.export_chunks("csv")))
+        target = PromptDatabase(self.temp_db.name + ".csv.db")
+        self.addCleanup(os.unlink, self.temp_db.name + ".csv.db")
+        counts = target.import_prompts(export)
+        self.assertEqual(counts["images_linked"], 1)
+        prompt = target.get_prompt_by_hash(generate_prompt_hash("Comma tags"))
+        self.assertEqual(sorted(prompt["tags"]), ["b", "tag, with comma"])
+        images = target.get_prompt_images(prompt["id"])
+        self.assertEqual([img["image_path"] for img in images], ["/out/a;b.png"])
+        target.model.close()
+
+    def test_csv_import_reads_legacy_joined_tags(self):
+        path = self._write(".csv", 'text,tags,images\nOld,"a, b",/x.png; /y.png\n')
+        self.db.import_prompts(path, link_images=True)
+        prompt = self.db.get_prompt_by_hash(generate_prompt_hash("Old"))
+        self.assertEqual(sorted(prompt["tags"]), ["a", "b"])
+
+    def test_json_parser_handles_small_reads(self):
+        from database.operations import _iter_json_records
+
+        records = [{"text": f"p{i}", "notes": "x" * i} for i in range(20)]
+        document = json.dumps({"export_date": "now", "prompts": records}, indent=2)
+        parsed = list(_iter_json_records(io.StringIO(document), read_size=7))
+        self.assertEqual(parsed, records)
+        bare = list(_iter_json_records(io.StringIO(json.dumps(records)), read_size=5))
+        self.assertEqual(bare, records)
+
+    def test_malformed_json_raises(self):
+        path = self._write(".json", '{"prompts": [{"text": "ok"}, {"text": ')
+        with self.assertRaises(ValueError):
+            self.db.import_prompts(path)
+
+    def test_unusable_records_are_skipped(self):
+        path = self._write(
+            ".jsonl",
+            '{"text": "good", "rating": 9}\n[1, 2]\n{"text": ""}\n\n',
+        )
+        counts = self.db.import_prompts(path)
+        self.assertEqual((counts["imported"], counts["skipped"]), (1, 2))
+        prompt = self.db.get_prompt_by_hash(generate_prompt_hash("good"))
+        self.assertIsNone(prompt["rating"])
+
+    def test_unknown_format(self):
+        with self.assertRaises(ValueError):
+            self.db.import_prompts(self.temp_db.name, format="xml")
+
+
 class TestSearch(DatabaseTestCase):
     """Test search and filter operations."""
 
@@ -276,6 +536,117 @@ class TestSearch(DatabaseTestCase):
         self.assertEqual(len(results), 2)
 
 
+class TestFullTextSearch(DatabaseTestCase):
+    """Test the FTS5 index behind text search."""
+
+    def setUp(self):
+        super().setUp()
+        self.assertTrue(self.db.model.fts_enabled)
+        self.p1 = self._save("sunset over the ocean, golden hour")
+        self.p2 = self._save("sunset sunset sunset, dramatic sky")
+        self.p3 = self._save("<lora:detail:0.8> portrait, (masterpiece:1.2)")
+
+    def test_prefix_match(self):
+        results = self.db.search_prompts(text="sun")
+        self.assertEqual({r["id"] for r in results}, {self.p1, self.p2})
+
+    def test_prefix_disabled(self):
+        self.assertEqual(self.db.search_prompts(text="sun", prefix=False), [])
+        results = self.db.search_prompts(text="sunset", prefix=False)
+        self.assertEqual(len(results), 2)
+
+    def test_all_words_must_match(self):
+        results = self.db.search_prompts(text="sunset ocean")
+        self.assertEqual([r["id"] for r in results], [self.p1])
+
+    def test_bm25_ranking(self):
+        results = self.db.search_prompts(text="sunset", rank=True)
+        self.assertEqual(results[0]["id"], self.p2)
+
+    def test_operator_characters_are_literal(self):
+        results = self.db.search_prompts(text="lora:detail (masterpiece")
+        self.assertEqual([r["id"] for r in results], [self.p3])
+
+    def test_index_follows_text_updates(self):
+        self.db.update_prompt_text(self.p1, "misty forest at dawn")
+        self.assertEqual(
+            [r["id"] for r in self.db.search_prompts(text="forest")], [self.p1]
+        )
+        self.assertEqual([r["id"] for r in self.db.search_prompts(text="ocean")], [])
+
+    def test_index_follows_deletes(self):
+        self.db.delete_prompt(self.p2)
+        results = self.db.search_prompts(text="sunset")
+        self.assertEqual([r["id"] for r in results], [self.p1])
+
+    def test_backfill_existing_prompts(self):
+        with self.db.model.get_connection() as conn:
+            conn.execute("DROP TABLE prompts_fts")
+            conn.commit()
+        reopened = PromptDatabase(self.temp_db.name)
+        results = reopened.search_prompts(text="golden")
+        self.assertEqual([r["id"] for r in results], [self.p1])
+
+    def test_like_fallback(self):
+        self.db.model.fts_enabled = False
+        results = self.db.search_prompts(text="unset over")
+        self.assertEqual([r["id"] for r in results], [self.p1])
+
+    def test_search_images_by_prompt(self):
+        self.db.link_image_to_prompt(str(self.p1), "/fake/ocean.png")
+        images = self.db.search_images_by_prompt("golden")
+        self.assertEqual(len(images), 1)
+        self.assertEqual(images[0]["prompt_id"], self.p1)
+
+    def test_substring_match_inside_words(self):
+        self.assertTrue(self.db.model.trigram_enabled)
+        results = self.db.search_prompts(text="unset ov", substring=True)
+        self.assertEqual([r["id"] for r in results], [self.p1])
+        results = self.db.search_prompts(text="ASTERPIEC", substring=True)
+        self.assertEqual([r["id"] for r in results], [self.p3])
+
+    def test_substring_matches_like(self):
+        self._save("100% cotton_shirt")
+        for needle in ("sunset", "et ", "0%", "n_s", "on_sh", "a", "1.2)"):
+            with self.subTest(needle=needle):
+                trigram = self.db.search_prompts(text=needle, substring=True)
+                self.db.model.trigram_enabled = False
+                like = self.db.search_prompts(text=needle, substring=True)
+                self.db.model.trigram_enabled = True
+                self.assertEqual([r["id"] for r in trigram], [r["id"] for r in like])
+
+    def test_trigram_index_follows_writes(self):
+        self.db.update_prompt_text(self.p1, "misty forest at dawn")
+        self.db.delete_prompt(self.p2)
+        self.assertEqual(self.db.search_prompts(text="unset", substring=True), [])
+        results = self.db.search_prompts(text="ist", substring=True)
+        self.assertEqual([r["id"] for r in results], [self.p1])
+
+    def test_trigram_backfill_existing_prompts(self):
+        with self.db.model.get_connection() as conn:
+            conn.execute("DROP TABLE prompts_trigram")
+            conn.commit()
+        reopened = PromptDatabase(self.temp_db.name)
+        self.assertTrue(reopened.model.trigram_enabled)
+        results = reopened.search_prompts(text="olden ho", substring=True)
+        self.assertEqual([r["id"] for r in results], [self.p1])
+
+    def test_suggest_search_terms(self):
+        self._save("cyberpunk city at night")
+        self.assertEqual(self.db.suggest_search_terms("cyberpnuk"), ["cyberpunk"])
+        self.assertEqual(
+            self.db.suggest_search_terms("sunsett citty")[0], "sunset city"
+        )
+        # Known words (as prefixes) need no correction
+        self.assertEqual(self.db.suggest_search_terms("cyber sun"), [])
+        self.assertEqual(self.db.suggest_search_terms("qqqqqq"), [])
+
+    def test_suggestions_follow_new_prompts(self):
+        self.assertEqual(self.db.suggest_search_terms("steampnuk"), [])
+        self._save("steampunk airship")
+        self.assertEqual(self.db.suggest_search_terms("steampnuk"), ["steampunk"])
+
+
 class TestPagination(DatabaseTestCase):
     """Test pagination in get_recent_prompts."""
 
@@ -328,6 +699,69 @@ class TestPagination(DatabaseTestCase):
         self.assertIsInstance(result["has_more"], bool)
 
 
+class TestCursorPagination(DatabaseTestCase):
+    """Test keyset (cursor) pagination."""
+
+    def setUp(self):
+        super().setUp()
+        self.ids = [self._save(f"Cursor prompt {i:02d}", tags=["t"]) for i in range(12)]
+        # Identical timestamps force the id tie-breaker to do its job
+        with self.db.model.get_connection() as conn:
+            conn.execute("UPDATE prompts SET created_at = '2024-01-01T00:00:00'")
+            conn.commit()
+
+    def _walk(self, fetch):
+        seen, cursor = [], None
+        while True:
+            page = fetch(cursor)
+            seen.extend(p["id"] for p in page["prompts"])
+            cursor = page["next_cursor"]
+            if not cursor:
+                self.assertFalse(page["has_more"])
+                return seen
+
+    def test_recent_prompts_cursor_walk(self):
+        seen = self._walk(lambda c: self.db.get_recent_prompts(limit=5, cursor=c))
+        self.assertEqual(seen, sorted(self.ids, reverse=True))
+
+    def test_cursor_matches_offset_pages(self):
+        first = self.db.get_recent_prompts(limit=5)
+        by_cursor = self.db.get_recent_prompts(limit=5, cursor=first["next_cursor"])
+        by_offset = self.db.get_recent_prompts(limit=5, offset=5)
+        self.assertEqual(
+            [p["id"] for p in by_cursor["prompts"]],
+            [p["id"] for p in by_offset["prompts"]],
+        )
+
+    def test_tags_cursor_walk(self):
+        seen = self._walk(
+            lambda c: self.db.get_prompts_by_tags(["t"], limit=4, cursor=c)
+        )
+        self.assertEqual(seen, sorted(self.ids, reverse=True))
+
+    def test_untagged_cursor_walk(self):
+        extra = [self._save(f"Untagged {i}") for i in range(3)]
+        seen = self._walk(lambda c: self.db.get_untagged_prompts(limit=2, cursor=c))
+        self.assertEqual(seen, sorted(extra, reverse=True))
+
+    def test_images_cursor_walk(self):
+        for i in range(7):
+            self.db.link_image_to_prompt(str(self.ids[0]), f"/fake/img{i}.png")
+        seen, cursor = [], None
+        while True:
+            page = self.db.get_images_page(limit=3, cursor=cursor)
+            seen.extend(img["id"] for img in page["images"])
+            cursor = page["next_cursor"]
+            if not cursor:
+                break
+        self.assertEqual(len(seen), 7)
+        self.assertEqual(len(set(seen)), 7)
+
+    def test_invalid_cursor(self):
+        with self.assertRaises(ValueError):
+            self.db.get_recent_prompts(limit=5, cursor="not-a-cursor")
+
+
 class TestStatistics(DatabaseTestCase):
     """Test get_statistics method."""
 
@@ -398,6 +832,224 @@ class TestDuplicateDetection(DatabaseTestCase):
         removed = self.db.cleanup_duplicates()
         self.assertEqual(removed, 0)
 
+    def _save_variant(self, text, key, **kwargs):
+        # Distinct hashes so near-identical texts can coexist
+        return self.db.save_prompt(
+            text=text, prompt_hash=generate_prompt_hash(key), **kwargs
+        )
+
+    def test_normalized_text_maintained_on_insert_and_edit(self):
+        pid = self._save_variant("Mixed Case", "k1")
+        with self.db.model.get_read_connection() as conn:
+            row = conn.execute(
+                "SELECT normalized_text FROM prompts WHERE id = ?", (pid,)
+            ).fetchone()
+        self.assertEqual(row[0], "mixed case")
+        self.db.update_prompt_text(pid, "  Edited TEXT ")
+        with self.db.model.get_read_connection() as conn:
+            row = conn.execute(
+                "SELECT normalized_text FROM prompts WHERE id = ?", (pid,)
+            ).fetchone()
+        self.assertEqual(row[0], "edited text")
+        self.assertNotIn("normalized_text", self.db.get_prompt_by_id(pid))
+
+    def test_find_duplicates_groups_oldest_first(self):
+        first = self._save_variant("Sunset Beach", "a", tags=["warm"])
+        second = self._save_variant("sunset beach", "b")
+        self._save_variant("Other", "c")
+        groups = self.db.find_duplicates()
+        self.assertEqual(len(groups), 1)
+        self.assertEqual(groups[0]["text"], "Sunset Beach")
+        self.assertEqual([p["id"] for p in groups[0]["prompts"]], [first, second])
+        self.assertEqual(groups[0]["prompts"][0]["tags"], ["warm"])
+
+    def test_cleanup_merges_metadata_images_and_tags(self):
+        primary = self._save_variant(
+            "Castle", "a", category="", rating=2, notes="first", tags=["a"]
+        )
+        dup1 = self._save_variant(
+            "castle", "b", category="arch", rating=5, notes=" ", tags=["a", "b"]
+        )
+        dup2 = self._save_variant(
+            "CASTLE", "c", category="other", notes="third", tags=["c"]
+        )
+        self.db.link_image_to_prompt(str(dup1), "/out/one.png")
+        self.db.link_image_to_prompt(str(dup2), "/out/two.png")
+        # Same filename as an image already on the primary: dropped, not moved
+        self.db.link_image_to_prompt(str(primary), "/out/one.png")
+        events = []
+        removed = self.db.cleanup_duplicates(
+            lambda stage, done, total: events.append(stage)
+        )
+        self.assertEqual(removed, 2)
+        self.assertEqual(events[-1], "removing")
+        self.assertIsNone(self.db.get_prompt_by_id(dup1))
+        self.assertIsNone(self.db.get_prompt_by_id(dup2))
+        merged = self.db.get_prompt_by_id(primary)
+        self.assertEqual(merged["category"], "arch")
+        self.assertEqual(merged["rating"], 5)
+        self.assertEqual(merged["notes"], "first | third")
+        self.assertEqual(sorted(merged["tags"]), ["a", "b", "c"])
+        images = self.db.get_prompt_images(str(primary))
+        self.assertEqual(sorted(i["filename"] for i in images), ["one.png", "two.png"])
+        with self.db.model.get_read_connection() as conn:
+            counts = dict(conn.execute("SELECT name, usage_count FROM tags"))
+        self.assertEqual(counts, {"a": 1, "b": 1, "c": 1})
+        self.assertEqual(self.db.find_duplicates(), [])
+
+
+class TestCleanupMissingImages(DatabaseTestCase):
+    """Test directory-batched removal of image rows with missing files."""
+
+    def setUp(self):
+        super().setUp()
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root, True)
+        self.pid = self._save("Prompt with files")
+
+    def _image(self, folder, name, create=True):
+        directory = os.path.join(self.root, folder)
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, name)
+        if create:
+            open(path, "wb").close()
+        self.db.link_image_to_prompt(str(self.pid), path)
+        return path
+
+    def _remaining(self):
+        return sorted(
+            os.path.basename(i["image_path"])
+            for i in self.db.get_prompt_images(str(self.pid))
+        )
+
+    def test_removes_only_missing_files(self):
+        self._image("a", "keep1.png")
+        self._image("a", "gone1.png", create=False)
+        self._image("b", "keep2.png")
+        self._image("c", "gone2.png")
+        shutil.rmtree(os.path.join(self.root, "c"))
+        self.assertEqual(self.db.cleanup_missing_images(), 2)
+        self.assertEqual(self._remaining(), ["keep1.png", "keep2.png"])
+
+    def test_slices_report_progress_and_resume(self):
+        for i in range(5):
+            self._image("a", f"img{i}.png", create=i % 2 == 0)
+        events = []
+        removed = self.db.cleanup_missing_images(
+            lambda checked, total, counts: events.append(counts), slice_size=2
+        )
+        self.assertEqual(removed, 2)
+        self.assertEqual([e["checked"] for e in events], [2, 4, 5])
+        self.assertEqual(events[-1]["total"], 5)
+        # Resuming after the last reported id checks nothing more
+        self.assertEqual(
+            self.db.cleanup_missing_images(after_id=events[-1]["last_id"]), 0
+        )
+
+    def test_resume_skips_earlier_rows(self):
+        self._image("a", "old_missing.png", create=False)
+        first = self.db.get_prompt_images(str(self.pid))[0]["id"]
+        self._image("a", "new_missing.png", create=False)
+        self.assertEqual(self.db.cleanup_missing_images(after_id=first), 1)
+        self.assertEqual(self._remaining(), ["old_missing.png"])
+
+    def test_parallel_directory_listing(self):
+        for folder in "abcdef":
+            self._image(folder, f"keep_{folder}.png")
+            self._image(folder, f"gone_{folder}.png", create=False)
+        self.assertEqual(self.db.cleanup_missing_images(workers=4, slice_size=3), 6)
+        self.assertEqual(
+            self._remaining(), [f"keep_{folder}.png" for folder in "abcdef"]
+        )
+
+
+class TestNearDuplicates(DatabaseTestCase):
+    """Test MinHash/LSH near-duplicate detection."""
+
+    BASE = "(masterpiece:{w}), best quality, castle on a hill, sunset, dramatic clouds"
+
+    def _signature_count(self):
+        with self.db.model.get_read_connection() as conn:
+            return conn.execute("SELECT COUNT(*) FROM prompt_signatures").fetchone()[0]
+
+    def test_save_prompt_stores_signature(self):
+        pid = self._save("a signed prompt")
+        with self.db.model.get_read_connection() as conn:
+            row = conn.execute(
+                "SELECT signature FROM prompt_signatures WHERE prompt_id = ?", (pid,)
+            ).fetchone()
+        self.assertEqual(len(row[0]), 256)
+        self.db.delete_prompt(pid)
+        self.assertEqual(self._signature_count(), 0)
+
+    def test_groups_prompts_differing_by_a_weight(self):
+        first = self._save(self.BASE.format(w="1.2"))
+        second = self._save(self.BASE.format(w="1.3"))
+        self._save("a completely different prompt about a forest")
+        groups = self.db.find_near_duplicates(0.6)
+        self.assertEqual(len(groups), 1)
+        self.assertEqual([p["id"] for p in groups[0]["prompts"]], [first, second])
+        self.assertEqual(groups[0]["prompts"][0]["similarity"], 1.0)
+        self.assertGreaterEqual(groups[0]["similarity"], 0.6)
+        self.assertEqual(self.db.find_near_duplicates(0.95), [])
+
+    def test_text_edit_refreshes_signature(self):
+        pid = self._save(self.BASE.format(w="1.2"))
+        other = self._save("a quiet lake in the morning")
+        self.assertEqual(self.db.find_near_duplicates(0.6), [])
+        self.db.update_prompt_text(other, self.BASE.format(w="1.4"))
+        groups = self.db.find_near_duplicates(0.6)
+        self.assertEqual([p["id"] for p in groups[0]["prompts"]], [pid, other])
+
+    def test_missing_signatures_are_backfilled(self):
+        self._save(self.BASE.format(w="1.2"))
+        self._save(self.BASE.format(w="1.3"))
+        with self.db.model.get_connection() as conn:
+            conn.execute("DELETE FROM prompt_signatures")
+            conn.commit()
+        self.assertEqual(len(self.db.find_near_duplicates(0.6)), 1)
+        self.assertEqual(self._signature_count(), 2)
+
+    def test_bulk_upsert_stores_signatures(self):
+        self.db.bulk_upsert_prompts(
+            [
+                {"text": f"prompt {i}", "hash": generate_prompt_hash(str(i))}
+                for i in range(3)
+            ]
+        )
+        self.assertEqual(self._signature_count(), 3)
+
+    def test_find_duplicates_with_near_threshold(self):
+        self._save(self.BASE.format(w="1.2"))
+        self._save(self.BASE.format(w="1.3"))
+        self.assertEqual(self.db.find_duplicates(), [])
+        groups = self.db.find_duplicates(near_threshold=0.6)
+        self.assertEqual([g["kind"] for g in groups], ["near"])
+
+    def test_find_duplicates_keeps_exact_groups_with_near_threshold(self):
+        exact = self.BASE.format(w="1.2")
+        self._save(exact)
+        self.db.bulk_upsert_prompts(
+            [{"text": exact.upper(), "hash": generate_prompt_hash("upper")}]
+        )
+        self._save(self.BASE.format(w="1.3"))
+        self._save("a completely different prompt about the sea")
+        groups = self.db.find_duplicates(near_threshold=0.6)
+        self.assertEqual([g["kind"] for g in groups], ["exact", "near"])
+        self.assertEqual(len(groups[0]["prompts"]), 2)
+        self.assertEqual(len(groups[1]["prompts"]), 3)
+        # An exact pair alone is not reported a second time as a near group
+        self.assertEqual(
+            [g["kind"] for g in self.db.find_duplicates(near_threshold=0.99)],
+            ["exact"],
+        )
+
+    def test_invalid_threshold(self):
+        with self.assertRaises(ValueError):
+            self.db.find_near_duplicates(0)
+        with self.assertRaises(ValueError):
+            self.db.find_near_duplicates(1.5)
+
 
 class TestImageOperations(DatabaseTestCase):
     """Test image linking and retrieval."""
@@ -431,6 +1083,357 @@ class TestImageOperations(DatabaseTestCase):
         self.assertEqual(len(images), 0)
 
 
+class TestImageBlobs(DatabaseTestCase):
+    """Test deduplicated, compressed storage of image workflow metadata."""
+
+    WORKFLOW = {"nodes": [{"id": i, "type": "KSampler"} for i in range(50)]}
+
+    def _link_batch(self, pid, count, workflow=None):
+        metadata = {"workflow": workflow or self.WORKFLOW, "prompt": {"1": {}}}
+        self.db.bulk_link_images(
+            (pid, f"/out/batch/img_{i}.png", metadata) for i in range(count)
+        )
+
+    def _blob_count(self):
+        with self.db.model.get_read_connection() as conn:
+            return conn.execute("SELECT COUNT(*) FROM blobs").fetchone()[0]
+
+    def test_identical_metadata_stored_once(self):
+        pid = self._save("batch")
+        self._link_batch(pid, 64)
+        self.db.link_image_to_prompt(
+            str(pid), "/out/single.png", {"workflow": self.WORKFLOW, "prompt": {}}
+        )
+        # One workflow, two prompt JSONs ("{...}" and "{}"), no parameters blob
+        self.assertEqual(self._blob_count(), 3)
+
+        images = self.db.get_prompt_images(str(pid))
+        self.assertEqual(len(images), 65)
+        self.assertEqual(images[0]["workflow_data"], self.WORKFLOW)
+        self.assertNotIn("workflow_blob_id", images[0])
+        # Rows sharing a blob get their own parsed objects
+        self.assertIsNot(images[0]["workflow_data"], images[1]["workflow_data"])
+        images[0]["workflow_data"]["nodes"].clear()
+        self.assertEqual(images[1]["workflow_data"], self.WORKFLOW)
+
+        info = self.db.get_image_prompt_info("/out/batch/img_3.png")
+        self.assertEqual(info["workflow_data"], self.WORKFLOW)
+        self.assertEqual(info["prompt_metadata"], {"1": {}})
+
+    def test_unused_blobs_are_removed(self):
+        keep = self._save("keep")
+        gone = self._save("gone")
+        self._link_batch(keep, 2)
+        self._link_batch(gone, 2, workflow={"nodes": []})
+        self.assertEqual(self._blob_count(), 3)
+        self.db.delete_prompt(gone)
+        self.assertEqual(self._blob_count(), 2)
+        self.assertEqual(
+            self.db.get_prompt_images(str(keep))[0]["workflow_data"], self.WORKFLOW
+        )
+
+    def test_relinking_an_image_stores_no_blobs(self):
+        pid = self._save("relink")
+        self.db.link_image_to_prompt(str(pid), "/x/a.png", {"workflow": {"v": 1}})
+        self.assertEqual(
+            self.db.link_image_to_prompt(str(pid), "/x/a.png", {"workflow": {"v": 2}}),
+            0,
+        )
+        self._link_batch(pid, 2)
+        self._link_batch(pid, 2, workflow={"nodes": []})
+        # {"v": 1} and "{}" from the first link, WORKFLOW and {"1": {}} from
+        # the batch; the ignored re-links add nothing
+        self.assertEqual(self._blob_count(), 4)
+        images = self.db.get_prompt_images(str(pid))
+        self.assertEqual(len(images), 3)
+        self.assertEqual(
+            {json.dumps(img["workflow_data"]) for img in images},
+            {json.dumps({"v": 1}), json.dumps(self.WORKFLOW)},
+        )
+
+    def test_empty_info_fields_stay_none(self):
+        pid = self._save("no metadata")
+        with self.db.model.get_connection() as conn:
+            conn.execute(
+                "INSERT INTO generated_images (prompt_id, image_path, filename) "
+                "VALUES (?, '/out/bare.png', 'bare.png')",
+                (pid,),
+            )
+            conn.commit()
+        info = self.db.get_image_prompt_info("/out/bare.png")
+        self.assertIsNone(info["workflow_data"])
+        self.assertIsNone(info["prompt_metadata"])
+        image = self.db.get_prompt_images(str(pid))[0]
+        self.assertEqual(image["workflow_data"], {})
+
+    def test_migration_moves_inline_json(self):
+        pid = self._save("legacy")
+        workflow = json.dumps(self.WORKFLOW)
+        with self.db.model.get_connection() as conn:
+            conn.execute("DROP TRIGGER generated_images_blob_delete")
+            for column in ("workflow_blob", "metadata_blob"):
+                conn.execute(f"DROP INDEX idx_images_{column}")
+                conn.execute(f"ALTER TABLE generated_images DROP COLUMN {column}_id")
+            conn.executemany(
+                "INSERT INTO generated_images (prompt_id, image_path, filename, "
+                "workflow_data, prompt_metadata) VALUES (?, ?, ?, ?, '{}')",
+                [(pid, f"/out/{i}.png", f"{i}.png", workflow) for i in range(10)],
+            )
+            conn.execute("PRAGMA user_version = 9")
+            conn.commit()
+        self.db.model.close()
+
+        self.db = PromptDatabase(self.temp_db.name)
+        self.assertEqual(self._blob_count(), 2)
+        with self.db.model.get_read_connection() as conn:
+            inline = conn.execute(
+                "SELECT COUNT(*) FROM generated_images WHERE workflow_data IS NOT NULL"
+            ).fetchone()[0]
+        self.assertEqual(inline, 0)
+        images = self.db.get_prompt_images(str(pid))
+        self.assertEqual(len(images), 10)
+        self.assertEqual(images[0]["workflow_data"], self.WORKFLOW)
+        self.assertEqual(images[0]["prompt_metadata"], {})
+
+
+class TestImageFieldProjection(DatabaseTestCase):
+    """Test selecting which image fields the list methods return."""
+
+    def setUp(self):
+        super().setUp()
+        self.pid = self._save("projected")
+        self.db.link_image_to_prompt(
+            str(self.pid), "/out/a.png", {"workflow": {"nodes": [1]}, "prompt": {}}
+        )
+
+    def test_resolve_image_fields(self):
+        from database.operations import IMAGE_SUMMARY_FIELDS, resolve_image_fields
+
+        self.assertIsNone(resolve_image_fields())
+        self.assertEqual(resolve_image_fields(None, False), IMAGE_SUMMARY_FIELDS)
+        self.assertEqual(
+            resolve_image_fields("width, image_path,width"), ("image_path", "width")
+        )
+        self.assertEqual(
+            resolve_image_fields("image_path,workflow_data", False), ("image_path",)
+        )
+        with self.assertRaises(ValueError):
+            resolve_image_fields("image_path,dir_id")
+
+    def test_list_methods_honor_fields(self):
+        fields = ("image_path", "width")
+        expected = {"id", "image_path", "width"}
+        images = self.db.get_prompt_images(str(self.pid), fields)
+        self.assertEqual(set(images[0]), expected)
+        for images in (
+            self.db.get_recent_images(10, fields),
+            self.db.search_images_by_prompt("projected", fields),
+        ):
+            self.assertEqual(set(images[0]), expected | {"prompt_text"})
+
+        page = self.db.get_images_page(limit=1, fields=fields)
+        image = page["images"][0]
+        self.assertNotIn("workflow_data", image)
+        self.assertEqual(image["prompt_tags"], [])
+        self.assertIn("generation_time", image)
+
+    def test_default_returns_metadata_without_internal_columns(self):
+        image = self.db.get_prompt_images(str(self.pid))[0]
+        self.assertEqual(image["workflow_data"], {"nodes": [1]})
+        for column in ("dir_id", "canonical_path", "workflow_blob_id"):
+            self.assertNotIn(column, image)
+        self.assertEqual(self.db.get_image_by_id(image["id"]), image)
+
+
+class TestImagePromptInfo(DatabaseTestCase):
+    """Test resolving gallery image paths to their prompts."""
+
+    def _link(self, text, path):
+        pid = self._save(text, tags=["t"])
+        self.db.link_image_to_prompt(prompt_id=str(pid), image_path=path)
+        return pid
+
+    def test_exact_path(self):
+        pid = self._link("exact", "/out/a/img.png")
+        self._link("other", "/out/b/img.png")
+        info = self.db.get_image_prompt_info("/out/a/img.png")
+        self.assertEqual(info["prompt_id"], pid)
+        self.assertEqual(info["tags"], ["t"])
+
+    def test_equivalent_spellings_match_exactly(self):
+        pid = self._link("exact", "/out/a/img.png")
+        self._link("other", "/moved/a/img.png")
+        self.assertEqual(
+            self.db.get_image_prompt_info("/out//a/./img.png")["prompt_id"], pid
+        )
+
+    def test_filename_fallback_prefers_closest_directory(self):
+        self._link("day one", "/old/output/2026-01-01/img.png")
+        pid = self._link("day two", "/old/output/2026-01-02/img.png")
+        info = self.db.get_image_prompt_info("/new/output/2026-01-02/img.png")
+        self.assertEqual(info["prompt_id"], pid)
+
+    def test_filename_fallback_needs_whole_name(self):
+        self._link("suffix", "/out/xa.png")
+        self.assertIsNone(self.db.get_image_prompt_info("/elsewhere/a.png"))
+
+    def test_batch(self):
+        a = self._link("a", "/out/a.png")
+        b = self._link("b", "/out/b.png")
+        result = self.db.get_images_prompt_info(
+            ["/out/a.png", "/moved/b.png", "/out/missing.png"]
+        )
+        self.assertEqual(result["/out/a.png"]["prompt_id"], a)
+        self.assertEqual(result["/moved/b.png"]["prompt_id"], b)
+        self.assertIsNone(result["/out/missing.png"])
+        self.assertEqual(self.db.get_images_prompt_info([]), {})
+
+    def test_lookups_use_indexes(self):
+        with self.db.model.get_read_connection() as conn:
+            for column in ("canonical_path", "filename"):
+                plan = " ".join(
+                    row[3]
+                    for row in conn.execute(
+                        "EXPLAIN QUERY PLAN SELECT id FROM generated_images "
+                        f"WHERE {column} IN (?, ?)",
+                        ("a", "b"),
+                    )
+                )
+                self.assertIn(f"INDEX idx_images_{column}", plan)
+                self.assertNotIn("SCAN", plan)
+
+
+class TestSchemaMigrations(DatabaseTestCase):
+    """Test the user_version based migration runner."""
+
+    LEGACY_SCHEMA = """
+        CREATE TABLE prompts (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            text TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            category TEXT,
+            tags TEXT,
+            rating INTEGER,
+            notes TEXT,
+            hash TEXT UNIQUE,
+            workflow_name TEXT
+        );
+        CREATE TABLE generated_images (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            prompt_id TEXT NOT NULL,
+            image_path TEXT NOT NULL,
+            filename TEXT NOT NULL,
+            generation_time TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            file_size INTEGER,
+            width INTEGER,
+            height INTEGER,
+            format TEXT,
+            workflow_data TEXT,
+            prompt_metadata TEXT,
+            parameters TEXT,
+            FOREIGN KEY (prompt_id) REFERENCES prompts(id) ON DELETE CASCADE
+        );
+        INSERT INTO prompts (id, text, tags, hash, workflow_name)
+        VALUES (1, 'legacy castle', '["old", "castle"]', 'h1', 'wf');
+        INSERT INTO generated_images (prompt_id, image_path, filename, workflow_data)
+        VALUES ('1', '/out/legacy/a.png', 'a.png', '{"nodes": []}'),
+               ('1', '/out/legacy/a.png', 'a.png', '{"nodes": []}');
+    """
+
+    def _user_version(self):
+        with self.db.model.get_read_connection() as conn:
+            return conn.execute("PRAGMA user_version").fetchone()[0]
+
+    def _legacy_database(self):
+        self.db.model.close()
+        self.tearDown()
+        import sqlite3
+
+        conn = sqlite3.connect(self.temp_db.name)
+        conn.executescript(self.LEGACY_SCHEMA)
+        conn.close()
+
+    def test_new_database_starts_at_latest_version(self):
+        from database.models import SCHEMA_VERSION
+
+        self.assertEqual(self._user_version(), SCHEMA_VERSION)
+        self.assertEqual(self.db.model.migrate_database(), 0)
+
+    def test_up_to_date_database_skips_schema_setup(self):
+        from unittest.mock import patch
+
+        from database.models import PromptModel
+
+        self.db.model.close()
+        with patch.object(PromptModel, "_create_tables") as create_tables:
+            reopened = PromptDatabase(self.temp_db.name)
+        create_tables.assert_not_called()
+        self.assertTrue(reopened.model.fts_enabled)
+        reopened.model.close()
+
+    def test_legacy_database_is_migrated(self):
+        from database.models import MIGRATIONS, SCHEMA_VERSION
+
+        self._legacy_database()
+        with self.assertLogs("prompt_manager.database.models", "INFO") as logs:
+            self.db = PromptDatabase(self.temp_db.name)
+        self.assertTrue(
+            any(f"{len(MIGRATIONS)}/{len(MIGRATIONS)}" in line for line in logs.output)
+        )
+        self.assertEqual(self._user_version(), SCHEMA_VERSION)
+
+        prompt = self.db.get_prompt_by_id(1)
+        self.assertEqual(sorted(prompt["tags"]), ["castle", "old"])
+        self.assertNotIn("workflow_name", prompt)
+        # Rebuilding prompts must not cascade-delete the linked images
+        images = self.db.get_prompt_images("1")
+        self.assertEqual(len(images), 1)
+        self.assertEqual(images[0]["workflow_data"], {"nodes": []})
+        self.assertEqual(self.db.search_prompts(folder="legacy")[0]["id"], 1)
+        self.assertEqual(self.db.search_prompts(text="castle")[0]["id"], 1)
+        results = self.db.search_prompts(text="gacy cas", substring=True)
+        self.assertEqual([r["id"] for r in results], [1])
+        with self.db.model.get_read_connection() as conn:
+            indexes = {
+                row[0]
+                for row in conn.execute(
+                    "SELECT name FROM sqlite_master WHERE type = 'index'"
+                )
+            }
+        self.assertIn("idx_images_prompt_time", indexes)
+        self.assertNotIn("idx_prompt_images", indexes)
+
+    def test_failed_migration_rolls_back(self):
+        from unittest.mock import patch
+
+        from database.models import PromptModel
+
+        self._legacy_database()
+        with patch.object(
+            PromptModel,
+            "_migrate_json_tags_to_junction",
+            side_effect=RuntimeError("boom"),
+        ):
+            with self.assertLogs("prompt_manager.database.models", "ERROR"):
+                with self.assertRaises(RuntimeError):
+                    PromptDatabase(self.temp_db.name)
+
+        import sqlite3
+
+        conn = sqlite3.connect(self.temp_db.name)
+        try:
+            self.assertEqual(conn.execute("PRAGMA user_version").fetchone()[0], 3)
+            tags = conn.execute("SELECT COUNT(*) FROM prompt_tags").fetchone()[0]
+        finally:
+            conn.close()
+        self.assertEqual(tags, 0)
+
+        # The next start resumes at the failed migration
+        self.db = PromptDatabase(self.temp_db.name)
+        self.assertEqual(sorted(self.db.get_prompt_by_id(1)["tags"]), ["castle", "old"])
+
+
 class TestEdgeCases(DatabaseTestCase):
     """Test edge cases and boundary conditions."""
 
@@ -10,6 +10,7 @@ Verifies that:
 import asyncio
 import json
 import os
+import shutil
 import sys
 import tempfile
 import types
@@ -149,26 +150,43 @@ class TestAdminEndpointsUseConfigPath(unittest.TestCase):
         )
 
     def test_backup_uses_model_db_path(self):
-        """backup_database should read from self.db.model.db_path."""
+        """backup_database should back up self.db.model.db_path."""
         if "server" not in sys.modules:
             sys.modules["server"] = MagicMock()
 
-        from py.api.admin import AdminRoutesMixin
+        from aiohttp import web
 
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".db") as f:
-            db_file = f.name
-            f.write(b"SQLite format 3\x00test data for backup")
+        from database.operations import PromptDatabase
+        from py.api.admin import AdminRoutesMixin
 
+        tmp_dir = tempfile.mkdtemp()
+        db_file = os.path.join(tmp_dir, "custom.db")
         try:
+            db = PromptDatabase(db_file)
+            db.save_prompt("backed up", prompt_hash="h1")
+
+            async def run_in_executor(func, *args, **kwargs):
+                return func(*args, **kwargs)
+
             stub = self._make_api_stub(db_file)
-            result = self._run_async(
-                AdminRoutesMixin.backup_database(stub, MagicMock())
-            )
+            stub.db = db
+            stub._run_in_executor = run_in_executor
+            request = MagicMock()
+            request.query = {}
+            result = self._run_async(AdminRoutesMixin.backup_database(stub, request))
+
+            self.assertIsInstance(result, web.FileResponse)
+            backup_path = str(result._path)
+            self.assertEqual(os.path.dirname(backup_path), db.backup_dir())
+            self.assertTrue(backup_path.startswith(os.path.join(tmp_dir, "backups")))
+            import sqlite3
 
-            self.assertEqual(result.content_type, "application/octet-stream")
-            self.assertGreater(len(result.body), 0)
+            with sqlite3.connect(backup_path) as conn:
+                row = conn.execute("SELECT text FROM prompts").fetchone()
+            self.assertEqual(row[0], "backed up")
+            db.model.close()
         finally:
-            os.unlink(db_file)
+            shutil.rmtree(tmp_dir)
 
     def test_backup_reports_missing_custom_path(self):
         """backup_database should return 404 when configured path doesn't exist."""
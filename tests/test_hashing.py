@@ -1,9 +1,10 @@
 """
 Tests for hashing utilities.
 
-Tests generate_content_hash and is_duplicate_prompt which are
-currently untested. generate_prompt_hash is covered in test_basic.py
-but we add edge cases here.
+Tests generate_content_hash, is_duplicate_prompt, the MinHash helpers
+used for near-duplicate detection and the term vectors used for similarity
+search. generate_prompt_hash is covered in
+test_basic.py but we add edge cases here.
 """
 
 import os
@@ -13,9 +14,18 @@ import unittest
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from utils.hashing import (
+    LSH_BAND_BYTES,
+    MINHASH_PERMUTATIONS,
     generate_prompt_hash,
     generate_content_hash,
     is_duplicate_prompt,
+    minhash_signature,
+    pack_signature,
+    prompt_shingles,
+    shingle_similarity,
+    term_vector,
+    pack_term_vector,
+    unpack_term_vector,
 )
 
 
@@ -109,9 +119,16 @@ class TestIsDuplicatePrompt(unittest.TestCase):
         self.assertFalse(is_duplicate_prompt("text A", "text B"))
 
     def test_threshold_parameter_accepted(self):
-        # threshold is unused but should not cause errors
+        # Exact matches are duplicates at any threshold
         self.assertTrue(is_duplicate_prompt("same", "same", threshold=0.5))
 
+    def test_near_duplicates_within_threshold(self):
+        a = "(masterpiece:1.2), best quality, castle on a hill, sunset, clouds"
+        b = "(masterpiece:1.3), best quality, castle on a hill, sunset, clouds"
+        self.assertFalse(is_duplicate_prompt(a, b))
+        self.assertTrue(is_duplicate_prompt(a, b, threshold=0.6))
+        self.assertFalse(is_duplicate_prompt(a, b, threshold=1.0))
+
     def test_empty_strings_are_duplicates(self):
         self.assertTrue(is_duplicate_prompt("", ""))
 
@@ -120,6 +137,65 @@ class TestIsDuplicatePrompt(unittest.TestCase):
         self.assertFalse(is_duplicate_prompt("日本語", "中文"))
 
 
+class TestMinHash(unittest.TestCase):
+    """Test shingling and MinHash signatures."""
+
+    def test_shingles_ignore_case_and_punctuation(self):
+        self.assertEqual(prompt_shingles("Red, Fox (1.2)"), {"red fox", "fox 1.2"})
+        self.assertEqual(prompt_shingles("Solo"), {"solo"})
+        self.assertEqual(prompt_shingles("!!!"), set())
+
+    def test_shingle_similarity(self):
+        self.assertEqual(shingle_similarity("a b c", "A, b c"), 1.0)
+        self.assertEqual(shingle_similarity("a b", "c d"), 0.0)
+        self.assertAlmostEqual(shingle_similarity("a b c", "a b d"), 1 / 3)
+
+    def test_signature_is_deterministic(self):
+        sig = minhash_signature("golden hour portrait")
+        self.assertEqual(len(sig), MINHASH_PERMUTATIONS)
+        self.assertEqual(sig, minhash_signature("Golden hour, portrait"))
+        self.assertEqual(minhash_signature("..."), [])
+
+    def test_signature_agreement_estimates_similarity(self):
+        words = [f"word{i}" for i in range(60)]
+        a = " ".join(words)
+        b = " ".join(words[:50] + [f"other{i}" for i in range(10)])
+        sa, sb = minhash_signature(a), minhash_signature(b)
+        estimate = sum(x == y for x, y in zip(sa, sb)) / len(sa)
+        self.assertAlmostEqual(estimate, shingle_similarity(a, b), delta=0.2)
+
+    def test_packed_bands(self):
+        packed = pack_signature(minhash_signature("a b c d"))
+        self.assertEqual(len(packed), MINHASH_PERMUTATIONS * 4)
+        self.assertEqual(len(packed) % LSH_BAND_BYTES, 0)
+
+
+class TestTermVector(unittest.TestCase):
+    """Hashed word and word-pair vectors for similarity search."""
+
+    def test_words_and_pairs(self):
+        vector = term_vector("Red castle, red CASTLE")
+        # red, castle, "red castle" (twice) and "castle red"
+        self.assertEqual(len(vector), 4)
+        self.assertEqual(sorted(vector.values()).count(1.0), 1)
+
+    def test_numbers_are_ignored(self):
+        self.assertEqual(
+            term_vector("castle seed 12345 (castle:1.2)"),
+            term_vector("castle seed 999 (castle)"),
+        )
+        self.assertEqual(term_vector("1234 5.5"), {})
+
+    def test_pack_round_trip(self):
+        vector = term_vector("neon city at night, neon rain")
+        buckets, weights = pack_term_vector(vector)
+        self.assertEqual(len(buckets), 4 * len(vector))
+        unpacked = unpack_term_vector(buckets, weights)
+        self.assertEqual(unpacked.keys(), vector.keys())
+        for bucket, weight in vector.items():
+            self.assertAlmostEqual(unpacked[bucket], weight, places=6)
+
+
 class TestGeneratePromptHashEdgeCases(unittest.TestCase):
     """Additional edge cases for generate_prompt_hash."""
 
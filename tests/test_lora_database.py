@@ -226,6 +226,136 @@ class TestGetPromptSubfolders(LoraDBTestCase):
         self.assertEqual(folders, sorted(folders))
 
 
+class TestImageDirectoryIndex(LoraDBTestCase):
+    """Test the image_dirs index behind folder filters and subfolders."""
+
+    def _folder_texts(self, folder):
+        return {r["text"] for r in self.db.search_prompts(folder=folder)}
+
+    def test_nested_folder_matches_descendants(self):
+        self._link_image(self._save("day"), "/output/2026/08-Aug/06/a.png")
+        self._link_image(self._save("month"), "/output/2026/08-Aug/b.png")
+        self._link_image(self._save("other"), "/output/2026/08-Augx/c.png")
+
+        self.assertEqual(self._folder_texts("2026/08-Aug"), {"day", "month"})
+        self.assertEqual(self._folder_texts("08-Aug/06"), {"day"})
+        self.assertEqual(self._folder_texts("/2026/"), {"day", "month", "other"})
+
+    def test_partial_segment_does_not_match(self):
+        self._link_image(self._save("landscape"), "/output/landscapes/a.png")
+        self.assertEqual(self._folder_texts("landscape"), set())
+        self.assertEqual(self._folder_texts("scapes"), set())
+
+    def test_windows_paths_and_case(self):
+        self._link_image(self._save("win"), "C:\\Out\\Portraits\\a.png")
+        self.assertEqual(self._folder_texts("portraits"), {"win"})
+        self.assertEqual(self._folder_texts("out\\portraits"), {"win"})
+        self.assertEqual(
+            self.db.get_prompt_subfolders(root_dirs=["C:\\Out"]), ["Portraits"]
+        )
+
+    def test_rows_inserted_directly_are_indexed(self):
+        pid = self._save("raw")
+        with self.db.model.get_connection() as conn:
+            conn.execute(
+                "INSERT INTO generated_images (prompt_id, image_path, filename) "
+                "VALUES (?, '/output/raw/a.png', 'a.png')",
+                (pid,),
+            )
+            conn.commit()
+        self.assertEqual(self._folder_texts("raw"), {"raw"})
+        self.assertEqual(self.db.get_prompt_subfolders(), ["/output/raw"])
+
+    def test_path_change_moves_image(self):
+        pid = self._save("moved")
+        self._link_image(pid, "/output/old/a.png")
+        with self.db.model.get_connection() as conn:
+            conn.execute("UPDATE generated_images SET image_path = '/output/new/a.png'")
+            conn.commit()
+        self.assertEqual(self._folder_texts("old"), set())
+        self.assertEqual(self._folder_texts("new"), {"moved"})
+        self.assertEqual(self.db.get_prompt_subfolders(), ["/output/new"])
+
+    def test_deleted_images_drop_their_directory(self):
+        keep = self._save("keep")
+        gone = self._save("gone")
+        self._link_image(keep, "/output/keep/a.png")
+        self._link_image(gone, "/output/gone/b.png")
+        self.db.delete_prompt(gone)
+
+        self.assertEqual(self.db.get_prompt_subfolders(), ["/output/keep"])
+        with self.db.model.get_read_connection() as conn:
+            suffixes = {
+                r[0] for r in conn.execute("SELECT suffix FROM image_dir_suffixes")
+            }
+        self.assertEqual(suffixes, {"output/keep", "keep"})
+
+    def test_first_matching_root_wins(self):
+        self._link_image(self._save("p"), "/output/nested/deep/a.png")
+        self._link_image(self._save("q"), "/elsewhere/b.png")
+
+        folders = self.db.get_prompt_subfolders(
+            root_dirs=["/output/nested/", "/output"]
+        )
+        self.assertEqual(folders, ["/elsewhere", "deep"])
+
+    def test_bulk_link_indexes_directories(self):
+        pid = self._save("bulk")
+        linked = self.db.bulk_link_images(
+            [(pid, f"/output/batch_{i % 2}/img_{i}.png") for i in range(4)]
+        )
+        self.assertEqual(linked, 4)
+        with self.db.model.get_read_connection() as conn:
+            missing = conn.execute(
+                "SELECT COUNT(*) FROM generated_images WHERE dir_id IS NULL"
+            ).fetchone()[0]
+        self.assertEqual(missing, 0)
+        self.assertEqual(
+            self.db.get_prompt_subfolders(root_dirs=["/output"]),
+            ["batch_0", "batch_1"],
+        )
+
+    def test_migration_backfills_existing_images(self):
+        pid = self._save("legacy")
+        self._link_image(pid, "/output/legacy/a.png")
+        with self.db.model.get_connection() as conn:
+            conn.execute("DROP INDEX idx_image_dir")
+            for trigger in ("stale", "delete", "update"):
+                conn.execute(f"DROP TRIGGER generated_images_dir_{trigger}")
+            conn.execute("ALTER TABLE generated_images DROP COLUMN dir_id")
+            conn.execute("DELETE FROM image_dir_suffixes")
+            conn.execute("DELETE FROM image_dirs")
+            conn.execute("PRAGMA user_version = 8")
+            conn.commit()
+        self.db.model.close()
+
+        self.db = PromptDatabase(self.temp_db.name)
+        with self.db.model.get_read_connection() as conn:
+            missing = conn.execute(
+                "SELECT COUNT(*) FROM generated_images WHERE dir_id IS NULL"
+            ).fetchone()[0]
+        self.assertEqual(missing, 0)
+        self.assertEqual(self._folder_texts("legacy"), {"legacy"})
+
+    def test_folder_filter_uses_indexes(self):
+        self._link_image(self._save("p"), "/output/a/img.png")
+        sql = (
+            "SELECT dir_id FROM image_dir_suffixes "
+            "WHERE suffix = ? OR (suffix >= ? AND suffix < ?)"
+        )
+        with self.db.model.get_read_connection() as conn:
+            plan = " ".join(
+                row[3]
+                for row in conn.execute(
+                    f"EXPLAIN QUERY PLAN SELECT prompt_id FROM generated_images "
+                    f"WHERE dir_id IN ({sql})",
+                    ("a", "a/", "a0"),
+                )
+            )
+        self.assertIn("COVERING INDEX idx_image_dir", plan)
+        self.assertNotIn("SCAN", plan)
+
+
 # ── LoRA prompt workflow ──────────────────────────────────────────────
 
 
@@ -9,12 +9,15 @@ Regression tests for: https://github.com/ComfyAssets/ComfyUI_PromptManager/issue
 """
 
 import os
+import shutil
 import sys
-import time
+import tempfile
 import unittest
+from unittest.mock import patch
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+from database.operations import PromptDatabase
 from prompt_manager import PromptManager
 from prompt_manager_text import PromptManagerText
 from prompt_search_list import PromptSearchList
@@ -105,18 +108,37 @@ class TestIsChangedPromptManagerText(unittest.TestCase):
 
 
 class TestIsChangedPromptSearchList(unittest.TestCase):
-    """IS_CHANGED for PromptSearchList should always return a unique value
-    so the node re-runs every time (database contents may have changed)."""
+    """IS_CHANGED for PromptSearchList should return the search index
+    generation, so the node re-runs only when stored prompts change."""
 
-    def test_returns_different_value_on_successive_calls(self):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.db = PromptDatabase(os.path.join(self.tmpdir, "test.db"))
+        patcher = patch("prompt_search_list._shared_db", self.db)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        self.db.model.close()
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def test_unchanged_database_returns_same_value(self):
         result1 = PromptSearchList.IS_CHANGED()
-        time.sleep(0.01)
+        result2 = PromptSearchList.IS_CHANGED()
+        self.assertEqual(result1, result2)
+
+    def test_saved_prompt_changes_value(self):
+        result1 = PromptSearchList.IS_CHANGED()
+        self.db.save_prompt("a new prompt", prompt_hash="h1")
         result2 = PromptSearchList.IS_CHANGED()
         self.assertNotEqual(result1, result2)
 
-    def test_returns_numeric(self):
-        result = PromptSearchList.IS_CHANGED()
-        self.assertIsInstance(result, float)
+    def test_image_link_keeps_value(self):
+        prompt_id = self.db.save_prompt("a new prompt", prompt_hash="h1")
+        result1 = PromptSearchList.IS_CHANGED()
+        self.db.link_image_to_prompt(prompt_id, "/output/image.png")
+        result2 = PromptSearchList.IS_CHANGED()
+        self.assertEqual(result1, result2)
 
 
 if __name__ == "__main__":
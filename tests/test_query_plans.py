@@ -0,0 +1,327 @@
+"""
+Query plan regression tests for PromptDatabase.
+
+Every SQL statement PromptDatabase issues while running WORKLOAD is traced
+and checked with EXPLAIN QUERY PLAN. A statement fails the suite if it scans
+a whole table or sorts through a temp b-tree, unless ALLOWED lists it with
+the reason that plan is acceptable. New public methods must be added to
+WORKLOAD (or NO_SQL) so their queries are covered too.
+"""
+
+import inspect
+import os
+import re
+import sqlite3
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.operations import PromptDatabase
+from utils.hashing import generate_prompt_hash
+
+# Plan details that mean a full table scan ("SCAN prompts", "SCAN p"; index,
+# virtual table and subquery scans carry a suffix) or a sort
+FULL_SCAN = re.compile(r"^SCAN \w+$")
+TEMP_SORT = "USE TEMP B-TREE"
+
+# (SQL pattern, plan detail pattern, reason) for plans that are by design
+ALLOWED = (
+    (
+        r"WHERE prompts_fts MATCH .* ORDER BY",
+        r"USE TEMP B-TREE FOR ORDER BY",
+        "sorts only the full-text matches, which are found first",
+    ),
+    (
+        r"prompts\.id IN \( SELECT .* ORDER BY created_at DESC",
+        r"USE TEMP B-TREE FOR ORDER BY",
+        "tag/folder filters look matches up by id; sorting them beats "
+        "walking every prompt in created_at order",
+    ),
+    (
+        r"HAVING COUNT\(DISTINCT t\.name\) = ",
+        r"USE TEMP B-TREE FOR (GROUP BY|count\(DISTINCT\))",
+        "groups only the links of the requested tags",
+    ),
+    (
+        r"DISTINCT TRIM\(category\)",
+        r"USE TEMP B-TREE FOR (DISTINCT|count\(DISTINCT\))",
+        "de-duplicates trimmed names while walking the category index",
+    ),
+    (
+        r"^SELECT path FROM image_dirs",
+        r"SCAN image_dirs",
+        "lists every folder; one row per directory, not per image",
+    ),
+    (
+        r"ORDER BY prompt_id, generation_time$",
+        r"USE TEMP B-TREE FOR RIGHT PART OF ORDER BY",
+        "export orders each prompt's images oldest first; the index serves "
+        "the newest-first previews",
+    ),
+    (
+        r"prompts\.id IN \(SELECT rowid FROM prompts_trigram .* ORDER BY",
+        r"USE TEMP B-TREE FOR ORDER BY",
+        "sorts only the substring matches, which the trigram index finds first",
+    ),
+    (
+        r"JOIN prompts p ON gi\.prompt_id = p\.id WHERE p\.id IN "
+        r"\( SELECT rowid FROM prompts_fts",
+        r"USE TEMP B-TREE FOR ORDER BY",
+        "sorts only the images of full-text matches",
+    ),
+    (
+        r"LEFT JOIN prompts p ON pt\.prompt_id = p\.id WHERE p\.id IS NULL"
+        r"|LEFT JOIN prompt_tags pt ON pt\.tag_id = t\.id GROUP BY t\.id"
+        r"|json_array_length\(p\.tag_list\)",
+        r"SCAN (pt|t|p)$",
+        "consistency check, reads everything by design",
+    ),
+    (
+        r"FROM prompt_signatures WHERE length\(signature\) > 0 GROUP BY substr",
+        r"SCAN prompt_signatures$|USE TEMP B-TREE FOR GROUP BY",
+        "near-duplicate scan buckets every signature band by design",
+    ),
+    (
+        r"^SELECT (prompt_id, )?buckets(, weights)? FROM prompt_vectors$",
+        r"SCAN prompt_vectors$",
+        "the similarity index loads every vector by design",
+    ),
+    (
+        r"^UPDATE (tags SET usage_count|prompts SET tag_list) = ",
+        r"SCAN (tags|prompts)$",
+        "maintenance rebuild of derived columns, touches every row",
+    ),
+)
+
+# Public methods that issue no SQL of their own
+NO_SQL = {
+    "backup_dir": "path helper",
+    "create_backup": "SQLite online backup API",
+    "latest_backup_time": "reads backup file names",
+    "prune_backups": "deletes backup files",
+    "similarity_search_enabled": "reads config",
+}
+
+
+def _workload(t):
+    """(method, call) pairs exercising every query path of PromptDatabase."""
+    db, ids = t.db, t.ids
+    export_path = os.path.join(t.tmpdir.name, "export.json")
+    return [
+        ("get_prompt_by_id", lambda: db.get_prompt_by_id(ids[0])),
+        (
+            "get_prompt_by_hash",
+            lambda: db.get_prompt_by_hash(generate_prompt_hash("castle prompt 1")),
+        ),
+        ("search_prompts", lambda: db.search_prompts(text="castle")),
+        ("search_prompts", lambda: db.search_prompts(text="cast", prefix=False)),
+        ("search_prompts", lambda: db.search_prompts(text="castle", rank=True)),
+        ("search_prompts", lambda: db.search_prompts(category="cat1")),
+        ("search_prompts", lambda: db.search_prompts(tags=["t1"])),
+        ("search_prompts", lambda: db.search_prompts(tags=["t"], tag_partial=True)),
+        ("search_prompts", lambda: db.search_prompts(rating_min=3, rating_max=4)),
+        ("search_prompts", lambda: db.search_prompts(folder="d1")),
+        ("search_prompts", lambda: db.search_prompts(date_from="2020-01-01")),
+        ("search_prompts", lambda: db.search_prompts(text="astle", substring=True)),
+        ("suggest_search_terms", lambda: db.suggest_search_terms("casle")),
+        ("get_recent_prompts", lambda: db.get_recent_prompts(limit=5, offset=5)),
+        (
+            "get_recent_prompts",
+            lambda: db.get_recent_prompts(
+                limit=5, cursor=db.get_recent_prompts(limit=5)["next_cursor"]
+            ),
+        ),
+        ("get_prompts_by_category", lambda: db.get_prompts_by_category("cat1")),
+        ("get_top_rated_prompts", lambda: db.get_top_rated_prompts()),
+        ("get_all_categories", lambda: db.get_all_categories()),
+        (
+            "get_prompt_subfolders",
+            lambda: db.get_prompt_subfolders(root_dirs=["/out"]),
+        ),
+        ("get_all_tags", lambda: db.get_all_tags()),
+        ("get_tags_with_counts", lambda: db.get_tags_with_counts()),
+        (
+            "get_tags_with_counts",
+            lambda: db.get_tags_with_counts(search="t", sort="count_desc"),
+        ),
+        ("get_prompts_by_tags", lambda: db.get_prompts_by_tags(["t1", "common"])),
+        (
+            "get_prompts_by_tags",
+            lambda: db.get_prompts_by_tags(["t1", "t2"], mode="or"),
+        ),
+        ("get_untagged_prompts_count", lambda: db.get_untagged_prompts_count()),
+        ("get_untagged_prompts", lambda: db.get_untagged_prompts()),
+        ("iter_export_prompts", lambda: list(db.iter_export_prompts())),
+        ("export_chunks", lambda: list(db.export_chunks())),
+        ("export_prompts", lambda: db.export_prompts(export_path)),
+        ("find_duplicates", lambda: db.find_duplicates()),
+        ("find_near_duplicates", lambda: db.find_near_duplicates()),
+        ("embed_prompts", lambda: db.embed_prompts()),
+        ("embed_prompts", lambda: db.embed_prompts(ids[:3])),
+        ("find_similar_prompts", lambda: db.find_similar_prompts(ids[0])),
+        ("get_prompt_images", lambda: db.get_prompt_images(str(ids[0]))),
+        ("get_recent_images", lambda: db.get_recent_images()),
+        ("get_all_images", lambda: db.get_all_images()),
+        ("get_images_page", lambda: db.get_images_page(limit=5)),
+        (
+            "get_images_page",
+            lambda: db.get_images_page(
+                limit=5, cursor=db.get_images_page(limit=5)["next_cursor"]
+            ),
+        ),
+        ("search_images_by_prompt", lambda: db.search_images_by_prompt("castle")),
+        ("get_image_by_id", lambda: db.get_image_by_id(1)),
+        ("get_statistics", lambda: db.get_statistics()),
+        (
+            "get_image_prompt_info",
+            lambda: db.get_image_prompt_info("/out/d1/img1.png"),
+        ),
+        (
+            "get_images_prompt_info",
+            lambda: db.get_images_prompt_info(["/moved/d1/img3.png"]),
+        ),
+        (
+            "get_prompt_id_for_image",
+            lambda: db.get_prompt_id_for_image("/out/d1/img1.png"),
+        ),
+        ("check_hash_duplicates", lambda: db.check_hash_duplicates()),
+        ("check_consistency", lambda: db.check_consistency()),
+        (
+            "save_prompt",
+            lambda: db.save_prompt(
+                "new prompt", tags=["t1"], prompt_hash=generate_prompt_hash("new")
+            ),
+        ),
+        (
+            "bulk_upsert_prompts",
+            lambda: db.bulk_upsert_prompts(
+                [
+                    {
+                        "text": text,
+                        "tags": ["extra"],
+                        "hash": generate_prompt_hash(text),
+                    }
+                    for text in ("castle prompt 1", "bulk")
+                ],
+                merge_tags=True,
+            ),
+        ),
+        (
+            "link_image_to_prompt",
+            lambda: db.link_image_to_prompt(str(ids[0]), "/out/d3/extra.png"),
+        ),
+        (
+            "bulk_link_images",
+            lambda: db.bulk_link_images([(ids[1], "/out/d3/bulk.png")]),
+        ),
+        ("import_prompts", lambda: db.import_prompts(export_path)),
+        ("update_prompt_text", lambda: db.update_prompt_text(ids[1], "edited")),
+        ("update_prompt_rating", lambda: db.update_prompt_rating(ids[1], 2)),
+        (
+            "update_prompt_metadata",
+            lambda: db.update_prompt_metadata(ids[2], category="new", tags=["x"]),
+        ),
+        ("set_prompt_tags", lambda: db.set_prompt_tags(ids[3], ["y"])),
+        ("bulk_add_tags", lambda: db.bulk_add_tags(ids[:3], ["z"])),
+        ("bulk_set_category", lambda: db.bulk_set_category(ids[:3], "bulk")),
+        ("rename_tag_all_prompts", lambda: db.rename_tag_all_prompts("t1", "t1b")),
+        ("merge_tags", lambda: db.merge_tags(["t2"], "t3")),
+        ("delete_tag_all_prompts", lambda: db.delete_tag_all_prompts("t3")),
+        ("delete_image", lambda: db.delete_image(2)),
+        ("bulk_delete_prompts", lambda: db.bulk_delete_prompts(ids[5:7])),
+        ("delete_prompts_by_category", lambda: db.delete_prompts_by_category("cat0")),
+        ("delete_prompt", lambda: db.delete_prompt(ids[4])),
+        ("prune_orphaned_prompts", lambda: db.prune_orphaned_prompts()),
+        ("cleanup_duplicates", lambda: db.cleanup_duplicates()),
+        ("rebuild_tag_counts", lambda: db.rebuild_tag_counts()),
+        ("cleanup_missing_images", lambda: db.cleanup_missing_images()),
+    ]
+
+
+class TestQueryPlans(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.db = PromptDatabase(os.path.join(self.tmpdir.name, "prompts.db"))
+        self.ids = []
+        for i in range(20):
+            text = f"castle prompt {i}"
+            self.ids.append(
+                self.db.save_prompt(
+                    text,
+                    category=f"cat{i % 3}",
+                    tags=[f"t{i % 4}", "common"],
+                    rating=i % 5 + 1,
+                    prompt_hash=generate_prompt_hash(text),
+                )
+            )
+            self.db.link_image_to_prompt(
+                str(self.ids[-1]),
+                f"/out/d{i % 2}/img{i}.png",
+                {"workflow": {"n": i}, "prompt": {}},
+            )
+        # Route reads through the writer so one trace sees every statement
+        self.db.model.read_pool_size = 0
+        self.statements = []
+
+    def tearDown(self):
+        self.db.model.close()
+        self.tmpdir.cleanup()
+
+    def _plan(self, conn, sql):
+        conn.set_trace_callback(None)
+        try:
+            return [row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + sql)]
+        except sqlite3.OperationalError as e:
+            # Scratch temp tables are dropped before the call returns
+            if "no such table: temp." in str(e):
+                return []
+            raise
+        finally:
+            conn.set_trace_callback(self.statements.append)
+
+    def test_workload_covers_public_methods(self):
+        public = {
+            name
+            for name, _ in inspect.getmembers(PromptDatabase, inspect.isfunction)
+            if not name.startswith("_")
+        }
+        covered = {name for name, _ in _workload(self)} | set(NO_SQL)
+        self.assertEqual(sorted(public - covered), [])
+
+    def test_no_full_scans_or_temp_sorts(self):
+        with self.db.model.get_connection() as conn:
+            conn.set_trace_callback(self.statements.append)
+        failures = []
+        used = set()
+        for method, call in _workload(self):
+            self.statements.clear()
+            call()
+            with self.db.model.get_connection() as conn:
+                for sql in list(self.statements):
+                    sql = " ".join(sql.split())
+                    if not re.match(r"(SELECT|WITH|UPDATE|DELETE|INSERT)\b", sql):
+                        continue
+                    for detail in self._plan(conn, sql):
+                        if not (FULL_SCAN.match(detail) or TEMP_SORT in detail):
+                            continue
+                        allowed = [
+                            i
+                            for i, (pattern, plan, _) in enumerate(ALLOWED)
+                            if re.search(pattern, sql) and re.match(plan, detail)
+                        ]
+                        used.update(allowed)
+                        if not allowed:
+                            failures.append(f"{method}: {detail}\n    {sql[:300]}")
+        with self.db.model.get_connection() as conn:
+            conn.set_trace_callback(None)
+
+        self.assertEqual(failures, [], "\n" + "\n".join(failures))
+        # Keep ALLOWED honest: every entry must still be needed
+        unused = [ALLOWED[i][2] for i in range(len(ALLOWED)) if i not in used]
+        self.assertEqual(unused, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,113 @@
+"""
+Tests for the query result cache and its write-generation invalidation.
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.operations import PromptDatabase
+from database.result_cache import ResultCache
+
+
+class TestResultCache(unittest.TestCase):
+    def test_lru_eviction(self):
+        cache = ResultCache(max_entries=2)
+        cache.put("a", 0, 1)
+        cache.put("b", 0, 2)
+        cache.get("a", 0)
+        cache.put("c", 0, 3)
+        self.assertEqual(cache.get("b", 0), (False, None))
+        self.assertEqual(cache.get("a", 0), (True, 1))
+        self.assertEqual(cache.evictions, 1)
+
+    def test_new_generation_drops_entries(self):
+        cache = ResultCache()
+        cache.put("a", 0, 1)
+        self.assertEqual(cache.get("a", 1), (False, None))
+        self.assertEqual(cache.invalidations, 1)
+        self.assertEqual(cache.stats()["entries"], 0)
+
+    def test_results_of_older_generations_are_not_stored(self):
+        cache = ResultCache()
+        cache.get("a", 3)
+        cache.put("a", 2, "stale")
+        self.assertEqual(cache.get("a", 3), (False, None))
+        # A late lookup from before the write does not roll the cache back
+        cache.put("a", 3, "fresh")
+        self.assertEqual(cache.get("a", 2), (False, None))
+        self.assertEqual(cache.get("a", 3), (True, "fresh"))
+
+
+class TestCachedQueries(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.db = PromptDatabase(os.path.join(self.tmpdir, "test.db"))
+        self.db.save_prompt("castle at dusk", category="fantasy", tags=["castle"])
+
+    def tearDown(self):
+        self.db.model.close()
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def test_repeated_reads_hit(self):
+        for _ in range(3):
+            self.assertEqual(self.db.get_all_categories(), ["fantasy"])
+            self.db.get_statistics()
+            self.db.get_tags_with_counts(limit=10, sort="count_desc")
+        stats = self.db.result_cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"]), (6, 3))
+
+    def test_arguments_are_part_of_the_key(self):
+        self.db.save_prompt("harbor at dawn", category="harbor")
+        first = self.db.get_recent_prompts(limit=1)
+        second = self.db.get_recent_prompts(limit=1, offset=1)
+        self.assertNotEqual(first["prompts"][0]["id"], second["prompts"][0]["id"])
+
+    def test_writes_invalidate(self):
+        self.assertEqual(self.db.get_all_tags(), ["castle"])
+        prompt_id = self.db.save_prompt("harbor at dawn", tags=["harbor"])
+        self.assertEqual(self.db.get_all_tags(), ["castle", "harbor"])
+        self.db.delete_prompt(prompt_id)
+        self.assertEqual(self.db.get_all_tags(), ["castle"])
+
+    def test_image_writes_invalidate(self):
+        self.assertEqual(self.db.get_statistics()["total_images"], 0)
+        self.db.link_image_to_prompt(1, "/output/castle.png")
+        self.assertEqual(self.db.get_statistics()["total_images"], 1)
+
+    def test_writes_through_another_instance_invalidate(self):
+        self.assertEqual(self.db.get_all_categories(), ["fantasy"])
+        other = PromptDatabase(self.db.model.db_path)
+        try:
+            other.save_prompt("harbor at dawn", category="harbor")
+        finally:
+            other.model.close()
+        self.assertEqual(self.db.get_all_categories(), ["fantasy", "harbor"])
+
+    def test_callers_get_copies(self):
+        self.db.get_all_categories().append("mutated")
+        self.db.get_recent_prompts()["prompts"][0]["text"] = "mutated"
+        self.assertEqual(self.db.get_all_categories(), ["fantasy"])
+        self.assertEqual(
+            self.db.get_recent_prompts()["prompts"][0]["text"], "castle at dusk"
+        )
+
+    def test_size_zero_disables(self):
+        with patch("py.config.PromptManagerConfig.RESULT_CACHE_SIZE", 0):
+            db = PromptDatabase(self.db.model.db_path)
+        try:
+            db.get_all_categories()
+            db.get_all_categories()
+            self.assertEqual(db.result_cache.stats()["misses"], 0)
+            self.assertEqual(db.result_cache.stats()["entries"], 0)
+        finally:
+            db.model.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,263 @@
+"""
+Tests for the in-memory prompt search index and the write generation counter.
+"""
+
+import os
+import random
+import shutil
+import sys
+import tempfile
+import unittest
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.operations import PromptDatabase
+from database.search_index import PromptSearchIndex, get_search_index
+
+WORDS = (
+    "sunset castle forest dragon portrait café Café neon city river "
+    "mountain knight sunflower castles ocean storm"
+).split()
+
+
+class SearchIndexTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.db = PromptDatabase(os.path.join(self.tmpdir, "test.db"))
+        self.index = PromptSearchIndex(self.db)
+
+    def tearDown(self):
+        self.db.model.close()
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def _save(self, text, **kwargs):
+        return self.db.save_prompt(text, prompt_hash=text, **kwargs)
+
+    def _ids(self, **kwargs):
+        return [r["id"] for r in self.index.search(**kwargs)]
+
+
+class TestSearchParity(SearchIndexTestCase):
+    """The index must return what search_prompts returns, in order."""
+
+    def setUp(self):
+        super().setUp()
+        rng = random.Random(21)
+        entries = []
+        for i in range(300):
+            words = rng.sample(WORDS, 4)
+            if i % 7 == 0:
+                words.append(f"Clip_{i % 3}")
+            if i % 11 == 0:
+                words.append("<lora:detail_v2:0.8>")
+            entries.append(
+                {
+                    "text": " ".join(words) + f" #{i}",
+                    "hash": f"h{i}",
+                    "category": f"cat_{i % 4}" if i % 5 else None,
+                    "tags": [f"tag_{j}" for j in rng.sample(range(12), i % 3)],
+                    "rating": i % 6 or None,
+                    "created_at": f"2026-01-01T00:{i // 60:02d}:{i % 60:02d}",
+                }
+            )
+        self.db.bulk_upsert_prompts(entries)
+
+    QUERIES = (
+        {},
+        {"text": "castle"},
+        {"text": "cast"},
+        {"text": "cast", "prefix": False},
+        {"text": "castle dragon"},
+        {"text": "CAFE"},
+        {"text": "Clip_1"},
+        {"text": "clip_"},
+        {"text": "lora:detail"},
+        {"text": "!!"},
+        {"text": "#1"},
+        {"text": "zzz"},
+        {"category": "cat_2"},
+        {"tags": ["tag_3"]},
+        {"tags": ["TAG_1"], "tag_partial": True},
+        {"tags": ["ag_1", "tag_2"], "tag_partial": True},
+        {"tags": ["t%g_5"], "tag_partial": True},
+        {"rating_min": 4},
+        {"rating_min": 2, "rating_max": 3},
+        {"text": "sun", "category": "cat_1", "rating_min": 2},
+        {"text": "river", "tags": ["tag"], "tag_partial": True, "limit": 5},
+    )
+
+    def test_matches_search_prompts(self):
+        for query in self.QUERIES:
+            with self.subTest(query=query):
+                expected = [r["id"] for r in self.db.search_prompts(**query)]
+                self.assertEqual(self._ids(**query), expected)
+
+    def test_matches_like_search_without_fts(self):
+        self.db.model.fts_enabled = False
+        for query in ({"text": "cast"}, {"text": "CLIP_1"}, {"text": "a_e"}):
+            with self.subTest(query=query):
+                expected = [r["id"] for r in self.db.search_prompts(**query)]
+                self.assertEqual(self._ids(**query), expected)
+
+    def test_result_fields(self):
+        result = self.index.search(tags=["tag_3"], limit=1)[0]
+        stored = self.db.get_prompt_by_id(result["id"])
+        for field in ("text", "category", "tags", "rating", "created_at"):
+            self.assertEqual(result[field], stored[field], field)
+
+
+class TestIncrementalUpdates(SearchIndexTestCase):
+    def test_loaded_lazily_once(self):
+        self._save("a castle at dusk")
+        self.assertEqual(self.index.loads, 0)
+        self._ids(text="castle")
+        self._ids(text="dusk")
+        self.assertEqual(self.index.loads, 1)
+
+    def test_named_writes_update_without_reload(self):
+        first = self._save("a castle at dusk", tags=["old"])
+        self.assertEqual(self._ids(text="castle"), [first])
+
+        second = self._save("castle in the sky", category="fantasy")
+        self.db.update_prompt_text(first, "a harbor at dawn")
+        self.db.update_prompt_metadata(second, tags=["new"], rating=5)
+        self.assertEqual(self._ids(text="castle"), [second])
+        self.assertEqual(self._ids(text="harbor"), [first])
+        self.assertEqual(self._ids(tags=["new"], rating_min=5), [second])
+        self.assertEqual(self._ids(tags=["old"]), [first])
+
+        self.db.set_prompt_tags(first, [])
+        self.db.bulk_set_category([first], "fantasy")
+        self.db.delete_prompt(second)
+        self.assertEqual(self._ids(tags=["old"]), [])
+        self.assertEqual(self._ids(category="fantasy"), [first])
+        self.assertEqual(self._ids(text="castle"), [])
+        self.assertEqual(self.index.loads, 1)
+
+    def test_unnamed_write_reloads(self):
+        prompt_id = self._save("a castle at dusk", tags=["old"])
+        self.assertEqual(self._ids(tags=["old"]), [prompt_id])
+        self.db.rename_tag_all_prompts("old", "renamed")
+        self.assertEqual(self._ids(tags=["renamed"]), [prompt_id])
+        self.assertEqual(self.index.loads, 2)
+
+    def test_generation_follows_prompt_writes_only(self):
+        prompt_id = self._save("a castle at dusk")
+        generation = self.index.generation
+        db_generation = self.db.model.generation
+
+        self.db.link_image_to_prompt(prompt_id, "/output/castle.png")
+        self.assertEqual(self.index.generation, generation)
+        self.assertGreater(self.db.model.generation, db_generation)
+
+        self.db.update_prompt_rating(prompt_id, 4)
+        self.assertGreater(self.index.generation, generation)
+
+    def test_reads_do_not_advance_generation(self):
+        self._save("a castle at dusk")
+        generation = self.db.model.generation
+        self.db.search_prompts(text="castle")
+        self.db.update_prompt_rating(12345, 3)
+        self.assertEqual(self.db.model.generation, generation)
+
+
+class TestCompletion(SearchIndexTestCase):
+    def setUp(self):
+        super().setUp()
+        self._save("cyberpunk city", tags=["Cyberpunk", "cyan"])
+        self._save("cyberpunk street, 2077", tags=["cyberpunk"])
+        self._save("cyan sky, 2077", tags=["Cyberpunk", "café"])
+
+    def _complete(self, prefix, **kwargs):
+        return [
+            (c["text"], c["type"], c["count"])
+            for c in self.index.complete(prefix, **kwargs)
+        ]
+
+    def test_ranked_by_usage(self):
+        self.assertEqual(
+            self._complete("cy"),
+            [
+                ("Cyberpunk", "tag", 2),
+                ("cyberpunk", "word", 2),
+                ("cyan", "tag", 1),
+                ("cyberpunk", "tag", 1),
+            ],
+        )
+        self.assertEqual(self._complete("cy", limit=1), [("Cyberpunk", "tag", 2)])
+
+    def test_kind_and_folding(self):
+        self.assertEqual(
+            self._complete("CYB", kind="tag"),
+            [("Cyberpunk", "tag", 2), ("cyberpunk", "tag", 1)],
+        )
+        self.assertEqual(self._complete("cafe", kind="tag"), [("café", "tag", 1)])
+        self.assertEqual(
+            self._complete("cyber", kind="word"), [("cyberpunk", "word", 2)]
+        )
+
+    def test_rare_words_and_numbers_left_out(self):
+        self.assertEqual(self._complete("sky"), [])
+        self.assertEqual(self._complete("20"), [])
+        self.assertEqual(self._complete("  "), [])
+
+    def test_follows_tag_edits(self):
+        self.assertEqual(self._complete("cya", kind="tag"), [("cyan", "tag", 1)])
+        self.db.set_prompt_tags(1, ["cyanotype"])
+        self.db.bulk_add_tags([2, 3], ["cyanotype"])
+        self.assertEqual(self._complete("cya", kind="tag"), [("cyanotype", "tag", 3)])
+        self.db.delete_prompt(1)
+        self.assertEqual(self._complete("cya", kind="tag"), [("cyanotype", "tag", 2)])
+        self.assertEqual(self.index.loads, 1)
+
+
+class TestCompletionRanking(SearchIndexTestCase):
+    """Completions answered from the popular names must match a full scan."""
+
+    def _expected(self, prefix, limit):
+        counts = {}
+        for prompt in self.db.search_prompts(limit=10_000):
+            for tag in prompt["tags"]:
+                counts[tag] = counts.get(tag, 0) + 1
+        ranked = sorted(
+            (-count, tag) for tag, count in counts.items() if tag.startswith(prefix)
+        )
+        return [(tag, -negated) for negated, tag in ranked[:limit]]
+
+    def test_popular_names_match_full_scan(self):
+        rng = random.Random(23)
+        with patch("database.search_index.POPULAR_SIZE", 4):
+            for i in range(120):
+                tags = {f"t{rng.randint(0, 40) ** 2 % 97}" for _ in range(3)}
+                prompt_id = self._save(f"prompt {i}", tags=sorted(tags))
+                if i % 9 == 0:
+                    self.db.set_prompt_tags(prompt_id, ["t1"])
+                if i >= 40:
+                    for prefix in ("t", "t1", "t2", "t9"):
+                        with self.subTest(i=i, prefix=prefix):
+                            completed = [
+                                (c["text"], c["count"])
+                                for c in self.index.complete(prefix, 3, "tag")
+                            ]
+                            self.assertEqual(completed, self._expected(prefix, 3))
+
+
+class TestSharedIndex(SearchIndexTestCase):
+    def test_one_index_and_generation_per_file(self):
+        other = PromptDatabase(os.path.join(self.tmpdir, "test.db"))
+        try:
+            index = get_search_index(self.db)
+            self.assertIs(get_search_index(other), index)
+
+            prompt_id = other.save_prompt("written elsewhere", prompt_hash="x")
+            self.assertEqual(self.db.model.generation, other.model.generation)
+            self.assertEqual(
+                [r["id"] for r in index.search(text="elsewhere")], [prompt_id]
+            )
+        finally:
+            other.model.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
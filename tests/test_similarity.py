@@ -0,0 +1,217 @@
+"""
+Tests for prompt similarity vectors, the vector index and the embedding
+worker.
+"""
+
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+import unittest
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import similarity
+from database.models import SCHEMA_VERSION
+from database.operations import PromptDatabase
+from database.similarity import PromptVectorIndex, get_vector_index
+from utils.embedding_worker import EmbeddingWorker
+from utils.hashing import term_vector
+
+
+class SimilarityTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.tmpdir, "test.db")
+        self.db = PromptDatabase(self.db_path)
+
+    def tearDown(self):
+        self.db.model.close()
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def _save(self, text):
+        return self.db.save_prompt(text, prompt_hash=text)
+
+    def _similar(self, prompt_id, limit=10):
+        return [p["id"] for p in self.db.find_similar_prompts(prompt_id, limit)]
+
+    def _vector_count(self):
+        with self.db.model.get_read_connection() as conn:
+            return conn.execute("SELECT COUNT(*) FROM prompt_vectors").fetchone()[0]
+
+
+class TestFindSimilar(SimilarityTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.castle = self._save("gothic castle on a hill at night, moonlight")
+        self.castle2 = self._save("ruined gothic castle at night, fog")
+        self.castle3 = self._save("castle in a sunny meadow, flowers")
+        self.ocean = self._save("stormy ocean waves at night, lighthouse")
+        self.portrait = self._save("portrait of an old man, oil painting")
+        self.db.embed_prompts()
+
+    def test_ranks_by_shared_words(self):
+        results = self.db.find_similar_prompts(self.castle)
+        ids = [p["id"] for p in results]
+        # Shares "gothic castle at night", then "at night" and "castle"
+        self.assertEqual(ids, [self.castle2, self.ocean, self.castle3])
+        scores = [p["similarity"] for p in results]
+        self.assertEqual(scores, sorted(scores, reverse=True))
+        self.assertTrue(all(0 < s <= 1 for s in scores))
+        self.assertEqual(results[0]["text"], "ruined gothic castle at night, fog")
+
+    def test_rare_words_outweigh_common_ones(self):
+        for i in range(20):
+            self._save(f"landscape at night number {i} wide")
+        query = self._save("gothic landscape")
+        self.db.embed_prompts()
+        self.assertEqual(self._similar(query, 1), [self.castle2])
+
+    def test_limit_and_missing_prompt(self):
+        self.assertEqual(len(self._similar(self.castle, 1)), 1)
+        self.assertEqual(self._similar(self.castle, 0), [])
+        self.assertIsNone(self.db.find_similar_prompts(999))
+
+    def test_prompt_without_words(self):
+        number = self._save("12345")
+        self.db.embed_prompts()
+        self.assertEqual(self._similar(number), [])
+
+    def test_embed_only_missing(self):
+        self.assertEqual(self.db.embed_prompts(), 0)
+        self.assertEqual(self.db.embed_prompts([self.castle, 999]), 1)
+        self.assertEqual(self._vector_count(), 5)
+
+    def test_skipped_buckets_are_rescored(self):
+        expected = self.db.find_similar_prompts(self.castle)
+        index = PromptVectorIndex(self.db)
+        with patch.object(similarity, "POSTINGS_BUDGET", 1):
+            approximate = index.nearest(
+                term_vector("gothic castle on a hill at night, moonlight"),
+                exclude=self.castle,
+            )
+        # Only the rarest bucket is walked; its prompts are re-scored exactly
+        self.assertLess(len(approximate), len(expected))
+        for prompt_id, score in approximate:
+            match = next(p for p in expected if p["id"] == prompt_id)
+            self.assertAlmostEqual(score, match["similarity"], places=3)
+
+
+class TestIncrementalUpdates(SimilarityTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.castle = self._save("gothic castle at night")
+        self.forest = self._save("misty forest, dawn light")
+        self.db.embed_prompts()
+        self.index = get_vector_index(self.db)
+        self.index.refresh()
+        self.loads = self.index.loads
+
+    def test_new_prompt_found_after_embedding(self):
+        new = self._save("gothic castle in winter")
+        self.assertEqual(self._similar(self.castle), [])
+        self.db.embed_prompts([new])
+        self.assertEqual(self._similar(self.castle), [new])
+        self.assertEqual(self.index.loads, self.loads)
+
+    def test_edited_prompt(self):
+        self.db.update_prompt_text(self.forest, "gothic castle under snow")
+        self.assertEqual(self._vector_count(), 1)
+        self.assertEqual(self._similar(self.castle), [])
+        self.db.embed_prompts([self.forest])
+        self.assertEqual(self._similar(self.castle), [self.forest])
+        self.db.update_prompt_text(self.forest, "misty forest, dawn light")
+        self.db.embed_prompts([self.forest])
+        self.assertEqual(self._similar(self.castle), [])
+        self.assertEqual(self.index.loads, self.loads)
+
+    def test_deleted_prompt(self):
+        other = self._save("gothic castle in winter")
+        self.db.embed_prompts([other])
+        self.db.delete_prompt(other)
+        self.assertEqual(self._vector_count(), 2)
+        self.assertEqual(self._similar(self.castle), [])
+
+    def test_rebuild_after_many_changes(self):
+        with patch.object(similarity, "MIN_REBUILD", 2):
+            ids = [self._save(f"gothic castle tower {i}th floor") for i in range(3)]
+            self.db.embed_prompts(ids)
+            self.assertEqual(len(self._similar(self.castle)), 3)
+        self.assertEqual(self.index.loads, self.loads + 1)
+
+    def test_unknown_write_reloads(self):
+        with self.db.model.get_connection() as conn:
+            conn.execute(
+                "DELETE FROM prompt_vectors WHERE prompt_id = ?", (self.forest,)
+            )
+            conn.commit()
+        self.index.refresh()
+        self.assertEqual(self.index.loads, self.loads + 1)
+        self.assertEqual(self.index.size, 1)
+
+
+class TestEmbeddingWorker(SimilarityTestCase):
+
+    def test_run_once_backfills_then_embeds_changes(self):
+        first = self._save("gothic castle at night")
+        worker = EmbeddingWorker(self.db)
+        self.assertEqual(worker.run_once(), 1)
+        self.assertEqual(worker.run_once(), 0)
+        second = self._save("gothic castle at dawn")
+        self.assertEqual(worker.run_once(), 1)
+        self.assertEqual(self._similar(first), [second])
+
+    def test_disabled_by_config(self):
+        self._save("gothic castle at night")
+        worker = EmbeddingWorker(self.db)
+        with patch("py.config.PromptManagerConfig.ENABLE_SIMILARITY_SEARCH", False):
+            self.assertFalse(self.db.similarity_search_enabled())
+            self.assertEqual(worker.run_once(), 0)
+        self.assertEqual(self._vector_count(), 0)
+        self.assertEqual(worker.run_once(), 1)
+
+    def test_thread_embeds_saved_prompts(self):
+        worker = EmbeddingWorker(self.db, batch_delay=0.01)
+        worker.start()
+        try:
+            first = self._save("gothic castle at night")
+            second = self._save("gothic castle at dawn")
+            deadline = time.monotonic() + 5
+            while self._vector_count() < 2 and time.monotonic() < deadline:
+                time.sleep(0.01)
+        finally:
+            worker.stop()
+        self.assertFalse(worker.is_running)
+        self.assertEqual(self._similar(first), [second])
+
+
+class TestMigration(SimilarityTestCase):
+
+    def test_upgrade_adds_table_and_trigger(self):
+        self.db.model.close()
+        conn = sqlite3.connect(self.db_path)
+        conn.execute("DROP TRIGGER prompts_vector_stale")
+        conn.execute("DROP TABLE prompt_vectors")
+        conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION - 1}")
+        conn.commit()
+        conn.close()
+
+        self.db = PromptDatabase(self.db_path)
+        first = self._save("gothic castle at night")
+        second = self._save("gothic castle at dawn")
+        self.assertEqual(self.db.embed_prompts(), 2)
+        self.db.update_prompt_text(second, "misty forest")
+        self.assertEqual(self._vector_count(), 1)
+        with self.db.model.get_read_connection() as conn:
+            version = conn.execute("PRAGMA user_version").fetchone()[0]
+        self.assertEqual(version, SCHEMA_VERSION)
+        self.assertEqual(self._similar(first), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,211 @@
+"""
+Tests for the SQLite performance profile and background optimize schedule.
+"""
+
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+import types
+import unittest
+from unittest.mock import MagicMock, patch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.models import PromptModel, resolve_sqlite_pragmas
+from database.operations import PromptDatabase
+from utils.optimize_scheduler import OptimizeScheduler
+
+
+class SqliteProfileTestCase(unittest.TestCase):
+    def setUp(self):
+        self.temp_db = tempfile.NamedTemporaryFile(delete=False, suffix=".db")
+        self.temp_db.close()
+        self.models = []
+
+    def tearDown(self):
+        for model in self.models:
+            model.close()
+        for path in (
+            self.temp_db.name,
+            self.temp_db.name + "-wal",
+            self.temp_db.name + "-shm",
+        ):
+            if os.path.exists(path):
+                os.unlink(path)
+
+    def _model(self, *args, **kwargs):
+        model = PromptModel(self.temp_db.name, *args, **kwargs)
+        self.models.append(model)
+        return model
+
+
+class TestResolvePragmas(unittest.TestCase):
+    def test_profile_with_overrides(self):
+        pragmas = resolve_sqlite_pragmas(
+            "balanced", {"cache_size": -4096, "synchronous": "full"}
+        )
+        self.assertEqual(pragmas["cache_size"], -4096)
+        self.assertEqual(pragmas["synchronous"], "FULL")
+        self.assertEqual(pragmas["temp_store"], "MEMORY")
+
+    def test_invalid_settings_rejected(self):
+        for profile, overrides in (
+            ("turbo", None),
+            ("safe", {"journal_mode": "OFF"}),
+            ("safe", {"synchronous": "NORMAL; DROP TABLE prompts"}),
+            ("safe", {"mmap_size": "1e9"}),
+            ("safe", {"cache_size": True}),
+        ):
+            with self.assertRaises(ValueError):
+                resolve_sqlite_pragmas(profile, overrides)
+
+
+class TestProfileApplied(SqliteProfileTestCase):
+    def test_applied_to_writer_and_readers(self):
+        model = self._model(sqlite_profile="balanced")
+        expected = {
+            "synchronous": 1,
+            "cache_size": -32768,
+            "mmap_size": 256 * 2**20,
+            "temp_store": 2,
+        }
+        with model.get_connection() as writer, model.get_read_connection() as reader:
+            for conn in (writer, reader):
+                for name, value in expected.items():
+                    self.assertEqual(
+                        conn.execute(f"PRAGMA {name}").fetchone()[0], value, name
+                    )
+
+    def test_safe_profile_keeps_defaults(self):
+        model = self._model(sqlite_profile="safe")
+        info = model.profile_info()
+        self.assertEqual(info["profile"], "safe")
+        self.assertEqual(info["active"]["synchronous"], "FULL")
+        self.assertEqual(info["active"]["mmap_size"], 0)
+        self.assertEqual(info["active"]["journal_mode"], "wal")
+
+    def test_profile_info_reports_overrides(self):
+        model = self._model(sqlite_pragmas={"wal_autocheckpoint": 2000})
+        info = model.profile_info()
+        self.assertEqual(info["profile"], "balanced")
+        self.assertEqual(info["settings"]["wal_autocheckpoint"], 2000)
+        self.assertEqual(info["active"]["wal_autocheckpoint"], 2000)
+        self.assertIsNone(info["last_optimized"])
+
+    def test_invalid_config_falls_back_to_default(self):
+        fake_config_mod = types.ModuleType("py.config")
+        fake_config_mod.PromptManagerConfig = type(
+            "PromptManagerConfig",
+            (),
+            {
+                "DEFAULT_DB_PATH": self.temp_db.name,
+                "READ_POOL_SIZE": 4,
+                "SQLITE_PROFILE": "turbo",
+                "SQLITE_PRAGMAS": {},
+            },
+        )
+        with patch.dict(sys.modules, {"py.config": fake_config_mod}):
+            db = PromptDatabase()
+        self.models.append(db.model)
+        self.assertEqual(db.model.sqlite_profile, "balanced")
+
+    def test_config_profile_used(self):
+        fake_config_mod = types.ModuleType("py.config")
+        fake_config_mod.PromptManagerConfig = type(
+            "PromptManagerConfig",
+            (),
+            {
+                "DEFAULT_DB_PATH": self.temp_db.name,
+                "READ_POOL_SIZE": 4,
+                "SQLITE_PROFILE": "fast",
+                "SQLITE_PRAGMAS": {"mmap_size": 0},
+            },
+        )
+        with patch.dict(sys.modules, {"py.config": fake_config_mod}):
+            db = PromptDatabase()
+        self.models.append(db.model)
+        info = db.model.profile_info()
+        self.assertEqual(info["profile"], "fast")
+        self.assertEqual(info["active"]["mmap_size"], 0)
+        self.assertEqual(info["active"]["wal_autocheckpoint"], 4000)
+
+
+class TestOptimize(SqliteProfileTestCase):
+    def test_first_run_analyzes(self):
+        model = self._model()
+        with model.get_connection() as conn:
+            conn.executemany(
+                "INSERT INTO tags (name) VALUES (?)", [(f"t{i}",) for i in range(50)]
+            )
+            conn.commit()
+        model.optimize_database()
+        self.assertIsNotNone(model.last_optimized)
+        with model.get_read_connection() as conn:
+            stats = conn.execute(
+                "SELECT COUNT(*) FROM sqlite_stat1 WHERE tbl = 'tags'"
+            ).fetchone()[0]
+        self.assertGreater(stats, 0)
+
+    def test_scheduler_runs_when_due(self):
+        db = PromptDatabase(self.temp_db.name)
+        self.models.append(db.model)
+        scheduler = OptimizeScheduler(db)
+        self.assertEqual(scheduler.seconds_until_due(), 0.0)
+        self.assertTrue(scheduler.run_once())
+        # Next run is one interval (default 24h) after the last one
+        self.assertGreater(scheduler.seconds_until_due(), 23 * 3600)
+        self.assertFalse(scheduler.run_once())
+
+    def test_zero_interval_disables(self):
+        db = PromptDatabase(self.temp_db.name)
+        self.models.append(db.model)
+        scheduler = OptimizeScheduler(db)
+        with patch("utils.optimize_scheduler._optimize_interval_hours", return_value=0):
+            self.assertIsNone(scheduler.seconds_until_due())
+            self.assertFalse(scheduler.run_once())
+        self.assertIsNone(db.model.last_optimized)
+
+    def test_thread_runs_and_stops(self):
+        db = PromptDatabase(self.temp_db.name)
+        self.models.append(db.model)
+        scheduler = OptimizeScheduler(db, startup_delay=0)
+        scheduler.start()
+        try:
+            deadline = time.time() + 5
+            while db.model.last_optimized is None and time.time() < deadline:
+                time.sleep(0.01)
+            self.assertIsNotNone(db.model.last_optimized)
+        finally:
+            scheduler.stop()
+        self.assertFalse(scheduler.is_running)
+
+
+class TestDiagnosticsReportsProfile(SqliteProfileTestCase):
+    def test_diagnostics_include_profile(self):
+        if "server" not in sys.modules:
+            sys.modules["server"] = MagicMock()
+
+        from py.api.admin import AdminRoutesMixin
+
+        db = PromptDatabase(self.temp_db.name)
+        self.models.append(db.model)
+        stub = MagicMock()
+        stub.db = db
+        loop = asyncio.new_event_loop()
+        try:
+            result = loop.run_until_complete(
+                AdminRoutesMixin.run_diagnostics(stub, MagicMock())
+            )
+        finally:
+            loop.close()
+        profile = json.loads(result.body)["diagnostics"]["sqlite_profile"]
+        self.assertEqual(profile["status"], "ok")
+        self.assertEqual(profile["profile"], "balanced")
+        self.assertEqual(profile["active"]["synchronous"], "NORMAL")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,178 @@
+"""Background daemon threads shared by PromptManager's schedulers and workers.
+
+``BackgroundWorker`` owns one daemon thread and its stop event;
+``PeriodicWorker`` adds the interval schedule used by scheduled backups and
+planner maintenance. Each process runs at most one instance of every
+worker class, handed out by :func:`shared_worker`.
+
+Typical usage:
+    class Cleaner(PeriodicWorker):
+        thread_name = "PromptManagerCleaner"
+        task_name = "Scheduled cleanup"
+
+        def interval_hours(self): ...
+        def last_run_time(self): ...
+        def task(self): ...
+
+    shared_worker(Cleaner, db).start()
+"""
+
+import threading
+import time
+from typing import Any, Dict, Optional, Type, TypeVar
+
+from .logging_config import get_logger
+
+# How often to re-check the interval while a schedule is disabled
+DISABLED_POLL_INTERVAL = 3600.0
+
+# Pause before retrying a run that failed and so is still due
+RETRY_DELAY = 60.0
+
+
+class BackgroundWorker:
+    """A single daemon thread running :meth:`_run` until :meth:`stop`.
+
+    Subclasses implement :meth:`_run`, which should return once ``_stop``
+    is set.
+    """
+
+    thread_name = "PromptManagerWorker"
+    description = "Background worker"
+
+    def __init__(self, db_manager, logger_name: str):
+        """Initialize the worker.
+
+        Args:
+            db_manager: PromptDatabase the worker operates on
+            logger_name: Name of the worker's logger
+        """
+        self.db_manager = db_manager
+        self.logger = get_logger(logger_name)
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def is_running(self) -> bool:
+        """Whether the worker thread is alive."""
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        """Start the worker thread (no-op if already running)."""
+        if self.is_running:
+            return
+        self._stop.clear()
+        self._wake_up()
+        self._thread = threading.Thread(
+            target=self._run, name=self.thread_name, daemon=True
+        )
+        self._thread.start()
+        self.logger.info(f"{self.description} started")
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Signal the worker thread to exit and wait for it."""
+        self._stop.set()
+        self._wake_up()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _wake_up(self) -> None:
+        """Interrupt a thread waiting for work; called on start and stop."""
+
+    def _run(self) -> None:
+        raise NotImplementedError
+
+
+class PeriodicWorker(BackgroundWorker):
+    """Runs :meth:`task` once every :meth:`interval_hours` hours.
+
+    The next run is due one interval after :meth:`last_run_time`, so the
+    schedule survives restarts. An interval of 0 disables the schedule; the
+    interval is re-read on every cycle, so config changes apply without a
+    restart.
+    """
+
+    task_name = "Scheduled task"
+
+    def __init__(self, db_manager, logger_name: str, startup_delay: float):
+        """Initialize the worker.
+
+        Args:
+            db_manager: PromptDatabase the worker operates on
+            logger_name: Name of the worker's logger
+            startup_delay: Seconds to wait after start() before the first check
+        """
+        super().__init__(db_manager, logger_name)
+        self.startup_delay = startup_delay
+
+    def interval_hours(self) -> float:
+        """Hours between runs (0 = disabled)."""
+        raise NotImplementedError
+
+    def last_run_time(self) -> Optional[float]:
+        """Unix time of the last completed run, or None if there was none."""
+        raise NotImplementedError
+
+    def task(self) -> Any:
+        """Do one run of the work; its result is returned by run_once()."""
+        raise NotImplementedError
+
+    def seconds_until_due(self) -> Optional[float]:
+        """Seconds until the next run, or None when the schedule is disabled."""
+        interval_hours = self.interval_hours()
+        if interval_hours <= 0:
+            return None
+        last = self.last_run_time()
+        if last is None:
+            return 0.0
+        return max(0.0, last + interval_hours * 3600 - time.time())
+
+    def run_once(self) -> Any:
+        """Run the task if it is due.
+
+        Returns:
+            The task's result, or None if no run was due or it failed
+        """
+        wait = self.seconds_until_due()
+        if wait is None or wait > 0:
+            return None
+        try:
+            return self.task()
+        except Exception as e:
+            self.logger.error(f"{self.task_name} failed: {e}")
+            return None
+
+    def _run(self) -> None:
+        if self._stop.wait(self.startup_delay):
+            return
+        while not self._stop.is_set():
+            self.run_once()
+            wait = self.seconds_until_due()
+            if wait is None:
+                wait = DISABLED_POLL_INTERVAL
+            # A failed run stays due; retry after a pause instead of spinning
+            self._stop.wait(max(wait, RETRY_DELAY))
+
+
+W = TypeVar("W", bound=BackgroundWorker)
+
+# Singleton instance management
+_worker_instances: Dict[type, BackgroundWorker] = {}
+_worker_lock = threading.Lock()
+
+
+def shared_worker(worker_class: Type[W], db_manager) -> W:
+    """Get or create the process-wide instance of a worker class.
+
+    Args:
+        worker_class: BackgroundWorker subclass
+        db_manager: PromptDatabase instance (only used on first call)
+
+    Returns:
+        The shared instance of ``worker_class``
+    """
+    with _worker_lock:
+        if worker_class not in _worker_instances:
+            _worker_instances[worker_class] = worker_class(db_manager)
+        return _worker_instances[worker_class]
@@ -0,0 +1,77 @@
+"""Scheduled, rotating database backups for PromptManager.
+
+Runs a single daemon thread that writes an online backup of the prompt
+database every ``PromptManagerConfig.AUTO_BACKUP_INTERVAL`` hours into the
+``backups`` folder next to the database, keeping the newest
+``BACKUP_RETENTION`` scheduled backups.
+
+Typical usage:
+    from utils.backup_scheduler import get_backup_scheduler
+
+    scheduler = get_backup_scheduler(db)
+    scheduler.start()
+
+The schedule survives restarts: the next backup is due one interval after
+the newest existing scheduled backup, so restarting ComfyUI does not create
+a new backup each time. An interval of 0 disables scheduled backups; the
+interval is re-read on every cycle, so config changes apply without a
+restart.
+"""
+
+from typing import Optional
+
+from .background_worker import PeriodicWorker, shared_worker
+
+# Delay before the first check after startup, so backups never slow launch
+STARTUP_DELAY = 60.0
+
+AUTO_BACKUP_KIND = "auto"
+
+
+def _backup_interval_hours() -> float:
+    """Read AUTO_BACKUP_INTERVAL from config (hours, 0 = disabled)."""
+    try:
+        from ..py.config import PromptManagerConfig
+
+        return float(PromptManagerConfig.AUTO_BACKUP_INTERVAL)
+    except Exception:
+        return 24.0
+
+
+class BackupScheduler(PeriodicWorker):
+    """Background thread that writes rotating scheduled database backups."""
+
+    thread_name = "PromptManagerBackups"
+    description = "Backup scheduler"
+    task_name = "Scheduled backup"
+
+    def __init__(self, db_manager, startup_delay: float = STARTUP_DELAY):
+        """Initialize the scheduler.
+
+        Args:
+            db_manager: PromptDatabase whose database is backed up
+            startup_delay: Seconds to wait after start() before the first check
+        """
+        super().__init__(db_manager, "prompt_manager.backup_scheduler", startup_delay)
+
+    def interval_hours(self) -> float:
+        return _backup_interval_hours()
+
+    def last_run_time(self) -> Optional[float]:
+        return self.db_manager.latest_backup_time(AUTO_BACKUP_KIND)
+
+    def task(self) -> str:
+        """Write a scheduled backup; returns the path of the new file."""
+        return self.db_manager.create_backup(AUTO_BACKUP_KIND)
+
+
+def get_backup_scheduler(db_manager) -> BackupScheduler:
+    """Get or create the singleton BackupScheduler instance.
+
+    Args:
+        db_manager: PromptDatabase instance (only used on first call)
+
+    Returns:
+        The shared BackupScheduler instance
+    """
+    return shared_worker(BackupScheduler, db_manager)
@@ -0,0 +1,119 @@
+"""Background similarity vectors for PromptManager.
+
+Runs a single daemon thread that computes the term vectors behind
+``/prompt_manager/prompts/{id}/similar`` (``PromptDatabase.embed_prompts``)
+shortly after prompts are saved or edited, so saving never waits for them.
+
+Typical usage:
+    from utils.embedding_worker import get_embedding_worker
+
+    worker = get_embedding_worker(db)
+    worker.start()
+
+On start the worker computes the vectors of every prompt that has none
+(existing libraries, prompts imported by other tools) and then loads the
+similarity index, so the first lookup does not have to. Saves are collected
+for BATCH_DELAY seconds and embedded together. Nothing runs while
+``PromptManagerConfig.ENABLE_SIMILARITY_SEARCH`` is off.
+"""
+
+import threading
+import time
+from typing import FrozenSet, Optional, Set
+
+from .background_worker import BackgroundWorker, shared_worker
+
+# Seconds to collect further changes before embedding, so a batch of saves
+# is embedded in one transaction
+BATCH_DELAY = 0.5
+
+
+class EmbeddingWorker(BackgroundWorker):
+    """Background thread that keeps prompt similarity vectors up to date."""
+
+    thread_name = "PromptManagerEmbedding"
+    description = "Embedding worker"
+
+    def __init__(self, db_manager, batch_delay: float = BATCH_DELAY):
+        """Initialize the worker.
+
+        Args:
+            db_manager: PromptDatabase whose prompts are embedded
+            batch_delay: Seconds to wait for further changes before embedding
+        """
+        super().__init__(db_manager, "prompt_manager.embedding_worker")
+        self.batch_delay = batch_delay
+        self._lock = threading.Lock()
+        self._pending: Set[int] = set()
+        self._backfill = True
+        self._wake = threading.Event()
+        db_manager.model.add_change_listener(self._on_change)
+
+    def _on_change(self, generation: int, prompt_ids: Optional[FrozenSet[int]]):
+        """Change listener: queue changed prompts (None: look for any missing)."""
+        if prompt_ids is not None and not prompt_ids:
+            return
+        with self._lock:
+            if prompt_ids is None:
+                self._backfill = True
+            else:
+                self._pending.update(prompt_ids)
+        self._wake.set()
+
+    def _wake_up(self) -> None:
+        self._wake.set()
+
+    def run_once(self) -> int:
+        """Embed the queued prompts and refresh the similarity index.
+
+        Returns:
+            Number of prompts embedded
+        """
+        if not self.db_manager.similarity_search_enabled():
+            return 0
+        with self._lock:
+            pending, backfill = self._pending, self._backfill
+            self._pending, self._backfill = set(), False
+        try:
+            from ..database.similarity import get_vector_index
+        except ImportError:
+            from database.similarity import get_vector_index
+
+        try:
+            start = time.perf_counter()
+            embedded = self.db_manager.embed_prompts(sorted(pending))
+            if backfill:
+                embedded += self.db_manager.embed_prompts()
+            get_vector_index(self.db_manager).refresh()
+            if embedded:
+                self.logger.debug(
+                    f"Embedded {embedded} prompts in "
+                    f"{time.perf_counter() - start:.2f}s"
+                )
+            return embedded
+        except Exception as e:
+            # Missing vectors are found by the next backfill
+            with self._lock:
+                self._backfill = True
+            self.logger.error(f"Computing similarity vectors failed: {e}")
+            return 0
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self._wake.wait()
+            if self._stop.wait(self.batch_delay):
+                return
+            self._wake.clear()
+            self.run_once()
+
+
+def get_embedding_worker(db_manager) -> EmbeddingWorker:
+    """Get or create the singleton EmbeddingWorker instance.
+
+    Args:
+        db_manager: PromptDatabase instance (only used on first call)
+
+    Returns:
+        The shared EmbeddingWorker instance
+    """
+    return shared_worker(EmbeddingWorker, db_manager)
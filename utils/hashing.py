@@ -10,6 +10,8 @@ Key features:
 - Content hashing for complex prompt metadata structures
 - Duplicate detection utilities
 - Consistent normalization (lowercase, trimmed whitespace)
+- Near-duplicate detection: word shingles, Jaccard similarity and MinHash
+  signatures split into LSH bands
 
 Typical usage:
     from utils.hashing import generate_prompt_hash, is_duplicate_prompt
@@ -26,9 +28,46 @@ The hashing is designed for:
 - Quick similarity checking
 - Content integrity verification
 - Efficient database indexing
+
+MinHash signatures let the database find prompts that differ by a token or a
+weight without comparing every pair: prompts whose signatures agree on every
+value of at least one band are candidates, and only candidates are compared
+exactly with :func:`shingle_similarity`.
+
+Term vectors (:func:`term_vector`) feed "similar prompts": words and word
+pairs hashed into VECTOR_DIMENSIONS buckets, which the similarity index
+weighs by rarity and compares by cosine.
 """
 
 import hashlib
+import math
+import re
+import struct
+import zlib
+from collections import Counter
+from typing import Dict, List, Set, Tuple
+
+# Words, keeping decimal weights such as "1.2" together
+_SHINGLE_TOKEN_RE = re.compile(r"\w+(?:\.\w+)*", re.UNICODE)
+
+# Consecutive words per shingle
+SHINGLE_SIZE = 2
+
+# MinHash signature length, split into LSH_BANDS bands of equal size.
+# With 16 bands of 4 values, prompts with 0.6 Jaccard similarity share a
+# band about 9 times in 10 and those above 0.7 almost always, while pairs
+# below 0.2 rarely become candidates.
+MINHASH_PERMUTATIONS = 64
+LSH_BANDS = 16
+LSH_BAND_BYTES = MINHASH_PERMUTATIONS // LSH_BANDS * 4
+
+# One SHAKE-128 digest per shingle yields all of its MinHash values at once
+_SIGNATURE_STRUCT = struct.Struct(f">{MINHASH_PERMUTATIONS}I")
+
+# Buckets term vector features are hashed into. Distinct words and word
+# pairs of a large library outnumber them, but the few that collide rarely
+# occur in the same prompts, and the bound keeps the in-memory index small.
+VECTOR_DIMENSIONS = 1 << 18
 
 
 def generate_prompt_hash(text: str) -> str:
@@ -113,29 +152,151 @@ def generate_content_hash(content: dict) -> str:
     return hashlib.sha256(content_str.encode("utf-8")).hexdigest()
 
 
+def prompt_shingles(text: str, size: int = SHINGLE_SIZE) -> Set[str]:
+    """
+    Split prompt text into overlapping word shingles.
+
+    Text is lowercased and reduced to words, so punctuation and spacing do
+    not matter. Texts shorter than ``size`` words give a single shingle.
+
+    Args:
+        text: The prompt text
+        size: Number of consecutive words per shingle
+
+    Returns:
+        Set of shingles (empty for text without words)
+    """
+    tokens = _SHINGLE_TOKEN_RE.findall(text.lower())
+    if len(tokens) <= size:
+        return {" ".join(tokens)} if tokens else set()
+    return {" ".join(tokens[i : i + size]) for i in range(len(tokens) - size + 1)}
+
+
+def shingle_similarity(text1: str, text2: str) -> float:
+    """
+    Jaccard similarity of the word shingles of two prompt texts.
+
+    Returns:
+        Similarity between 0.0 (nothing shared) and 1.0 (same shingles)
+    """
+    return jaccard_similarity(prompt_shingles(text1), prompt_shingles(text2))
+
+
+def jaccard_similarity(a: Set[str], b: Set[str]) -> float:
+    """Jaccard similarity of two sets (1.0 when both are empty)."""
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+
+def minhash_signature(text: str) -> List[int]:
+    """
+    Compute the MinHash signature of a prompt's word shingles.
+
+    Each shingle is hashed once with SHAKE-128 into ``MINHASH_PERMUTATIONS``
+    independent 32-bit values; position ``i`` of the signature is the
+    minimum of the ``i``-th values over all shingles. The fraction of equal
+    positions in two signatures estimates the Jaccard similarity of the
+    underlying shingle sets.
+
+    Args:
+        text: The prompt text
+
+    Returns:
+        ``MINHASH_PERMUTATIONS`` 32-bit values, or an empty list for text
+        without words
+    """
+    digests = [
+        _SIGNATURE_STRUCT.unpack(
+            hashlib.shake_128(shingle.encode("utf-8")).digest(_SIGNATURE_STRUCT.size)
+        )
+        for shingle in prompt_shingles(text)
+    ]
+    return list(map(min, zip(*digests)))
+
+
+def pack_signature(signature: List[int]) -> bytes:
+    """
+    Pack a MinHash signature into bytes for storage.
+
+    Values are big-endian, so band ``i`` is the byte slice
+    ``[i * LSH_BAND_BYTES, (i + 1) * LSH_BAND_BYTES)`` and two prompts share
+    an LSH bucket exactly when those slices are equal.
+    """
+    return struct.pack(f">{len(signature)}I", *signature)
+
+
+def term_vector(text: str) -> Dict[int, float]:
+    """
+    Hashed term-frequency vector of a prompt (the "hashing trick").
+
+    Features are the prompt's lowercased words and pairs of consecutive
+    words; numbers such as seeds and weights are left out. Each feature is
+    hashed into one of VECTOR_DIMENSIONS buckets with CRC-32 and weighted
+    ``1 + log(count)``.
+
+    Args:
+        text: Prompt text
+
+    Returns:
+        Mapping of bucket to weight, empty for text without words
+    """
+    words = [
+        word
+        for word in _SHINGLE_TOKEN_RE.findall(text.lower())
+        if not word.replace(".", "").isdigit()
+    ]
+    features = words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+    counts = Counter(
+        zlib.crc32(feature.encode("utf-8")) & (VECTOR_DIMENSIONS - 1)
+        for feature in features
+    )
+    return {bucket: 1.0 + math.log(count) for bucket, count in counts.items()}
+
+
+def pack_term_vector(vector: Dict[int, float]) -> Tuple[bytes, bytes]:
+    """
+    Pack a term vector for storage.
+
+    Returns:
+        (buckets, weights): little-endian uint32 buckets in ascending order
+        and the matching float32 weights
+    """
+    buckets = sorted(vector)
+    return (
+        struct.pack(f"<{len(buckets)}I", *buckets),
+        struct.pack(f"<{len(buckets)}f", *(vector[b] for b in buckets)),
+    )
+
+
+def unpack_term_vector(buckets: bytes, weights: bytes) -> Dict[int, float]:
+    """Inverse of :func:`pack_term_vector`."""
+    size = len(buckets) // 4
+    return dict(
+        zip(struct.unpack(f"<{size}I", buckets), struct.unpack(f"<{size}f", weights))
+    )
+
+
 def is_duplicate_prompt(text1: str, text2: str, threshold: float = 0.95) -> bool:
     """
-    Check if two prompts are likely duplicates using hash comparison.
+    Check if two prompts are likely duplicates.
 
-    Compares the normalized hashes of two prompt texts to determine if
-    they are functionally identical. This is an exact match after normalization,
-    not a similarity measure.
+    Prompts with identical normalized hashes are always duplicates. Otherwise
+    they are duplicates when the Jaccard similarity of their word shingles
+    reaches ``threshold``, which catches prompts that differ by a token or a
+    weight.
 
     Args:
         text1: First prompt text to compare
         text2: Second prompt text to compare
-        threshold: Similarity threshold (not used - kept for API compatibility)
+        threshold: Minimum shingle similarity (0.0-1.0); 1.0 or more only
+            accepts exact matches after normalization
 
     Returns:
-        True if the prompts have identical normalized hashes (i.e., are duplicates),
-        False otherwise
-
-    Note:
-        The threshold parameter is not used in the current implementation as
-        this performs exact hash matching rather than similarity scoring.
-        It's maintained for potential future fuzzy matching capabilities.
+        True if the prompts are duplicates, False otherwise
     """
-    hash1 = generate_prompt_hash(text1)
-    hash2 = generate_prompt_hash(text2)
-
-    return hash1 == hash2
+    if generate_prompt_hash(text1) == generate_prompt_hash(text2):
+        return True
+    if threshold >= 1.0:
+        return False
+    return shingle_similarity(text1, text2) >= threshold
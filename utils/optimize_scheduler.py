@@ -0,0 +1,78 @@
+"""Periodic query planner maintenance for PromptManager.
+
+Runs a single daemon thread that calls ``PromptModel.optimize_database``
+every ``PromptManagerConfig.OPTIMIZE_INTERVAL`` hours, so SQLite's
+statistics follow the data as prompts, tags and images accumulate.
+
+Typical usage:
+    from utils.optimize_scheduler import get_optimize_scheduler
+
+    scheduler = get_optimize_scheduler(db)
+    scheduler.start()
+
+The first run happens shortly after startup and runs a full (sampled)
+ANALYZE if the database has never been analyzed; later runs use
+``PRAGMA optimize``, which only re-analyzes tables that changed enough to
+matter. An interval of 0 disables the schedule; the interval is re-read on
+every cycle, so config changes apply without a restart.
+"""
+
+import time
+from typing import Optional
+
+from .background_worker import PeriodicWorker, shared_worker
+
+# Delay before the first run after startup, so it never slows launch
+STARTUP_DELAY = 300.0
+
+
+def _optimize_interval_hours() -> float:
+    """Read OPTIMIZE_INTERVAL from config (hours, 0 = disabled)."""
+    try:
+        from ..py.config import PromptManagerConfig
+
+        return float(PromptManagerConfig.OPTIMIZE_INTERVAL)
+    except Exception:
+        return 24.0
+
+
+class OptimizeScheduler(PeriodicWorker):
+    """Background thread that periodically refreshes planner statistics."""
+
+    thread_name = "PromptManagerOptimize"
+    description = "Optimize scheduler"
+    task_name = "Scheduled optimize"
+
+    def __init__(self, db_manager, startup_delay: float = STARTUP_DELAY):
+        """Initialize the scheduler.
+
+        Args:
+            db_manager: PromptDatabase whose database is optimized
+            startup_delay: Seconds to wait after start() before the first run
+        """
+        super().__init__(db_manager, "prompt_manager.optimize_scheduler", startup_delay)
+
+    def interval_hours(self) -> float:
+        return _optimize_interval_hours()
+
+    def last_run_time(self) -> Optional[float]:
+        return self.db_manager.model.last_optimized
+
+    def task(self) -> bool:
+        """Optimize the database; returns True once done."""
+        start = time.perf_counter()
+        self.db_manager.model.optimize_database()
+        self.logger.debug(f"Database optimized in {time.perf_counter() - start:.2f}s")
+        return True
+
+
+def get_optimize_scheduler(db_manager) -> OptimizeScheduler:
+    """Get or create the singleton OptimizeScheduler instance.
+
+    Args:
+        db_manager: PromptDatabase instance (only used on first call)
+
+    Returns:
+        The shared OptimizeScheduler instance
+    """
+    return shared_worker(OptimizeScheduler, db_manager)
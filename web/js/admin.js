@@ -1355,7 +1355,7 @@
                 document.getElementById("galleryEmpty").classList.add("hidden");
                 
                 try {
-                    const response = await fetch(`/prompt_manager/prompts/${promptId}/images`);
+                    const response = await fetch(`/prompt_manager/prompts/${promptId}/images?include_metadata=false`);
                     if (response.ok) {
                         const data = await response.json();
                         if (data.success) {
@@ -3831,7 +3831,7 @@ Seed: ${this.currentMetadata.seed || 'Unknown'}`;
 
             async loadFilmStripImages(promptId) {
                 try {
-                    const response = await fetch(`/prompt_manager/prompts/${promptId}/images`);
+                    const response = await fetch(`/prompt_manager/prompts/${promptId}/images?include_metadata=false`);
                     if (response.ok) {
                         const data = await response.json();
                         if (data.success && data.images) {
@@ -4210,7 +4210,7 @@ Seed: ${this.currentMetadata.seed || 'Unknown'}`;
 
                 // Get ALL images with linked prompts from the database
                 try {
-                    const scanResponse = await fetch('/prompt_manager/images/all');
+                    const scanResponse = await fetch('/prompt_manager/images/all?include_metadata=false');
                     const scanData = await scanResponse.json();
 
                     if (!scanData.success || !scanData.images || scanData.images.length === 0) {
@@ -925,7 +925,7 @@ class TagsPageManager {
         // If there might be more images, load them all
         if (prompt.image_count > images.length) {
             try {
-                const data = await this.fetchJson(`/prompt_manager/prompts/${prompt.id}/images`);
+                const data = await this.fetchJson(`/prompt_manager/prompts/${prompt.id}/images?include_metadata=false`);
                 if (data.success && data.images) {
                     images = data.images;
                 }